@@ -23,483 +23,9 @@ st.set_page_config(
 )
 
 # ==================== PROFESSIONAL CSS ====================
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Outfit:wght@300;400;500;600;700;800&family=Inter:wght@300;400;500;600&display=swap');
-    
-    :root {
-        --primary: #0F172A;
-        --accent: #6366F1;
-        --accent-hover: #4F46E5;
-        --success: #10B981;
-        --warning: #F59E0B;
-        --error: #EF4444;
-        --bg-primary: #FFFFFF;
-        --bg-secondary: #F8FAFC;
-        --bg-tertiary: #F1F5F9;
-        --text-primary: #0F172A;
-        --text-secondary: #64748B;
-        --text-muted: #94A3B8;
-        --border: #E2E8F0;
-        --shadow-sm: 0 1px 2px 0 rgb(0 0 0 / 0.05);
-        --shadow-md: 0 4px 6px -1px rgb(0 0 0 / 0.1);
-        --shadow-lg: 0 10px 15px -3px rgb(0 0 0 / 0.1);
-        --shadow-xl: 0 20px 25px -5px rgb(0 0 0 / 0.1);
-        --radius-sm: 0.375rem;
-        --radius-md: 0.5rem;
-        --radius-lg: 0.75rem;
-        --radius-xl: 1rem;
-        --radius-2xl: 1.5rem;
-    }
-    
-    * { margin: 0; padding: 0; box-sizing: border-box; }
-    
-    html, body, [data-testid="stAppViewContainer"] {
-        font-family: 'Inter', -apple-system, BlinkMacSystemFont, sans-serif;
-        color: var(--text-primary);
-        background: var(--bg-secondary) !important;
-        -webkit-font-smoothing: antialiased;
-    }
-    
-    #MainMenu, footer, header { visibility: hidden; }
-    .stDeployButton { display: none; }
-    
-    .main .block-container {
-        max-width: 1400px !important;
-        padding: 1rem 2rem 4rem !important;
-    }
-    
-    /* Premium Header */
-    .premium-header {
-        background: linear-gradient(135deg, var(--primary) 0%, #1E293B 100%);
-        padding: 1rem 2rem;
-        border-radius: var(--radius-2xl);
-        margin-bottom: 2rem;
-        box-shadow: var(--shadow-lg);
-    }
-    
-    .header-inner {
-        display: flex;
-        align-items: center;
-        justify-content: space-between;
-        max-width: 1400px;
-        margin: 0 auto;
-    }
-    
-    .logo {
-        font-family: 'Outfit', sans-serif;
-        font-size: 2rem;
-        font-weight: 800;
-        background: linear-gradient(135deg, #fff 0%, #A5B4FC 100%);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        display: flex;
-        align-items: center;
-        gap: 0.5rem;
-    }
-    
-    .nav-links {
-        display: flex;
-        gap: 1.5rem;
-    }
-    
-    .nav-link {
-        color: rgba(255,255,255,0.8);
-        text-decoration: none;
-        font-weight: 500;
-        padding: 0.5rem 1rem;
-        border-radius: var(--radius-md);
-        transition: all 0.2s;
-    }
-    
-    .nav-link:hover {
-        background: rgba(255,255,255,0.1);
-        color: white;
-    }
-    
-    /* Hero Section */
-    .hero {
-        background: linear-gradient(135deg, #6366F1 0%, #8B5CF6 50%, #A855F7 100%);
-        border-radius: var(--radius-2xl);
-        padding: 4rem 3rem;
-        text-align: center;
-        margin-bottom: 3rem;
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .hero::before {
-        content: '';
-        position: absolute;
-        top: -50%;
-        left: -50%;
-        width: 200%;
-        height: 200%;
-        background: radial-gradient(circle, rgba(255,255,255,0.1) 0%, transparent 60%);
-        animation: pulse 4s ease-in-out infinite;
-    }
-    
-    @keyframes pulse {
-        0%, 100% { transform: scale(1); opacity: 0.5; }
-        50% { transform: scale(1.1); opacity: 0.8; }
-    }
-    
-    .hero-content {
-        position: relative;
-        z-index: 1;
-    }
-    
-    .hero h1 {
-        font-family: 'Outfit', sans-serif;
-        font-size: 3.5rem;
-        font-weight: 800;
-        color: white;
-        margin-bottom: 1rem;
-        text-shadow: 0 4px 20px rgba(0,0,0,0.2);
-    }
-    
-    .hero p {
-        font-size: 1.25rem;
-        color: rgba(255,255,255,0.9);
-        margin-bottom: 2rem;
-    }
-    
-    .hero-btn {
-        display: inline-block;
-        background: white;
-        color: var(--accent);
-        padding: 1rem 2.5rem;
-        border-radius: var(--radius-xl);
-        font-weight: 700;
-        font-size: 1.125rem;
-        text-decoration: none;
-        box-shadow: var(--shadow-xl);
-        transition: all 0.3s;
-        cursor: pointer;
-    }
-    
-    .hero-btn:hover {
-        transform: translateY(-3px);
-        box-shadow: 0 25px 50px -12px rgba(0,0,0,0.25);
-    }
-    
-    /* Section Title */
-    .section-title {
-        font-family: 'Outfit', sans-serif;
-        font-size: 2rem;
-        font-weight: 700;
-        color: var(--text-primary);
-        margin: 2rem 0 1.5rem;
-        display: flex;
-        align-items: center;
-        gap: 0.75rem;
-    }
-    
-    /* Product Cards */
-    .product-card {
-        background: white;
-        border-radius: var(--radius-xl);
-        overflow: hidden;
-        border: 1px solid var(--border);
-        transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1);
-        height: 100%;
-    }
-    
-    .product-card:hover {
-        transform: translateY(-8px);
-        box-shadow: var(--shadow-xl);
-        border-color: var(--accent);
-    }
-    
-    .product-img-container {
-        position: relative;
-        width: 100%;
-        padding-top: 100%;
-        background: linear-gradient(135deg, var(--bg-secondary) 0%, var(--bg-tertiary) 100%);
-        overflow: hidden;
-    }
-    
-    .product-img-container img {
-        position: absolute;
-        top: 0;
-        left: 0;
-        width: 100%;
-        height: 100%;
-        object-fit: cover;
-        transition: transform 0.5s;
-    }
-    
-    .product-card:hover .product-img-container img {
-        transform: scale(1.1);
-    }
-    
-    .product-badge {
-        position: absolute;
-        top: 1rem;
-        right: 1rem;
-        background: var(--accent);
-        color: white;
-        padding: 0.375rem 0.75rem;
-        border-radius: var(--radius-md);
-        font-size: 0.75rem;
-        font-weight: 700;
-        text-transform: uppercase;
-        letter-spacing: 0.5px;
-    }
-    
-    .product-badge.sale { background: var(--error); }
-    .product-badge.new { background: var(--success); }
-    
-    .product-info {
-        padding: 1.5rem;
-    }
-    
-    .product-category {
-        color: var(--text-muted);
-        font-size: 0.75rem;
-        font-weight: 600;
-        text-transform: uppercase;
-        letter-spacing: 1px;
-        margin-bottom: 0.5rem;
-    }
-    
-    .product-name {
-        font-family: 'Outfit', sans-serif;
-        font-size: 1.125rem;
-        font-weight: 600;
-        color: var(--text-primary);
-        margin-bottom: 0.75rem;
-        line-height: 1.4;
-        display: -webkit-box;
-        -webkit-line-clamp: 2;
-        -webkit-box-orient: vertical;
-        overflow: hidden;
-    }
-    
-    .product-rating {
-        display: flex;
-        align-items: center;
-        gap: 0.5rem;
-        margin-bottom: 1rem;
-        font-size: 0.875rem;
-    }
-    
-    .stars { color: #FBBF24; }
-    
-    .product-price {
-        font-family: 'Outfit', sans-serif;
-        font-size: 1.5rem;
-        font-weight: 700;
-        color: var(--accent);
-    }
-    
-    .product-old-price {
-        font-size: 0.875rem;
-        color: var(--text-muted);
-        text-decoration: line-through;
-        margin-left: 0.5rem;
-    }
-    
-    /* Buttons */
-    .stButton > button {
-        font-weight: 600;
-        border-radius: var(--radius-lg) !important;
-        transition: all 0.2s !important;
-        border: none !important;
-        padding: 0.75rem 1.5rem !important;
-    }
-    
-    .stButton > button[kind="primary"] {
-        background: linear-gradient(135deg, var(--accent) 0%, var(--accent-hover) 100%) !important;
-        color: white !important;
-        box-shadow: var(--shadow-md) !important;
-    }
-    
-    .stButton > button[kind="primary"]:hover {
-        transform: translateY(-2px) !important;
-        box-shadow: var(--shadow-lg) !important;
-    }
-    
-    .stButton > button[kind="secondary"] {
-        background: white !important;
-        color: var(--text-primary) !important;
-        border: 2px solid var(--border) !important;
-    }
-    
-    .stButton > button[kind="secondary"]:hover {
-        border-color: var(--accent) !important;
-        color: var(--accent) !important;
-    }
-    
-    .stButton > button > div > p {
-        background: transparent !important;
-        color: inherit !important;
-    }
-    
-    /* Inputs */
-    .stTextInput > div > div > input,
-    .stNumberInput > div > div > input,
-    .stSelectbox > div > div {
-        border: 2px solid var(--border) !important;
-        border-radius: var(--radius-lg) !important;
-        padding: 0.75rem 1rem !important;
-        transition: all 0.2s !important;
-    }
-    
-    .stTextInput > div > div > input:focus,
-    .stNumberInput > div > div > input:focus {
-        border-color: var(--accent) !important;
-        box-shadow: 0 0 0 4px rgba(99, 102, 241, 0.1) !important;
-    }
-    
-    /* Tabs */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 0.5rem;
-        background: var(--bg-tertiary);
-        padding: 0.5rem;
-        border-radius: var(--radius-xl);
-    }
-    
-    .stTabs [data-baseweb="tab"] {
-        border-radius: var(--radius-lg);
-        padding: 0.75rem 1.5rem;
-        font-weight: 600;
-    }
-    
-    .stTabs [aria-selected="true"] {
-        background: white !important;
-        box-shadow: var(--shadow-sm);
-    }
-    
-    /* Cards Container */
-    .card {
-        background: white;
-        border-radius: var(--radius-xl);
-        padding: 2rem;
-        border: 1px solid var(--border);
-        box-shadow: var(--shadow-sm);
-    }
-    
-    /* Cart Item */
-    .cart-item {
-        display: flex;
-        align-items: center;
-        gap: 1.5rem;
-        padding: 1.5rem;
-        background: var(--bg-secondary);
-        border-radius: var(--radius-lg);
-        margin-bottom: 1rem;
-        transition: all 0.2s;
-    }
-    
-    .cart-item:hover {
-        background: white;
-        box-shadow: var(--shadow-md);
-    }
-    
-    /* Footer */
-    .footer {
-        background: var(--primary);
-        color: white;
-        padding: 3rem 2rem 2rem;
-        margin-top: 4rem;
-        border-radius: var(--radius-2xl) var(--radius-2xl) 0 0;
-    }
-    
-    .footer-grid {
-        display: grid;
-        grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-        gap: 2rem;
-        max-width: 1400px;
-        margin: 0 auto 2rem;
-    }
-    
-    .footer-col h4 {
-        font-family: 'Outfit', sans-serif;
-        font-size: 1.125rem;
-        font-weight: 700;
-        margin-bottom: 1rem;
-        color: white;
-    }
-    
-    .footer-col a {
-        display: block;
-        color: rgba(255,255,255,0.7);
-        text-decoration: none;
-        margin-bottom: 0.5rem;
-        transition: color 0.2s;
-    }
-    
-    .footer-col a:hover { color: white; }
-    
-    .footer-bottom {
-        text-align: center;
-        padding-top: 2rem;
-        border-top: 1px solid rgba(255,255,255,0.1);
-        color: rgba(255,255,255,0.6);
-        font-size: 0.875rem;
-    }
-    
-    /* Feature Cards */
-    .feature-card {
-        background: white;
-        border-radius: var(--radius-xl);
-        padding: 2rem;
-        text-align: center;
-        border: 1px solid var(--border);
-        transition: all 0.3s;
-    }
-    
-    .feature-card:hover {
-        transform: translateY(-5px);
-        box-shadow: var(--shadow-lg);
-        border-color: var(--accent);
-    }
-    
-    .feature-icon {
-        font-size: 3rem;
-        margin-bottom: 1rem;
-    }
-    
-    .feature-title {
-        font-family: 'Outfit', sans-serif;
-        font-size: 1.25rem;
-        font-weight: 700;
-        color: var(--text-primary);
-        margin-bottom: 0.5rem;
-    }
-    
-    .feature-desc {
-        color: var(--text-secondary);
-        font-size: 0.9375rem;
-    }
-    
-    /* Responsive */
-    @media (max-width: 768px) {
-        .hero h1 { font-size: 2.5rem; }
-        .hero { padding: 3rem 1.5rem; }
-        .premium-header { padding: 1rem; }
-        .logo { font-size: 1.5rem; }
-    }
-    
-    /* Animations */
-    @keyframes fadeInUp {
-        from { opacity: 0; transform: translateY(20px); }
-        to { opacity: 1; transform: translateY(0); }
-    }
-    
-    .fade-in { animation: fadeInUp 0.5s ease-out; }
-    
-    /* Scrollbar */
-    ::-webkit-scrollbar { width: 10px; }
-    ::-webkit-scrollbar-track { background: var(--bg-secondary); }
-    ::-webkit-scrollbar-thumb { 
-        background: var(--text-muted); 
-        border-radius: 5px; 
-    }
-    ::-webkit-scrollbar-thumb:hover { background: var(--text-secondary); }
-</style>
-""", unsafe_allow_html=True)
+# Global stylesheet lives in static/css/app.css (linked, cached by the browser)
+from utils.static_assets import inject_global_styles
+inject_global_styles()
 
 # ==================== SESSION STATE ====================
 def init_session():
@@ -507,8 +33,6 @@ def init_session():
         'page': 'home',
         'lang': 'ES',
         'user': None,
-        'cart': [],
-        'cart_count': 0,
         'search_query': '',
         'selected_category': None,
         'selected_product': None
@@ -616,6 +140,25 @@ def navigate_to(page):
     st.session_state.page = page
     st.rerun()
 
+def logout():
+    """Persist pending cart changes, stop refreshing the user's tokens, then sign out"""
+    from services.cart_store import close_cart_store
+    close_cart_store()
+    user = st.session_state.user or {}
+    if user.get('refreshToken'):
+        from services.auth_service import AuthService
+        AuthService.sign_out(user.get('uid'))
+    st.session_state.user = None
+
+def set_session_user(auth_user):
+    """Store an AuthService user (with the tokens logout needs) as the session user"""
+    st.session_state.user = {**auth_user, 'name': auth_user.get('display_name') or auth_user['email'].split('@')[0].title()}
+
+def set_demo_user(email, name):
+    """Demo sign-in when Firebase Auth is not configured (the cart stays in memory)"""
+    from services.cart_store import DEMO_USER_ID
+    st.session_state.user = {'uid': DEMO_USER_ID, 'email': email, 'name': name}
+
 # ==================== HEADER ====================
 def render_header():
     st.markdown("""
@@ -658,7 +201,8 @@ def render_header():
                 navigate_to('auth')
     
     with col5:
-        cart_label = f"🛒 ({len(st.session_state.cart)})" if st.session_state.cart else "🛒"
+        cart = get_cart_store()
+        cart_label = f"🛒 ({len(cart)})" if cart else "🛒"
         if st.button(cart_label, use_container_width=True):
             navigate_to('cart')
     
@@ -822,81 +366,152 @@ def get_products():
         pass
     return get_sample_products()
 
-def render_product_card(product, show_button=True):
-    """Render a product card"""
-    name = product.get('name', 'Product')
-    price = product.get('price', 0)
-    old_price = product.get('old_price')
-    image = product.get('image', 'https://placehold.co/400x400/E2E8F0/64748B?text=Product')
-    rating = product.get('rating', 0)
-    reviews = product.get('reviews_count', 0)
-    category = product.get('category', 'General')
-    badge = product.get('badge', '')
+# Sort labels shown in the UI -> FirebaseService.PRODUCT_SORTS keys
+SORT_KEYS = {
+    'Relevancia': 'relevance',
+    'Precio: Menor a Mayor': 'price_asc',
+    'Precio: Mayor a Menor': 'price_desc',
+    'Mejor Valorados': 'rating'
+}
+
+def get_sample_products_page(cursor=None, page_size=24, sort='relevance', category=None, search_query=None,
+                             min_price=None, max_price=None, in_stock=False, min_rating=None, below_price=None):
+    """Paginate sample products with the same page/cursor shape as Firebase"""
+    from services.pagination import encode_page_token, decode_page_token
+    from services.search_index import SearchIndex
+    
+    products = get_sample_products()
+    if search_query and search_query.strip():
+        products = SearchIndex(products).search(search_query)
+    if category:
+        products = [p for p in products if p.get('category') == category]
+    if min_price is not None:
+        products = [p for p in products if p.get('price', 0) >= min_price]
+    if max_price is not None:
+        products = [p for p in products if p.get('price', 0) <= max_price]
+    if below_price is not None:
+        products = [p for p in products if p.get('price', 0) < below_price]
+    if in_stock:
+        products = [p for p in products if p.get('stock', 0) > 0]
+    if min_rating is not None:
+        products = [p for p in products if p.get('rating', 0) >= min_rating]
+    
+    if sort == 'price_asc':
+        products.sort(key=lambda x: x.get('price', 0))
+    elif sort == 'price_desc':
+        products.sort(key=lambda x: x.get('price', 0), reverse=True)
+    elif sort == 'rating':
+        products.sort(key=lambda x: x.get('rating', 0), reverse=True)
     
-    badge_html = f'<div class="product-badge {badge}">{badge.upper()}</div>' if badge else ''
-    old_price_html = f'<span class="product-old-price">${old_price:.2f}</span>' if old_price else ''
+    offset = (decode_page_token(cursor) or {}).get('offset', 0)
+    next_cursor = None
+    if offset + page_size < len(products):
+        next_cursor = encode_page_token({'offset': offset + page_size})
     
-    st.markdown(f"""
-        <div class="product-card fade-in">
-            <div class="product-img-container">
-                <img src="{image}" alt="{name}" />
-                {badge_html}
-            </div>
-            <div class="product-info">
-                <div class="product-category">{category}</div>
-                <div class="product-name">{name}</div>
-                <div class="product-rating">
-                    <span class="stars">{'⭐' * int(rating)}</span>
-                    <span>({reviews} {T['reviews']})</span>
-                </div>
-                <div>
-                    <span class="product-price">${price:.2f}</span>
-                    {old_price_html}
-                </div>
-            </div>
-        </div>
-    """, unsafe_allow_html=True)
+    return {'products': products[offset:offset + page_size], 'next_cursor': next_cursor}
+
+def get_products_page(cursor=None, sort='relevance', category=None, search_query=None,
+                      min_price=None, max_price=None, in_stock=False, min_rating=None, below_price=None):
+    """Get one page of products from Firebase, fallback to paginated sample data"""
+    from config import Config
+    page_size = Config.PRODUCTS_PER_PAGE
     
-    if show_button:
-        if st.button(f"🛒 {T['add_to_cart']}", key=f"add_{product.get('id', name)}", use_container_width=True):
+    try:
+        from services.firebase_service import FirebaseService
+        firebase = FirebaseService()
+        page = firebase.get_products_page(cursor, page_size, sort, category, search_query,
+                                          min_price, max_price, in_stock, min_rating, below_price)
+        # An empty page only means "no catalog" when nothing exists at all
+        if page['products'] or cursor or firebase.get_products(limit=1):
+            return page
+    except:
+        pass
+    return get_sample_products_page(cursor, page_size, sort, category, search_query,
+                                    min_price, max_price, in_stock, min_rating, below_price)
+
+def warm_up_firebase():
+    """Initialize Firebase once per process and warm up the shared Firestore client"""
+    try:
+        from services.firebase_service import FirebaseService
+        FirebaseService()
+    except:
+        pass
+
+def get_catalog_facets(category=None):
+    """Get facet counts from Firebase, fallback to facets of the sample data"""
+    try:
+        from services.firebase_service import FirebaseService
+        facets = FirebaseService().get_catalog_facets(category)
+        if facets['categories']:
+            return facets
+    except:
+        pass
+    from services.catalog_snapshot import CatalogSnapshot
+    return CatalogSnapshot(get_sample_products()).facets(category)
+
+def price_bucket_label(bucket):
+    """Label of a price facet bucket with its product count"""
+    from utils.formatters import format_currency
+    if bucket['max'] is None:
+        return f"{format_currency(bucket['min'])}+ ({bucket['count']})"
+    return f"{format_currency(bucket['min'])} - {format_currency(bucket['max'])} ({bucket['count']})"
+
+def get_user_orders_page(user_id, cursor=None):
+    """Get one page of the user's orders from Firebase (empty when unavailable)"""
+    try:
+        from services.firebase_service import FirebaseService
+        firebase = FirebaseService()
+        return firebase.get_user_orders_page(user_id, cursor)
+    except:
+        return {'orders': [], 'next_cursor': None}
+
+def get_account_overview(user_id, cursor=None):
+    """Profile and one page of orders, read concurrently (empty when unavailable)"""
+    try:
+        from services.async_firebase_service import get_async_firebase
+        return get_async_firebase().get_account_overview(user_id, cursor)
+    except:
+        return {'profile': None, 'orders_page': get_user_orders_page(user_id, cursor)}
+
+def render_product_grid(products, key):
+    """Render products as one batched grid element and handle its add-to-cart clicks"""
+    from components.product_grid import render_batched_product_grid
+    
+    event = render_batched_product_grid(
+        products,
+        key=key,
+        labels={'add': f"🛒 {T['add_to_cart']}", 'reviews': T['reviews']},
+        show_details=False,
+        signed_in=True
+    )
+    if event and event['action'] == 'add':
+        product = next((p for p in products if p.get('id') == event['product_id']), None)
+        if product:
             add_to_cart(product)
-            st.success("✅ Agregado al carrito!")
+            st.toast("✅ Agregado al carrito!")
             st.rerun()
 
 # ==================== CART FUNCTIONS ====================
+def get_cart_store():
+    """Session cart (persisted for signed-in users)"""
+    from services.cart_store import get_cart_store as _get_cart_store
+    return _get_cart_store()
+
 def add_to_cart(product, quantity=1):
     """Add product to cart"""
-    cart = st.session_state.cart
-    
-    # Check if product already in cart
-    for item in cart:
-        if item['id'] == product.get('id'):
-            item['quantity'] += quantity
-            return
-    
-    # Add new item
-    cart.append({
-        'id': product.get('id'),
-        'name': product.get('name'),
-        'price': product.get('price'),
-        'image': product.get('image', ''),
-        'quantity': quantity
-    })
+    get_cart_store().add(product, quantity)
 
 def remove_from_cart(product_id):
     """Remove product from cart"""
-    st.session_state.cart = [item for item in st.session_state.cart if item['id'] != product_id]
+    get_cart_store().remove(product_id)
 
 def update_cart_quantity(product_id, quantity):
     """Update quantity in cart"""
-    for item in st.session_state.cart:
-        if item['id'] == product_id:
-            item['quantity'] = quantity
-            break
+    get_cart_store().set_quantity(product_id, quantity)
 
 def get_cart_total():
     """Calculate cart total"""
-    return sum(item['price'] * item['quantity'] for item in st.session_state.cart)
+    return get_cart_store().total
 
 # ==================== PAGES ====================
 def render_home_page():
@@ -908,14 +523,13 @@ def render_home_page():
     products = get_products()
     
     if products:
-        cols = st.columns(4)
-        for idx, product in enumerate(products[:8]):
-            with cols[idx % 4]:
-                render_product_card(product)
+        render_product_grid(products[:8], key='home_grid')
     else:
         st.info(T['no_products'])
 
 def render_products_page():
+    from components.product_list import get_page_cursor, reset_pagination, render_pagination_controls
+    
     st.markdown(f'<div class="section-title">🛍️ {T["products"]}</div>', unsafe_allow_html=True)
     
     # Filters
@@ -927,47 +541,72 @@ def render_products_page():
             st.session_state.search_query = search
     
     with col2:
-        categories = ['Todos', 'Electronics', 'Audio', 'Gaming', 'Wearables', 'Photography', 'Accessories']
-        selected_cat = st.selectbox(f"📁 {T['categories']}", categories)
+        # Categories and counts come from the precomputed catalog facets
+        category_counts = get_catalog_facets()['categories']
+        total = sum(category_counts.values())
+        selected_cat = st.selectbox(
+            f"📁 {T['categories']}", ['Todos'] + list(category_counts),
+            format_func=lambda c: f"Todos ({total})" if c == 'Todos' else f"{c} ({category_counts[c]})"
+        )
     
     with col3:
-        sort_options = ['Relevancia', 'Precio: Menor a Mayor', 'Precio: Mayor a Menor', 'Mejor Valorados']
+        sort_options = list(SORT_KEYS)
         sort_by = st.selectbox("📊 Ordenar por", sort_options)
     
-    st.markdown("---")
-    
-    # Get and filter products
-    products = get_products()
-    
-    # Apply category filter
-    if selected_cat != 'Todos':
-        products = [p for p in products if p.get('category') == selected_cat]
+    facets = get_catalog_facets(None if selected_cat == 'Todos' else selected_cat)
+    with st.expander("⚙️ Más filtros"):
+        fcol1, fcol2, fcol3 = st.columns([1, 1, 1])
+        with fcol1:
+            price_bucket = st.selectbox(
+                "💲 Precio", [None] + [b for b in facets['price'] if b['count']],
+                format_func=lambda b: "Todos los precios" if b is None else price_bucket_label(b),
+                key="prod_price_bucket"
+            )
+        with fcol2:
+            rating_bucket = st.selectbox(
+                "⭐ Valoración", [None] + [b for b in facets['rating'] if b['count']],
+                format_func=lambda b: "Todas" if b is None else f"{b['min']}+ ({b['count']})",
+                key="prod_rating_bucket"
+            )
+        with fcol3:
+            in_stock = st.checkbox("Solo con stock", key="prod_in_stock")
+    
+    min_price = price_bucket['min'] if price_bucket else None
+    below_price = price_bucket['max'] if price_bucket else None
+    min_rating = rating_bucket['min'] if rating_bucket else None
     
-    # Apply search filter
-    if search:
-        products = [p for p in products if search.lower() in p.get('name', '').lower()]
+    st.markdown("---")
     
-    # Apply sorting
-    if sort_by == 'Precio: Menor a Mayor':
-        products.sort(key=lambda x: x.get('price', 0))
-    elif sort_by == 'Precio: Mayor a Menor':
-        products.sort(key=lambda x: x.get('price', 0), reverse=True)
-    elif sort_by == 'Mejor Valorados':
-        products.sort(key=lambda x: x.get('rating', 0), reverse=True)
+    # Filters changed -> start again from the first page
+    filters = (search, selected_cat, sort_by, min_price, below_price, in_stock, min_rating)
+    if st.session_state.get('catalog_filters') != filters:
+        st.session_state.catalog_filters = filters
+        reset_pagination('catalog')
+    
+    # Read and render only the current page
+    page = get_products_page(
+        cursor=get_page_cursor('catalog'),
+        sort=SORT_KEYS.get(sort_by, 'relevance'),
+        category=None if selected_cat == 'Todos' else selected_cat,
+        search_query=search,
+        min_price=min_price,
+        in_stock=in_stock,
+        min_rating=min_rating,
+        below_price=below_price
+    )
+    products = page['products']
     
     if products:
         st.caption(f"Mostrando {len(products)} productos")
-        cols = st.columns(4)
-        for idx, product in enumerate(products):
-            with cols[idx % 4]:
-                render_product_card(product)
+        render_product_grid(products, key='catalog_grid')
+        render_pagination_controls(page['next_cursor'], 'catalog')
     else:
         st.warning(T['no_products'])
 
 def render_cart_page():
     st.markdown(f'<div class="section-title">🛒 {T["cart"]}</div>', unsafe_allow_html=True)
     
-    cart = st.session_state.cart
+    cart = get_cart_store()
     
     if not cart:
         st.markdown("""
@@ -989,31 +628,31 @@ def render_cart_page():
             c1, c2, c3, c4, c5 = st.columns([1, 3, 2, 1, 1])
             
             with c1:
-                st.image(item['image'] or 'https://placehold.co/100x100', width=80)
+                st.image(item.image or 'https://placehold.co/100x100', width=80)
             
             with c2:
-                st.markdown(f"**{item['name']}**")
-                st.caption(f"${item['price']:.2f}")
+                st.markdown(f"**{item.name}**")
+                st.caption(f"${item.price:.2f}")
             
             with c3:
                 new_qty = st.number_input(
                     T['quantity'],
                     min_value=1,
                     max_value=99,
-                    value=item['quantity'],
-                    key=f"qty_{item['id']}",
+                    value=item.quantity,
+                    key=f"qty_{item.product_id}",
                     label_visibility="collapsed"
                 )
-                if new_qty != item['quantity']:
-                    update_cart_quantity(item['id'], new_qty)
+                if new_qty != item.quantity:
+                    update_cart_quantity(item.product_id, new_qty)
                     st.rerun()
             
             with c4:
-                st.markdown(f"**${item['price'] * item['quantity']:.2f}**")
+                st.markdown(f"**${item.subtotal:.2f}**")
             
             with c5:
-                if st.button("🗑️", key=f"del_{item['id']}"):
-                    remove_from_cart(item['id'])
+                if st.button("🗑️", key=f"del_{item.product_id}"):
+                    remove_from_cart(item.product_id)
                     st.rerun()
             
             st.markdown("---")
@@ -1058,7 +697,7 @@ def render_auth_page():
                 navigate_to('cart')
         with col2:
             if st.button(f"🚪 {T['logout']}", use_container_width=True):
-                st.session_state.user = None
+                logout()
                 st.rerun()
         return
     
@@ -1071,22 +710,16 @@ def render_auth_page():
             
             if st.form_submit_button(T['login'], type="primary", use_container_width=True):
                 if email and password:
-                    # Try Firebase auth first
-                    try:
-                        from services.firebase_service import FirebaseService
-                        firebase = FirebaseService()
-                        user = firebase.sign_in(email, password)
+                    from config.settings import get_firebase_api_key
+                    if get_firebase_api_key():
+                        from services.auth_service import AuthService
+                        user = AuthService.sign_in(email, password)  # Shows its own errors
                         if user:
-                            st.session_state.user = user
+                            set_session_user(user)
                             st.success("✅ ¡Inicio de sesión exitoso!")
                             st.rerun()
-                    except:
-                        # Demo mode
-                        st.session_state.user = {
-                            'uid': 'demo123',
-                            'email': email,
-                            'name': email.split('@')[0].title()
-                        }
+                    else:
+                        set_demo_user(email, email.split('@')[0].title())
                         st.success("✅ ¡Inicio de sesión exitoso!")
                         st.rerun()
                 else:
@@ -1104,22 +737,16 @@ def render_auth_page():
                     if reg_password != confirm_password:
                         st.error("Las contraseñas no coinciden")
                     else:
-                        # Try Firebase registration
-                        try:
-                            from services.firebase_service import FirebaseService
-                            firebase = FirebaseService()
-                            user = firebase.create_user(reg_email, reg_password, name)
+                        from config.settings import get_firebase_api_key
+                        if get_firebase_api_key():
+                            from services.auth_service import AuthService
+                            user = AuthService.sign_up(reg_email, reg_password, name)  # Shows its own errors
                             if user:
-                                st.session_state.user = user
+                                set_session_user(user)
                                 st.success("✅ ¡Cuenta creada exitosamente!")
                                 st.rerun()
-                        except:
-                            # Demo mode
-                            st.session_state.user = {
-                                'uid': 'demo123',
-                                'email': reg_email,
-                                'name': name
-                            }
+                        else:
+                            set_demo_user(reg_email, name)
                             st.success("✅ ¡Cuenta creada exitosamente!")
                             st.rerun()
                 else:
@@ -1192,7 +819,8 @@ def render_checkout_page():
             navigate_to('auth')
         return
     
-    if not st.session_state.cart:
+    cart = get_cart_store()
+    if not cart:
         st.info("Tu carrito está vacío")
         if st.button("Ir a Productos"):
             navigate_to('products')
@@ -1234,15 +862,16 @@ def render_checkout_page():
             if st.form_submit_button("🛒 Completar Compra", type="primary", use_container_width=True):
                 st.success("✅ ¡Pedido realizado exitosamente!")
                 st.balloons()
-                st.session_state.cart = []
+                cart.clear()
+                cart.flush()
                 st.info("Tu pedido ha sido procesado. Recibirás un email de confirmación.")
     
     with col2:
         st.markdown("### 📋 Resumen del Pedido")
         
-        for item in st.session_state.cart:
-            st.markdown(f"**{item['name']}** x{item['quantity']}")
-            st.caption(f"${item['price'] * item['quantity']:.2f}")
+        for item in cart:
+            st.markdown(f"**{item.name}** x{item.quantity}")
+            st.caption(f"${item.subtotal:.2f}")
         
         st.markdown("---")
         
@@ -1278,20 +907,38 @@ def render_account_page():
         """, unsafe_allow_html=True)
         
         if st.button(f"🚪 {T['logout']}", use_container_width=True):
-            st.session_state.user = None
+            logout()
             navigate_to('home')
     
     with col2:
         tab1, tab2 = st.tabs(["📦 Pedidos", "⚙️ Configuración"])
         
         with tab1:
-            st.info("No tienes pedidos aún. ¡Comienza a comprar!")
-            if st.button("🛍️ Ir a Productos"):
-                navigate_to('products')
+            from components.product_list import get_page_cursor, render_pagination_controls
+            from utils.formatters import format_currency, format_date, format_order_status
+            
+            overview = get_account_overview(user.get('uid'), get_page_cursor('orders'))
+            profile = overview['profile'] or {}
+            orders_page = overview['orders_page']
+            orders = orders_page['orders']
+            
+            if orders:
+                for order in orders:
+                    totals = order.get('totals', {})
+                    st.markdown(
+                        f"**#{order['id'][:8]}** · {format_date(order.get('created_at'))} · "
+                        f"{format_order_status(order.get('status', 'pending'))} · "
+                        f"{format_currency(totals.get('total', 0))}"
+                    )
+                render_pagination_controls(orders_page['next_cursor'], 'orders')
+            else:
+                st.info("No tienes pedidos aún. ¡Comienza a comprar!")
+                if st.button("🛍️ Ir a Productos"):
+                    navigate_to('products')
         
         with tab2:
             with st.form("update_profile"):
-                st.text_input("Nombre", value=user.get('name', ''))
+                st.text_input("Nombre", value=profile.get('display_name') or user.get('name', ''))
                 st.text_input("Email", value=user.get('email', ''), disabled=True)
                 st.text_input("Teléfono")
                 st.text_area("Dirección")
@@ -1341,29 +988,46 @@ def render_footer():
     """, unsafe_allow_html=True)
 
 # ==================== MAIN ====================
+PAGES = {
+    'home': render_home_page,
+    'products': render_products_page,
+    'cart': render_cart_page,
+    'auth': render_auth_page,
+    'about': render_about_page,
+    'checkout': render_checkout_page,
+    'account': render_account_page,
+}
+
 def main():
-    render_header()
+    from contextlib import nullcontext
+    from config import active_config
+    from utils.profiler import profile_block, profiler
+    from services.firestore_metrics import track_rerun
+    from components.debug_panel import render_debug_panel
     
     page = st.session_state.page
+    if page not in PAGES:
+        page = 'home'
+    
+    # Open the shared Firestore channel in the background while the page renders
+    warm_up_firebase()
+    
+    # Rerun cost per page and per section, Firestore usage per page (see the debug panel).
+    # Off in production unless PROFILING_ENABLED: the delta counter patches Streamlit internals.
+    profiling = active_config.DEBUG or active_config.PROFILING_ENABLED
+    profiler.enabled = profiling
+    rerun_metrics = track_rerun(page) if profiling or active_config.FIRESTORE_READ_BUDGET else nullcontext()
+    with rerun_metrics, profile_block("rerun"):
+        with profile_block("component:header"):
+            render_header()
+        
+        with profile_block(f"page:{page}"):
+            PAGES[page]()
+        
+        with profile_block("component:footer"):
+            render_footer()
     
-    if page == 'home':
-        render_home_page()
-    elif page == 'products':
-        render_products_page()
-    elif page == 'cart':
-        render_cart_page()
-    elif page == 'auth':
-        render_auth_page()
-    elif page == 'about':
-        render_about_page()
-    elif page == 'checkout':
-        render_checkout_page()
-    elif page == 'account':
-        render_account_page()
-    else:
-        render_home_page()
-    
-    render_footer()
+    render_debug_panel()
 
 if __name__ == "__main__":
     try:
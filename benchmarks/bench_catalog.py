@@ -0,0 +1,94 @@
+"""
+Catalog listing benchmarks: category filter + price sort + first page.
+
+``BenchCatalogScan`` is the plain full-scan path (list comprehension filter,
+``list.sort(key=lambda ...)``) that in-memory listings started from; the
+``CatalogStore`` benchmarks measure the live catalog's columnar snapshot
+(sort orders precomputed per refresh, vectorized masks, only the page
+materialized).
+"""
+import pytest
+
+from services.catalog_listener import CatalogStore
+from services.catalog_snapshot import CatalogSnapshot
+
+
+PAGE_SIZE = 24
+CATEGORY = 'Books'
+
+
+@pytest.fixture(scope='session')
+def store(catalog):
+    store = CatalogStore()
+    store.replace(catalog)
+    return store
+
+
+def _scan_page(products, category, field, descending, page_size):
+    matches = [p for p in products if p.get('category') == category and p.get(field) is not None]
+    matches.sort(key=lambda p: (p[field], p['id']), reverse=descending)
+    return [dict(p) for p in matches[:page_size]]
+
+
+class BenchCatalogScan:
+    """Full scan on every call."""
+
+    @pytest.mark.benchmark(group='catalog: filter + sort + page')
+    def bench_scan_category_by_price(self, benchmark, catalog):
+        page = benchmark(_scan_page, catalog, CATEGORY, 'price', False, PAGE_SIZE)
+        assert len(page) == PAGE_SIZE
+
+    @pytest.mark.benchmark(group='catalog: filter + sort + page')
+    def bench_scan_all_by_rating_desc(self, benchmark, catalog):
+        def scan():
+            matches = [p for p in catalog if p.get('rating') is not None]
+            matches.sort(key=lambda p: (p['rating'], p['id']), reverse=True)
+            return [dict(p) for p in matches[:PAGE_SIZE]]
+
+        assert len(benchmark(scan)) == PAGE_SIZE
+
+
+class BenchCatalogStore:
+    """CatalogStore.page on a warm snapshot and right after a change."""
+
+    @pytest.mark.benchmark(group='catalog: filter + sort + page')
+    def bench_store_page_warm(self, benchmark, store):
+        products, _ = benchmark(store.page, 'price', False, CATEGORY, PAGE_SIZE)
+        assert len(products) == PAGE_SIZE
+
+    @pytest.mark.benchmark(group='catalog: filter + sort + page')
+    def bench_store_page_cold(self, benchmark, store):
+        """First page right after a catalog change (snapshot rebuilt)."""
+        products, _ = benchmark.pedantic(
+            store.page, args=('price', False, CATEGORY, PAGE_SIZE),
+            setup=store._changed, rounds=20, iterations=1,
+        )
+        assert len(products) == PAGE_SIZE
+
+    @pytest.mark.benchmark(group='catalog: filter + sort + page')
+    def bench_store_page_price_range_in_stock(self, benchmark, store):
+        products, _ = benchmark(store.page, 'price', False, CATEGORY, PAGE_SIZE,
+                                min_price=20.0, max_price=200.0, in_stock=True)
+        assert all(20.0 <= product['price'] <= 200.0 for product in products)
+
+    @pytest.mark.benchmark(group='catalog: deep cursor')
+    def bench_store_page_deep_cursor(self, benchmark, store):
+        ranked = sorted((p for p in store.products() if p.get('rating') is not None),
+                        key=lambda p: (p['rating'], p['id']), reverse=True)
+        middle = ranked[len(ranked) // 2]
+        page, _ = benchmark(store.page, 'rating', True, None, PAGE_SIZE, (middle['rating'], middle['id']))
+        assert page and page[0]['rating'] <= middle['rating']
+
+
+class BenchCatalogSnapshot:
+    """Building the columnar snapshot (once per catalog change) and reading its facets."""
+
+    @pytest.mark.benchmark(group='catalog: snapshot build')
+    def bench_build(self, benchmark, catalog):
+        snapshot = benchmark.pedantic(CatalogSnapshot, args=(catalog,), rounds=5, iterations=1)
+        assert len(snapshot) == len(catalog)
+
+    @pytest.mark.benchmark(group='catalog: facets')
+    def bench_facets(self, benchmark, store):
+        facets = benchmark(store.snapshot().facets, CATEGORY)
+        assert facets['count'] == facets['categories'][CATEGORY]
@@ -0,0 +1,31 @@
+"""
+Formatting benchmarks: cart/order totals and currency formatting in loops.
+"""
+import pytest
+
+from utils.formatters import calculate_total, format_currency
+
+
+@pytest.fixture(scope='session')
+def cart_lines(catalog):
+    return [{'product_id': product['id'], 'price': product['price'], 'quantity': 1 + i % 3}
+            for i, product in enumerate(catalog)]
+
+
+class BenchCalculateTotal:
+    """calculate_total over one line per catalog product."""
+
+    @pytest.mark.benchmark(group='formatters: calculate_total')
+    def bench_calculate_total(self, benchmark, cart_lines):
+        totals = benchmark(calculate_total, cart_lines, 0.08, 5.99)
+        assert totals['total'] > totals['subtotal']
+
+
+class BenchFormatCurrency:
+    """format_currency for every price in the catalog."""
+
+    @pytest.mark.benchmark(group='formatters: format_currency')
+    def bench_format_every_price(self, benchmark, catalog):
+        prices = [product['price'] for product in catalog]
+        formatted = benchmark(lambda: [format_currency(price) for price in prices])
+        assert formatted[0].startswith('$')
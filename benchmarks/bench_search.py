@@ -0,0 +1,41 @@
+"""
+Search path benchmarks: FirebaseService.get_products / get_products_page with a
+query, answered by the in-process SearchIndex (Firestore fake behind it).
+"""
+import pytest
+
+from services.search_index import SearchIndex
+
+
+class BenchSearch:
+    """Search through the service, index warm."""
+
+    @pytest.mark.benchmark(group='search: get_products')
+    def bench_single_term(self, benchmark, firebase):
+        results = benchmark(firebase.get_products, limit=24, search_query='camara')
+        assert results
+
+    @pytest.mark.benchmark(group='search: get_products')
+    def bench_two_terms_with_category(self, benchmark, firebase):
+        results = benchmark(firebase.get_products, limit=24, category='Electronics',
+                            search_query='camara premium')
+        assert all(product['category'] == 'Electronics' for product in results)
+
+    @pytest.mark.benchmark(group='search: get_products')
+    def bench_prefix_term(self, benchmark, firebase):
+        assert benchmark(firebase.get_products, limit=24, search_query='zapat')
+
+    @pytest.mark.benchmark(group='search: get_products_page sorted')
+    def bench_page_sorted_by_price(self, benchmark, firebase):
+        page = benchmark(firebase.get_products_page, page_size=24, sort='price_asc', search_query='eco')
+        prices = [product['price'] for product in page['products']]
+        assert prices == sorted(prices)
+
+
+class BenchSearchIndexBuild:
+    """Full index rebuild (done on cold start and every 10 minutes)."""
+
+    @pytest.mark.benchmark(group='search: index build')
+    def bench_build(self, benchmark, catalog):
+        index = benchmark.pedantic(SearchIndex, args=(catalog,), rounds=3, iterations=1)
+        assert len(index) == len(catalog)
@@ -0,0 +1,58 @@
+"""
+Shared fixtures for the microbenchmarks.
+
+Every benchmark that takes ``catalog`` runs once per catalog size
+(1k / 10k / 100k products by default; narrow with ``--catalog-sizes=1000,10000``).
+Catalogs come from loadtest.data, so they match the load test's data.
+"""
+from functools import lru_cache
+from typing import Any, Dict, List
+
+import pytest
+
+from loadtest.data import seed_database, shopper_accounts, synthetic_products
+
+
+DEFAULT_CATALOG_SIZES = (1_000, 10_000, 100_000)
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--catalog-sizes',
+        default=','.join(str(size) for size in DEFAULT_CATALOG_SIZES),
+        help="comma-separated catalog sizes to benchmark (default: 1000,10000,100000)",
+    )
+
+
+def pytest_generate_tests(metafunc):
+    if 'catalog_size' in metafunc.fixturenames:
+        sizes = [int(size) for size in metafunc.config.getoption('catalog_sizes').split(',') if size]
+        metafunc.parametrize('catalog_size', sizes, ids=[f"{size // 1000}k" for size in sizes], scope='session')
+
+
+@lru_cache(maxsize=None)
+def _products(size: int) -> Dict[str, Dict[str, Any]]:
+    return synthetic_products(size, seed=size)
+
+
+@pytest.fixture(scope='session')
+def catalog(catalog_size) -> List[Dict[str, Any]]:
+    """Active products with their 'id', as the services return them."""
+    return [{**product, 'id': product_id}
+            for product_id, product in _products(catalog_size).items() if product['active']]
+
+
+@pytest.fixture(scope='session')
+def firebase(catalog_size):
+    """FirebaseService backed by a Firestore fake holding the catalog (warm caches)."""
+    from loadtest.fake_firestore import FakeFirestore
+    from loadtest.harness import FakeIdentityToolkit, fake_backend
+    from services.firebase_service import FirebaseService
+
+    db = FakeFirestore()
+    seed_database(db, _products(catalog_size), shopper_accounts(1))
+    with fake_backend(db, FakeIdentityToolkit([])):
+        service = FirebaseService()
+        # Build the search index before measuring
+        service.get_products(search_query='warm up')
+        yield service
@@ -4,15 +4,26 @@ Cart summary component for displaying cart items and totals.
 import streamlit as st
 from typing import List, Dict, Any
 from utils.formatters import format_currency, calculate_total
+from utils.profiler import profiled
 
 
+@profiled("component:cart_summary")
 def render_cart_summary(cart_items: List[Dict[str, Any]]):
     """
     Render cart summary with items and totals.
     
+    Quantity changes go through the session's cart store: they show up
+    immediately and are persisted together in one write.
+    
     Args:
-        cart_items: List of cart item dictionaries
+        cart_items: List of cart item dictionaries (used when no user is signed in)
     """
+    store = None
+    if st.session_state.get('user'):
+        from services.cart_store import get_cart_store
+        store = get_cart_store()
+        cart_items = store.to_dicts()
+    
     if not cart_items:
         st.info("Your cart is empty.")
         return
@@ -32,24 +43,20 @@ def render_cart_summary(cart_items: List[Dict[str, Any]]):
                 st.write(format_currency(item.get('price', 0)))
             
             with col3:
-                # Create callback with closure to capture item and user info
-                # The callback receives the new value as first argument automatically
-                product_id = item['product_id']  # Capture for closure
-                user_id = st.session_state.user['uid']  # Capture for closure
+                product_id = item['product_id']
+                quantity_key = f"cart_qty_{product_id}"
                 
-                def update_quantity(new_quantity: int):
-                    """Callback to update cart item quantity."""
-                    from services.firebase_service import FirebaseService
-                    firebase = FirebaseService()
-                    firebase.update_cart_item(user_id, product_id, int(new_quantity))
-                    st.rerun()
+                def update_quantity(product_id=product_id, quantity_key=quantity_key):
+                    """Callback to update cart item quantity (buffered, no write yet)."""
+                    if store is not None:
+                        store.set_quantity(product_id, int(st.session_state[quantity_key]))
                 
-                quantity = st.number_input(
+                st.number_input(
                     "Qty",
                     min_value=1,
                     max_value=99,
                     value=item.get('quantity', 1),
-                    key=f"cart_qty_{i}",
+                    key=quantity_key,
                     on_change=update_quantity
                 )
             
@@ -58,13 +65,8 @@ def render_cart_summary(cart_items: List[Dict[str, Any]]):
                 st.write(f"**{format_currency(item_total)}**")
                 
                 if st.button("Remove", key=f"cart_remove_{i}"):
-                    from services.firebase_service import FirebaseService
-                    firebase = FirebaseService()
-                    firebase.update_cart_item(
-                        st.session_state.user['uid'],
-                        item['product_id'],
-                        0
-                    )
+                    if store is not None:
+                        store.remove(item['product_id'])
                     st.rerun()
             
             st.divider()
@@ -88,6 +90,10 @@ def render_cart_summary(cart_items: List[Dict[str, Any]]):
         st.write(f"**{format_currency(totals['total'])}**")
     
     if st.button("Proceed to Checkout", type="primary", use_container_width=True):
+        # Checkout must see the persisted cart
+        if store is not None and not store.flush():
+            st.error("Could not save your cart. Please try again.")
+            return
         st.session_state.checkout_step = 'shipping'
         st.rerun()
 
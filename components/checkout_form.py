@@ -3,6 +3,7 @@ Checkout form component for collecting shipping and payment information.
 """
 import streamlit as st
 from typing import Dict, Any
+from utils.error_handler import EcommerceException, ErrorHandler, InsufficientStockError, ProductNotFoundError
 from utils.validators import validate_address, validate_name, validate_email, validate_phone
 
 
@@ -152,9 +153,30 @@ def render_review_order():
     """Render order review and confirmation."""
     st.subheader("Review Your Order")
     
+    from services.cart_store import close_cart_store, get_cart_store
+    from services.checkout import new_order_id
     from services.firebase_service import FirebaseService
     firebase = FirebaseService()
-    cart_items = firebase.get_user_cart(st.session_state.user['uid'])
+    
+    # One ID per checkout: retrying a placement that already committed returns
+    # the same order instead of placing it twice
+    if 'checkout_order_id' not in st.session_state:
+        st.session_state.checkout_order_id = new_order_id()
+    
+    # Persist buffered edits and pick up changes made in other sessions
+    cart = get_cart_store()
+    cart.revalidate(firebase)
+    
+    # Current prices and stock of every line, read in one batch
+    cart_lines = cart.to_dicts()
+    check = firebase.validate_cart(cart_lines)
+    cart_items = check['items']
+    names = {item['product_id']: item.get('name') for item in cart_lines}
+    
+    for change in check['price_changes']:
+        st.info(price_change_message(change))
+    for error in check['errors']:
+        render_line_error(error, names)
     
     st.write("**Items:**")
     for item in cart_items:
@@ -185,7 +207,7 @@ def render_review_order():
         payment = st.session_state.payment_info
         st.write(payment.get('method'))
     
-    if st.button("Place Order", type="primary", use_container_width=True):
+    if st.button("Place Order", type="primary", use_container_width=True, disabled=bool(check['errors'])):
         order_data = {
             'items': cart_items,
             'totals': totals,
@@ -193,11 +215,20 @@ def render_review_order():
             'payment_info': st.session_state.payment_info
         }
         
-        order_id = firebase.create_order(st.session_state.user['uid'], order_data)
+        try:
+            order_id = firebase.place_order(st.session_state.user['uid'],
+                                            st.session_state.checkout_order_id, order_data)
+        except EcommerceException as e:
+            # Stock or prices changed since the review was rendered
+            render_line_error(e, names)
+            return
         
         if order_id:
-            firebase.clear_cart(st.session_state.user['uid'])
+            # The ordered lines were removed from the persisted cart in the same
+            # commit; drop the session copy so it is reloaded
+            close_cart_store()
             
+            del st.session_state.checkout_order_id
             if 'checkout_step' in st.session_state:
                 del st.session_state.checkout_step
             if 'shipping_info' in st.session_state:
@@ -213,3 +244,26 @@ def render_review_order():
         else:
             st.error("Failed to place order. Please try again.")
 
+
+def price_change_message(change: Dict[str, Any]) -> str:
+    """Message for a cart line whose price differs from the product's current price."""
+    if not change.get('old_price'):
+        # The line was stored without a price snapshot (None, or 0 once loaded into the cart store)
+        return f"The price of {change['name']} is ${change['new_price']:.2f}."
+    return (f"The price of {change['name']} changed from ${change['old_price']:.2f} "
+            f"to ${change['new_price']:.2f}.")
+
+
+def render_line_error(error: Exception, names: Dict[str, Any]):
+    """Show a checkout validation error for one cart line."""
+    details = getattr(error, 'details', {})
+    name = names.get(details.get('product_id')) or details.get('product_id')
+    if isinstance(error, InsufficientStockError):
+        message = (f"Only {details['available']} of {name} left in stock "
+                   f"(your cart has {details['requested']}). Update your cart to continue.")
+    elif isinstance(error, ProductNotFoundError):
+        message = f"{name} is no longer available. Remove it from your cart to continue."
+    else:
+        message = None
+    ErrorHandler.handle_error(error, user_message=message, show_details_in_debug=False)
+
@@ -0,0 +1,121 @@
+"""
+Debug-only performance panel.
+Shows per-page and per-component rerun cost collected by utils.profiler and
+Firestore usage collected by services.firestore_metrics.
+"""
+import streamlit as st
+
+from config import active_config
+from services.firestore_metrics import metrics
+from utils.profiler import profiler
+
+
+def render_debug_panel():
+    """Render the profiler and Firestore summaries (only when active_config.DEBUG is on)."""
+    if not active_config.DEBUG:
+        return
+
+    with st.expander("🛠️ Performance (debug)"):
+        rerun_tab, firestore_tab = st.tabs(["Rerun cost", "Firestore"])
+        with rerun_tab:
+            _render_profiler_summary()
+        with firestore_tab:
+            _render_firestore_metrics()
+
+
+def _render_profiler_summary():
+    summary = profiler.summary()
+    if not summary:
+        st.caption("No samples yet.")
+        return
+
+    rows = []
+    for name, stats in summary.items():
+        hit_rate = stats['cache_hit_rate']
+        rows.append({
+            'block': name,
+            'runs': stats['count'],
+            'p50 ms': round(stats['wall_ms']['p50'], 1),
+            'p95 ms': round(stats['wall_ms']['p95'], 1),
+            'p99 ms': round(stats['wall_ms']['p99'], 1),
+            'rpcs p95': stats['rpcs']['p95'],
+            'elements p95': stats['elements']['p95'],
+            'KB p95': round(stats['delta_bytes']['p95'] / 1024, 1),
+            'cache hit %': None if hit_rate is None else round(hit_rate * 100),
+        })
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            "Export JSON",
+            data=profiler.export_json(include_samples=True),
+            file_name="profile.json",
+            mime="application/json"
+        )
+    with col2:
+        if st.button("Reset samples"):
+            profiler.reset()
+            st.rerun()
+
+
+def _render_firestore_client():
+    try:
+        from services.firebase_service import _get_firestore_holder
+        holder = _get_firestore_holder()
+    except Exception as e:
+        st.caption(f"Firestore client unavailable: {e}")
+        return
+
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        health = holder.last_health
+        if health is None:
+            st.caption(f"Clients created: {holder.clients_created} · no health check yet")
+        else:
+            status = "healthy" if health['ok'] else f"unhealthy ({health['error']})"
+            st.caption(f"Clients created: {holder.clients_created} · {status} · "
+                       f"{health['latency_ms']} ms")
+    with col2:
+        if st.button("Health check", key="firestore_health_check"):
+            holder.health_check()
+            st.rerun()
+
+
+def _render_firestore_metrics():
+    _render_firestore_client()
+
+    snapshot = metrics.snapshot()
+    if not snapshot['by_method']:
+        st.caption("No Firestore operations yet.")
+        return
+
+    for title, key, label in (("By method", 'by_method', 'method'),
+                              ("By page", 'by_page', 'page'),
+                              ("By session", 'by_session', 'session')):
+        st.markdown(f"**{title}**")
+        rows = [{label: name, **counts} for name, counts in
+                sorted(snapshot[key].items(), key=lambda item: -item[1]['reads'])]
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+
+    st.markdown("**Latency (ms)**")
+    rows = [
+        {'rpc': rpc, 'count': stats['count'], 'p50': round(stats['p50'], 1),
+         'p95': round(stats['p95'], 1), 'p99': round(stats['p99'], 1), 'max': round(stats['max'], 1)}
+        for rpc, stats in snapshot['latency_ms'].items()
+    ]
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            "Export JSON",
+            data=metrics.export_json(),
+            file_name="firestore_metrics.json",
+            mime="application/json",
+            key="firestore_metrics_export"
+        )
+    with col2:
+        if st.button("Reset counters", key="firestore_metrics_reset"):
+            metrics.reset()
+            st.rerun()
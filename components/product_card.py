@@ -61,18 +61,9 @@ def render_product_card(product: Dict[str, Any], key_prefix: str = ""):
                         key=f"{key_prefix}_qty_{product_id}"
                     )
                     if st.button("Add to Cart", key=f"{key_prefix}_add_{product_id}"):
-                        from services.firebase_service import FirebaseService
-                        firebase = FirebaseService()
+                        from services.cart_store import get_cart_store
                         
-                        success = firebase.add_to_cart(
-                            st.session_state.user['uid'],
-                            product_id,
-                            quantity
-                        )
-                        
-                        if success:
-                            st.success("Added to cart!")
-                            st.rerun()
-                        else:
-                            st.error("Failed to add to cart")
+                        get_cart_store().add(product, quantity)
+                        st.success("Added to cart!")
+                        st.rerun()
 
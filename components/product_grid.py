@@ -0,0 +1,152 @@
+"""
+Batched product grid.
+
+The whole grid is rendered by one lightweight custom component (static HTML
+and vanilla JS in ``product_grid_frontend/``, no build step) instead of one
+``st.markdown`` + several widgets per card. A page of 48 products becomes a
+single element per rerun; a click on a card button is sent back as an event
+``{'action', 'product_id', 'nonce'}``.
+"""
+import html
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+from utils.formatters import format_currency
+from utils.profiler import profiled
+
+
+_FRONTEND_DIR = Path(__file__).parent / "product_grid_frontend"
+_product_grid = components.declare_component("product_grid", path=str(_FRONTEND_DIR))
+
+PLACEHOLDER_IMAGE = "https://placehold.co/400x400/E2E8F0/64748B?text=Product"
+
+# Approximate card height used until the frame reports its real size
+_ROW_HEIGHT = 460
+
+DEFAULT_LABELS = {
+    'view': 'Ver detalles',
+    'add': 'Agregar',
+    'sold_out': 'Agotado',
+    'login': 'Ingresar',
+    'reviews': 'reseñas',
+}
+
+
+def _product_image(product: Dict[str, Any]) -> str:
+    images = product.get('images')
+    if images:
+        return images[0].get('url') or PLACEHOLDER_IMAGE
+    return product.get('image') or PLACEHOLDER_IMAGE
+
+
+def _card_html(product: Dict[str, Any], labels: Dict[str, str], show_details: bool,
+               signed_in: bool) -> str:
+    esc = lambda value: html.escape(str(value), quote=True)
+
+    product_id = esc(product.get('id', ''))
+    name = product.get('name', 'Producto')
+    rating = product.get('rating', 0) or 0
+    stock = product.get('stock')
+    in_stock = stock is None or stock > 0
+    badge = product.get('badge', '')
+    old_price = product.get('old_price')
+
+    badge_html = f'<div class="product-badge {esc(badge)}">{esc(badge.upper())}</div>' if badge else ''
+    old_price_html = (
+        f'<span class="product-old-price">{esc(format_currency(old_price))}</span>' if old_price else ''
+    )
+    rating_html = ''
+    if rating > 0:
+        rating_html = (
+            f'<div class="product-rating"><span class="stars">{"⭐" * int(rating)}</span>'
+            f'<span>({esc(product.get("reviews_count", 0))} {esc(labels["reviews"])})</span></div>'
+        )
+
+    buttons = []
+    if show_details:
+        buttons.append(f'<button class="btn secondary" data-action="view" data-id="{product_id}">'
+                       f'{esc(labels["view"])}</button>')
+    if not signed_in:
+        buttons.append(f'<button class="btn primary" data-action="login" data-id="{product_id}">'
+                       f'{esc(labels["login"])}</button>')
+    elif in_stock:
+        buttons.append(f'<button class="btn primary" data-action="add" data-id="{product_id}">'
+                       f'{esc(labels["add"])}</button>')
+    else:
+        buttons.append(f'<button class="btn" disabled>{esc(labels["sold_out"])}</button>')
+
+    return (
+        '<div class="product-card">'
+        '<div class="product-img-container">'
+        f'<img src="{esc(_product_image(product))}" alt="{esc(name)}" loading="lazy" />{badge_html}'
+        '</div>'
+        '<div class="product-info">'
+        f'<div class="product-category">{esc(product.get("category", ""))}</div>'
+        f'<div class="product-name">{esc(name)}</div>'
+        f'{rating_html}'
+        f'<div><span class="product-price">{esc(format_currency(product.get("price", 0)))}</span>'
+        f'{old_price_html}</div>'
+        f'<div class="product-actions">{"".join(buttons)}</div>'
+        '</div>'
+        '</div>'
+    )
+
+
+def build_grid_html(products: List[Dict[str, Any]], labels: Optional[Dict[str, str]] = None,
+                    show_details: bool = True, signed_in: bool = True) -> str:
+    """
+    Build the static markup of a whole product grid.
+    All product values are HTML-escaped.
+
+    Args:
+        products: Products to show
+        labels: Button/label overrides (see DEFAULT_LABELS)
+        show_details: Show the "view details" button
+        signed_in: Show "add" buttons (otherwise a "sign in" button)
+
+    Returns:
+        HTML string with one card per product
+    """
+    labels = {**DEFAULT_LABELS, **(labels or {})}
+    return ''.join(_card_html(product, labels, show_details, signed_in) for product in products)
+
+
+@profiled("component:product_grid")
+def render_batched_product_grid(products: List[Dict[str, Any]], key: str, columns: int = 4,
+                                labels: Optional[Dict[str, str]] = None, show_details: bool = True,
+                                signed_in: Optional[bool] = None) -> Optional[Dict[str, Any]]:
+    """
+    Render a product grid as a single component.
+
+    Args:
+        products: Products to show
+        key: Unique widget key of the grid
+        columns: Cards per row on wide screens
+        labels: Button/label overrides (see DEFAULT_LABELS)
+        show_details: Show the "view details" button
+        signed_in: Show "add" buttons (defaults to whether a user is signed in)
+
+    Returns:
+        The click event {'action', 'product_id'} produced since the last rerun, or None
+    """
+    if signed_in is None:
+        signed_in = bool(st.session_state.get('user'))
+
+    rows = -(-len(products) // columns)
+    event = _product_grid(
+        html=build_grid_html(products, labels, show_details, signed_in),
+        columns=columns,
+        key=key,
+        default=None,
+        height=rows * _ROW_HEIGHT
+    )
+
+    # The component keeps returning its last value; only report new clicks
+    handled_key = f"{key}_handled_nonce"
+    if not event or event.get('nonce') == st.session_state.get(handled_key):
+        return None
+    st.session_state[handled_key] = event.get('nonce')
+    return {'action': event.get('action'), 'product_id': event.get('product_id')}
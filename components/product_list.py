@@ -3,29 +3,127 @@ Product list component with modern grid layout.
 REDISEÑO UX/UI - Grid responsive y tarjetas profesionales
 """
 import streamlit as st
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from utils.profiler import profiled
 
 
-def render_product_grid(products: List[Dict[str, Any]], columns: int = 4):
+def render_product_grid(products: List[Dict[str, Any]], columns: int = 4,
+                        next_cursor: Optional[str] = None,
+                        pagination_key: Optional[str] = None):
     """
-    Render products in a modern responsive grid.
+    Render one page of products in a modern responsive grid.
+    The whole grid is a single element (see components.product_grid); card
+    buttons come back as one click event per rerun.
     
     Args:
-        products: List of product dictionaries
+        products: Product dictionaries for the current page
         columns: Number of columns (default: 4)
+        next_cursor: Page token for the next page (from FirebaseService.get_products_page)
+        pagination_key: Session key of the listing; enables Anterior/Siguiente controls
     """
     if not products:
         st.info("No se encontraron productos.")
         return
     
-    # Responsive grid: usa CSS Grid nativo de Streamlit
-    for i in range(0, len(products), columns):
-        cols = st.columns(columns)
+    from components.product_grid import render_batched_product_grid
+    
+    # Una sola grilla HTML (CSS Grid) en lugar de columnas y botones por tarjeta
+    event = render_batched_product_grid(
+        products,
+        key=f"{pagination_key or 'product'}_grid",
+        columns=columns
+    )
+    if event:
+        handle_grid_event(event, products)
+    
+    if pagination_key:
+        render_pagination_controls(next_cursor, pagination_key)
+
+
+def handle_grid_event(event: Dict[str, Any], products: List[Dict[str, Any]]):
+    """
+    Apply a click from the batched product grid.
+    
+    Args:
+        event: {'action', 'product_id'} returned by render_batched_product_grid
+        products: Products shown in the grid
+    """
+    product = next((p for p in products if p.get('id') == event['product_id']), None)
+    if product is None:
+        return
+    
+    if event['action'] == 'view':
+        st.session_state.selected_product_id = product['id']
+    elif event['action'] == 'add':
+        from services.cart_store import get_cart_store
         
-        for j, col in enumerate(cols):
-            if i + j < len(products):
-                with col:
-                    render_product_card(products[i + j], key_prefix=f"grid_{i}_{j}")
+        get_cart_store().add(product, 1)  # Cantidad por defecto
+        st.toast("✓ Agregado", icon="✅")
+    elif event['action'] == 'login':
+        st.session_state.page = 'auth'
+    st.rerun()
+
+
+def get_page_cursor(pagination_key: str = "catalog") -> Optional[str]:
+    """
+    Get the cursor of the page currently shown for a paginated listing.
+    
+    Args:
+        pagination_key: Session key of the listing
+        
+    Returns:
+        Page token, or None for the first page
+    """
+    history = st.session_state.get(f"{pagination_key}_cursors", [])
+    return history[-1] if history else None
+
+
+def reset_pagination(pagination_key: str = "catalog"):
+    """Go back to the first page (e.g. after filters change)."""
+    st.session_state[f"{pagination_key}_cursors"] = []
+
+
+@profiled("component:pagination")
+def render_pagination_controls(next_cursor: Optional[str], pagination_key: str = "catalog"):
+    """
+    Render previous/next page buttons.
+    Visited cursors are kept as a stack in session state so "Anterior" never
+    needs a backwards query.
+    
+    Args:
+        next_cursor: Page token for the next page (None on the last page)
+        pagination_key: Session key of the listing
+    """
+    state_key = f"{pagination_key}_cursors"
+    history = st.session_state.setdefault(state_key, [])
+    
+    col1, col2, col3 = st.columns([1, 2, 1])
+    
+    with col1:
+        if st.button(
+            "← Anterior",
+            key=f"{pagination_key}_prev",
+            use_container_width=True,
+            disabled=not history
+        ):
+            history.pop()
+            st.rerun()
+    
+    with col2:
+        st.markdown(
+            f'<div style="text-align: center; padding-top: 0.5rem;">Página {len(history) + 1}</div>',
+            unsafe_allow_html=True
+        )
+    
+    with col3:
+        if st.button(
+            "Siguiente →",
+            key=f"{pagination_key}_next",
+            use_container_width=True,
+            disabled=not next_cursor
+        ):
+            history.append(next_cursor)
+            st.rerun()
 
 
 def render_product_card(product: Dict[str, Any], key_prefix: str = ""):
@@ -106,23 +204,11 @@ def render_product_card(product: Dict[str, Any], key_prefix: str = ""):
                     use_container_width=True,
                     type="primary"
                 ):
-                    from services.firebase_service import FirebaseService
-                    firebase = FirebaseService()
-                    
-                    success = firebase.add_to_cart(
-                        st.session_state.user['uid'],
-                        product_id,
-                        1  # Cantidad por defecto
-                    )
+                    from services.cart_store import get_cart_store
                     
-                    if success:
-                        st.success("✓ Agregado", icon="✅")
-                        # Actualizar contador del carrito
-                        if 'cart_count' in st.session_state:
-                            st.session_state.cart_count += 1
-                        st.rerun()
-                    else:
-                        st.error("Error al agregar")
+                    get_cart_store().add(product, 1)  # Cantidad por defecto
+                    st.success("✓ Agregado", icon="✅")
+                    st.rerun()
             else:
                 st.button(
                     "Agotado",
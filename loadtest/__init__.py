@@ -0,0 +1,3 @@
+"""
+Load-testing harness: an in-memory Firestore fake and simulated shoppers.
+"""
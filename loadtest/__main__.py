@@ -0,0 +1,45 @@
+"""
+Run the shopper load test from the command line::
+
+    python -m loadtest --shoppers 500 --concurrency 100 --catalog-size 5000
+
+Exits with status 1 when an operation fails or a step exceeds its read budget.
+"""
+import argparse
+import json
+import sys
+
+from loadtest.harness import LoadTest, check_budgets, format_report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Simulate concurrent shoppers against a Firestore fake.")
+    parser.add_argument('--shoppers', type=int, default=200, help="simulated users (default: 200)")
+    parser.add_argument('--concurrency', type=int, default=50, help="users active at once (default: 50)")
+    parser.add_argument('--catalog-size', type=int, default=1000, help="products in the catalog (default: 1000)")
+    parser.add_argument('--latency-ms', type=float, default=2.0, help="simulated latency per RPC (default: 2)")
+    parser.add_argument('--seed', type=int, default=0, help="random seed (default: 0)")
+    parser.add_argument('--json', metavar='PATH', help="also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = LoadTest(
+        shoppers=args.shoppers,
+        concurrency=args.concurrency,
+        catalog_size=args.catalog_size,
+        latency=args.latency_ms / 1000,
+        seed=args.seed,
+    ).run()
+
+    print(format_report(report))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+
+    violations = check_budgets(report)
+    for violation in violations:
+        print(f"FAIL {violation}", file=sys.stderr)
+    return 1 if violations else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
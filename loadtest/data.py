@@ -0,0 +1,86 @@
+"""
+Synthetic catalogs and shopper accounts for load tests and benchmarks.
+Generation is seeded, so every run sees the same data.
+"""
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Tuple
+
+from services.category_summary import CATALOG_META_COLLECTION, CATEGORY_SUMMARY_DOC, build_summary
+
+
+CATEGORIES = ('Electronics', 'Clothing', 'Home & Garden', 'Sports', 'Books', 'Toys', 'Beauty', 'Food')
+
+_ADJECTIVES = ('Básico', 'Premium', 'Compacto', 'Ligero', 'Clásico', 'Deluxe', 'Eco', 'Pro', 'Mini', 'Ultra')
+_NOUNS = {
+    'Electronics': ('Cámara', 'Auriculares', 'Teclado', 'Monitor', 'Altavoz', 'Cargador'),
+    'Clothing': ('Camiseta', 'Chaqueta', 'Pantalón', 'Bufanda', 'Zapatillas', 'Gorra'),
+    'Home & Garden': ('Lámpara', 'Maceta', 'Cojín', 'Sartén', 'Manguera', 'Reloj'),
+    'Sports': ('Balón', 'Raqueta', 'Esterilla', 'Mancuerna', 'Bicicleta', 'Casco'),
+    'Books': ('Novela', 'Atlas', 'Diccionario', 'Cómic', 'Ensayo', 'Guía'),
+    'Toys': ('Puzle', 'Peluche', 'Cometa', 'Robot', 'Tren', 'Muñeca'),
+    'Beauty': ('Crema', 'Perfume', 'Champú', 'Cepillo', 'Sérum', 'Jabón'),
+    'Food': ('Café', 'Chocolate', 'Aceite', 'Miel', 'Té', 'Galletas'),
+}
+
+# Terms that match products through the search index
+SEARCH_TERMS = ('camara', 'premium', 'novela', 'cafe', 'robot', 'eco', 'zapatillas', 'lampara')
+
+SHOPPER_PASSWORD = 'loadtest-password'
+
+
+def synthetic_products(count: int, seed: int = 0) -> Dict[str, Dict[str, Any]]:
+    """
+    Generate an active catalog.
+
+    Args:
+        count: Number of products
+        seed: Random seed
+
+    Returns:
+        Product ID -> product document
+    """
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    products = {}
+    for index in range(count):
+        category = CATEGORIES[index % len(CATEGORIES)]
+        name = f"{rng.choice(_NOUNS[category])} {rng.choice(_ADJECTIVES)} {index}"
+        products[f"p{index:06d}"] = {
+            'name': name,
+            'description': f"{name}: artículo de {category.lower()} de prueba.",
+            'price': round(rng.uniform(1, 500), 2),
+            'category': category,
+            'stock': rng.randint(0, 200),
+            'rating': round(rng.uniform(1, 5), 1),
+            'reviews_count': rng.randint(0, 500),
+            'images': [{'url': f"https://example.com/{index}.jpg", 'alt': name}],
+            'active': rng.random() > 0.05,
+            'created_at': start + timedelta(minutes=index),
+        }
+    return products
+
+
+def shopper_accounts(count: int) -> List[Tuple[str, str, str]]:
+    """(uid, email, password) for ``count`` shoppers."""
+    return [(f"shopper{index:05d}", f"shopper{index}@loadtest.example", SHOPPER_PASSWORD)
+            for index in range(count)]
+
+
+def seed_database(db, products: Dict[str, Dict[str, Any]], accounts: List[Tuple[str, str, str]]):
+    """
+    Load products, their category summary and empty user documents into a fake.
+
+    Args:
+        db: loadtest.fake_firestore.FakeFirestore
+        products: Output of synthetic_products
+        accounts: Output of shopper_accounts
+    """
+    db.seed('products', products)
+    summary = build_summary(products.values())
+    db.seed(CATALOG_META_COLLECTION, {CATEGORY_SUMMARY_DOC: {'categories': summary}})
+    db.seed('users', {
+        uid: {'uid': uid, 'email': email, 'display_name': uid, 'cart_items': {}, 'cart_version': 0,
+              'orders': [], 'addresses': [], 'created_at': datetime(2024, 1, 1)}
+        for uid, email, _ in accounts
+    })
@@ -0,0 +1,622 @@
+"""
+In-memory Firestore fake for load tests.
+
+Implements the part of the google-cloud-firestore client API the services use:
+collections and documents, ``where`` / ``order_by`` / ``limit`` / cursor
+queries, ``get_all``, batches, and transactions that work with
+``firestore.transactional``. Field transforms (``Increment``, ``ArrayUnion``,
+``ArrayRemove``, ``DELETE_FIELD``, ``SERVER_TIMESTAMP``) and dotted field
+paths in ``update`` behave like the real service.
+
+Transactions are optimistic: the commit aborts (and ``firestore.transactional``
+retries) when a document read by the transaction changed in the meantime.
+Each RPC can sleep for ``latency`` seconds to stand in for network time.
+
+``FakeAsyncFirestore`` puts the read API of ``firestore.AsyncClient`` in front
+of the same data; each RPC runs in a worker thread, so concurrent coroutines
+overlap their simulated latency like real RPCs would.
+"""
+import asyncio
+import copy
+import functools
+import itertools
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from google.api_core import exceptions
+from google.cloud.firestore_v1 import transforms
+from google.cloud.firestore_v1.field_path import FieldPath
+
+
+ASCENDING = 'ASCENDING'
+DESCENDING = 'DESCENDING'
+
+_NAME = '__name__'
+_MISSING = object()
+
+
+# ==================== Values ====================
+
+def _parts(field_path: Any) -> Tuple[str, ...]:
+    if isinstance(field_path, FieldPath):
+        return field_path.parts
+    return FieldPath.from_api_repr(field_path).parts
+
+
+def _lookup(data: Dict[str, Any], parts: Tuple[str, ...]) -> Any:
+    value: Any = data
+    for part in parts:
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _type_rank(value: Any) -> int:
+    """Firestore's cross-type ordering: null < bool < number < timestamp < string < others."""
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, datetime):
+        return 3
+    if isinstance(value, str):
+        return 4
+    return 5
+
+
+def _compare(left: Any, right: Any) -> int:
+    left_rank, right_rank = _type_rank(left), _type_rank(right)
+    if left_rank != right_rank:
+        return -1 if left_rank < right_rank else 1
+    if left_rank == 3 and (left.tzinfo is None) != (right.tzinfo is None):
+        left, right = left.replace(tzinfo=None), right.replace(tzinfo=None)
+    try:
+        return (left > right) - (left < right)
+    except TypeError:
+        return 0
+
+
+def _matches(value: Any, op: str, expected: Any) -> bool:
+    if value is _MISSING:
+        return False
+    if op == '==':
+        return _compare(value, expected) == 0 and _type_rank(value) == _type_rank(expected)
+    if op == '!=':
+        return not _matches(value, '==', expected)
+    if op in ('<', '<=', '>', '>='):
+        if _type_rank(value) != _type_rank(expected):
+            return False
+        result = _compare(value, expected)
+        return {'<': result < 0, '<=': result <= 0, '>': result > 0, '>=': result >= 0}[op]
+    if op == 'in':
+        return any(_matches(value, '==', item) for item in expected)
+    if op == 'not-in':
+        return not any(_matches(value, '==', item) for item in expected)
+    if op == 'array_contains':
+        return isinstance(value, list) and expected in value
+    if op == 'array_contains_any':
+        return isinstance(value, list) and any(item in value for item in expected)
+    raise ValueError(f"Unsupported operator: {op}")
+
+
+def _write_value(container: Dict[str, Any], key: str, value: Any):
+    """Write one field, applying Firestore sentinels and transforms."""
+    if value is transforms.DELETE_FIELD:
+        container.pop(key, None)
+    elif value is transforms.SERVER_TIMESTAMP:
+        container[key] = datetime.now(timezone.utc)
+    elif isinstance(value, transforms.Increment):
+        current = container.get(key)
+        numeric = isinstance(current, (int, float)) and not isinstance(current, bool)
+        container[key] = current + value.value if numeric else value.value
+    elif isinstance(value, transforms.ArrayUnion):
+        current = list(container.get(key) or [])
+        container[key] = current + [item for item in value.values if item not in current]
+    elif isinstance(value, transforms.ArrayRemove):
+        container[key] = [item for item in container.get(key) or [] if item not in value.values]
+    elif isinstance(value, dict):
+        nested: Dict[str, Any] = {}
+        _merge(nested, value)
+        container[key] = nested
+    else:
+        container[key] = copy.deepcopy(value)
+
+
+def _merge(target: Dict[str, Any], data: Dict[str, Any]):
+    """Deep-merge ``data`` into ``target`` (``set(..., merge=True)`` semantics)."""
+    for key, value in data.items():
+        if isinstance(value, dict):
+            nested = target.get(key)
+            if not isinstance(nested, dict):
+                nested = target[key] = {}
+            _merge(nested, value)
+        else:
+            _write_value(target, key, value)
+
+
+def _apply_update(data: Dict[str, Any], updates: Dict[str, Any]):
+    """Apply ``update()`` field paths (dotted, possibly backtick-quoted)."""
+    for field_path, value in updates.items():
+        parts = _parts(field_path)
+        container = data
+        for part in parts[:-1]:
+            nested = container.get(part)
+            if not isinstance(nested, dict):
+                if value is transforms.DELETE_FIELD:
+                    break
+                nested = container[part] = {}
+            container = nested
+        else:
+            _write_value(container, parts[-1], value)
+
+
+# ==================== Documents ====================
+
+class FakeDocumentSnapshot:
+    """Result of reading one document."""
+
+    def __init__(self, reference: 'FakeDocumentReference', data: Optional[Dict[str, Any]]):
+        self.reference = reference
+        self._data = data
+
+    @property
+    def id(self) -> str:
+        return self.reference.id
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field_path: str) -> Any:
+        value = _lookup(self._data or {}, _parts(field_path))
+        if value is _MISSING:
+            raise KeyError(field_path)
+        return copy.deepcopy(value)
+
+
+class FakeDocumentReference:
+    """Reference to ``<collection path>/<id>``."""
+
+    def __init__(self, client: 'FakeFirestore', collection_path: str, document_id: str):
+        self._client = client
+        self._collection_path = collection_path
+        self.id = document_id
+
+    @property
+    def path(self) -> str:
+        return f"{self._collection_path}/{self.id}"
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, FakeDocumentReference) and other.path == self.path
+
+    def __hash__(self) -> int:
+        return hash(self.path)
+
+    def collection(self, collection_id: str) -> 'FakeCollectionReference':
+        return FakeCollectionReference(self._client, f"{self.path}/{collection_id}")
+
+    def get(self, field_paths=None, transaction: Optional['FakeTransaction'] = None, **kwargs) -> FakeDocumentSnapshot:
+        return next(self._client.get_all([self], transaction=transaction))
+
+    def set(self, document_data: Dict[str, Any], merge: bool = False, **kwargs):
+        self._client._rpc()
+        self._client._write(self, 'set', document_data, merge)
+
+    def create(self, document_data: Dict[str, Any], **kwargs):
+        self._client._rpc()
+        self._client._write(self, 'create', document_data)
+
+    def update(self, field_updates: Dict[str, Any], **kwargs):
+        self._client._rpc()
+        self._client._write(self, 'update', field_updates)
+
+    def delete(self, **kwargs):
+        self._client._rpc()
+        self._client._write(self, 'delete')
+
+
+# ==================== Queries ====================
+
+class FakeQuery:
+    """Immutable query over one collection."""
+
+    def __init__(self, client: 'FakeFirestore', collection_path: str, filters=(), orders=(),
+                 limit: Optional[int] = None, offset: int = 0, cursor=None):
+        self._client = client
+        self._collection_path = collection_path
+        self._filters: Tuple[Tuple[Tuple[str, ...], str, Any], ...] = tuple(filters)
+        self._orders: Tuple[Tuple[Tuple[str, ...], str], ...] = tuple(orders)
+        self._limit = limit
+        self._offset = offset
+        self._cursor = cursor
+
+    def _copy(self, **changes) -> 'FakeQuery':
+        state = {'filters': self._filters, 'orders': self._orders, 'limit': self._limit,
+                 'offset': self._offset, 'cursor': self._cursor}
+        state.update(changes)
+        return FakeQuery(self._client, self._collection_path, **state)
+
+    def where(self, field_path=None, op_string=None, value=None, *, filter=None) -> 'FakeQuery':
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copy(filters=self._filters + ((_parts(field_path), op_string, value),))
+
+    def order_by(self, field_path, direction: str = ASCENDING) -> 'FakeQuery':
+        return self._copy(orders=self._orders + ((_parts(field_path), direction),))
+
+    def limit(self, count: int) -> 'FakeQuery':
+        return self._copy(limit=count)
+
+    def offset(self, num_to_skip: int) -> 'FakeQuery':
+        return self._copy(offset=num_to_skip)
+
+    def start_at(self, document_fields_or_snapshot) -> 'FakeQuery':
+        return self._copy(cursor=(document_fields_or_snapshot, False))
+
+    def start_after(self, document_fields_or_snapshot) -> 'FakeQuery':
+        return self._copy(cursor=(document_fields_or_snapshot, True))
+
+    def _order_fields(self) -> List[Tuple[Tuple[str, ...], str]]:
+        orders = list(self._orders)
+        if not any(parts == (_NAME,) for parts, _ in orders):
+            direction = orders[-1][1] if orders else ASCENDING
+            orders.append(((_NAME,), direction))
+        return orders
+
+    @staticmethod
+    def _field(doc_id: str, data: Dict[str, Any], parts: Tuple[str, ...]) -> Any:
+        return doc_id if parts == (_NAME,) else _lookup(data, parts)
+
+    def _cursor_values(self, orders) -> List[Any]:
+        fields, _ = self._cursor
+        if isinstance(fields, FakeDocumentSnapshot):
+            return [self._field(fields.id, fields._data or {}, parts) for parts, _ in orders]
+        values = []
+        for parts, _ in orders:
+            key = FieldPath(*parts).to_api_repr() if parts != (_NAME,) else _NAME
+            if key not in fields:
+                break
+            value = fields[key]
+            if parts == (_NAME,) and isinstance(value, FakeDocumentReference):
+                value = value.id
+            elif parts == (_NAME,) and isinstance(value, str):
+                value = value.rsplit('/', 1)[-1]
+            values.append(value)
+        return values
+
+    def _run(self, rows: Iterable[Tuple[str, Dict[str, Any], int]]) -> List[Tuple[str, Dict[str, Any], int]]:
+        orders = self._order_fields()
+        matched = [
+            (doc_id, data, version) for doc_id, data, version in rows
+            if all(_matches(_lookup(data, parts), op, value) for parts, op, value in self._filters)
+            # Documents missing an order_by field are excluded, as in Firestore
+            and all(self._field(doc_id, data, parts) is not _MISSING for parts, _ in orders)
+        ]
+
+        def order(left, right):
+            for parts, direction in orders:
+                result = _compare(self._field(left[0], left[1], parts), self._field(right[0], right[1], parts))
+                if result:
+                    return -result if direction == DESCENDING else result
+            return 0
+
+        matched.sort(key=functools.cmp_to_key(order))
+
+        if self._cursor is not None:
+            values = self._cursor_values(orders)
+            exclusive = self._cursor[1]
+
+            def past_cursor(row):
+                for (parts, direction), value in zip(orders, values):
+                    result = _compare(self._field(row[0], row[1], parts), value)
+                    if result:
+                        return (-result if direction == DESCENDING else result) > 0
+                return not exclusive
+
+            matched = [row for row in matched if past_cursor(row)]
+
+        matched = matched[self._offset:]
+        if self._limit is not None:
+            matched = matched[:self._limit]
+        return matched
+
+    def stream(self, transaction: Optional['FakeTransaction'] = None, **kwargs) -> Iterator[FakeDocumentSnapshot]:
+        self._client._rpc()
+        rows = self._run(self._client._rows(self._collection_path))
+        collection = FakeCollectionReference(self._client, self._collection_path)
+        for doc_id, data, version in rows:
+            reference = collection.document(doc_id)
+            if transaction is not None:
+                transaction._reads.setdefault(reference.path, version)
+            yield FakeDocumentSnapshot(reference, data)
+
+    def get(self, transaction: Optional['FakeTransaction'] = None, **kwargs) -> List[FakeDocumentSnapshot]:
+        return list(self.stream(transaction=transaction))
+
+
+class FakeCollectionReference(FakeQuery):
+    """Collection: a query over all of its documents that also hands out references."""
+
+    def __init__(self, client: 'FakeFirestore', path: str):
+        super().__init__(client, path)
+
+    @property
+    def id(self) -> str:
+        return self._collection_path.rsplit('/', 1)[-1]
+
+    def document(self, document_id: Optional[str] = None) -> FakeDocumentReference:
+        return FakeDocumentReference(self._client, self._collection_path, document_id or uuid.uuid4().hex[:20])
+
+    def add(self, document_data: Dict[str, Any], document_id: Optional[str] = None, **kwargs):
+        reference = self.document(document_id)
+        reference.create(document_data)
+        return datetime.now(timezone.utc), reference
+
+    def list_documents(self, **kwargs) -> List[FakeDocumentReference]:
+        return [self.document(doc_id) for doc_id, _, _ in self._client._rows(self._collection_path)]
+
+
+# ==================== Batches and transactions ====================
+
+class FakeWriteBatch:
+    """Writes applied together on commit()."""
+
+    def __init__(self, client: 'FakeFirestore'):
+        self._client = client
+        self._writes: List[Tuple[FakeDocumentReference, str, Any, bool]] = []
+
+    def set(self, reference: FakeDocumentReference, document_data: Dict[str, Any], merge: bool = False):
+        self._writes.append((reference, 'set', document_data, merge))
+
+    def create(self, reference: FakeDocumentReference, document_data: Dict[str, Any]):
+        self._writes.append((reference, 'create', document_data, False))
+
+    def update(self, reference: FakeDocumentReference, field_updates: Dict[str, Any], **kwargs):
+        self._writes.append((reference, 'update', field_updates, False))
+
+    def delete(self, reference: FakeDocumentReference, **kwargs):
+        self._writes.append((reference, 'delete', None, False))
+
+    def commit(self, **kwargs) -> List[Any]:
+        self._client._rpc()
+        writes, self._writes = self._writes, []
+        self._client._commit(writes)
+        return [None] * len(writes)
+
+
+class FakeTransaction(FakeWriteBatch):
+    """
+    Optimistic transaction driven by ``firestore.transactional``
+    (which uses the private ``_begin`` / ``_commit`` / ``_rollback`` API).
+    """
+
+    def __init__(self, client: 'FakeFirestore', max_attempts: int = 5, read_only: bool = False):
+        super().__init__(client)
+        self._max_attempts = max_attempts
+        self._read_only = read_only
+        self._id: Optional[bytes] = None
+        self._reads: Dict[str, int] = {}
+
+    @property
+    def in_progress(self) -> bool:
+        return self._id is not None
+
+    @property
+    def id(self) -> Optional[bytes]:
+        return self._id
+
+    def _clean_up(self):
+        self._writes = []
+        self._reads = {}
+        self._id = None
+
+    def _begin(self, retry_id: Optional[bytes] = None):
+        self._client._rpc()
+        self._id = uuid.uuid4().bytes
+
+    def _rollback(self):
+        self._clean_up()
+
+    def get(self, ref_or_query, **kwargs) -> Iterator[FakeDocumentSnapshot]:
+        if isinstance(ref_or_query, FakeDocumentReference):
+            return self._client.get_all([ref_or_query], transaction=self)
+        if isinstance(ref_or_query, FakeQuery):
+            return ref_or_query.stream(transaction=self)
+        raise ValueError('Value for argument "ref_or_query" must be a DocumentReference or a Query.')
+
+    def _commit(self) -> List[Any]:
+        self._client._rpc()
+        writes = self._writes
+        try:
+            self._client._commit(writes, expected_versions=self._reads)
+        finally:
+            self._clean_up()
+        return [None] * len(writes)
+
+    def commit(self, **kwargs) -> List[Any]:
+        return self._commit()
+
+
+# ==================== Client ====================
+
+class FakeFirestore:
+    """
+    Thread-safe in-memory stand-in for ``firestore.Client``.
+
+    Args:
+        latency: Seconds slept per RPC (simulated round trip)
+        abort_on_conflict: Abort transactions whose reads changed before commit
+    """
+
+    def __init__(self, latency: float = 0.0, abort_on_conflict: bool = True):
+        self.latency = latency
+        self.abort_on_conflict = abort_on_conflict
+        self._lock = threading.RLock()
+        self._collections: Dict[str, Dict[str, Tuple[Dict[str, Any], int]]] = {}
+        self._versions = itertools.count(1)
+        self.rpc_count = 0
+
+    # ---- client API ----
+
+    def collection(self, *path: str) -> FakeCollectionReference:
+        return FakeCollectionReference(self, '/'.join(path))
+
+    def document(self, *path: str) -> FakeDocumentReference:
+        full = '/'.join(path)
+        collection_path, document_id = full.rsplit('/', 1)
+        return FakeDocumentReference(self, collection_path, document_id)
+
+    def get_all(self, references: Iterable[FakeDocumentReference], field_paths=None,
+                transaction: Optional[FakeTransaction] = None, **kwargs) -> Iterator[FakeDocumentSnapshot]:
+        references = list(references)
+        self._rpc()
+        with self._lock:
+            rows = [self._collections.get(ref._collection_path, {}).get(ref.id) for ref in references]
+        for reference, row in zip(references, rows):
+            if transaction is not None:
+                transaction._reads.setdefault(reference.path, row[1] if row else 0)
+            yield FakeDocumentSnapshot(reference, row[0] if row else None)
+
+    def batch(self) -> FakeWriteBatch:
+        return FakeWriteBatch(self)
+
+    def transaction(self, max_attempts: int = 5, read_only: bool = False) -> FakeTransaction:
+        return FakeTransaction(self, max_attempts=max_attempts, read_only=read_only)
+
+    def collections(self) -> List[FakeCollectionReference]:
+        with self._lock:
+            return [FakeCollectionReference(self, path) for path in sorted(self._collections) if '/' not in path]
+
+    # ---- test helpers ----
+
+    def seed(self, collection_path: str, documents: Dict[str, Dict[str, Any]]):
+        """Insert documents directly (no RPC, no latency)."""
+        with self._lock:
+            collection = self._collections.setdefault(collection_path, {})
+            for document_id, data in documents.items():
+                stored: Dict[str, Any] = {}
+                _merge(stored, data)
+                collection[document_id] = (stored, next(self._versions))
+
+    def dump(self, collection_path: str) -> Dict[str, Dict[str, Any]]:
+        """Copy of every document in a collection."""
+        with self._lock:
+            rows = dict(self._collections.get(collection_path, {}))
+        return {doc_id: copy.deepcopy(data) for doc_id, (data, _) in rows.items()}
+
+    # ---- internals ----
+
+    def _rpc(self):
+        with self._lock:
+            self.rpc_count += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _rows(self, collection_path: str) -> List[Tuple[str, Dict[str, Any], int]]:
+        with self._lock:
+            return [(doc_id, data, version)
+                    for doc_id, (data, version) in self._collections.get(collection_path, {}).items()]
+
+    def _write(self, reference: FakeDocumentReference, kind: str, data: Any = None, merge: bool = False):
+        self._commit([(reference, kind, data, merge)])
+
+    def _commit(self, writes: List[Tuple[FakeDocumentReference, str, Any, bool]],
+                expected_versions: Optional[Dict[str, int]] = None):
+        """Apply writes atomically; stored documents are replaced, never mutated."""
+        with self._lock:
+            if expected_versions and self.abort_on_conflict:
+                for path, version in expected_versions.items():
+                    collection_path, document_id = path.rsplit('/', 1)
+                    row = self._collections.get(collection_path, {}).get(document_id)
+                    if (row[1] if row else 0) != version:
+                        raise exceptions.Aborted(f"Transaction conflict on {path}")
+
+            for reference, kind, payload, merge in writes:
+                collection = self._collections.setdefault(reference._collection_path, {})
+                row = collection.get(reference.id)
+                if kind == 'delete':
+                    collection.pop(reference.id, None)
+                    continue
+                if kind == 'create' and row is not None:
+                    raise exceptions.AlreadyExists(f"Document already exists: {reference.path}")
+                if kind == 'update' and row is None:
+                    raise exceptions.NotFound(f"No document to update: {reference.path}")
+
+                data: Dict[str, Any] = copy.deepcopy(row[0]) if row is not None and (merge or kind == 'update') else {}
+                if kind == 'update':
+                    _apply_update(data, payload)
+                else:
+                    _merge(data, payload)
+                collection[reference.id] = (data, next(self._versions))
+
+
+# ==================== Async client ====================
+
+class FakeAsyncDocumentReference:
+    """``AsyncDocumentReference`` over a fake document."""
+
+    def __init__(self, reference: FakeDocumentReference):
+        self._reference = reference
+
+    @property
+    def id(self) -> str:
+        return self._reference.id
+
+    async def get(self, **kwargs) -> FakeDocumentSnapshot:
+        return await asyncio.to_thread(self._reference.get, **kwargs)
+
+
+class FakeAsyncQuery:
+    """``AsyncQuery`` / ``AsyncCollectionReference`` over a fake query."""
+
+    def __init__(self, query: FakeQuery):
+        self._query = query
+
+    def _chain(self, name: str, *args, **kwargs) -> 'FakeAsyncQuery':
+        return FakeAsyncQuery(getattr(self._query, name)(*args, **kwargs))
+
+    def where(self, *args, **kwargs) -> 'FakeAsyncQuery':
+        return self._chain('where', *args, **kwargs)
+
+    def order_by(self, *args, **kwargs) -> 'FakeAsyncQuery':
+        return self._chain('order_by', *args, **kwargs)
+
+    def limit(self, count: int) -> 'FakeAsyncQuery':
+        return self._chain('limit', count)
+
+    def start_after(self, document_fields_or_snapshot) -> 'FakeAsyncQuery':
+        return self._chain('start_after', document_fields_or_snapshot)
+
+    def document(self, document_id: Optional[str] = None) -> FakeAsyncDocumentReference:
+        return FakeAsyncDocumentReference(self._query.document(document_id))
+
+    async def stream(self, **kwargs):
+        for snapshot in await asyncio.to_thread(self._query.get, **kwargs):
+            yield snapshot
+
+
+class FakeAsyncFirestore:
+    """Read-only ``firestore.AsyncClient`` stand-in sharing a FakeFirestore's data."""
+
+    def __init__(self, client: FakeFirestore):
+        self._client = client
+
+    def collection(self, *path: str) -> FakeAsyncQuery:
+        return FakeAsyncQuery(self._client.collection(*path))
+
+    def document(self, *path: str) -> FakeAsyncDocumentReference:
+        return FakeAsyncDocumentReference(self._client.document(*path))
+
+    async def get_all(self, references: Iterable[FakeAsyncDocumentReference], **kwargs):
+        sync_references = [reference._reference for reference in references]
+        for snapshot in await asyncio.to_thread(lambda: list(self._client.get_all(sync_references, **kwargs))):
+            yield snapshot
@@ -0,0 +1,336 @@
+"""
+Concurrent shopper load test.
+
+Simulated shoppers run the real ``AuthService`` and ``FirebaseService`` code
+paths against the in-memory Firestore fake (``loadtest.fake_firestore``) and a
+fake Identity Toolkit endpoint. Every shopper goes through the same journey::
+
+    sign_in -> browse -> search -> product -> add_to_cart -> checkout -> orders
+
+Each step is timed and its Firestore reads/writes are taken from
+``services.firestore_metrics`` (the instrumented client counts them), so the
+report shows throughput, latency percentiles and document reads per step.
+``check_budgets`` turns the report into pass/fail against per-step read budgets.
+"""
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from unittest import mock
+
+import streamlit as st
+
+from loadtest.data import SEARCH_TERMS, seed_database, shopper_accounts, synthetic_products
+from loadtest.fake_firestore import FakeAsyncFirestore, FakeFirestore
+from utils.profiler import PERCENTILES, percentile
+
+
+STEPS = ('sign_in', 'browse', 'search', 'product', 'add_to_cart', 'checkout', 'orders')
+
+# Maximum p95 document reads per operation of each step (cold-cache reads of a
+# few operations fall above p95). Checked by check_budgets; raise a budget only
+# together with the change that needs it.
+DEFAULT_READ_BUDGETS = {
+    'sign_in': 1,
+    'browse': 76,   # three pages of PRODUCTS_PER_PAGE + 1, plus the category summary
+    'search': 1,
+    'product': 1,
+    'add_to_cart': 3,  # the cart line of each of up to 3 added products
+    'checkout': 8,  # cart, up to 3 products at review, then order + products in the order transaction
+    'orders': 11,   # ORDERS_PER_PAGE + 1
+}
+
+
+# ==================== Fake backend ====================
+
+class _FakeResponse:
+    def __init__(self, status_code: int, payload: Dict[str, Any]):
+        self.status_code = status_code
+        self._payload = payload
+
+    def json(self) -> Dict[str, Any]:
+        return self._payload
+
+
+class FakeIdentityToolkit:
+    """Answers the Identity Toolkit REST calls made by AuthService."""
+
+    def __init__(self, accounts: List[Tuple[str, str, str]], latency: float = 0.0):
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._accounts = {email: (uid, password) for uid, email, password in accounts}
+
+    def post(self, url: str, json: Optional[Dict[str, Any]] = None, **kwargs) -> _FakeResponse:
+        if self.latency:
+            time.sleep(self.latency)
+        payload = json or {}
+        email = payload.get('email')
+        if ':signInWithPassword' in url:
+            account = self._accounts.get(email)
+            if account is None:
+                return _FakeResponse(400, {'error': {'message': 'EMAIL_NOT_FOUND'}})
+            if account[1] != payload.get('password'):
+                return _FakeResponse(400, {'error': {'message': 'INVALID_PASSWORD'}})
+            return _FakeResponse(200, self._session(account[0], email))
+        if ':signUp' in url:
+            with self._lock:
+                if email in self._accounts:
+                    return _FakeResponse(400, {'error': {'message': 'EMAIL_EXISTS'}})
+                uid = f"user{len(self._accounts):05d}"
+                self._accounts[email] = (uid, payload.get('password'))
+            return _FakeResponse(200, self._session(uid, email))
+        return _FakeResponse(400, {'error': {'message': 'UNSUPPORTED'}})
+
+    @staticmethod
+    def _session(uid: str, email: str) -> Dict[str, Any]:
+        return {'localId': uid, 'email': email, 'idToken': f"token-{uid}", 'refreshToken': f"refresh-{uid}"}
+
+
+@contextmanager
+def fake_backend(db: FakeFirestore, identity: FakeIdentityToolkit) -> Iterator[None]:
+    """
+    Point the services at the fakes and start from cold caches.
+    Per-RPC and per-rerun log lines are silenced for the duration.
+    """
+    metrics_logger = logging.getLogger('services.firestore_metrics')
+    level = metrics_logger.level
+    with ExitStack() as stack:
+        stack.enter_context(mock.patch('firebase_admin.get_app', lambda *args, **kwargs: object()))
+        stack.enter_context(mock.patch('services.firestore_client.create_firestore_client', lambda app: db))
+        stack.enter_context(mock.patch('services.firestore_client.create_async_firestore_client',
+                                       lambda app: FakeAsyncFirestore(db)))
+        stack.enter_context(mock.patch('services.auth_service.get_firebase_api_key', lambda: 'loadtest'))
+        stack.enter_context(mock.patch('services.auth_service._get_http_session', lambda: identity))
+        stack.enter_context(mock.patch('config.Config.CATALOG_LISTENER_ENABLED', False))
+        metrics_logger.setLevel(logging.WARNING)
+        st.cache_data.clear()
+        st.cache_resource.clear()
+        try:
+            yield
+        finally:
+            metrics_logger.setLevel(level)
+            st.cache_data.clear()
+            st.cache_resource.clear()
+
+
+# ==================== Shoppers ====================
+
+class Shopper:
+    """One simulated user walking through the store."""
+
+    def __init__(self, account: Tuple[str, str, str], seed: int):
+        from services.firebase_service import FirebaseService
+
+        self.uid, self.email, self.password = account
+        self.rng = random.Random(seed)
+        self.firebase = FirebaseService()
+        self.seen: List[Dict[str, Any]] = []
+        self.product: Optional[Dict[str, Any]] = None
+
+    def sign_in(self) -> bool:
+        from services.auth_service import AuthService
+        user = AuthService.sign_in(self.email, self.password)
+        return bool(user) and user['uid'] == self.uid
+
+    def browse(self) -> bool:
+        categories = self.firebase.get_categories()
+        category = self.rng.choice([None] + categories)
+        sort = self.rng.choice(list(self.firebase.PRODUCT_SORTS))
+        cursor = None
+        for _ in range(self.rng.randint(1, 3)):
+            page = self.firebase.get_products_page(cursor=cursor, sort=sort, category=category)
+            self.seen.extend(page['products'])
+            cursor = page['next_cursor']
+            if not cursor:
+                break
+        return bool(categories) and bool(self.seen)
+
+    def search(self) -> bool:
+        page = self.firebase.get_products_page(search_query=self.rng.choice(SEARCH_TERMS))
+        self.seen.extend(page['products'])
+        return True
+
+    def view_product(self) -> bool:
+        self.product = self.firebase.get_product_by_id(self.rng.choice(self.seen)['id'])
+        return self.product is not None
+
+    def add_to_cart(self) -> bool:
+        picks = [self.product] + self.rng.sample(self.seen, min(len(self.seen), self.rng.randint(0, 2)))
+        return all(
+            self.firebase.add_to_cart(self.uid, product['id'], self.rng.randint(1, 3), product=product)
+            for product in picks
+        )
+
+    def checkout(self) -> bool:
+        from config import Config
+        from services.checkout import new_order_id
+        from utils.formatters import calculate_total
+
+        items = self.firebase.get_user_cart(self.uid)
+        # Review step: current prices, and lines out of stock left behind
+        check = self.firebase.validate_cart(items)
+        failing = {error.details.get('product_id') for error in check['errors']}
+        items = [item for item in check['items'] if item['product_id'] not in failing]
+        if not items:
+            return False
+        totals = calculate_total(items, tax_rate=Config.DEFAULT_TAX_RATE, shipping=Config.DEFAULT_SHIPPING_COST)
+        order_id = self.firebase.place_order(self.uid, new_order_id(), {
+            'items': items,
+            'totals': totals,
+            'shipping_info': {'city': 'Madrid', 'country': 'ES'},
+            'payment_info': {'method': 'PayPal'},
+        })
+        return bool(order_id)
+
+    def orders(self) -> bool:
+        return bool(self.firebase.get_user_orders_page(self.uid)['orders'])
+
+    def journey(self) -> List[Tuple[str, Callable[[], bool]]]:
+        return [
+            ('sign_in', self.sign_in),
+            ('browse', self.browse),
+            ('search', self.search),
+            ('product', self.view_product),
+            ('add_to_cart', self.add_to_cart),
+            ('checkout', self.checkout),
+            ('orders', self.orders),
+        ]
+
+
+# ==================== Runner ====================
+
+class LoadTest:
+    """
+    Run ``shoppers`` journeys on ``concurrency`` threads.
+
+    Args:
+        shoppers: Number of simulated users (each runs the journey once)
+        concurrency: Users active at the same time
+        catalog_size: Products in the synthetic catalog
+        latency: Simulated seconds per Firestore RPC / auth request
+        seed: Random seed for data and shopper choices
+    """
+
+    def __init__(self, shoppers: int = 200, concurrency: int = 50, catalog_size: int = 1000,
+                 latency: float = 0.002, seed: int = 0):
+        self.shoppers = shoppers
+        self.concurrency = concurrency
+        self.catalog_size = catalog_size
+        self.latency = latency
+        self.seed = seed
+        self._lock = threading.Lock()
+        self._samples: Dict[str, List[Dict[str, Any]]] = {step: [] for step in STEPS}
+
+    def run(self) -> Dict[str, Any]:
+        """Seed the fake, run every shopper and return the report."""
+        accounts = shopper_accounts(self.shoppers)
+        db = FakeFirestore(latency=self.latency)
+        seed_database(db, synthetic_products(self.catalog_size, self.seed), accounts)
+        identity = FakeIdentityToolkit(accounts, latency=self.latency)
+
+        with fake_backend(db, identity):
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='shopper') as pool:
+                for _ in pool.map(self._run_shopper, [(account, self.seed + index)
+                                                      for index, account in enumerate(accounts)]):
+                    pass
+            duration = time.perf_counter() - start
+
+        return self.report(duration, db.rpc_count)
+
+    def _run_shopper(self, args: Tuple[Tuple[str, str, str], int]):
+        from services.firestore_metrics import track_rerun
+
+        account, seed = args
+        shopper = Shopper(account, seed)
+        for step, action in shopper.journey():
+            with track_rerun(f"loadtest:{step}", budget=0) as counters:
+                start = time.perf_counter()
+                try:
+                    ok = bool(action())
+                except Exception:
+                    ok = False
+                latency_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self._samples[step].append({'latency_ms': latency_ms, 'ok': ok, **counters})
+            if not ok:
+                break
+
+    def report(self, duration: float, rpc_count: int) -> Dict[str, Any]:
+        """
+        Summarize the samples.
+
+        Returns:
+            {'shoppers', 'concurrency', 'duration_s', 'journeys_per_s', 'firestore_rpcs',
+             'steps': {step: {'count', 'errors', 'ops_per_s', 'latency_ms': {...},
+                              'reads': {'total', 'mean', 'p95', 'max'}, 'writes': {'total', 'mean'}}}}
+        """
+        steps = {}
+        for step in STEPS:
+            samples = self._samples[step]
+            latencies = [sample['latency_ms'] for sample in samples]
+            reads = [sample['reads'] for sample in samples]
+            writes = [sample['writes'] + sample['deletes'] for sample in samples]
+            count = len(samples)
+            latency = {f'p{pct}': round(percentile(latencies, pct), 2) for pct in PERCENTILES}
+            latency['max'] = round(max(latencies), 2) if latencies else 0
+            steps[step] = {
+                'count': count,
+                'errors': sum(1 for sample in samples if not sample['ok']),
+                'ops_per_s': round(count / duration, 1) if duration else 0,
+                'latency_ms': latency,
+                'reads': {'total': sum(reads), 'mean': round(sum(reads) / count, 2) if count else 0,
+                          'p95': percentile(reads, 95), 'max': max(reads) if reads else 0},
+                'writes': {'total': sum(writes), 'mean': round(sum(writes) / count, 2) if count else 0},
+            }
+        completed = self._samples['orders']
+        return {
+            'shoppers': self.shoppers,
+            'concurrency': self.concurrency,
+            'catalog_size': self.catalog_size,
+            'duration_s': round(duration, 3),
+            'journeys_per_s': round(sum(1 for sample in completed if sample['ok']) / duration, 1) if duration else 0,
+            'firestore_rpcs': rpc_count,
+            'steps': steps,
+        }
+
+
+def check_budgets(report: Dict[str, Any], budgets: Optional[Dict[str, float]] = None) -> List[str]:
+    """
+    Compare a report with per-step read budgets.
+
+    Returns:
+        Human-readable violations (empty when every step errored zero times and
+        stayed within its budget)
+    """
+    budgets = DEFAULT_READ_BUDGETS if budgets is None else budgets
+    violations = []
+    for step, stats in report['steps'].items():
+        if stats['errors']:
+            violations.append(f"{step}: {stats['errors']} of {stats['count']} operations failed")
+        budget = budgets.get(step)
+        if budget is not None and stats['reads']['p95'] > budget:
+            violations.append(f"{step}: p95 of {stats['reads']['p95']} reads/op exceeds budget of {budget}")
+    return violations
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Plain-text table of a report."""
+    lines = [
+        f"{report['shoppers']} shoppers, {report['concurrency']} concurrent, "
+        f"{report['catalog_size']} products: {report['duration_s']}s, "
+        f"{report['journeys_per_s']} journeys/s, {report['firestore_rpcs']} Firestore RPCs",
+        f"{'step':<12}{'ops':>6}{'err':>5}{'ops/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        f"{'reads p95':>11}{'reads':>8}{'writes':>8}",
+    ]
+    for step, stats in report['steps'].items():
+        latency = stats['latency_ms']
+        lines.append(
+            f"{step:<12}{stats['count']:>6}{stats['errors']:>5}{stats['ops_per_s']:>9}"
+            f"{latency['p50']:>9}{latency['p95']:>9}{latency['p99']:>9}"
+            f"{stats['reads']['p95']:>11}{stats['reads']['total']:>8}{stats['writes']['total']:>8}"
+        )
+    return '\n'.join(lines)
@@ -0,0 +1,271 @@
+"""
+Asyncio variant of the FirebaseService read path.
+
+Pages that need several independent reads (the user profile, cart product
+details, a page of orders) issue them one after another through
+``FirebaseService``, so a rerun waits for the sum of the round trips.
+``AsyncFirebaseService`` offers the same read methods as coroutines on a
+``google.cloud.firestore.AsyncClient``, so they can be awaited together and
+a rerun waits for roughly the slowest one:
+
+    overview = get_async_firebase().get_account_overview(uid)
+
+Streamlit scripts are synchronous, so the service runs on one process-wide
+event loop in a background thread (``EventLoopThread``; the AsyncClient's
+channel is bound to that loop). ``SyncFirebaseFacade`` exposes every
+coroutine method as a blocking call, so script code calls it like
+``FirebaseService``. ``gather()`` runs several of them concurrently.
+
+The caches are the ones FirebaseService uses (catalog store, product cache,
+profile cache). Unlike FirebaseService, errors are raised rather than shown
+with ``st.error``: the coroutines run off the script thread. RPCs on the
+async client are not counted by services/firestore_metrics.py.
+"""
+import asyncio
+import functools
+import inspect
+import threading
+from datetime import datetime
+from typing import Any, Awaitable, Dict, List, Optional
+
+import streamlit as st
+
+from config import Config
+from services import firestore_client
+from services.cart_model import LEGACY_CART_FIELD
+from services.firebase_service import (
+    FirebaseService, _get_catalog_store, _get_firebase_app, _get_product_cache, _get_profile_cache,
+)
+from services.profile_cache import profile_from_document
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+class AsyncFirebaseService:
+    """Read methods of FirebaseService as coroutines on an AsyncClient."""
+
+    GET_ALL_CHUNK_SIZE = FirebaseService.GET_ALL_CHUNK_SIZE
+
+    def __init__(self, db: Any):
+        """
+        Args:
+            db: ``firestore.AsyncClient`` (or a fake with the same API)
+        """
+        self.db = db
+
+    # ==================== Products ====================
+
+    async def get_product_by_id(self, product_id: str) -> Optional[Dict[str, Any]]:
+        """Get a single product by ID (shared product cache first)."""
+        products = await self.get_products_by_ids([product_id])
+        return products.get(product_id)
+
+    async def get_products_by_ids(self, product_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get several products by ID.
+        Products missing from the catalog store and product cache are read
+        with ``get_all`` calls of GET_ALL_CHUNK_SIZE documents, all in flight
+        at once.
+
+        Returns:
+            Product ID -> product (IDs that do not exist are left out)
+        """
+        store = _get_catalog_store()
+        cache = _get_product_cache()
+        products: Dict[str, Dict[str, Any]] = {}
+        missing = []
+        for product_id in dict.fromkeys(product_ids):
+            if store is not None and product_id in store:
+                products[product_id] = store.get(product_id)
+                continue
+            product = cache.get(product_id)
+            if product is not None:
+                products[product_id] = product
+            else:
+                missing.append(product_id)
+
+        products_ref = self.db.collection('products')
+        chunks = [missing[start:start + self.GET_ALL_CHUNK_SIZE]
+                  for start in range(0, len(missing), self.GET_ALL_CHUNK_SIZE)]
+        for docs in await asyncio.gather(*(self._get_all(products_ref, chunk) for chunk in chunks)):
+            for doc in docs:
+                product = doc.to_dict()
+                product['id'] = doc.id
+                cache.put(product)
+                products[doc.id] = dict(product)
+        return products
+
+    # ==================== Users ====================
+
+    async def get_user_profile(self, user_id: str, fresh: bool = False) -> Optional[Dict[str, Any]]:
+        """Cached user profile (see FirebaseService.get_user_profile)."""
+        cache = _get_profile_cache()
+        if fresh:
+            cache.invalidate(user_id)
+        profile = cache.get(user_id)
+        if profile is not None:
+            return profile
+
+        version = cache.version(user_id)
+        user_doc = await self.db.collection('users').document(user_id).get()
+        if not user_doc.exists:
+            return None
+        user_data = user_doc.to_dict()
+        if user_data.get(LEGACY_CART_FIELD):
+            # Rare one-time migration: let the sync service run its transaction
+            return await asyncio.to_thread(FirebaseService().get_user_profile, user_id)
+
+        profile = profile_from_document(user_data)
+        cache.put(user_id, profile, version)
+        return profile
+
+    async def get_user_cart_state(self, user_id: str, fresh: bool = False) -> Dict[str, Any]:
+        """User's cart items and cart_version."""
+        profile = await self.get_user_profile(user_id, fresh=fresh)
+        if profile is None:
+            return {'items': [], 'version': 0}
+        return {'items': profile['cart_items'], 'version': profile['cart_version']}
+
+    async def get_user_cart(self, user_id: str) -> List[Dict[str, Any]]:
+        """User's cart items."""
+        return (await self.get_user_cart_state(user_id))['items']
+
+    # ==================== Orders ====================
+
+    async def get_user_orders(self, user_id: str) -> List[Dict[str, Any]]:
+        """All of a user's orders, newest first (order chunks read concurrently)."""
+        profile = await self.get_user_profile(user_id)
+        if profile is None:
+            return []
+
+        order_ids = profile['order_ids']
+        orders_ref = self.db.collection('orders')
+        chunks = [order_ids[start:start + self.GET_ALL_CHUNK_SIZE]
+                  for start in range(0, len(order_ids), self.GET_ALL_CHUNK_SIZE)]
+        orders = []
+        for docs in await asyncio.gather(*(self._get_all(orders_ref, chunk) for chunk in chunks)):
+            for doc in docs:
+                order = doc.to_dict()
+                order['id'] = doc.id
+                orders.append(order)
+        orders.sort(key=lambda order: order.get('created_at', datetime.min), reverse=True)
+        return orders
+
+    async def get_user_orders_page(self, user_id: str, cursor: Optional[str] = None,
+                                   page_size: Optional[int] = None) -> Dict[str, Any]:
+        """One page of a user's orders, newest first (see FirebaseService.get_user_orders_page)."""
+        page_size = page_size or Config.ORDERS_PER_PAGE
+        query = FirebaseService._orders_page_query(self.db.collection('orders'), user_id, cursor, page_size)
+        docs = [doc async for doc in query.stream()]
+        return FirebaseService._orders_page(docs, user_id, page_size)
+
+    # ==================== Page loads ====================
+
+    async def get_account_overview(self, user_id: str, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Everything the account page reads, fetched concurrently.
+
+        Returns:
+            Dictionary with 'profile' (or None) and 'orders_page'
+        """
+        profile, orders_page = await asyncio.gather(
+            self.get_user_profile(user_id),
+            self.get_user_orders_page(user_id, cursor),
+        )
+        return {'profile': profile, 'orders_page': orders_page}
+
+    async def get_cart_details(self, user_id: str, fresh: bool = False) -> Dict[str, Any]:
+        """
+        The user's cart with the current product documents of its items.
+
+        Returns:
+            Dictionary with 'items', 'version' and 'products' (product ID -> product)
+        """
+        state = await self.get_user_cart_state(user_id, fresh=fresh)
+        products = await self.get_products_by_ids([item['product_id'] for item in state['items']])
+        return {**state, 'products': products}
+
+    # ==================== Internal helpers ====================
+
+    async def _get_all(self, collection_ref, document_ids: List[str]) -> List[Any]:
+        references = [collection_ref.document(document_id) for document_id in document_ids]
+        return [doc async for doc in self.db.get_all(references) if doc.exists]
+
+
+class EventLoopThread:
+    """An asyncio event loop running forever on a daemon thread."""
+
+    def __init__(self, name: str = 'firestore-async'):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def run(self, awaitable: Awaitable, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the loop and wait for its result from another thread."""
+        return asyncio.run_coroutine_threadsafe(_await(awaitable), self.loop).result(timeout)
+
+    def stop(self):
+        """Stop the loop (pending coroutines are abandoned)."""
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+async def _await(awaitable: Awaitable) -> Any:
+    return await awaitable
+
+
+class SyncFirebaseFacade:
+    """Blocking view of an AsyncFirebaseService for synchronous callers."""
+
+    def __init__(self, service: AsyncFirebaseService, runner: EventLoopThread, timeout: float = 30.0):
+        """
+        Args:
+            service: Async service whose coroutine methods are exposed
+            runner: Loop the coroutines run on
+            timeout: Seconds a call may take before ``TimeoutError``
+        """
+        self.service = service
+        self.runner = runner
+        self.timeout = timeout
+
+    def __getattr__(self, name: str) -> Any:
+        method = getattr(self.service, name)
+        if not inspect.iscoroutinefunction(method):
+            return method
+
+        @functools.wraps(method)
+        def call(*args, **kwargs):
+            return self.runner.run(method(*args, **kwargs), self.timeout)
+        return call
+
+    def gather(self, *coroutines: Awaitable) -> List[Any]:
+        """
+        Run several service coroutines concurrently and wait for all of them.
+
+            profile, products = facade.gather(facade.service.get_user_profile(uid),
+                                              facade.service.get_products_by_ids(ids))
+        """
+        async def _gather():
+            return await asyncio.gather(*coroutines)
+        return self.runner.run(_gather(), self.timeout)
+
+
+@st.cache_resource
+def get_async_firebase() -> SyncFirebaseFacade:
+    """
+    Process-wide async service, its event loop thread and AsyncClient.
+
+    Returns:
+        SyncFirebaseFacade over AsyncFirebaseService
+
+    Raises:
+        ValueError: If Firebase is not configured (not cached)
+    """
+    client = firestore_client.create_async_firestore_client(_get_firebase_app())
+    logger.info("Async Firestore client created")
+    return SyncFirebaseFacade(AsyncFirebaseService(client), EventLoopThread())
@@ -1,17 +1,31 @@
 """
 Authentication service using Firebase Auth REST API.
 Handles user login and registration.
+
+REST calls share one pooled keep-alive session per process (see
+services/http_client.py), so logins after the first skip the TCP and TLS setup.
+ID tokens are verified locally against Google's cached public keys (see
+services/token_verifier.py); repeated checks of a token are served from memory.
+Signed-in users' tokens are refreshed in the background before they expire
+(see services/token_manager.py).
 """
 import streamlit as st
 from typing import Optional, Dict, Any
 import requests
+from config import Config
 from config.settings import get_firebase_api_key, get_firebase_project_id
+from services.firestore_metrics import track_methods
+from services.http_client import build_session
+from services.token_manager import TokenManager
+from services.token_verifier import PublicKeyCache, TokenVerifier, http_certs_fetcher
 
 
+@track_methods
 class AuthService:
     """Service for handling user authentication via Firebase Auth REST API."""
     
     FIREBASE_AUTH_BASE_URL = "https://identitytoolkit.googleapis.com/v1/accounts"
+    SECURE_TOKEN_URL = "https://securetoken.googleapis.com/v1/token"
     
     @staticmethod
     def _get_api_key() -> Optional[str]:
@@ -26,6 +40,18 @@ class AuthService:
         
         return api_key
     
+    @staticmethod
+    def _post(method: str, api_key: str, payload: Dict[str, Any]) -> requests.Response:
+        """
+        POST to an Identity Toolkit ``accounts:<method>`` endpoint through the shared session.
+        
+        Raises:
+            requests.exceptions.RequestException: On network errors and timeouts
+        """
+        url = f"{AuthService.FIREBASE_AUTH_BASE_URL}:{method}?key={api_key}"
+        timeout = (Config.AUTH_CONNECT_TIMEOUT, Config.AUTH_READ_TIMEOUT)
+        return _get_http_session().post(url, json=payload, timeout=timeout)
+    
     @staticmethod
     def sign_up(email: str, password: str, display_name: str = None) -> Optional[Dict[str, Any]]:
         """
@@ -44,8 +70,6 @@ class AuthService:
             return None
         
         try:
-            url = f"{AuthService.FIREBASE_AUTH_BASE_URL}:signUp?key={api_key}"
-            
             payload = {
                 "email": email,
                 "password": password,
@@ -55,7 +79,7 @@ class AuthService:
             if display_name:
                 payload["displayName"] = display_name
             
-            response = requests.post(url, json=payload, timeout=10)
+            response = AuthService._post('signUp', api_key, payload)
             
             if response.status_code == 200:
                 data = response.json()
@@ -69,7 +93,7 @@ class AuthService:
                     'email': email,
                     'display_name': display_name or email.split('@')[0],
                     'created_at': None,  # Will be set by Firestore
-                    'cart': [],
+                    'cart_items': {},
                     'orders': [],
                     'addresses': []
                 }
@@ -79,11 +103,15 @@ class AuthService:
                     db = firebase.get_db()
                     if db:
                         from datetime import datetime
+                        from services.firebase_service import _get_profile_cache
                         user_data['created_at'] = datetime.now()
                         db.collection('users').document(data.get('localId')).set(user_data)
+                        _get_profile_cache().invalidate(data.get('localId'))
                 except Exception:
                     pass  # Continue even if Firestore save fails
                 
+                AuthService._track_tokens(data)
+                
                 return {
                     'uid': data.get('localId'),
                     'email': data.get('email'),
@@ -128,34 +156,31 @@ class AuthService:
             return None
         
         try:
-            url = f"{AuthService.FIREBASE_AUTH_BASE_URL}:signInWithPassword?key={api_key}"
-            
             payload = {
                 "email": email,
                 "password": password,
                 "returnSecureToken": True
             }
             
-            response = requests.post(url, json=payload, timeout=10)
+            response = AuthService._post('signInWithPassword', api_key, payload)
             
             if response.status_code == 200:
                 data = response.json()
                 
-                # Get user display name from Firestore if available
+                # Get user display name from Firestore if available. This read
+                # fills the profile cache the cart and order list use next.
                 display_name = data.get('displayName', email.split('@')[0])
                 
                 try:
                     from services.firebase_service import FirebaseService
-                    firebase = FirebaseService()
-                    db = firebase.get_db()
-                    if db:
-                        user_doc = db.collection('users').document(data.get('localId')).get()
-                        if user_doc.exists:
-                            user_data = user_doc.to_dict()
-                            display_name = user_data.get('display_name', display_name)
+                    profile = FirebaseService().get_user_profile(data.get('localId'))
+                    if profile and profile.get('display_name'):
+                        display_name = profile['display_name']
                 except Exception:
                     pass
                 
+                AuthService._track_tokens(data)
+                
                 return {
                     'uid': data.get('localId'),
                     'email': data.get('email'),
@@ -183,29 +208,121 @@ class AuthService:
             st.error(f"Error during sign in: {str(e)}")
             return None
     
+    @staticmethod
+    def get_id_token(uid: str) -> Optional[str]:
+        """
+        Current ID token of a signed-in user, kept fresh in the background.
+        Never waits for a network call.
+        
+        Args:
+            uid: User ID
+            
+        Returns:
+            ID token, or None if the user is not signed in, was inactive for
+            Config.TOKEN_SESSION_IDLE_SECONDS, or the token expired
+        """
+        return _get_token_manager().token(uid)
+    
+    @staticmethod
+    def sign_out(uid: str):
+        """Stop refreshing a user's tokens."""
+        _get_token_manager().discard(uid)
+    
+    @staticmethod
+    def refresh_id_token(refresh_token: str) -> Optional[Dict[str, Any]]:
+        """
+        Exchange a refresh token for a new ID token (securetoken API).
+        Runs on the token manager's threads, so it reports errors by
+        return value and exceptions instead of Streamlit messages.
+        
+        Args:
+            refresh_token: Refresh token from sign-in or a previous refresh
+            
+        Returns:
+            Dictionary with 'id_token', 'refresh_token', 'expires_in' and 'uid',
+            or None if the refresh token was rejected
+            
+        Raises:
+            requests.exceptions.RequestException: On network and server errors
+            ValueError: If no Web API Key is configured
+        """
+        api_key = get_firebase_api_key()
+        if not api_key:
+            raise ValueError("Firebase Web API Key is required to refresh tokens")
+        
+        response = _get_http_session().post(
+            f"{AuthService.SECURE_TOKEN_URL}?key={api_key}",
+            data={'grant_type': 'refresh_token', 'refresh_token': refresh_token},
+            timeout=(Config.AUTH_CONNECT_TIMEOUT, Config.AUTH_READ_TIMEOUT)
+        )
+        if response.status_code in (400, 401, 403):
+            return None
+        response.raise_for_status()
+        
+        data = response.json()
+        return {
+            'id_token': data.get('id_token'),
+            'refresh_token': data.get('refresh_token'),
+            'expires_in': int(data.get('expires_in', 3600)),
+            'uid': data.get('user_id')
+        }
+    
+    @staticmethod
+    def _track_tokens(data: Dict[str, Any]):
+        """
+        Hand the tokens of a sign-in or sign-up response to the token manager.
+        Refreshing starts with the first get_id_token call for the user.
+        """
+        if data.get('localId') and data.get('idToken') and data.get('refreshToken'):
+            _get_token_manager().register(data['localId'], data['idToken'], data['refreshToken'],
+                                          int(data.get('expiresIn', 3600)), lazy=True)
+    
     @staticmethod
     def verify_token(id_token: str) -> Optional[Dict[str, Any]]:
         """
         Verify Firebase ID token.
         
+        The signature and claims are checked locally and the result is cached
+        until the token expires. Without a configured project ID the token is
+        checked with the ``accounts:lookup`` REST call instead.
+        
         Args:
             id_token: Firebase ID token
             
         Returns:
             Decoded token data, or None if invalid
         """
+        try:
+            verifier = _get_token_verifier()
+        except ValueError:
+            verifier = None
+        
+        if verifier is not None:
+            claims = verifier.verify(id_token)
+            if not claims:
+                return None
+            email = claims.get('email') or ''
+            return {
+                'uid': claims['uid'],
+                'email': claims.get('email'),
+                'display_name': claims.get('name') or email.split('@')[0]
+            }
+        
+        return AuthService._lookup_token(id_token)
+    
+    @staticmethod
+    def _lookup_token(id_token: str) -> Optional[Dict[str, Any]]:
+        """Verify an ID token with the Identity Toolkit ``accounts:lookup`` call."""
         api_key = AuthService._get_api_key()
         if not api_key:
             return None
         
         try:
-            url = f"https://identitytoolkit.googleapis.com/v1/accounts:lookup?key={api_key}"
-            
             payload = {
                 "idToken": id_token
             }
             
-            response = requests.post(url, json=payload, timeout=10)
+            response = AuthService._post('lookup', api_key, payload)
             
             if response.status_code == 200:
                 data = response.json()
@@ -221,3 +338,57 @@ class AuthService:
         except Exception:
             return None
 
+
+@st.cache_resource
+def _get_http_session() -> requests.Session:
+    """
+    Process-wide keep-alive session for the Identity Toolkit REST API.
+    Account creation is excluded from retries on server errors, since the
+    account may already exist by then.
+    
+    Returns:
+        requests.Session with a pooled, retrying adapter
+    """
+    return build_session(
+        pool_size=Config.AUTH_HTTP_POOL_SIZE,
+        retries=Config.AUTH_HTTP_RETRIES,
+        backoff_factor=Config.AUTH_HTTP_BACKOFF,
+        non_idempotent_prefixes=[f"{AuthService.FIREBASE_AUTH_BASE_URL}:signUp"],
+    )
+
+
+@st.cache_resource
+def _get_token_verifier() -> TokenVerifier:
+    """
+    Process-wide ID token verifier with its certificate and claims caches.
+    Certificates are fetched through the shared keep-alive session.
+    
+    Returns:
+        TokenVerifier for the configured Firebase project
+        
+    Raises:
+        ValueError: If no Firebase project ID is configured (not cached)
+    """
+    project_id = get_firebase_project_id()
+    if not project_id:
+        raise ValueError("Firebase project ID is required to verify ID tokens locally")
+    
+    fetch = http_certs_fetcher(_get_http_session(),
+                               timeout=(Config.AUTH_CONNECT_TIMEOUT, Config.AUTH_READ_TIMEOUT))
+    return TokenVerifier(project_id, PublicKeyCache(fetch), max_entries=Config.TOKEN_CACHE_MAX_ENTRIES)
+
+
+@st.cache_resource
+def _get_token_manager() -> TokenManager:
+    """
+    Process-wide manager refreshing signed-in users' ID tokens in the background.
+    
+    Returns:
+        TokenManager using the securetoken API
+    """
+    return TokenManager(
+        AuthService.refresh_id_token,
+        refresh_margin=Config.TOKEN_REFRESH_MARGIN_SECONDS,
+        idle_timeout=Config.TOKEN_SESSION_IDLE_SECONDS,
+        max_sessions=Config.TOKEN_SESSION_MAX_ENTRIES
+    )
@@ -0,0 +1,225 @@
+"""
+Write-behind cart buffer.
+
+CartStore applies cart mutations to the session's copy of the cart and
+stages them here, coalesced into one pending change per product. Pending changes are written to
+Firestore in a single update once the debounce interval has passed without
+further changes, or immediately when the cart must be durable (checkout,
+logout).
+
+Pending changes are quantity deltas, not absolute states: a flush adds
+each line's delta with ``firestore.Increment`` on
+``cart_items.<product_id>.quantity`` (and rewrites the line's snapshot
+fields). Sessions or tabs changing the same product at the same time
+therefore add up instead of overwriting each other's count, as with
+``add_to_cart``. A line removed (or a cart cleared) and then re-added in the
+same interval is written whole with its absolute quantity.
+
+Persistence semantics:
+- A flush is one atomic Firestore write: it either lands entirely or not at all.
+- A flush takes the pending changes as a batch and writes it without holding
+  the buffer's lock, so staging is never blocked by a network write; changes
+  staged meanwhile go into the next batch.
+- A batch is only discarded after a successful flush; failures keep it for the
+  next attempt (logged and kept in ``last_error``, since timer flushes run off
+  the script thread). Each batch carries a flush ID (the buffer's writer ID and
+  a sequence number) that is resent unchanged by retries, and the write skips
+  IDs it already applied, so a write that landed but was reported as failed
+  does not add its deltas twice.
+- The buffer is owned by the session's CartStore (kept in
+  ``st.session_state``), so it survives script exceptions and reruns.
+- A background timer flushes due changes even if the user never interacts
+  again. Changes from a session that dies before the timer fires (at most one
+  debounce interval of edits) are lost.
+"""
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+# Signature of the persistence callback: (user_id, changes, clear, flush_id) -> success.
+# Each change is None (remove the line) or {'item': line snapshot, 'quantity':
+# units to add, or the line's quantity when 'replace' is True, 'replace': bool}.
+# The same flush_id is passed again when a failed batch is retried.
+FlushFunction = Callable[[str, Dict[str, Optional[Dict[str, Any]]], bool, str], bool]
+
+_NOTHING = object()
+
+
+class CartWriteBuffer:
+    """Per-session write-behind buffer for one user's cart."""
+
+    def __init__(self, user_id: str, flush_fn: FlushFunction,
+                 debounce_seconds: float = 2.0, clock: Callable[[], float] = time.monotonic,
+                 use_timer: bool = True):
+        """
+        Args:
+            user_id: Owner of the cart
+            flush_fn: Callback that persists coalesced changes
+            debounce_seconds: Quiet period before pending changes are flushed
+            clock: Monotonic clock (injectable for tests)
+            use_timer: Schedule a background flush after each mutation
+        """
+        self.user_id = user_id
+        self.debounce_seconds = debounce_seconds
+        self._flush_fn = flush_fn
+        self._clock = clock
+        self._use_timer = use_timer
+        self._lock = threading.RLock()
+        # Serializes flushes so batches are written in order; never held by stage()
+        self._flush_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+        self._pending: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._pending_clear = False
+        self._writer_id = uuid.uuid4().hex
+        self._sequence = 0
+        # Batch taken by a flush and not confirmed yet: (flush_id, changes, clear)
+        self._batch: Optional[Tuple[str, Dict[str, Optional[Dict[str, Any]]], bool]] = None
+        self._last_change: Optional[float] = None
+        self.flush_count = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def has_pending(self) -> bool:
+        """Whether there are changes not persisted yet."""
+        with self._lock:
+            return bool(self._pending) or self._pending_clear or self._batch is not None
+
+    # ==================== Mutations ====================
+
+    def stage(self, product_id: str, item: Optional[Dict[str, Any]], delta: int = 0):
+        """
+        Record a change to one cart line.
+
+        Args:
+            product_id: Product ID
+            item: The line's new full state (None removes the line)
+            delta: Units added to the line by this change (negative when lowered)
+        """
+        with self._lock:
+            if item is None:
+                self._pending[product_id] = None
+                self._touch()
+                return
+
+            pending = self._pending.get(product_id, _NOTHING)
+            replace = pending is None or self._pending_clear or (pending is not _NOTHING and pending['replace'])
+            if replace:
+                quantity = item['quantity']
+            else:
+                quantity = delta + (pending['quantity'] if pending is not _NOTHING else 0)
+                if quantity == 0:
+                    # Changes that cancel out need no write
+                    self._pending.pop(product_id, None)
+                    return
+            self._pending[product_id] = {'item': dict(item), 'quantity': quantity, 'replace': replace}
+            self._touch()
+
+    def clear(self):
+        """Remove every item from the cart."""
+        with self._lock:
+            self._pending.clear()
+            self._pending_clear = True
+            self._touch()
+
+    # ==================== Persistence ====================
+
+    def is_due(self) -> bool:
+        """Whether pending changes have been quiet for the debounce interval."""
+        with self._lock:
+            if not self.has_pending or self._last_change is None:
+                return False
+            return self._clock() - self._last_change >= self.debounce_seconds
+
+    def maybe_flush(self) -> bool:
+        """Flush if the debounce interval has elapsed. Returns False only on a failed flush."""
+        if self.is_due():
+            return self.flush()
+        return True
+
+    def flush(self) -> bool:
+        """
+        Persist all pending changes: a batch left by a failed flush first, then
+        the changes staged since, one write each. Changes staged while the
+        write runs are left for the next flush.
+
+        Returns:
+            True if nothing was pending or the writes succeeded
+        """
+        with self._flush_lock:
+            with self._lock:
+                self._cancel_timer()
+            take_pending = True
+            while True:
+                with self._lock:
+                    if self._batch is None:
+                        if not take_pending or not (self._pending or self._pending_clear):
+                            return True
+                        take_pending = False
+                        self._sequence += 1
+                        self._batch = (f"{self._writer_id}:{self._sequence}",
+                                       dict(self._pending), self._pending_clear)
+                        self._pending.clear()
+                        self._pending_clear = False
+                    flush_id, changes, clear = self._batch
+
+                # The write runs unlocked; stage() keeps collecting the next batch
+                try:
+                    success = self._flush_fn(self.user_id, changes, clear, flush_id)
+                except Exception as e:
+                    success = False
+                    self.last_error = str(e)
+                    logger.warning(f"Cart flush for {self.user_id} failed: {e}")
+
+                with self._lock:
+                    if not success:
+                        # Keep the batch and its flush ID; retry after another interval
+                        self._schedule_timer()
+                        return False
+                    self._batch = None
+                    self.flush_count += 1
+                    self.last_error = None
+
+    def close(self) -> bool:
+        """Flush outstanding changes and stop the background timer (e.g. on logout)."""
+        success = self.flush()
+        with self._lock:
+            self._use_timer = False
+            self._cancel_timer()
+        return success
+
+    # ==================== Internal helpers ====================
+
+    def _touch(self):
+        self._last_change = self._clock()
+        self._schedule_timer()
+
+    def _schedule_timer(self):
+        if not self._use_timer:
+            return
+        self._cancel_timer()
+        self._timer = threading.Timer(self.debounce_seconds, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self):
+        # A newer change may have rescheduled the flush; maybe_flush re-checks
+        self.maybe_flush()
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+
+def persist_cart_changes(user_id: str, changes: Dict[str, Optional[Dict[str, Any]]], clear: bool,
+                         flush_id: Optional[str] = None) -> bool:
+    """Default flush callback: one FirebaseService.apply_cart_changes write (raises on errors)."""
+    from services.firebase_service import FirebaseService
+    return FirebaseService().apply_cart_changes(user_id, changes, clear=clear, flush_id=flush_id)
@@ -0,0 +1,88 @@
+"""
+Persisted cart data model.
+
+Carts live on the user document as a map keyed by product ID::
+
+    users/{uid}.cart_items = {
+        "<product_id>": {"product_id", "name", "price", "image", "quantity", "added_at"}
+    }
+
+Keying by product ID lets every mutation touch a single field path, so
+quantities can be changed with ``firestore.Increment`` and no prior read.
+Every cart write also increments ``cart_version`` so cached copies can be
+checked for staleness. Buffered writes record their flush ID in
+``cart_recent_flushes`` (the last few only) so a retried write is applied once.
+Older documents store the cart as a ``cart`` array; ``merge_legacy_cart``
+folds it into the map.
+"""
+from typing import Any, Dict, List, Optional
+
+
+CART_FIELD = 'cart_items'
+CART_VERSION_FIELD = 'cart_version'
+CART_FLUSHES_FIELD = 'cart_recent_flushes'
+LEGACY_CART_FIELD = 'cart'
+
+# Flush IDs kept per user; a retry arrives well before this many newer flushes
+RECENT_CART_FLUSHES = 20
+
+
+def build_cart_item(product_id: str, product: Optional[Dict[str, Any]], quantity: Any) -> Dict[str, Any]:
+    """
+    Build the stored snapshot of a product in the cart.
+
+    Args:
+        product_id: Product ID
+        product: Product document (may be None if unknown)
+        quantity: Quantity value (an int or a Firestore transform such as Increment)
+    """
+    product = product or {}
+    images = product.get('images')
+    image = images[0].get('url', '') if images else product.get('image', '')
+    return {
+        'product_id': product_id,
+        'name': product.get('name', ''),
+        'price': product.get('price', 0),
+        'image': image,
+        'quantity': quantity,
+    }
+
+
+def cart_items_to_list(cart_items: Optional[Dict[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Convert the stored cart map into a list ordered by when items were added."""
+    if not cart_items:
+        return []
+
+    items = []
+    for product_id, item in cart_items.items():
+        if not item or item.get('quantity', 0) <= 0:
+            continue
+        items.append({**item, 'product_id': item.get('product_id') or product_id})
+
+    items.sort(key=lambda item: (str(item.get('added_at') or ''), item['product_id']))
+    return items
+
+
+def merge_legacy_cart(legacy_cart: Optional[List[Dict[str, Any]]],
+                      cart_items: Optional[Dict[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Fold a legacy ``cart`` array into the cart map.
+
+    Quantities of products present in both are added together, since items
+    written to the map after the legacy cart are later additions.
+    """
+    merged = {product_id: dict(item) for product_id, item in (cart_items or {}).items()}
+
+    for legacy_item in legacy_cart or []:
+        product_id = legacy_item.get('product_id')
+        if not product_id:
+            continue
+
+        if product_id in merged:
+            merged[product_id]['quantity'] = (
+                merged[product_id].get('quantity', 0) + legacy_item.get('quantity', 0)
+            )
+        else:
+            merged[product_id] = {**legacy_item, 'product_id': product_id}
+
+    return merged
@@ -0,0 +1,303 @@
+"""
+Single cart abstraction shared by app.py and the components.
+
+The session cart is held in memory as ``CartItem`` objects keyed by product
+ID (O(1) lookup and update). For signed-in users the persisted cart is loaded
+once per session and mutations are written back through the write-behind
+``CartWriteBuffer``; guests get a purely in-memory cart that is merged into
+their persisted cart when they sign in. The demo user (``DEMO_USER_ID``,
+used when Firebase Auth is not configured) is shared by every visitor, so its
+cart stays in memory like a guest's.
+
+Every persisted cart write bumps ``users/{uid}.cart_version``. The store knows
+which version its copy corresponds to, so ``revalidate()`` can tell whether
+another session changed the cart and only then reload it.
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+import streamlit as st
+
+from services.cart_buffer import CartWriteBuffer
+from services.cart_model import build_cart_item
+
+
+SESSION_KEY = 'cart_store'
+DEMO_USER_ID = 'demo123'  # Offline demo sign-in; its cart is never persisted
+
+
+class CartItem:
+    """One cart line. Uses __slots__ to keep per-item overhead small."""
+
+    __slots__ = ('product_id', 'name', 'price', 'image', 'quantity', 'added_at')
+
+    def __init__(self, product_id: str, name: str = '', price: float = 0, image: str = '',
+                 quantity: int = 1, added_at: Any = None):
+        self.product_id = product_id
+        self.name = name
+        self.price = price
+        self.image = image
+        self.quantity = quantity
+        self.added_at = added_at
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'CartItem':
+        """Build an item from a stored cart entry (accepts 'product_id' or 'id')."""
+        return cls(
+            product_id=data.get('product_id') or data.get('id'),
+            name=data.get('name', ''),
+            price=data.get('price', 0) or 0,
+            image=data.get('image', ''),
+            quantity=data.get('quantity', 1),
+            added_at=data.get('added_at'),
+        )
+
+    @property
+    def subtotal(self) -> float:
+        """Price times quantity."""
+        return self.price * self.quantity
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to the stored cart entry format."""
+        data = {
+            'product_id': self.product_id,
+            'name': self.name,
+            'price': self.price,
+            'image': self.image,
+            'quantity': self.quantity,
+        }
+        if self.added_at is not None:
+            data['added_at'] = self.added_at
+        return data
+
+    def __repr__(self) -> str:
+        return f"CartItem({self.product_id!r}, quantity={self.quantity})"
+
+
+class CartStore:
+    """In-memory session cart with optional write-behind persistence."""
+
+    def __init__(self, items: Optional[List[Dict[str, Any]]] = None, user_id: Optional[str] = None,
+                 buffer: Optional[CartWriteBuffer] = None, persisted_version: int = 0):
+        """
+        Args:
+            items: Initial cart entries
+            user_id: Owner of the persisted cart (None for guests)
+            buffer: Write-behind buffer used to persist mutations
+            persisted_version: ``cart_version`` of the persisted cart ``items`` came from
+        """
+        self.user_id = user_id
+        self._buffer = buffer
+        self._items: Dict[str, CartItem] = {}
+        for data in items or []:
+            item = CartItem.from_dict(data)
+            self._items[item.product_id] = item
+
+        # Local version: bumped on every mutation, keys the derived-value cache
+        self.version = 0
+        self._totals: Optional[tuple] = None
+
+        # Remote version bookkeeping (each successful flush bumps cart_version by one)
+        self.persisted_version = persisted_version
+        self._base_flush_count = buffer.flush_count if buffer else 0
+
+    # ==================== Reads ====================
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[CartItem]:
+        return iter(list(self._items.values()))
+
+    def __contains__(self, product_id: str) -> bool:
+        return product_id in self._items
+
+    def get(self, product_id: str) -> Optional[CartItem]:
+        """Get a cart item by product ID."""
+        return self._items.get(product_id)
+
+    def items(self) -> List[CartItem]:
+        """Cart items in insertion order."""
+        return list(self._items.values())
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Cart items as stored-format dictionaries (for orders and totals helpers)."""
+        return [item.to_dict() for item in self._items.values()]
+
+    @property
+    def total(self) -> float:
+        """Sum of item subtotals."""
+        return self._cached_totals()[0]
+
+    @property
+    def count(self) -> int:
+        """Total number of units in the cart."""
+        return self._cached_totals()[1]
+
+    # ==================== Mutations ====================
+
+    def add(self, product: Dict[str, Any], quantity: int = 1) -> CartItem:
+        """Add a product (dict with 'id' or 'product_id') to the cart."""
+        product_id = product.get('id') or product.get('product_id')
+        item = self._items.get(product_id)
+        if item is None:
+            item = CartItem.from_dict(build_cart_item(product_id, product, 0))
+            item.added_at = datetime.now()
+            self._items[product_id] = item
+        item.quantity += quantity
+        self._changed(item, quantity)
+        return item
+
+    def set_quantity(self, product_id: str, quantity: int):
+        """Set an item's quantity (0 or less removes it)."""
+        if quantity <= 0:
+            self.remove(product_id)
+            return
+        item = self._items.get(product_id)
+        if item is None or item.quantity == quantity:
+            return
+        delta = quantity - item.quantity
+        item.quantity = quantity
+        self._changed(item, delta)
+
+    def remove(self, product_id: str):
+        """Remove an item from the cart."""
+        if self._items.pop(product_id, None) is None:
+            return
+        self.version += 1
+        if self._buffer is not None:
+            self._buffer.stage(product_id, None)
+
+    def clear(self):
+        """Remove every item from the cart."""
+        self._items.clear()
+        self.version += 1
+        if self._buffer is not None:
+            self._buffer.clear()
+
+    # ==================== Persistence ====================
+
+    @property
+    def expected_remote_version(self) -> int:
+        """cart_version the persisted cart should have if only this session wrote it."""
+        flushes = self._buffer.flush_count - self._base_flush_count if self._buffer else 0
+        return self.persisted_version + flushes
+
+    def flush(self) -> bool:
+        """Persist pending changes now."""
+        return self._buffer.flush() if self._buffer is not None else True
+
+    def close(self) -> bool:
+        """Persist pending changes and stop background flushing."""
+        return self._buffer.close() if self._buffer is not None else True
+
+    def revalidate(self, firebase=None) -> bool:
+        """
+        Make sure the session copy matches the persisted cart.
+        Flushes local changes, then reloads only if another session wrote the cart.
+        If the flush fails the session copy is kept, so it stays consistent with
+        the changes still pending in the buffer.
+
+        Returns:
+            True if the cart was reloaded
+        """
+        if not self.user_id or self._buffer is None:
+            return False
+
+        if not self.flush():
+            return False
+        firebase = firebase or _get_firebase()
+        state = firebase.get_user_cart_state(self.user_id, fresh=True)
+        if state['version'] == self.expected_remote_version:
+            return False
+
+        self._items = {}
+        for data in state['items']:
+            item = CartItem.from_dict(data)
+            self._items[item.product_id] = item
+        self.version += 1
+        self.persisted_version = state['version']
+        self._base_flush_count = self._buffer.flush_count if self._buffer else 0
+        return True
+
+    # ==================== Internal helpers ====================
+
+    def _changed(self, item: CartItem, delta: int):
+        self.version += 1
+        if self._buffer is not None:
+            self._buffer.stage(item.product_id, item.to_dict(), delta)
+
+    def _cached_totals(self) -> tuple:
+        if self._totals is None or self._totals[2] != self.version:
+            total = sum(item.subtotal for item in self._items.values())
+            count = sum(item.quantity for item in self._items.values())
+            self._totals = (total, count, self.version)
+        return self._totals
+
+
+def _get_firebase():
+    from services.firebase_service import FirebaseService
+    return FirebaseService()
+
+
+def _load_user_store(user_id: str, guest: Optional[CartStore] = None) -> CartStore:
+    """Load a user's persisted cart into a store, merging any guest items."""
+    from config import Config
+    from services.cart_buffer import persist_cart_changes
+
+    state = _get_firebase().get_user_cart_state(user_id)
+    buffer = CartWriteBuffer(
+        user_id,
+        persist_cart_changes,
+        debounce_seconds=Config.CART_FLUSH_DEBOUNCE_SECONDS
+    )
+    store = CartStore(state['items'], user_id=user_id, buffer=buffer,
+                      persisted_version=state['version'])
+
+    if guest is not None:
+        for item in guest:
+            store.add(item.to_dict(), item.quantity)
+    return store
+
+
+def get_cart_store() -> CartStore:
+    """
+    Get the session's cart store for the signed-in user (or the guest cart).
+    Signing in loads the persisted cart once and merges the guest cart into it.
+    If the load fails, the session keeps an unbound in-memory cart and the load
+    (and merge) is retried on the next run.
+    """
+    user = st.session_state.get('user') or {}
+    user_id = user.get('uid')
+
+    store = st.session_state.get(SESSION_KEY)
+    if store is not None and store.user_id == user_id:
+        if store._buffer is not None:
+            store._buffer.maybe_flush()
+        return store
+
+    guest = store if store is not None and store.user_id is None else None
+    if store is not None and store.user_id is not None:
+        store.close()
+
+    if user_id and user_id != DEMO_USER_ID:
+        try:
+            store = _load_user_store(user_id, guest)
+        except Exception as e:
+            # Firebase unavailable: edits stay in an unbound cart that is merged on the next load
+            st.error(f"Your saved cart could not be loaded, changes are not saved yet: {str(e)}")
+            store = guest if guest is not None else CartStore()
+    else:
+        store = guest if guest is not None else CartStore()
+        store.user_id = user_id
+
+    st.session_state[SESSION_KEY] = store
+    return store
+
+
+def close_cart_store() -> bool:
+    """Persist and discard the session's cart store (logout)."""
+    store = st.session_state.pop(SESSION_KEY, None)
+    if store is None:
+        return True
+    return store.close()
@@ -0,0 +1,314 @@
+"""
+Live in-process catalog fed by a Firestore ``on_snapshot`` listener.
+
+When ``Config.CATALOG_LISTENER_ENABLED`` is set, one listener per process
+watches ``products where active == True`` and applies each change to a
+``CatalogStore``. Every session then reads the catalog from memory: no
+per-request Firestore reads and no TTL staleness window.
+
+Lifecycle:
+- ``CatalogListener.start()`` attaches the listener and starts a supervisor
+  thread. The supervisor re-attaches the listener with exponential backoff
+  (plus jitter) whenever the watch stream stops.
+- The first snapshot after each (re)connect carries the full result set and
+  replaces the store, so removals missed while disconnected are not kept.
+- Until the first snapshot arrives ``CatalogStore.ready`` is False and callers
+  fall back to querying Firestore. While reconnecting, the last known catalog
+  keeps being served.
+
+Reads go through a ``CatalogSnapshot`` (typed columns, presorted orders and
+facet counts) that is built on first use after each change.
+
+The query is created by a factory so tests can pass a fake with the same
+``on_snapshot(callback)`` surface as a Firestore query.
+"""
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from services.catalog_snapshot import CatalogSnapshot
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+# A change as seen by subscribers: (product_id, before, after)
+ProductChange = Tuple[str, Optional[Dict[str, Any]], Optional[Dict[str, Any]]]
+ChangeCallback = Callable[[List[ProductChange]], None]
+
+
+class CatalogStore:
+    """Thread-safe in-memory copy of the active catalog."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._products: Dict[str, Dict[str, Any]] = {}
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._subscribers: List[ChangeCallback] = []
+        self.version = 0
+        self.ready = False
+
+    # ==================== Reads ====================
+
+    def __len__(self) -> int:
+        return len(self._products)
+
+    def __contains__(self, product_id: str) -> bool:
+        return product_id in self._products
+
+    def get(self, product_id: str) -> Optional[Dict[str, Any]]:
+        """Get a copy of an active product by ID."""
+        with self._lock:
+            product = self._products.get(product_id)
+            return dict(product) if product else None
+
+    def snapshot(self) -> CatalogSnapshot:
+        """Columnar snapshot of the current catalog (rebuilt on first use after a change)."""
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = CatalogSnapshot(self._products.values())
+            return self._snapshot
+
+    def products(self, category: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Active products in document ID order (Firestore's default ordering)."""
+        snapshot = self.snapshot()
+        rows, _ = snapshot.order(None, False, category)
+        return snapshot.materialize(rows[:limit])
+
+    def page(self, field: str, descending: bool, category: Optional[str], page_size: int,
+             after: Optional[Tuple[Any, str]] = None, min_price: Optional[float] = None,
+             max_price: Optional[float] = None, in_stock: bool = False,
+             min_rating: Optional[float] = None,
+             below_price: Optional[float] = None) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        One page ordered by (field, document ID), like a Firestore cursor query.
+
+        Args:
+            field: Sort field (products without it are excluded, as in Firestore)
+            descending: Sort direction
+            category: Optional category filter
+            page_size: Products per page
+            after: (value, product_id) of the last product of the previous page
+            min_price: Optional inclusive lower price bound
+            max_price: Optional inclusive upper price bound
+            in_stock: Only products with stock left
+            min_rating: Optional inclusive lower rating bound
+            below_price: Optional exclusive upper price bound
+
+        Returns:
+            (products, has_more)
+        """
+        return self.snapshot().page(field, descending, page_size, after, category=category,
+                                    min_price=min_price, max_price=max_price, in_stock=in_stock,
+                                    min_rating=min_rating, below_price=below_price)
+
+    # ==================== Changes ====================
+
+    def subscribe(self, callback: ChangeCallback):
+        """Call ``callback(changes)`` with the (product_id, before, after) list of every applied snapshot."""
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def replace(self, products: Iterable[Dict[str, Any]]):
+        """Replace the whole catalog (first snapshot of a listen stream)."""
+        with self._lock:
+            before = self._products
+            self._products = {product['id']: product for product in products}
+            self._changed()
+            self.ready = True
+
+            changed = [
+                (product_id, before.get(product_id), self._products.get(product_id))
+                for product_id in set(before) | set(self._products)
+                if before.get(product_id) != self._products.get(product_id)
+            ]
+        self._notify(changed)
+
+    def apply(self, changes: Iterable[Tuple[str, str, Optional[Dict[str, Any]]]]):
+        """
+        Apply incremental changes.
+
+        Args:
+            changes: (change_type, product_id, product) with change_type one of
+                'ADDED', 'MODIFIED' or 'REMOVED'
+        """
+        changed = []
+        with self._lock:
+            for change_type, product_id, product in changes:
+                before = self._products.get(product_id)
+                if change_type == 'REMOVED':
+                    self._products.pop(product_id, None)
+                    after = None
+                else:
+                    self._products[product_id] = product
+                    after = product
+                if before != after:
+                    changed.append((product_id, before, after))
+            if changed:
+                self._changed()
+        self._notify(changed)
+
+    # ==================== Internal helpers ====================
+
+    def _changed(self):
+        self.version += 1
+        self._snapshot = None
+
+    def _notify(self, changed: List[ProductChange]):
+        if not changed:
+            return
+        for callback in list(self._subscribers):
+            try:
+                callback(changed)
+            except Exception as e:
+                logger.error(f"Catalog change subscriber failed: {e}")
+
+
+class CatalogListener:
+    """Keeps one ``on_snapshot`` listener attached, reconnecting with backoff."""
+
+    def __init__(self, query_factory: Callable[[], Any], store: CatalogStore,
+                 initial_backoff: float = 1.0, max_backoff: float = 60.0,
+                 check_interval: float = 5.0, clock: Callable[[], float] = time.monotonic,
+                 rand: Callable[[], float] = random.random):
+        """
+        Args:
+            query_factory: Returns the query to watch (anything with ``on_snapshot``)
+            store: Store the changes are applied to
+            initial_backoff: First reconnect delay in seconds
+            max_backoff: Upper bound of the reconnect delay
+            check_interval: How often the supervisor checks the stream
+            clock: Monotonic clock (injectable for tests)
+            rand: Random source for jitter (injectable for tests)
+        """
+        self.store = store
+        self._query_factory = query_factory
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.check_interval = check_interval
+        self._clock = clock
+        self._rand = rand
+
+        self._lock = threading.RLock()
+        self._watch = None
+        self._generation = 0
+        self._awaiting_full_snapshot = True
+        self._failures = 0
+        self._next_attempt = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.reconnects = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the listener has been started and not stopped."""
+        return self._thread is not None and not self._stop.is_set()
+
+    @property
+    def is_connected(self) -> bool:
+        """Whether the watch stream is currently active."""
+        watch = self._watch
+        return watch is not None and getattr(watch, 'is_active', True)
+
+    def start(self, supervise: bool = True):
+        """Attach the listener and start the supervisor thread (idempotent)."""
+        with self._lock:
+            if self._thread is not None or (not supervise and self._watch is not None):
+                return
+            self._stop.clear()
+            self._connect()
+            if supervise:
+                self._thread = threading.Thread(target=self._supervise, name='catalog-listener',
+                                                daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        """Detach the listener and stop reconnecting."""
+        self._stop.set()
+        with self._lock:
+            self._disconnect()
+            self._thread = None
+
+    def check(self) -> bool:
+        """
+        One supervisor step: reconnect if the stream stopped and the backoff elapsed.
+
+        Returns:
+            True if the listener is connected after the check
+        """
+        with self._lock:
+            if self._stop.is_set() or self.is_connected:
+                return self.is_connected
+            if self._clock() < self._next_attempt:
+                return False
+            self.reconnects += 1
+            self._disconnect()
+            return self._connect()
+
+    # ==================== Internal helpers ====================
+
+    def _supervise(self):
+        while not self._stop.wait(self.check_interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error(f"Catalog listener supervisor error: {e}")
+
+    def _connect(self) -> bool:
+        self._generation += 1
+        generation = self._generation
+        self._awaiting_full_snapshot = True
+        try:
+            query = self._query_factory()
+            self._watch = query.on_snapshot(
+                lambda docs, changes, read_time: self._on_snapshot(generation, docs, changes)
+            )
+            logger.info("Catalog listener attached")
+            return True
+        except Exception as e:
+            self._watch = None
+            self._schedule_retry(e)
+            return False
+
+    def _disconnect(self):
+        watch, self._watch = self._watch, None
+        if watch is not None:
+            try:
+                watch.unsubscribe()
+            except Exception as e:
+                logger.warning(f"Error closing catalog listener: {e}")
+
+    def _schedule_retry(self, error: Exception):
+        self.last_error = str(error)
+        delay = min(self.initial_backoff * (2 ** self._failures), self.max_backoff)
+        delay *= 0.5 + self._rand() / 2
+        self._failures += 1
+        self._next_attempt = self._clock() + delay
+        logger.warning(f"Catalog listener failed ({error}); retrying in {delay:.1f}s")
+
+    def _on_snapshot(self, generation: int, docs, changes):
+        # Ignore callbacks from a stream that has been replaced
+        if generation != self._generation:
+            return
+        try:
+            if self._awaiting_full_snapshot:
+                self.store.replace(_snapshot_product(doc) for doc in docs)
+                self._awaiting_full_snapshot = False
+            else:
+                self.store.apply(
+                    (change.type.name, change.document.id,
+                     None if change.type.name == 'REMOVED' else _snapshot_product(change.document))
+                    for change in changes
+                )
+            self._failures = 0
+            self.last_error = None
+        except Exception as e:
+            logger.error(f"Error applying catalog snapshot: {e}")
+
+
+def _snapshot_product(doc) -> Dict[str, Any]:
+    product = doc.to_dict()
+    product['id'] = doc.id
+    return product
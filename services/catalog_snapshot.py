@@ -0,0 +1,328 @@
+"""
+Immutable columnar snapshot of the active catalog.
+
+Products are stored once, in document ID order, and every field the listings
+filter or sort on is copied into a typed NumPy array:
+
+- ``price``, ``rating`` and ``created_at`` (POSIX seconds): float64, NaN when missing
+- ``stock``: int64, 0 when missing
+- ``category``: int32 codes into ``categories``, -1 when missing
+- ``active``: bool
+
+Everything listings need is computed once, when the snapshot is built (i.e.
+once per catalog refresh):
+
+- the sorted permutation of active rows for every sort field, overall and per
+  category (stable, so ties stay in document ID order like Firestore's
+  ``__name__`` tie-break). Paging a listing is then a slice plus a
+  ``searchsorted`` for the cursor, independent of catalog size;
+- facet counts per category, price bucket and rating threshold, overall and
+  per category.
+
+Price-range and in-stock filters are boolean masks applied to the presorted
+rows, and only the rows of the requested page are copied back into dicts. A
+snapshot never changes after it is built; its owner (``CatalogStore`` or
+``SearchIndex``) builds a new one after each change.
+"""
+import bisect
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+# Fields with a numeric column that pages can be sorted by
+SORT_FIELDS = ('price', 'rating', 'created_at')
+
+# Lower edges of the price facet buckets; the last bucket is open-ended
+PRICE_BUCKETS = (0, 25, 50, 100, 250, 500, 1000)
+
+# Rating facet thresholds, counted cumulatively ("4.5 or more")
+RATING_THRESHOLDS = (4.5, 4.0, 3.0, 2.0)
+
+# (rows, values) in ascending (value, document ID) order
+_Order = Tuple[np.ndarray, np.ndarray]
+
+
+def _number(value: Any) -> float:
+    """Column value for a sortable field (NaN when missing or not a number)."""
+    if isinstance(value, bool) or value is None:
+        return np.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return np.nan
+
+
+def _readonly(*arrays: np.ndarray) -> None:
+    for array in arrays:
+        array.flags.writeable = False
+
+
+class CatalogSnapshot:
+    """Typed-array view of a product list, answering filtered and sorted pages."""
+
+    def __init__(self, products: Iterable[Dict[str, Any]]):
+        rows = sorted(products, key=lambda product: product['id'])
+        count = len(rows)
+
+        self._products: Tuple[Dict[str, Any], ...] = tuple(rows)
+        self.ids: List[str] = [product['id'] for product in rows]
+
+        self.categories: Tuple[str, ...] = tuple(sorted(
+            {product['category'] for product in rows if isinstance(product.get('category'), str)}
+        ))
+        self._category_codes = {category: code for code, category in enumerate(self.categories)}
+
+        self.category = np.fromiter(
+            (self._category_codes.get(product.get('category'), -1) for product in rows),
+            dtype=np.int32, count=count
+        )
+        self.stock = np.fromiter(
+            (product['stock'] if isinstance(product.get('stock'), int) else 0 for product in rows),
+            dtype=np.int64, count=count
+        )
+        self.active = np.fromiter(
+            (product.get('active', True) is not False for product in rows),
+            dtype=bool, count=count
+        )
+        self._columns: Dict[str, np.ndarray] = {
+            field: np.fromiter((_number(product.get(field)) for product in rows),
+                               dtype=np.float64, count=count)
+            for field in SORT_FIELDS
+        }
+        _readonly(self.category, self.stock, self.active, *self._columns.values())
+
+        self._orders: Dict[Tuple[Optional[str], Optional[int]], _Order] = {}
+        for field in (None,) + SORT_FIELDS:
+            self._presort(field)
+        self._facets = self._count_facets()
+
+    def __len__(self) -> int:
+        return len(self._products)
+
+    @property
+    def price(self) -> np.ndarray:
+        return self._columns['price']
+
+    @property
+    def rating(self) -> np.ndarray:
+        return self._columns['rating']
+
+    def get(self, product_id: str) -> Optional[Dict[str, Any]]:
+        """Get a copy of a product by ID."""
+        row = bisect.bisect_left(self.ids, product_id)
+        if row < len(self.ids) and self.ids[row] == product_id:
+            return dict(self._products[row])
+        return None
+
+    def facets(self, category: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Precomputed facet counts over active products.
+
+        Args:
+            category: Count price and rating facets within this category only
+
+        Returns:
+            Dictionary with 'count', 'categories' ({category: count}, always over
+            the whole catalog), 'price' ([{'min', 'max', 'count'}], 'max' None for
+            the open-ended bucket, [min, max) otherwise) and 'rating'
+            ([{'min', 'count'}], cumulative)
+        """
+        facets = self._facets[None if category is None else self._category_codes.get(category, -1)]
+        return {
+            'count': facets['count'],
+            'categories': dict(self._facets[None]['categories']),
+            'price': [dict(bucket) for bucket in facets['price']],
+            'rating': [dict(bucket) for bucket in facets['rating']],
+        }
+
+    def mask(self, category: Optional[str] = None, min_price: Optional[float] = None,
+             max_price: Optional[float] = None, in_stock: bool = False,
+             min_rating: Optional[float] = None, below_price: Optional[float] = None) -> np.ndarray:
+        """
+        Boolean row mask of active products matching every given filter.
+
+        Args:
+            category: Exact category
+            min_price: Inclusive lower price bound
+            max_price: Inclusive upper price bound
+            in_stock: Only products with stock > 0
+            min_rating: Inclusive lower rating bound
+            below_price: Exclusive upper price bound (price facet buckets are [min, max))
+        """
+        mask = self.active.copy()
+        if category is not None:
+            code = self._category_codes.get(category)
+            if code is None:
+                return np.zeros(len(self), dtype=bool)
+            mask &= self.category == code
+        # NaN compares False, so products without a price/rating drop out of ranges
+        if min_price is not None:
+            mask &= self.price >= min_price
+        if max_price is not None:
+            mask &= self.price <= max_price
+        if below_price is not None:
+            mask &= self.price < below_price
+        if min_rating is not None:
+            mask &= self.rating >= min_rating
+        if in_stock:
+            mask &= self.stock > 0
+        return mask
+
+    def order(self, field: Optional[str], descending: bool = False, category: Optional[str] = None,
+              min_price: Optional[float] = None, max_price: Optional[float] = None,
+              in_stock: bool = False, min_rating: Optional[float] = None,
+              below_price: Optional[float] = None) -> _Order:
+        """
+        Active rows matching the filters, ordered by (field, document ID).
+
+        Rows without a value for ``field`` are excluded, as in Firestore. With
+        ``field=None`` rows come in document ID order. Category-only listings are
+        views of a precomputed permutation; other filters mask it without sorting.
+
+        Returns:
+            (rows, values): row indices and their sort values, both in page order
+        """
+        code = None
+        if category is not None:
+            code = self._category_codes.get(category)
+            if code is None:
+                return np.empty(0, dtype=np.intp), np.empty(0)
+        rows, values = self._orders[(field, code)]
+
+        if min_price is not None or max_price is not None or in_stock or min_rating is not None \
+                or below_price is not None:
+            keep = self.mask(None, min_price, max_price, in_stock, min_rating, below_price)[rows]
+            rows, values = rows[keep], values[keep]
+        if descending:
+            rows, values = rows[::-1], values[::-1]
+        return rows, values
+
+    def page(self, field: Optional[str], descending: bool, page_size: int,
+             after: Optional[Tuple[Any, str]] = None, category: Optional[str] = None,
+             min_price: Optional[float] = None, max_price: Optional[float] = None,
+             in_stock: bool = False, min_rating: Optional[float] = None,
+             below_price: Optional[float] = None) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        One page ordered by (field, document ID), like a Firestore cursor query.
+
+        Args:
+            field: Sort field from SORT_FIELDS, or None for document ID order
+            descending: Sort direction
+            page_size: Products per page
+            after: (value, product_id) of the last product of the previous page
+            category, min_price, max_price, in_stock, min_rating, below_price: Filters, as in ``mask``
+
+        Returns:
+            (products, has_more)
+        """
+        rows, values = self.order(field, descending, category, min_price, max_price,
+                                  in_stock, min_rating, below_price)
+        start = 0
+        if after is not None:
+            start = self._start_after(rows, values, field, descending, after)
+        return self.materialize(rows[start:start + page_size]), start + page_size < len(rows)
+
+    def materialize(self, rows: Iterable[int]) -> List[Dict[str, Any]]:
+        """Copy the given rows into product dicts."""
+        return [dict(self._products[row]) for row in rows]
+
+    # ==================== Internal helpers ====================
+
+    def _presort(self, field: Optional[str]):
+        """Store the ascending order of active rows for ``field``, overall and per category."""
+        rows = np.flatnonzero(self.active)
+        if field is None:
+            values = np.zeros(len(rows))
+        else:
+            values = self._columns[field][rows]
+            present = ~np.isnan(values)
+            rows, values = rows[present], values[present]
+            order = np.argsort(values, kind='stable')
+            rows, values = rows[order], values[order]
+        _readonly(rows, values)
+        self._orders[(field, None)] = (rows, values)
+
+        # A stable sort by category keeps each category's rows in field order
+        by_category = np.argsort(self.category[rows], kind='stable')
+        codes = self.category[rows][by_category]
+        bounds = np.searchsorted(codes, np.arange(len(self.categories) + 1), side='left')
+        for code in range(len(self.categories)):
+            part = by_category[bounds[code]:bounds[code + 1]]
+            category_rows, category_values = rows[part], values[part]
+            _readonly(category_rows, category_values)
+            self._orders[(field, code)] = (category_rows, category_values)
+
+    def _count_facets(self) -> Dict[Optional[int], Dict[str, Any]]:
+        """Facet counts for the whole catalog (key None), every category code and unknown categories (-1)."""
+        active = self.active
+        codes = self.category[active]
+        prices = self.price[active]
+        ratings = self.rating[active]
+        slots = len(self.categories) + 1  # last slot: products without a category
+
+        def per_category(selected: np.ndarray) -> np.ndarray:
+            return np.bincount(np.where(codes[selected] < 0, slots - 1, codes[selected]), minlength=slots)
+
+        category_counts = per_category(np.ones(len(codes), dtype=bool))
+
+        priced = ~np.isnan(prices)
+        buckets = np.searchsorted(PRICE_BUCKETS, prices[priced], side='right') - 1
+        # Negative prices count in the first bucket
+        buckets = np.maximum(buckets, 0)
+        price_counts = np.zeros((len(PRICE_BUCKETS), slots), dtype=np.int64)
+        priced_codes = np.where(codes[priced] < 0, slots - 1, codes[priced])
+        np.add.at(price_counts, (buckets, priced_codes), 1)
+
+        rating_counts = np.stack([per_category(ratings >= threshold) for threshold in RATING_THRESHOLDS])
+
+        def facet(counts_at) -> Dict[str, Any]:
+            return {
+                'count': int(counts_at(category_counts)),
+                'price': [
+                    {'min': low, 'max': PRICE_BUCKETS[i + 1] if i + 1 < len(PRICE_BUCKETS) else None,
+                     'count': int(counts_at(price_counts[i]))}
+                    for i, low in enumerate(PRICE_BUCKETS)
+                ],
+                'rating': [
+                    {'min': threshold, 'count': int(counts_at(rating_counts[i]))}
+                    for i, threshold in enumerate(RATING_THRESHOLDS)
+                ],
+            }
+
+        facets: Dict[Optional[int], Dict[str, Any]] = {None: facet(np.sum)}
+        facets[None]['categories'] = {
+            category: int(category_counts[code]) for code, category in enumerate(self.categories)
+        }
+        for code in range(len(self.categories)):
+            facets[code] = facet(lambda counts, code=code: counts[code])
+        # Unknown categories
+        facets[-1] = facet(lambda counts: 0)
+        return facets
+
+    def _start_after(self, rows: np.ndarray, values: np.ndarray, field: Optional[str],
+                     descending: bool, after: Tuple[Any, str]) -> int:
+        """Position of the first row strictly after the (value, id) cursor."""
+        value, product_id = after
+        target = 0.0 if field is None else _number(value)
+        if np.isnan(target):
+            return 0
+
+        # Range of rows tied with the cursor value, found on the ascending values
+        # (descending pages are reversed views, so this stays O(log n))
+        ascending = values[::-1] if descending else values
+        lo = int(np.searchsorted(ascending, target, side='left'))
+        hi = int(np.searchsorted(ascending, target, side='right'))
+        if descending:
+            lo, hi = len(values) - hi, len(values) - lo
+
+        # Within a tie rows are in ID order, and row order is ID order
+        tied = rows[lo:hi]
+        if descending:
+            # Keep rows whose ID sorts before the cursor ID
+            before = bisect.bisect_left(self.ids, product_id)
+            return hi - int(np.searchsorted(tied[::-1], before, side='left'))
+        after_row = bisect.bisect_right(self.ids, product_id)
+        return lo + int(np.searchsorted(tied, after_row, side='left'))
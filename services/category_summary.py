@@ -0,0 +1,130 @@
+"""
+Per-category catalog summary stored in ``catalog_meta/categories``.
+Keeps the product count and min/max price of every category so category
+lists can be served from a single document read instead of a catalog scan.
+
+Backfill or rebuild the summary for an existing catalog with:
+
+    python -m services.category_summary
+"""
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+
+CATALOG_META_COLLECTION = 'catalog_meta'
+CATEGORY_SUMMARY_DOC = 'categories'
+
+
+def product_contribution(product: Optional[Dict[str, Any]]) -> Optional[Tuple[str, Optional[float]]]:
+    """
+    Get the (category, price) a product contributes to the summary.
+
+    Only active products with a category are counted.
+    """
+    if not product or not product.get('active') or not product.get('category'):
+        return None
+    price = product.get('price')
+    return product['category'], float(price) if isinstance(price, (int, float)) else None
+
+
+def summarize_prices(prices: Iterable[Optional[float]]) -> Optional[Dict[str, Any]]:
+    """Build a summary entry from the prices of every product in a category."""
+    prices = list(prices)
+    if not prices:
+        return None
+    known = [price for price in prices if price is not None]
+    return {
+        'count': len(prices),
+        'min_price': min(known) if known else None,
+        'max_price': max(known) if known else None,
+    }
+
+
+def build_summary(products: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Build the full category summary from a product listing."""
+    prices_by_category: Dict[str, list] = {}
+    for product in products:
+        contribution = product_contribution(product)
+        if contribution:
+            category, price = contribution
+            prices_by_category.setdefault(category, []).append(price)
+    return {
+        category: summarize_prices(prices)
+        for category, prices in prices_by_category.items()
+    }
+
+
+def add_to_summary(categories: Dict[str, Dict[str, Any]], category: str, price: Optional[float]):
+    """Count one more product in a category."""
+    entry = categories.get(category)
+    if not entry:
+        categories[category] = summarize_prices([price])
+        return
+
+    entry['count'] = entry.get('count', 0) + 1
+    if price is not None:
+        if entry.get('min_price') is None or price < entry['min_price']:
+            entry['min_price'] = price
+        if entry.get('max_price') is None or price > entry['max_price']:
+            entry['max_price'] = price
+
+
+def remove_from_summary(categories: Dict[str, Dict[str, Any]], category: str,
+                        price: Optional[float]) -> bool:
+    """
+    Count one less product in a category.
+
+    Returns:
+        True if the removed price was the category's min or max, in which case
+        the bounds must be recomputed from the remaining products
+    """
+    entry = categories.get(category)
+    if not entry:
+        return False
+
+    entry['count'] = entry.get('count', 0) - 1
+    if entry['count'] <= 0:
+        del categories[category]
+        return False
+
+    return price is not None and price in (entry.get('min_price'), entry.get('max_price'))
+
+
+def apply_product_change(categories: Dict[str, Dict[str, Any]],
+                         before: Optional[Dict[str, Any]],
+                         after: Optional[Dict[str, Any]]) -> Set[str]:
+    """
+    Apply a product create/update/delete to the summary in place.
+
+    Args:
+        categories: Summary map (category -> entry)
+        before: Product data before the change (None on create)
+        after: Product data after the change (None on delete)
+
+    Returns:
+        Categories whose min/max bounds must be recomputed
+    """
+    old = product_contribution(before)
+    new = product_contribution(after)
+    if old == new:
+        return set()
+
+    stale = set()
+    if old and remove_from_summary(categories, *old):
+        stale.add(old[0])
+    if new:
+        add_to_summary(categories, *new)
+    return stale
+
+
+def category_names(categories: Dict[str, Dict[str, Any]]) -> list:
+    """Sorted names of the categories that still have products."""
+    return sorted(name for name, entry in categories.items() if entry and entry.get('count', 0) > 0)
+
+
+if __name__ == '__main__':
+    from services.firebase_service import FirebaseService
+
+    summary = FirebaseService().rebuild_category_summary()
+    for name in category_names(summary):
+        entry = summary[name]
+        print(f"{name}: {entry['count']} products ({entry['min_price']} - {entry['max_price']})")
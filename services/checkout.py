@@ -0,0 +1,92 @@
+"""
+Checkout validation: reconcile cart lines with the current product documents.
+
+Cart items store a snapshot of the product (name, price) taken by
+``add_to_cart``. Before an order is placed, every line is checked against
+the product documents, which are read with a single ``get_all``:
+
+- the line's price and name are replaced by the product's current ones
+  (changed prices are reported so the buyer sees them before confirming);
+- a product that no longer exists or is inactive yields a
+  ``ProductNotFoundError`` for that line;
+- a quantity above the product's ``stock`` yields an
+  ``InsufficientStockError`` for that line. Products without a ``stock``
+  field are not stock-tracked.
+
+``reconcile_cart`` does all of it in one pass over the lines and returns the
+per-line errors instead of stopping at the first one, so the review page can
+list every problem at once. ``create_order`` and ``place_order`` run it
+again inside their transaction and decrement stock by ``stock_updates``.
+
+Orders placed from checkout are keyed by an ID the client generates once per
+checkout (``new_order_id``), so a retried ``place_order`` finds the order it
+already wrote instead of placing it twice. ``same_order`` checks that the order
+found is the one being retried (same lines and totals).
+"""
+import uuid
+from typing import Any, Dict, List, Optional
+
+from utils.error_handler import EcommerceException, InsufficientStockError, ProductNotFoundError
+
+
+def reconcile_cart(items: List[Dict[str, Any]],
+                   products: Dict[str, Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Reconcile cart lines with current product documents.
+
+    Args:
+        items: Cart lines ('product_id', 'quantity', snapshot 'price' and 'name')
+        products: Product ID -> current product document (None if missing)
+
+    Returns:
+        Dictionary with 'items' (lines at current prices), 'price_changes'
+        (product_id, name, old_price, new_price), 'errors' (one
+        ProductNotFoundError / InsufficientStockError per failing line) and
+        'stock_updates' (product ID -> quantity to take from stock)
+    """
+    requested: Dict[str, int] = {}
+    for item in items:
+        requested[item['product_id']] = requested.get(item['product_id'], 0) + item.get('quantity', 0)
+
+    reconciled: List[Dict[str, Any]] = []
+    price_changes: List[Dict[str, Any]] = []
+    errors: List[EcommerceException] = []
+    stock_updates: Dict[str, int] = {}
+    checked = set()
+    for item in items:
+        product_id = item['product_id']
+        product = products.get(product_id)
+        if not product or not product.get('active', True):
+            errors.append(ProductNotFoundError(product_id))
+            continue
+
+        price = product.get('price', 0)
+        if price != item.get('price'):
+            price_changes.append({'product_id': product_id, 'name': product.get('name', item.get('name')),
+                                  'old_price': item.get('price'), 'new_price': price})
+        reconciled.append({**item, 'name': product.get('name', item.get('name')), 'price': price})
+
+        stock = product.get('stock')
+        if stock is None or product_id in checked:
+            continue
+        checked.add(product_id)
+        if requested[product_id] > stock:
+            errors.append(InsufficientStockError(product_id, requested[product_id], stock))
+        else:
+            stock_updates[product_id] = requested[product_id]
+
+    return {'items': reconciled, 'price_changes': price_changes, 'errors': errors,
+            'stock_updates': stock_updates}
+
+
+def same_order(stored: Dict[str, Any], order: Dict[str, Any]) -> bool:
+    """Whether a stored order has the same lines (product, quantity, price) and totals as ``order``."""
+    def lines(items):
+        return sorted((item['product_id'], item.get('quantity'), item.get('price')) for item in items or [])
+    return (lines(stored.get('items')) == lines(order.get('items'))
+            and stored.get('totals') == order.get('totals'))
+
+
+def new_order_id() -> str:
+    """Client-generated order ID (a valid Firestore document ID)."""
+    return uuid.uuid4().hex
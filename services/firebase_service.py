@@ -3,19 +3,63 @@ Firebase service for authentication, Firestore, and Storage.
 Handles all Firebase operations for the e-commerce platform.
 """
 import streamlit as st
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
 import firebase_admin
 from firebase_admin import credentials, firestore, auth, storage
+from google.cloud.firestore_v1.field_path import FieldPath
 import json
 
+from config import Config
+from services.cart_model import (
+    CART_FIELD,
+    CART_FLUSHES_FIELD,
+    CART_VERSION_FIELD,
+    LEGACY_CART_FIELD,
+    RECENT_CART_FLUSHES,
+    build_cart_item,
+    merge_legacy_cart,
+)
+from services.category_summary import (
+    CATALOG_META_COLLECTION,
+    CATEGORY_SUMMARY_DOC,
+    apply_product_change,
+    build_summary,
+    category_names,
+    product_contribution,
+    summarize_prices,
+)
+from services.catalog_listener import CatalogListener, CatalogStore
+from services.catalog_snapshot import CatalogSnapshot
+from services.checkout import reconcile_cart, same_order
+from services.firestore_client import FirestoreClientHolder
+from services.firestore_metrics import track_methods
+from services.pagination import encode_page_token, decode_page_token
+from services.product_cache import ProductCache
+from services.profile_cache import ProfileCache, profile_from_document
+from services.search_index import SearchIndex
+from utils.error_handler import DatabaseError, EcommerceException, ValidationError
 
+
+@track_methods
 class FirebaseService:
     """Service class for Firebase operations."""
     
     _instance = None
     _initialized = False
     
+    # Stable orderings for paginated catalog listings: sort key -> (field, direction).
+    # Every ordering is tie-broken by document ID so cursors never skip or repeat items.
+    PRODUCT_SORTS = {
+        'relevance': ('created_at', firestore.Query.DESCENDING),
+        'price_asc': ('price', firestore.Query.ASCENDING),
+        'price_desc': ('price', firestore.Query.DESCENDING),
+        'rating': ('rating', firestore.Query.DESCENDING),
+    }
+    
+    # Maximum number of document references per batched get_all call
+    GET_ALL_CHUNK_SIZE = 100
+    
     def __new__(cls):
         """Singleton pattern to ensure Firebase is initialized only once."""
         if cls._instance is None:
@@ -29,47 +73,12 @@ class FirebaseService:
             FirebaseService._initialized = True
     
     def _initialize_firebase(self):
-        """Initialize Firebase Admin SDK with credentials from Streamlit secrets."""
+        """
+        Initialize the process-wide Firebase app and start warming up the shared
+        Firestore client in the background (credentials are parsed once per process).
+        """
         try:
-            from config.settings import get_firebase_credentials
-            
-            # Check if Firebase is already initialized
-            try:
-                firebase_admin.get_app()
-                if 'firebase_initialized' not in st.session_state:
-                    st.session_state.firebase_initialized = True
-                return
-            except ValueError:
-                pass  # Firebase not initialized yet, continue
-            
-            # Get credentials
-            cred_dict = get_firebase_credentials()
-            
-            if not cred_dict:
-                error_msg = "Firebase credentials not found in Streamlit secrets. Please configure them in Streamlit Cloud settings."
-                if 'firebase_error_shown' not in st.session_state:
-                    st.error(error_msg)
-                    st.session_state.firebase_error_shown = True
-                raise ValueError(error_msg)
-            
-            # Validate that credentials have required fields
-            required_fields = ['type', 'project_id', 'private_key', 'client_email']
-            missing_fields = [field for field in required_fields if field not in cred_dict]
-            
-            if missing_fields:
-                error_msg = f"Firebase credentials missing required fields: {', '.join(missing_fields)}"
-                if 'firebase_error_shown' not in st.session_state:
-                    st.error(error_msg)
-                    st.session_state.firebase_error_shown = True
-                raise ValueError(error_msg)
-            
-            # Ensure type field is set correctly
-            if cred_dict.get('type') != 'service_account':
-                cred_dict['type'] = 'service_account'
-            
-            # Initialize Firebase
-            cred = credentials.Certificate(cred_dict)
-            firebase_admin.initialize_app(cred)
+            _get_firestore_holder().warm_up_async()
             
             st.session_state.firebase_initialized = True
             if 'firebase_error_shown' in st.session_state:
@@ -104,13 +113,14 @@ class FirebaseService:
                 'email': email,
                 'display_name': display_name or email.split('@')[0],
                 'created_at': datetime.now(),
-                'cart': [],
+                CART_FIELD: {},
                 'orders': [],
                 'addresses': []
             }
             
-            db = firestore.client()
+            db = self.get_db()
             db.collection('users').document(user.uid).set(user_data)
+            _get_profile_cache().invalidate(user.uid)
             
             return {
                 'uid': user.uid,
@@ -122,7 +132,17 @@ class FirebaseService:
             return None
     
     def verify_token(self, token: str) -> Optional[Dict[str, Any]]:
-        """Verify Firebase ID token."""
+        """
+        Verify Firebase ID token.
+        
+        Checked locally against Google's cached public keys; a token seen
+        before is answered from memory until it expires.
+        """
+        try:
+            from services.auth_service import _get_token_verifier
+            return _get_token_verifier().verify(token)
+        except ValueError:
+            pass
         try:
             decoded_token = auth.verify_id_token(token)
             return decoded_token
@@ -130,17 +150,22 @@ class FirebaseService:
             return None
     
     def get_db(self):
-        """Get Firestore database client."""
+        """Get the shared Firestore database client, instrumented for RPC accounting."""
         try:
-            # Verify Firebase is initialized
-            firebase_admin.get_app()
-            return firestore.client()
+            return _get_firestore_holder().client
         except ValueError:
             st.error("Firebase is not initialized. Please check your credentials.")
             return None
     
+    def _category_summary_ref(self, db):
+        """Reference to the maintained catalog_meta/categories summary document."""
+        return db.collection(CATALOG_META_COLLECTION).document(CATEGORY_SUMMARY_DOC)
+    
     def create_product(self, product_data: Dict[str, Any]) -> Optional[str]:
-        """Create a new product in Firestore."""
+        """
+        Create a new product in Firestore.
+        The product write and the category summary update commit in one transaction.
+        """
         try:
             db = self.get_db()
             if db is None:
@@ -148,12 +173,170 @@ class FirebaseService:
             
             product_data['created_at'] = datetime.now()
             product_data['updated_at'] = datetime.now()
-            doc_ref = db.collection('products').add(product_data)
-            return doc_ref[1].id
+            
+            product_ref = db.collection('products').document()
+            summary_ref = self._category_summary_ref(db)
+            
+            @firestore.transactional
+            def _create(transaction):
+                summary_doc = summary_ref.get(transaction=transaction)
+                categories = summary_doc.to_dict().get('categories', {}) if summary_doc.exists else {}
+                
+                transaction.set(product_ref, product_data)
+                if product_contribution(product_data):
+                    apply_product_change(categories, None, product_data)
+                    transaction.set(summary_ref, {'categories': categories, 'updated_at': datetime.now()})
+            
+            _create(db.transaction())
+            product_id = product_ref.id
+            
+            self._on_product_changed(product_id, {**product_data, 'id': product_id})
+            return product_id
         except Exception as e:
             st.error(f"Error creating product: {str(e)}")
             return None
     
+    def update_product(self, product_id: str, updates: Dict[str, Any]) -> bool:
+        """
+        Update fields of an existing product.
+        The category summary is adjusted in the same transaction; when a product
+        holding a category's min/max price leaves it, the bounds are recomputed
+        from that category only.
+        """
+        try:
+            db = self.get_db()
+            if db is None:
+                return False
+            
+            updates = {**updates, 'updated_at': datetime.now()}
+            product_ref = db.collection('products').document(product_id)
+            summary_ref = self._category_summary_ref(db)
+            
+            @firestore.transactional
+            def _update(transaction):
+                product_doc = product_ref.get(transaction=transaction)
+                if not product_doc.exists:
+                    return None
+                summary_doc = summary_ref.get(transaction=transaction)
+                categories = summary_doc.to_dict().get('categories', {}) if summary_doc.exists else {}
+                
+                before = product_doc.to_dict()
+                after = {**before, **updates}
+                
+                summary_changed = product_contribution(before) != product_contribution(after)
+                stale = apply_product_change(categories, before, after)
+                self._recompute_category_bounds(transaction, db, categories, stale, product_id, after)
+                
+                transaction.update(product_ref, updates)
+                if summary_changed:
+                    transaction.set(summary_ref, {'categories': categories, 'updated_at': datetime.now()})
+                return before, after
+            
+            result = _update(db.transaction())
+            if result is None:
+                return False
+            
+            before, after = result
+            self._on_product_changed(product_id, {**after, 'id': product_id}, before)
+            return True
+        except Exception as e:
+            st.error(f"Error updating product: {str(e)}")
+            return False
+    
+    def delete_product(self, product_id: str) -> bool:
+        """Delete a product and remove it from the category summary in one transaction."""
+        try:
+            db = self.get_db()
+            if db is None:
+                return False
+            
+            product_ref = db.collection('products').document(product_id)
+            summary_ref = self._category_summary_ref(db)
+            
+            @firestore.transactional
+            def _delete(transaction):
+                product_doc = product_ref.get(transaction=transaction)
+                if not product_doc.exists:
+                    return None
+                summary_doc = summary_ref.get(transaction=transaction)
+                categories = summary_doc.to_dict().get('categories', {}) if summary_doc.exists else {}
+                
+                before = product_doc.to_dict()
+                stale = apply_product_change(categories, before, None)
+                self._recompute_category_bounds(transaction, db, categories, stale, product_id, None)
+                
+                transaction.delete(product_ref)
+                if product_contribution(before):
+                    transaction.set(summary_ref, {'categories': categories, 'updated_at': datetime.now()})
+                return before
+            
+            before = _delete(db.transaction())
+            if before is None:
+                return False
+            
+            self._on_product_changed(product_id, None, before)
+            return True
+        except Exception as e:
+            st.error(f"Error deleting product: {str(e)}")
+            return False
+    
+    def _recompute_category_bounds(self, transaction, db, categories: Dict[str, Dict[str, Any]],
+                                   stale: set, product_id: str, after: Optional[Dict[str, Any]]):
+        """Recompute min/max price of stale categories from their products, inside a transaction."""
+        for category in stale:
+            query = db.collection('products').where('active', '==', True).where('category', '==', category)
+            prices = [
+                product_contribution(doc.to_dict())[1]
+                for doc in transaction.get(query)
+                if doc.id != product_id
+            ]
+            new = product_contribution(after)
+            if new and new[0] == category:
+                prices.append(new[1])
+            
+            entry = summarize_prices(prices)
+            if entry:
+                categories[category] = entry
+            else:
+                categories.pop(category, None)
+    
+    def _on_product_changed(self, product_id: str, product: Optional[Dict[str, Any]],
+                            before: Optional[Dict[str, Any]] = None):
+        """
+        Propagate a committed product write to in-process indexes and caches.
+        
+        Args:
+            product_id: Product ID
+            product: Product after the write (None when deleted)
+            before: Product before the write (None when created)
+        """
+        _apply_catalog_changes([(product_id, before, product)])
+    
+    def rebuild_category_summary(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Rebuild catalog_meta/categories from a full scan of active products.
+        Used to backfill existing catalogs (see ``python -m services.category_summary``).
+        
+        Returns:
+            The rebuilt summary (category -> count/min_price/max_price)
+            
+        Raises:
+            DatabaseError: If Firestore is not available; read and write errors
+                propagate (an empty summary must not be cached as the catalog's)
+        """
+        db = self.get_db()
+        if db is None:
+            raise DatabaseError("Firestore is not available")
+        
+        categories = build_summary(self._fetch_all_active_products())
+        self._category_summary_ref(db).set({
+            'categories': categories,
+            'updated_at': datetime.now()
+        })
+        
+        _get_cached_category_summary.clear()
+        return categories
+    
     def _fetch_products_from_db(self, category: Optional[str] = None, max_fetch: int = 100) -> List[Dict[str, Any]]:
         """
         Internal method to fetch products from Firestore.
@@ -184,48 +367,301 @@ class FirebaseService:
             st.error(f"Error fetching products: {str(e)}")
             return []
     
+    def _fetch_all_active_products(self) -> List[Dict[str, Any]]:
+        """
+        Internal method to fetch the full active catalog from Firestore.
+        Used to build the in-process search index.
+        
+        Raises:
+            DatabaseError: If Firestore is not available; read errors propagate
+                (callers must not mistake a failed read for an empty catalog)
+        """
+        db = self.get_db()
+        if db is None:
+            raise DatabaseError("Firestore is not available")
+        
+        docs = db.collection('products').where('active', '==', True).stream()
+        
+        products = []
+        for doc in docs:
+            product = doc.to_dict()
+            product['id'] = doc.id
+            products.append(product)
+        
+        return products
+    
     def get_products(self, limit: int = 12, category: Optional[str] = None, 
                      search_query: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Get products from Firestore with optional filtering.
-        Results are cached for 10 minutes to reduce Firebase costs.
+        Listings are held in the shared product cache for 10 minutes, or until
+        a product write invalidates them.
+        
+        Searches are answered from an in-process inverted index built from the
+        full active catalog, so matches are no longer limited to the first
+        products returned by Firestore.
         
         Args:
-            limit: Maximum number of products to return (applied AFTER search filter)
+            limit: Maximum number of products to return
             category: Optional category filter
             search_query: Optional search query for product name/description
             
         Returns:
-            List of product dictionaries
+            List of product dictionaries (ranked by relevance when searching)
         """
         try:
-            # IMPORTANT: Get more products than limit to allow for search filtering
-            # We'll fetch up to 100 products, filter by search, then apply limit
-            max_fetch = 100 if search_query else limit
-            
-            # Use cached function to fetch products
-            products = _get_cached_products(category, max_fetch)
-            
-            # Apply search filter BEFORE limiting results
-            # This fixes the bug where search wouldn't work if first N products didn't match
-            if search_query:
-                search_lower = search_query.lower()
-                products = [
-                    p for p in products
-                    if search_lower in p.get('name', '').lower() or
-                       search_lower in p.get('description', '').lower()
-                ]
-            
-            # Apply limit AFTER search filtering
+            if search_query and search_query.strip():
+                index = _get_search_index()
+                results = index.search(search_query, category=category, limit=limit)
+                return [dict(product) for product in results]
+            
+            # Served from the shared product cache
+            products = _get_cached_products(category, limit)
             return products[:limit]
             
         except Exception as e:
             st.error(f"Error fetching products: {str(e)}")
             return []
     
+    def get_products_page(self, cursor: Optional[str] = None, page_size: Optional[int] = None,
+                          sort: str = 'relevance', category: Optional[str] = None,
+                          search_query: Optional[str] = None, min_price: Optional[float] = None,
+                          max_price: Optional[float] = None, in_stock: bool = False,
+                          min_rating: Optional[float] = None,
+                          below_price: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Get one page of the active catalog.
+        
+        Listings are read with Firestore ``start_after`` cursors over a stable
+        ordering, so each call reads at most ``page_size + 1`` documents no matter
+        how large the catalog is. Searches page through the in-process index.
+        
+        With the catalog listener running, or when a price, rating or in-stock
+        filter is set, pages come from an in-memory CatalogSnapshot instead:
+        sort orders are precomputed once per catalog refresh, filters are
+        vectorized masks, and only the returned page is turned into dicts.
+        
+        Args:
+            cursor: Page token returned by the previous call (None for the first page)
+            page_size: Products per page (defaults to Config.PRODUCTS_PER_PAGE)
+            sort: One of PRODUCT_SORTS ('relevance', 'price_asc', 'price_desc', 'rating')
+            category: Optional category filter
+            search_query: Optional search query
+            min_price: Optional inclusive lower price bound
+            max_price: Optional inclusive upper price bound
+            in_stock: Only products with stock left
+            min_rating: Optional inclusive lower rating bound
+            below_price: Optional exclusive upper price bound (price facet buckets are [min, max))
+            
+        Returns:
+            Dictionary with 'products' (list) and 'next_cursor' (token or None)
+        """
+        page_size = page_size or Config.PRODUCTS_PER_PAGE
+        if sort not in self.PRODUCT_SORTS:
+            sort = 'relevance'
+        filters = {'min_price': min_price, 'max_price': max_price, 'in_stock': in_stock,
+                   'min_rating': min_rating, 'below_price': below_price}
+        
+        try:
+            if search_query and search_query.strip():
+                return self._search_products_page(search_query, cursor, page_size, sort, category, **filters)
+            
+            # A price/rating range plus category and sort would need a composite index
+            # per combination in Firestore; filter the search index's snapshot instead
+            if _get_catalog_store() is not None or self._page_filters(**filters):
+                return self._products_page_from_snapshot(_get_catalog_snapshot(), cursor, page_size,
+                                                         sort, category, **filters)
+            
+            return _get_cached_products_page(cursor, page_size, sort, category)
+        except Exception as e:
+            st.error(f"Error fetching products: {str(e)}")
+            return {'products': [], 'next_cursor': None}
+    
+    def _fetch_products_page_from_db(self, cursor: Optional[str], page_size: int, sort: str,
+                                     category: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Internal method to fetch one catalog page from Firestore.
+        This is the actual database query that gets cached.
+        """
+        try:
+            db = self.get_db()
+            if db is None:
+                return {'products': [], 'next_cursor': None}
+            
+            field, direction = self.PRODUCT_SORTS[sort]
+            
+            query = db.collection('products').where('active', '==', True)
+            if category:
+                query = query.where('category', '==', category)
+            query = query.order_by(field, direction=direction).order_by('__name__', direction=direction)
+            
+            # Ignore tokens minted for a different listing (e.g. after a filter change)
+            cursor_data = decode_page_token(cursor)
+            if cursor_data and cursor_data.get('sort') == sort and cursor_data.get('category') == category:
+                query = query.start_after({field: cursor_data.get('value'), '__name__': cursor_data.get('id')})
+            
+            # Read one extra document to know whether another page exists
+            docs = list(query.limit(page_size + 1).stream())
+            
+            products = []
+            for doc in docs[:page_size]:
+                product = doc.to_dict()
+                product['id'] = doc.id
+                products.append(product)
+            
+            next_cursor = None
+            if len(docs) > page_size and products:
+                last = products[-1]
+                next_cursor = encode_page_token({
+                    'sort': sort,
+                    'category': category,
+                    'value': last.get(field),
+                    'id': last['id'],
+                })
+            
+            return {'products': products, 'next_cursor': next_cursor}
+        except Exception as e:
+            st.error(f"Error fetching products: {str(e)}")
+            return {'products': [], 'next_cursor': None}
+    
+    @staticmethod
+    def _page_filters(min_price: Optional[float] = None, max_price: Optional[float] = None,
+                      in_stock: bool = False, min_rating: Optional[float] = None,
+                      below_price: Optional[float] = None) -> Optional[List[Any]]:
+        """Filters as stored in page tokens (None when no filter is set)."""
+        if min_price is None and max_price is None and not in_stock and min_rating is None \
+                and below_price is None:
+            return None
+        return [min_price, max_price, bool(in_stock), min_rating, below_price]
+    
+    @staticmethod
+    def _matches_filters(product: Dict[str, Any], min_price: Optional[float] = None,
+                         max_price: Optional[float] = None, in_stock: bool = False,
+                         min_rating: Optional[float] = None, below_price: Optional[float] = None) -> bool:
+        """Whether a product passes the price range, rating and in-stock filters."""
+        price = product.get('price')
+        if (min_price is not None or max_price is not None or below_price is not None) \
+                and not isinstance(price, (int, float)):
+            return False
+        if min_price is not None and price < min_price:
+            return False
+        if max_price is not None and price > max_price:
+            return False
+        if below_price is not None and price >= below_price:
+            return False
+        if min_rating is not None and not (product.get('rating') or 0) >= min_rating:
+            return False
+        return not in_stock or (product.get('stock') or 0) > 0
+    
+    def _products_page_from_snapshot(self, snapshot: CatalogSnapshot, cursor: Optional[str],
+                                     page_size: int, sort: str, category: Optional[str] = None,
+                                     min_price: Optional[float] = None, max_price: Optional[float] = None,
+                                     in_stock: bool = False, min_rating: Optional[float] = None,
+                                     below_price: Optional[float] = None) -> Dict[str, Any]:
+        """Serve one catalog page from an in-memory snapshot with the same tokens as Firestore pages."""
+        field, direction = self.PRODUCT_SORTS[sort]
+        filters = self._page_filters(min_price, max_price, in_stock, min_rating, below_price)
+        
+        after = None
+        cursor_data = decode_page_token(cursor)
+        if cursor_data and cursor_data.get('sort') == sort and cursor_data.get('category') == category \
+                and cursor_data.get('filters') == filters:
+            after = (cursor_data.get('value'), cursor_data.get('id'))
+        
+        products, has_more = snapshot.page(field, direction == firestore.Query.DESCENDING, page_size,
+                                           after, category=category, min_price=min_price,
+                                           max_price=max_price, in_stock=in_stock,
+                                           min_rating=min_rating, below_price=below_price)
+        
+        next_cursor = None
+        if has_more and products:
+            last = products[-1]
+            token = {
+                'sort': sort,
+                'category': category,
+                'value': last.get(field),
+                'id': last['id'],
+            }
+            if filters:
+                token['filters'] = filters
+            next_cursor = encode_page_token(token)
+        
+        return {'products': products, 'next_cursor': next_cursor}
+    
+    def _search_products_page(self, search_query: str, cursor: Optional[str], page_size: int,
+                              sort: str, category: Optional[str] = None, min_price: Optional[float] = None,
+                              max_price: Optional[float] = None, in_stock: bool = False,
+                              min_rating: Optional[float] = None,
+                              below_price: Optional[float] = None) -> Dict[str, Any]:
+        """Page through search results from the in-process index using offset tokens."""
+        results = _get_search_index().search(search_query, category=category)
+        filters = self._page_filters(min_price, max_price, in_stock, min_rating, below_price)
+        if filters:
+            results = [p for p in results
+                       if self._matches_filters(p, min_price, max_price, in_stock, min_rating, below_price)]
+        
+        if sort != 'relevance':
+            field, direction = self.PRODUCT_SORTS[sort]
+            results = sorted(
+                results,
+                key=lambda p: p.get(field) or 0,
+                reverse=direction == firestore.Query.DESCENDING
+            )
+        
+        cursor_data = decode_page_token(cursor) or {}
+        offset = 0
+        if cursor_data.get('query') == search_query and cursor_data.get('sort') == sort \
+                and cursor_data.get('category') == category and cursor_data.get('filters') == filters:
+            offset = max(int(cursor_data.get('offset') or 0), 0)
+        
+        page = [dict(product) for product in results[offset:offset + page_size]]
+        
+        next_cursor = None
+        if offset + page_size < len(results):
+            token = {
+                'query': search_query,
+                'sort': sort,
+                'category': category,
+                'offset': offset + page_size,
+            }
+            if filters:
+                token['filters'] = filters
+            next_cursor = encode_page_token(token)
+        
+        return {'products': page, 'next_cursor': next_cursor}
+    
+    def get_catalog_facets(self, category: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Facet counts of the active catalog, precomputed on each catalog refresh.
+        
+        Args:
+            category: Count price and rating facets within this category only
+            
+        Returns:
+            Dictionary with 'count', 'categories' ({category: count}), 'price'
+            (buckets with 'min', 'max', 'count') and 'rating' ('min', 'count')
+        """
+        try:
+            return _get_catalog_snapshot().facets(category)
+        except Exception as e:
+            st.error(f"Error fetching catalog facets: {str(e)}")
+            return {'count': 0, 'categories': {}, 'price': [], 'rating': []}
+    
     def get_product_by_id(self, product_id: str) -> Optional[Dict[str, Any]]:
-        """Get a single product by ID."""
+        """
+        Get a single product by ID.
+        Served from the shared product cache; Firestore is only read on a miss.
+        """
         try:
+            store = _get_catalog_store()
+            if store is not None and product_id in store:
+                return store.get(product_id)
+            
+            cache = _get_product_cache()
+            product = cache.get(product_id)
+            if product is not None:
+                return product
+            
             db = self.get_db()
             if db is None:
                 return None
@@ -235,36 +671,48 @@ class FirebaseService:
             if doc.exists:
                 product = doc.to_dict()
                 product['id'] = doc.id
-                return product
+                cache.put(product)
+                return dict(product)
             return None
         except Exception as e:
             st.error(f"Error fetching product: {str(e)}")
             return None
     
-    def _fetch_categories_from_db(self) -> List[str]:
+    def _fetch_category_summary_from_db(self) -> Dict[str, Dict[str, Any]]:
         """
-        Internal method to fetch categories from Firestore.
-        This is the actual database query that gets cached.
+        Internal method to read the category summary document from Firestore.
+        This is the actual database read that gets cached (one document read).
+        
+        Raises:
+            DatabaseError: If Firestore is not available; read errors propagate
+        """
+        db = self.get_db()
+        if db is None:
+            raise DatabaseError("Firestore is not available")
+        
+        summary_doc = self._category_summary_ref(db).get()
+        
+        # First run on an existing catalog: backfill the summary once
+        if not summary_doc.exists:
+            return self.rebuild_category_summary()
+        
+        return summary_doc.to_dict().get('categories', {})
+    
+    def get_category_summary(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get per-category product count and price range.
+        Results are cached for 1 hour and cleared whenever a product changes;
+        a failed read is not cached.
+        
+        Returns:
+            Dictionary mapping category -> {'count', 'min_price', 'max_price'}
+            (empty if it cannot be read)
         """
         try:
-            db = self.get_db()
-            if db is None:
-                return []
-            
-            # Only fetch active products to reduce reads
-            docs = db.collection('products').where('active', '==', True).stream()
-            
-            categories = set()
-            for doc in docs:
-                product = doc.to_dict()
-                if product.get('category'):
-                    categories.add(product['category'])
-            
-            return sorted(list(categories))
+            return _get_cached_category_summary()
         except Exception as e:
             st.error(f"Error fetching categories: {str(e)}")
-            return []
-    
+            return {}
     
     def get_categories(self) -> List[str]:
         """
@@ -275,59 +723,122 @@ class FirebaseService:
         Returns:
             Sorted list of category names
         """
-        return _get_cached_categories()
+        return category_names(self.get_category_summary())
     
-    def get_user_cart(self, user_id: str) -> List[Dict[str, Any]]:
-        """Get user's shopping cart."""
-        try:
-            db = self.get_db()
-            if db is None:
-                return []
+    def get_user_profile(self, user_id: str, fresh: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Get the parts of ``users/{uid}`` that sign-in, the cart and the order
+        list need, from the process-wide profile cache (one read per user per
+        Config.PROFILE_CACHE_TTL_SECONDS). Writes to the user document in this
+        process invalidate it.
+        
+        Args:
+            user_id: User ID
+            fresh: Read the document even if a cached profile exists
             
-            user_doc = db.collection('users').document(user_id).get()
+        Returns:
+            Dictionary with 'display_name', 'email', 'addresses', 'cart_items'
+            (list), 'cart_version' and 'order_ids', or None if the user has no
+            document
             
-            if user_doc.exists:
-                user_data = user_doc.to_dict()
-                return user_data.get('cart', [])
-            return []
+        Raises:
+            Exception: On Firestore errors (callers report them)
+        """
+        db = self.get_db()
+        if db is None:
+            return None
+        
+        cache = _get_profile_cache()
+        if fresh:
+            cache.invalidate(user_id)
+        return cache.load(user_id, lambda: self._read_user_profile(db, user_id))
+    
+    def _read_user_profile(self, db, user_id: str) -> Optional[Dict[str, Any]]:
+        """Read a profile from Firestore, migrating a legacy array cart on the way."""
+        user_ref = db.collection('users').document(user_id)
+        user_doc = user_ref.get()
+        
+        if not user_doc.exists:
+            return None
+        
+        user_data = user_doc.to_dict()
+        if user_data.get(LEGACY_CART_FIELD):
+            cart_items, version = self._migrate_legacy_cart(db, user_ref)
+            user_data = {**user_data, CART_FIELD: cart_items, CART_VERSION_FIELD: version}
+        return profile_from_document(user_data)
+    
+    def get_user_cart(self, user_id: str) -> List[Dict[str, Any]]:
+        """
+        Get user's shopping cart as a list of items.
+        Legacy array carts are migrated to the keyed map on first read.
+        """
+        return self.get_user_cart_state(user_id)['items']
+    
+    def get_user_cart_state(self, user_id: str, fresh: bool = False) -> Dict[str, Any]:
+        """
+        Get user's shopping cart together with its version stamp.
+        ``cart_version`` is incremented by every cart write, so a cached copy
+        can be checked for staleness (see services.cart_store.CartStore).
+        
+        Args:
+            user_id: User ID
+            fresh: Bypass the profile cache (to see writes from other processes)
+        
+        Returns:
+            Dictionary with 'items' (list) and 'version' (int)
+        """
+        try:
+            profile = self.get_user_profile(user_id, fresh=fresh)
+            if profile is None:
+                return {'items': [], 'version': 0}
+            return {'items': profile['cart_items'], 'version': profile['cart_version']}
         except Exception as e:
             st.error(f"Error fetching cart: {str(e)}")
-            return []
+            return {'items': [], 'version': 0}
     
-    def add_to_cart(self, user_id: str, product_id: str, quantity: int = 1) -> bool:
-        """Add item to user's cart."""
+    def add_to_cart(self, user_id: str, product_id: str, quantity: int = 1,
+                    product: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Add item to user's cart in one transaction.
+        The quantity is applied with an atomic server-side increment, so
+        concurrent adds from several tabs are never lost. Only the line itself
+        is read, to set ``added_at`` when the line is created and keep it on
+        later adds.
+        
+        Args:
+            user_id: User ID
+            product_id: Product ID
+            quantity: Quantity to add
+            product: Optional product document (skips the product lookup when given)
+        """
         try:
             db = self.get_db()
             if db is None:
                 return False
             
-            user_ref = db.collection('users').document(user_id)
+            if product is None:
+                product = self.get_product_by_id(product_id)
+                if not product:
+                    return False
             
-            user_doc = user_ref.get()
-            cart = user_doc.to_dict().get('cart', []) if user_doc.exists else []
+            user_ref = db.collection('users').document(user_id)
+            line_path = FieldPath(CART_FIELD, product_id).to_api_repr()
             
-            product_in_cart = False
-            for item in cart:
-                if item['product_id'] == product_id:
-                    item['quantity'] += quantity
-                    product_in_cart = True
-                    break
+            @firestore.transactional
+            def _add(transaction):
+                now = datetime.now()
+                user_doc = user_ref.get(field_paths=[line_path], transaction=transaction)
+                item = build_cart_item(product_id, product, firestore.Increment(quantity))
+                if not ((user_doc.to_dict() or {}).get(CART_FIELD) or {}).get(product_id):
+                    item['added_at'] = now
+                transaction.set(user_ref, {
+                    CART_FIELD: {product_id: item},
+                    CART_VERSION_FIELD: firestore.Increment(1),
+                    'updated_at': now
+                }, merge=True)
             
-            if not product_in_cart:
-                product = self.get_product_by_id(product_id)
-                if product:
-                    cart.append({
-                        'product_id': product_id,
-                        'name': product.get('name', ''),
-                        'price': product.get('price', 0),
-                        'image': product.get('images', [{}])[0].get('url', '') if product.get('images') else '',
-                        'quantity': quantity
-                    })
-            
-            user_ref.update({
-                'cart': cart,
-                'updated_at': datetime.now()
-            })
+            _add(db.transaction())
+            _get_profile_cache().invalidate(user_id)
             
             return True
         except Exception as e:
@@ -335,38 +846,124 @@ class FirebaseService:
             return False
     
     def update_cart_item(self, user_id: str, product_id: str, quantity: int) -> bool:
-        """Update cart item quantity."""
+        """
+        Update cart item quantity (0 or less removes the item).
+        Only the item's own field path is written; the rest of the cart is untouched.
+        """
         try:
             db = self.get_db()
             if db is None:
                 return False
             
             user_ref = db.collection('users').document(user_id)
-            
-            user_doc = user_ref.get()
-            if not user_doc.exists:
-                return False
-            
-            cart = user_doc.to_dict().get('cart', [])
+            item_path = FieldPath(CART_FIELD, product_id)
             
             if quantity <= 0:
-                cart = [item for item in cart if item['product_id'] != product_id]
-            else:
-                for item in cart:
-                    if item['product_id'] == product_id:
-                        item['quantity'] = quantity
-                        break
+                user_ref.update({
+                    item_path.to_api_repr(): firestore.DELETE_FIELD,
+                    CART_VERSION_FIELD: firestore.Increment(1),
+                    'updated_at': datetime.now()
+                })
+                _get_profile_cache().invalidate(user_id)
+                return True
             
-            user_ref.update({
-                'cart': cart,
-                'updated_at': datetime.now()
-            })
+            # Read-and-set inside a transaction so an item removed concurrently
+            # is not resurrected as a partial entry
+            @firestore.transactional
+            def _update(transaction):
+                user_doc = user_ref.get(transaction=transaction)
+                if not user_doc.exists:
+                    return False
+                if not (user_doc.to_dict().get(CART_FIELD) or {}).get(product_id):
+                    return False
+                transaction.update(user_ref, {
+                    FieldPath(CART_FIELD, product_id, 'quantity').to_api_repr(): quantity,
+                    CART_VERSION_FIELD: firestore.Increment(1),
+                    'updated_at': datetime.now()
+                })
+                return True
             
-            return True
+            updated = _update(db.transaction())
+            _get_profile_cache().invalidate(user_id)
+            return updated
         except Exception as e:
             st.error(f"Error updating cart: {str(e)}")
             return False
     
+    def apply_cart_changes(self, user_id: str, changes: Dict[str, Optional[Dict[str, Any]]],
+                           clear: bool = False, flush_id: Optional[str] = None) -> bool:
+        """
+        Apply a batch of coalesced cart changes in a single write.
+        Quantities are added with ``firestore.Increment``, so changes flushed by
+        several sessions for the same product add up instead of overwriting
+        each other. Used by the write-behind buffer, which may run off the
+        script thread, so errors are raised rather than shown with ``st.error``.
+        
+        With a ``flush_id`` the write is a transaction that records the ID and
+        skips batches already applied, so retrying a write whose outcome was
+        unknown (e.g. a timeout after commit) does not add its deltas twice.
+        
+        Args:
+            user_id: User ID
+            changes: Product ID -> None to remove the line, or a change with
+                'item' (the line's snapshot), 'quantity' and 'replace': the
+                quantity is added to the stored one, or written as the line's
+                quantity when 'replace' is set (line removed or cart cleared first)
+            clear: Replace the whole cart with the lines in ``changes``
+            flush_id: Unique ID of the batch, reused by retries of the same batch
+        
+        Raises:
+            DatabaseError: If Firestore is not available; write errors propagate
+        """
+        db = self.get_db()
+        if db is None:
+            raise DatabaseError("Firestore is not available")
+        
+        if clear:
+            updates = {
+                CART_FIELD: {pid: {**change['item'], 'quantity': change['quantity']}
+                             for pid, change in changes.items() if change},
+                LEGACY_CART_FIELD: firestore.DELETE_FIELD,
+            }
+        else:
+            updates = {}
+            for pid, change in changes.items():
+                if change is None:
+                    updates[FieldPath(CART_FIELD, pid).to_api_repr()] = firestore.DELETE_FIELD
+                elif change['replace']:
+                    updates[FieldPath(CART_FIELD, pid).to_api_repr()] = {
+                        **change['item'], 'quantity': change['quantity']
+                    }
+                else:
+                    # Snapshot fields too, in case another session removed the line meanwhile
+                    for field, value in change['item'].items():
+                        if field != 'quantity':
+                            updates[FieldPath(CART_FIELD, pid, field).to_api_repr()] = value
+                    updates[FieldPath(CART_FIELD, pid, 'quantity').to_api_repr()] = (
+                        firestore.Increment(change['quantity'])
+                    )
+        updates[CART_VERSION_FIELD] = firestore.Increment(1)
+        updates['updated_at'] = datetime.now()
+        
+        user_ref = db.collection('users').document(user_id)
+        if flush_id is None:
+            user_ref.update(updates)
+        else:
+            @firestore.transactional
+            def _apply(transaction):
+                user_doc = user_ref.get(transaction=transaction)
+                recent = (user_doc.to_dict() or {}).get(CART_FLUSHES_FIELD) or []
+                if flush_id in recent:
+                    return
+                transaction.update(user_ref, {
+                    **updates,
+                    CART_FLUSHES_FIELD: (recent + [flush_id])[-RECENT_CART_FLUSHES:],
+                })
+            
+            _apply(db.transaction())
+        _get_profile_cache().invalidate(user_id)
+        return True
+    
     def clear_cart(self, user_id: str) -> bool:
         """Clear user's cart."""
         try:
@@ -375,65 +972,250 @@ class FirebaseService:
                 return False
             
             db.collection('users').document(user_id).update({
-                'cart': [],
+                CART_FIELD: {},
+                LEGACY_CART_FIELD: firestore.DELETE_FIELD,
+                CART_VERSION_FIELD: firestore.Increment(1),
                 'updated_at': datetime.now()
             })
+            _get_profile_cache().invalidate(user_id)
             return True
         except Exception as e:
             st.error(f"Error clearing cart: {str(e)}")
             return False
     
+    def _migrate_legacy_cart(self, db, user_ref) -> Tuple[Dict[str, Dict[str, Any]], int]:
+        """
+        Move a legacy ``cart`` array into the ``cart_items`` map in one transaction.
+        
+        Returns:
+            The migrated cart map and its new cart_version
+        """
+        @firestore.transactional
+        def _migrate(transaction):
+            user_doc = user_ref.get(transaction=transaction)
+            if not user_doc.exists:
+                return {}, 0
+            
+            user_data = user_doc.to_dict()
+            cart_items = merge_legacy_cart(user_data.get(LEGACY_CART_FIELD), user_data.get(CART_FIELD))
+            version = user_data.get(CART_VERSION_FIELD, 0) + 1
+            transaction.update(user_ref, {
+                CART_FIELD: cart_items,
+                LEGACY_CART_FIELD: firestore.DELETE_FIELD,
+                CART_VERSION_FIELD: version,
+                'updated_at': datetime.now()
+            })
+            return cart_items, version
+        
+        migrated = _migrate(db.transaction())
+        _get_profile_cache().invalidate(user_ref.id)
+        return migrated
+    
+    def migrate_legacy_carts(self) -> int:
+        """
+        Migrate every user document still storing the cart as an array.
+        Carts are also migrated lazily on read; this finishes the job in bulk.
+        
+        Returns:
+            Number of migrated carts
+        """
+        try:
+            db = self.get_db()
+            if db is None:
+                return 0
+            
+            migrated = 0
+            for user_doc in db.collection('users').stream():
+                if user_doc.to_dict().get(LEGACY_CART_FIELD):
+                    self._migrate_legacy_cart(db, user_doc.reference)
+                    migrated += 1
+            return migrated
+        except Exception as e:
+            st.error(f"Error migrating carts: {str(e)}")
+            return 0
+    
+    def validate_cart(self, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Check cart lines against current product prices and stock.
+        Every product document is read with one ``get_all``, never from the
+        caches, whose stock may be stale.
+        
+        Returns:
+            Dictionary with 'items' (lines at current prices), 'price_changes',
+            'errors' (one per failing line) and 'stock_updates'
+            (see services.checkout.reconcile_cart)
+        """
+        try:
+            db = self.get_db()
+            if db is None:
+                raise DatabaseError("Firestore is not available")
+            
+            refs = [db.collection('products').document(product_id)
+                    for product_id in dict.fromkeys(item['product_id'] for item in items)]
+            products = {doc.id: doc.to_dict() for doc in db.get_all(refs) if doc.exists}
+            return reconcile_cart(items, products)
+        except Exception as e:
+            st.error(f"Error validating cart: {str(e)}")
+            error = e if isinstance(e, EcommerceException) else DatabaseError(str(e))
+            return {'items': items, 'price_changes': [], 'errors': [error], 'stock_updates': {}}
+    
     def create_order(self, user_id: str, order_data: Dict[str, Any]) -> Optional[str]:
-        """Create a new order."""
+        """
+        Create a new order (the cart is left as it is; checkout uses ``place_order``).
+        The order's lines are checked against current prices and stock, stock
+        is decremented and the order is written in one transaction, so two
+        buyers can never both take the last unit.
+        
+        Raises:
+            InsufficientStockError, ProductNotFoundError: For the first failing line
+            ValidationError: If a price changed since the order was reviewed
+        """
         try:
             db = self.get_db()
             if db is None:
                 return None
             
-            order_data['user_id'] = user_id
-            order_data['status'] = 'pending'
-            order_data['created_at'] = datetime.now()
-            order_data['updated_at'] = datetime.now()
+            return self._commit_order(db, user_id, db.collection('orders').document().id, order_data)
+        except EcommerceException:
+            raise
+        except Exception as e:
+            st.error(f"Error creating order: {str(e)}")
+            return None
+    
+    def place_order(self, user_id: str, order_id: str, order_data: Dict[str, Any]) -> Optional[str]:
+        """
+        Place an order from the user's cart in a single commit.
+        Stock is checked and decremented, the order is written, its ID is
+        appended to the user's ``orders`` with ``ArrayUnion`` and the ordered
+        lines are removed from the cart, all in one transaction.
+        
+        Idempotent: ``order_id`` is generated by the client once per checkout
+        (``services.checkout.new_order_id``), and retrying with an ID whose order
+        already exists returns it without writing anything again.
+        
+        Args:
+            user_id: User ID
+            order_id: Client-generated order ID
+            order_data: 'items', 'totals', 'shipping_info' and 'payment_info'
+        
+        Returns:
+            The order ID, or None on failure
+        
+        Raises:
+            InsufficientStockError, ProductNotFoundError: For the first failing line
+            ValidationError: If a price changed since the order was reviewed, or
+                the order ID belongs to another user or to a different order
+        """
+        try:
+            db = self.get_db()
+            if db is None:
+                return None
             
-            doc_ref = db.collection('orders').add(order_data)
-            order_id = doc_ref[1].id
+            return self._commit_order(db, user_id, order_id, order_data, clear_cart=True)
+        except EcommerceException:
+            raise
+        except Exception as e:
+            st.error(f"Error placing order: {str(e)}")
+            return None
+    
+    def _commit_order(self, db, user_id: str, order_id: str, order_data: Dict[str, Any],
+                      clear_cart: bool = False) -> str:
+        """
+        Write an order in one transaction (see create_order and place_order).
+        The order and product documents are read with a single ``get_all``;
+        the user document is only written.
+        """
+        if not order_id or '/' in order_id:
+            raise ValidationError("Invalid order ID", field='order_id')
+        
+        now = datetime.now()
+        order = {**order_data, 'user_id': user_id, 'status': 'pending', 'created_at': now, 'updated_at': now}
+        
+        items = order.get('items', [])
+        order_ref = db.collection('orders').document(order_id)
+        user_ref = db.collection('users').document(user_id)
+        product_refs = {product_id: db.collection('products').document(product_id)
+                        for product_id in dict.fromkeys(item['product_id'] for item in items)}
+        
+        user_updates: Dict[str, Any] = {
+            'orders': firestore.ArrayUnion([order_id]),
+            'updated_at': now
+        }
+        if clear_cart:
+            for product_id in product_refs:
+                user_updates[FieldPath(CART_FIELD, product_id).to_api_repr()] = firestore.DELETE_FIELD
+            user_updates[CART_VERSION_FIELD] = firestore.Increment(1)
+        
+        @firestore.transactional
+        def _commit(transaction):
+            docs = db.get_all([order_ref, *product_refs.values()], transaction=transaction)
+            snapshots = {doc.reference.path: doc for doc in docs}
             
-            user_ref = db.collection('users').document(user_id)
-            user_doc = user_ref.get()
-            orders = user_doc.to_dict().get('orders', []) if user_doc.exists else []
-            orders.append(order_id)
+            existing = snapshots[order_ref.path]
+            if existing.exists:
+                # A retry of an order that already committed
+                stored = existing.to_dict()
+                if stored.get('user_id') != user_id or not same_order(stored, order):
+                    raise ValidationError("Order ID already in use", field='order_id')
+                return None
             
-            user_ref.update({
-                'orders': orders,
-                'updated_at': datetime.now()
-            })
+            products = {
+                product_id: snapshots[ref.path].to_dict()
+                for product_id, ref in product_refs.items() if snapshots[ref.path].exists
+            }
+            check = reconcile_cart(items, products)
+            if check['errors']:
+                raise check['errors'][0]
+            if check['price_changes']:
+                raise ValidationError("Prices changed since the order was reviewed", field='items',
+                                      details={'price_changes': check['price_changes']})
             
+            for product_id, quantity in check['stock_updates'].items():
+                transaction.update(product_refs[product_id], {
+                    'stock': firestore.Increment(-quantity),
+                    'updated_at': now
+                })
+            transaction.create(order_ref, order)
+            transaction.update(user_ref, user_updates)
+            return {product_id: (products[product_id], quantity)
+                    for product_id, quantity in check['stock_updates'].items()}
+        
+        taken = _commit(db.transaction())
+        if taken is None:
             return order_id
-        except Exception as e:
-            st.error(f"Error creating order: {str(e)}")
-            return None
+        
+        _get_profile_cache().invalidate(user_id)
+        for product_id, (before, quantity) in taken.items():
+            after = {**before, 'id': product_id, 'stock': before['stock'] - quantity}
+            self._on_product_changed(product_id, after, before)
+        return order_id
     
     def get_user_orders(self, user_id: str) -> List[Dict[str, Any]]:
-        """Get user's orders."""
+        """
+        Get all of a user's orders, newest first.
+        Order IDs come from the cached user profile; the orders are loaded with
+        batched ``get_all`` calls instead of one read round trip per order.
+        """
         try:
             db = self.get_db()
             if db is None:
                 return []
             
-            user_doc = db.collection('users').document(user_id).get()
-            
-            if not user_doc.exists:
+            profile = self.get_user_profile(user_id)
+            if profile is None:
                 return []
             
-            orders = user_doc.to_dict().get('orders', [])
+            order_ids = profile['order_ids']
+            orders_ref = db.collection('orders')
             order_details = []
             
-            for order_id in orders:
-                order_doc = db.collection('orders').document(order_id).get()
-                if order_doc.exists:
-                    order = order_doc.to_dict()
-                    order['id'] = order_id
-                    order_details.append(order)
+            for start in range(0, len(order_ids), self.GET_ALL_CHUNK_SIZE):
+                chunk = order_ids[start:start + self.GET_ALL_CHUNK_SIZE]
+                for order_doc in db.get_all([orders_ref.document(order_id) for order_id in chunk]):
+                    if order_doc.exists:
+                        order = order_doc.to_dict()
+                        order['id'] = order_doc.id
+                        order_details.append(order)
             
             order_details.sort(key=lambda x: x.get('created_at', datetime.min), reverse=True)
             
@@ -442,6 +1224,72 @@ class FirebaseService:
             st.error(f"Error fetching orders: {str(e)}")
             return []
     
+    def get_user_orders_page(self, user_id: str, cursor: Optional[str] = None,
+                             page_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Get one page of a user's orders, newest first.
+        Reads at most ``page_size + 1`` order documents with a single query,
+        independent of how many orders the user has placed.
+        
+        Args:
+            user_id: User ID
+            cursor: Page token returned by the previous call (None for the first page)
+            page_size: Orders per page (defaults to Config.ORDERS_PER_PAGE)
+            
+        Returns:
+            Dictionary with 'orders' (list) and 'next_cursor' (token or None)
+        """
+        page_size = page_size or Config.ORDERS_PER_PAGE
+        
+        try:
+            db = self.get_db()
+            if db is None:
+                return {'orders': [], 'next_cursor': None}
+            
+            query = self._orders_page_query(db.collection('orders'), user_id, cursor, page_size)
+            return self._orders_page(list(query.stream()), user_id, page_size)
+        except Exception as e:
+            st.error(f"Error fetching orders: {str(e)}")
+            return {'orders': [], 'next_cursor': None}
+    
+    @staticmethod
+    def _orders_page_query(orders_ref, user_id: str, cursor: Optional[str], page_size: int):
+        """Query for one page of a user's orders (works on sync and async collections)."""
+        query = (
+            orders_ref
+            .where('user_id', '==', user_id)
+            .order_by('created_at', direction=firestore.Query.DESCENDING)
+            .order_by('__name__', direction=firestore.Query.DESCENDING)
+        )
+        
+        cursor_data = decode_page_token(cursor)
+        if cursor_data and cursor_data.get('user_id') == user_id:
+            query = query.start_after({
+                'created_at': cursor_data.get('value'),
+                '__name__': cursor_data.get('id')
+            })
+        return query.limit(page_size + 1)
+    
+    @staticmethod
+    def _orders_page(docs: List[Any], user_id: str, page_size: int) -> Dict[str, Any]:
+        """Build the orders page result from up to ``page_size + 1`` order snapshots."""
+        orders = []
+        for doc in docs[:page_size]:
+            order = doc.to_dict()
+            order['id'] = doc.id
+            orders.append(order)
+        
+        next_cursor = None
+        if len(docs) > page_size and orders:
+            last = orders[-1]
+            next_cursor = encode_page_token({
+                'user_id': user_id,
+                'value': last.get('created_at'),
+                'id': last['id'],
+            })
+        
+        return {'orders': orders, 'next_cursor': next_cursor}
+    
     def upload_image(self, file_bytes: bytes, file_name: str, folder: str = 'products') -> Optional[str]:
         """Upload image to Firebase Storage."""
         try:
@@ -457,12 +1305,13 @@ class FirebaseService:
 
 # ==================== Cached Helper Functions ====================
 # These functions are at module level to enable proper caching with @st.cache_data
+# and @st.cache_resource (shared by all sessions)
 
-@st.cache_data(ttl=600)  # Cache for 10 minutes
 def _get_cached_products(category: Optional[str] = None, max_fetch: int = 100) -> List[Dict[str, Any]]:
     """
-    Cached helper function to fetch products from Firestore.
-    This function is cached to dramatically reduce Firebase read costs.
+    Fetch a product listing through the shared product cache.
+    Only the product IDs are kept per listing; the products themselves are
+    shared with every other listing and with get_product_by_id.
     
     Args:
         category: Optional category filter
@@ -472,27 +1321,265 @@ def _get_cached_products(category: Optional[str] = None, max_fetch: int = 100) -
         List of product dictionaries
     """
     try:
+        store = _get_catalog_store()
+        if store is not None:
+            return store.products(category, max_fetch)
+        
+        cache = _get_product_cache()
+        key = ('products', category, max_fetch)
+        cached = cache.get_listing(key)
+        if cached is not None:
+            return cached[0]
+        
         firebase = FirebaseService()
-        return firebase._fetch_products_from_db(category, max_fetch)
+        products = firebase._fetch_products_from_db(category, max_fetch)
+        cache.put_listing(key, products, category=category)
+        return products
     except Exception as e:
         st.error(f"Error in cached products fetch: {str(e)}")
         return []
 
 
-@st.cache_data(ttl=3600)  # Cache for 1 hour (categories change infrequently)
-def _get_cached_categories() -> List[str]:
+def _get_cached_products_page(cursor: Optional[str], page_size: int, sort: str,
+                              category: Optional[str] = None) -> Dict[str, Any]:
     """
-    Cached helper function to fetch categories from Firestore.
-    This function is cached for 1 hour to dramatically reduce Firebase read costs.
-    Categories are cached longer than products since they change less frequently.
+    Fetch one catalog page through the shared product cache.
+    Each (cursor, page_size, sort, category) combination is a separate listing.
     
+    Args:
+        cursor: Page token (None for the first page)
+        page_size: Products per page
+        sort: Sort key from FirebaseService.PRODUCT_SORTS
+        category: Optional category filter
+        
     Returns:
-        Sorted list of category names
+        Dictionary with 'products' and 'next_cursor'
     """
     try:
+        store = _get_catalog_store()
+        if store is not None:
+            return FirebaseService()._products_page_from_snapshot(store.snapshot(), cursor, page_size,
+                                                                  sort, category)
+        
+        cache = _get_product_cache()
+        key = ('page', cursor, page_size, sort, category)
+        cached = cache.get_listing(key)
+        if cached is not None:
+            products, meta = cached
+            return {'products': products, 'next_cursor': meta.get('next_cursor')}
+        
         firebase = FirebaseService()
-        return firebase._fetch_categories_from_db()
+        page = firebase._fetch_products_page_from_db(cursor, page_size, sort, category)
+        cache.put_listing(key, page['products'], category=category,
+                          meta={'next_cursor': page['next_cursor']})
+        return page
     except Exception as e:
-        st.error(f"Error in cached categories fetch: {str(e)}")
-        return []
+        st.error(f"Error in cached products page fetch: {str(e)}")
+        return {'products': [], 'next_cursor': None}
+
+
+@st.cache_data(ttl=3600)  # Cache for 1 hour (categories change infrequently)
+def _get_cached_category_summary() -> Dict[str, Dict[str, Any]]:
+    """
+    Cached helper function to read the category summary from Firestore.
+    This function is cached for 1 hour; product writes clear it explicitly.
+    
+    Returns:
+        Dictionary mapping category -> {'count', 'min_price', 'max_price'}
+    
+    Raises:
+        Exception: If the summary cannot be read (not cached, so the next call retries)
+    """
+    return FirebaseService()._fetch_category_summary_from_db()
+
+
+@st.cache_resource(ttl=600)  # Full rebuild every 10 minutes, incremental updates in between
+def _build_search_index() -> SearchIndex:
+    """
+    Process-wide search index built from the full active catalog.
+    Shared by all sessions; create_product updates it in place.
+    
+    Returns:
+        SearchIndex over all active products
+    
+    Raises:
+        Exception: If the catalog cannot be read (not cached, so the next call retries)
+    """
+    global _built_search_index
+    store = _get_catalog_store()
+    if store is not None:
+        index = SearchIndex(store.products())
+    else:
+        index = SearchIndex(FirebaseService()._fetch_all_active_products())
+    _built_search_index = index
+    return index
+
+
+# Last index _build_search_index returned, so product writes can update it
+# without triggering a build (see _apply_catalog_changes)
+_built_search_index: Optional[SearchIndex] = None
+
+
+def _get_search_index() -> SearchIndex:
+    """
+    The process-wide search index, or an empty uncached one if it cannot be built.
+    
+    Returns:
+        SearchIndex over all active products
+    """
+    try:
+        return _build_search_index()
+    except Exception as e:
+        st.error(f"Error building search index: {str(e)}")
+        return SearchIndex()
+
+
+
+@st.cache_resource
+def _get_product_cache() -> ProductCache:
+    """
+    Process-wide product cache shared by all sessions.
+    Product writes in this process invalidate it through _on_product_changed;
+    listings expire after 10 minutes so writes from other processes show up.
+    
+    Returns:
+        ProductCache bounded by Config.PRODUCT_CACHE_MAX_BYTES
+    """
+    return ProductCache(max_bytes=Config.PRODUCT_CACHE_MAX_BYTES, listing_ttl=600)
+
 
+def _apply_catalog_changes(changes: List[Tuple[str, Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]):
+    """
+    Apply product changes to the in-process search index and caches.
+    Called after local product writes and for every snapshot seen by the
+    catalog listener (repeating a change is harmless).
+    
+    Args:
+        changes: (product_id, before, after) tuples; before/after are None
+            for created/deleted products
+    """
+    # Only an index that is already built is updated: a cold or expired one
+    # would cost a full catalog scan here, and the next search builds it anyway
+    index = _built_search_index
+    cache = _get_product_cache()
+    for product_id, before, after in changes:
+        # Keep the search index in sync without a full rebuild
+        if index is not None:
+            if after and after.get('active'):
+                index.add({**after, 'id': product_id})
+            else:
+                index.remove(product_id)
+        
+        cache.apply_change(product_id, before, after)
+    
+    _get_cached_category_summary.clear()
+
+
+@st.cache_resource
+def _get_profile_cache() -> ProfileCache:
+    """
+    Process-wide user profile cache shared by all sessions.
+    User document writes in this process invalidate it; entries expire after
+    Config.PROFILE_CACHE_TTL_SECONDS so writes from other processes show up.
+    
+    Returns:
+        ProfileCache
+    """
+    return ProfileCache(ttl=Config.PROFILE_CACHE_TTL_SECONDS, max_entries=Config.PROFILE_CACHE_MAX_ENTRIES)
+
+
+@st.cache_resource
+def _get_firebase_app() -> firebase_admin.App:
+    """
+    The process's Firebase app, initialized once from the Streamlit secrets.
+    Failures are not cached, so a fixed configuration is picked up on the next call.
+    
+    Returns:
+        Initialized firebase_admin.App
+        
+    Raises:
+        ValueError: If the credentials are missing or incomplete
+    """
+    from config.settings import get_firebase_credentials
+    
+    # Reuse an app initialized elsewhere in the process
+    try:
+        return firebase_admin.get_app()
+    except ValueError:
+        pass
+    
+    cred_dict = get_firebase_credentials()
+    if not cred_dict:
+        raise ValueError("Firebase credentials not found in Streamlit secrets. "
+                         "Please configure them in Streamlit Cloud settings.")
+    
+    # Validate that credentials have required fields
+    required_fields = ['type', 'project_id', 'private_key', 'client_email']
+    missing_fields = [field for field in required_fields if field not in cred_dict]
+    if missing_fields:
+        raise ValueError(f"Firebase credentials missing required fields: {', '.join(missing_fields)}")
+    
+    # Ensure type field is set correctly
+    if cred_dict.get('type') != 'service_account':
+        cred_dict['type'] = 'service_account'
+    
+    return firebase_admin.initialize_app(credentials.Certificate(cred_dict))
+
+
+@st.cache_resource
+def _get_firestore_holder() -> FirestoreClientHolder:
+    """
+    Process-wide holder of the Firestore client and its gRPC channel.
+    Shared by all sessions and threads; see services/firestore_client.py.
+    
+    Returns:
+        FirestoreClientHolder for the Firebase app
+    """
+    return FirestoreClientHolder(_get_firebase_app())
+
+
+def _get_catalog_snapshot() -> CatalogSnapshot:
+    """
+    Columnar snapshot of the active catalog: the live store's when the
+    listener is ready, otherwise the search index's (rebuilt with the index).
+    
+    Returns:
+        CatalogSnapshot with precomputed sort orders and facet counts
+    """
+    store = _get_catalog_store()
+    if store is not None:
+        return store.snapshot()
+    return _get_search_index().snapshot()
+
+
+def _get_catalog_store() -> Optional[CatalogStore]:
+    """
+    Live catalog kept current by the on_snapshot listener.
+    
+    Returns:
+        The store, or None when the listener is disabled or has not received
+        its first snapshot yet (callers then query Firestore)
+    """
+    if not Config.CATALOG_LISTENER_ENABLED:
+        return None
+    store = _get_catalog_listener().store
+    return store if store.ready else None
+
+
+@st.cache_resource
+def _get_catalog_listener() -> CatalogListener:
+    """
+    The process's single listener on active products (opt-in via
+    Config.CATALOG_LISTENER_ENABLED). Reconnects with backoff on its own.
+    
+    Returns:
+        Started CatalogListener
+    """
+    def _active_products_query():
+        return FirebaseService().get_db().collection('products').where('active', '==', True)
+    
+    store = CatalogStore()
+    store.subscribe(_apply_catalog_changes)
+    listener = CatalogListener(_active_products_query, store)
+    listener.start()
+    return listener
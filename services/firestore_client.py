@@ -0,0 +1,152 @@
+"""
+Process-wide Firebase app and Firestore client.
+
+One ``FirestoreClientHolder`` per process owns the Firestore client, and with
+it the gRPC channel, that every session and thread shares:
+
+- The client is created once, on first use or by ``warm_up()``. ``get_db()``
+  then costs an attribute read instead of ``firebase_admin.get_app()`` plus
+  ``firestore.client()`` on every call.
+- The SDK opens the channel with keepalive pings every 30 seconds, so idle
+  connections are detected and re-established before a user request needs
+  them.
+- ``health_check()`` issues one small read and drops the client after a
+  failure, so the next caller gets a fresh channel.
+- ``warm_up_async()`` runs the first health check in a background thread. The
+  OAuth token fetch, TLS handshake and channel setup then overlap with the
+  first page render instead of delaying its first query.
+
+``create_firestore_client`` (and ``create_async_firestore_client`` for
+``AsyncFirebaseService``) are the only places clients are built, so tests and
+the load test can swap in a fake.
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from google.cloud import firestore
+
+from services.firestore_metrics import instrument
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+# Document read by health checks (it does not need to exist)
+HEALTH_CHECK_PATH = ('catalog_meta', 'health')
+
+
+def create_firestore_client(app) -> Any:
+    """
+    Build the Firestore client for a Firebase app.
+
+    Args:
+        app: Initialized ``firebase_admin.App``
+
+    Returns:
+        ``google.cloud.firestore.Client``
+    """
+    project = app.project_id
+    if not project:
+        raise ValueError("Project ID is required to access Firestore")
+    return firestore.Client(credentials=app.credential.get_credential(), project=project)
+
+
+def create_async_firestore_client(app) -> Any:
+    """
+    Build the asyncio Firestore client for a Firebase app.
+
+    Its channel is bound to the event loop of the first RPC, so the client must
+    only be used from one loop (see services/async_firebase_service.py).
+
+    Args:
+        app: Initialized ``firebase_admin.App``
+
+    Returns:
+        ``google.cloud.firestore.AsyncClient``
+    """
+    project = app.project_id
+    if not project:
+        raise ValueError("Project ID is required to access Firestore")
+    return firestore.AsyncClient(credentials=app.credential.get_credential(), project=project)
+
+
+class FirestoreClientHolder:
+    """Thread-safe owner of the process's Firestore client."""
+
+    def __init__(self, app: Any = None, client_factory: Optional[Callable[[Any], Any]] = None):
+        """
+        Args:
+            app: Firebase app the client is created for
+            client_factory: Builds the raw client from ``app``
+                (defaults to ``create_firestore_client``)
+        """
+        self.app = app
+        self._client_factory = client_factory
+        self._lock = threading.Lock()
+        self._client = None
+        self._instrumented = None
+        self._warm_up_thread: Optional[threading.Thread] = None
+        self.clients_created = 0
+        self.last_health: Optional[Dict[str, Any]] = None
+
+    @property
+    def client(self):
+        """The shared client, instrumented for RPC accounting (created on first use)."""
+        instrumented = self._instrumented
+        if instrumented is not None:
+            return instrumented
+        with self._lock:
+            if self._instrumented is None:
+                factory = self._client_factory or create_firestore_client
+                self._client = factory(self.app)
+                self._instrumented = instrument(self._client)
+                self.clients_created += 1
+                logger.info("Firestore client created")
+            return self._instrumented
+
+    def health_check(self, timeout: float = 5.0) -> Dict[str, Any]:
+        """
+        Read one small document through the shared client.
+
+        A failed check drops the client, so the next caller opens a new channel.
+
+        Returns:
+            Dictionary with 'ok', 'latency_ms', 'error' and 'checked_at' (epoch seconds)
+        """
+        start = time.perf_counter()
+        try:
+            collection, document = HEALTH_CHECK_PATH
+            self.client.collection(collection).document(document).get(timeout=timeout)
+            health = {'ok': True, 'error': None}
+        except Exception as e:
+            logger.warning(f"Firestore health check failed: {e}")
+            health = {'ok': False, 'error': str(e)}
+            self.reset()
+        health['latency_ms'] = round((time.perf_counter() - start) * 1000, 1)
+        health['checked_at'] = time.time()
+        self.last_health = health
+        return health
+
+    def warm_up(self) -> Dict[str, Any]:
+        """Create the client and open its channel with a health check."""
+        return self.health_check()
+
+    def warm_up_async(self) -> threading.Thread:
+        """Run ``warm_up`` once in a background thread (idempotent)."""
+        with self._lock:
+            if self._warm_up_thread is None:
+                self._warm_up_thread = threading.Thread(target=self.warm_up, name='firestore-warm-up',
+                                                        daemon=True)
+                self._warm_up_thread.start()
+            return self._warm_up_thread
+
+    def reset(self):
+        """
+        Drop the client; the next access creates a new one.
+
+        The old client is not closed: other threads may still be using it, and
+        its channel is released once the last reference goes away.
+        """
+        with self._lock:
+            self._client, self._instrumented = None, None
@@ -0,0 +1,502 @@
+"""
+Firestore RPC accounting.
+
+``FirebaseService.get_db`` returns an ``InstrumentedClient``: a thin proxy over
+the Firestore client that counts every document read, write and delete and
+times every RPC. Counts are attributed three ways:
+
+- method: the outermost ``FirebaseService`` / ``AuthService`` call that issued
+  the RPC (set by the ``track_methods`` class decorator)
+- page: the page being rendered (set by ``track_rerun`` in ``app.main``)
+- session: the Streamlit session that issued the RPC
+
+Reads are counted the way Firestore bills them: one per document returned, and
+one for a query that returns nothing. Writes staged on a transaction or batch
+count when staged. Snapshot listeners are not counted.
+
+Each rerun logs one structured summary line. With ``Config.FIRESTORE_READ_BUDGET``
+set, a rerun that reads more documents than the budget logs a warning (and
+shows one in the app when ``DEBUG`` is on).
+"""
+import contextvars
+import functools
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional
+
+from utils.logger import get_logger
+from utils.profiler import PERCENTILES, percentile, record_rpc
+
+logger = get_logger(__name__)
+
+# Document operations counted per method, page and session
+OPERATIONS = ('reads', 'writes', 'deletes', 'rpcs')
+
+# Upper bounds (ms) of the latency histogram buckets; slower RPCs go to '+inf'
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+_current_method: contextvars.ContextVar = contextvars.ContextVar('firestore_method', default=None)
+_current_page: contextvars.ContextVar = contextvars.ContextVar('firestore_page', default=None)
+_current_rerun: contextvars.ContextVar = contextvars.ContextVar('firestore_rerun', default=None)
+
+
+def _session_id() -> Optional[str]:
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx(suppress_warning=True)
+    except Exception:
+        return None
+    return ctx.session_id if ctx is not None else None
+
+
+class _LatencyHistogram:
+    __slots__ = ('buckets', 'window')
+
+    def __init__(self, max_samples: int):
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.window: Deque[float] = deque(maxlen=max_samples)
+
+    def add(self, latency_ms: float):
+        for index, bound in enumerate(LATENCY_BUCKETS_MS):
+            if latency_ms <= bound:
+                break
+        else:
+            index = len(LATENCY_BUCKETS_MS)
+        self.buckets[index] += 1
+        self.window.append(latency_ms)
+
+    def to_dict(self) -> Dict[str, Any]:
+        labels = [f'<={bound}' for bound in LATENCY_BUCKETS_MS] + ['+inf']
+        samples = list(self.window)
+        stats: Dict[str, Any] = {'count': sum(self.buckets), 'buckets': dict(zip(labels, self.buckets))}
+        for pct in PERCENTILES:
+            stats[f'p{pct}'] = percentile(samples, pct)
+        stats['max'] = max(samples) if samples else 0
+        return stats
+
+
+class FirestoreMetrics:
+    """Process-wide Firestore operation counters and latency histograms."""
+
+    def __init__(self, max_samples: int = 1000, max_sessions: int = 500):
+        """
+        Args:
+            max_samples: Latency samples kept per RPC type for percentiles
+            max_sessions: Sessions tracked (least recently active are dropped)
+        """
+        self.max_samples = max_samples
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Drop all counters and latency samples."""
+        with self._lock:
+            self._by_method: Dict[str, Dict[str, int]] = {}
+            self._by_page: Dict[str, Dict[str, int]] = {}
+            self._by_session: 'OrderedDict[str, Dict[str, int]]' = OrderedDict()
+            self._latency: Dict[str, _LatencyHistogram] = {}
+
+    def record(self, rpc: str, reads: int = 0, writes: int = 0, deletes: int = 0,
+               latency_ms: Optional[float] = None):
+        """
+        Account for one Firestore operation.
+
+        Args:
+            rpc: Operation type, e.g. "document.get" or "query.stream"
+            reads / writes / deletes: Documents read, written and deleted
+            latency_ms: Round-trip time, or None for operations staged locally
+                (transaction and batch writes)
+        """
+        counts = {'reads': reads, 'writes': writes, 'deletes': deletes,
+                  'rpcs': 1 if latency_ms is not None else 0}
+        method = _current_method.get() or 'unattributed'
+        page = _current_page.get() or 'none'
+        session = _session_id() or 'none'
+
+        with self._lock:
+            self._add(self._by_method, method, counts)
+            self._add(self._by_page, page, counts)
+            self._add(self._by_session, session, counts)
+            self._by_session.move_to_end(session)
+            while len(self._by_session) > self.max_sessions:
+                self._by_session.popitem(last=False)
+            if latency_ms is not None:
+                histogram = self._latency.get(rpc)
+                if histogram is None:
+                    histogram = self._latency[rpc] = _LatencyHistogram(self.max_samples)
+                histogram.add(latency_ms)
+
+        rerun = _current_rerun.get()
+        if rerun is not None:
+            for key, value in counts.items():
+                rerun[key] += value
+        if counts['rpcs']:
+            record_rpc()
+
+        logger.debug("firestore_rpc %s", json.dumps({
+            'rpc': rpc, 'method': method, 'page': page, 'session': session,
+            'reads': reads, 'writes': writes, 'deletes': deletes,
+            'latency_ms': None if latency_ms is None else round(latency_ms, 2),
+        }))
+
+    @staticmethod
+    def _add(table: Dict[str, Dict[str, int]], key: str, counts: Dict[str, int]):
+        row = table.get(key)
+        if row is None:
+            row = table[key] = dict.fromkeys(OPERATIONS, 0)
+        for name, value in counts.items():
+            row[name] += value
+
+    def by_method(self) -> Dict[str, Dict[str, int]]:
+        """Counters per service method."""
+        with self._lock:
+            return {key: dict(row) for key, row in self._by_method.items()}
+
+    def by_page(self) -> Dict[str, Dict[str, int]]:
+        """Counters per page."""
+        with self._lock:
+            return {key: dict(row) for key, row in self._by_page.items()}
+
+    def by_session(self) -> Dict[str, Dict[str, int]]:
+        """Counters per Streamlit session."""
+        with self._lock:
+            return {key: dict(row) for key, row in self._by_session.items()}
+
+    def latency(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Latency per RPC type.
+
+        Returns:
+            {rpc: {'count', 'buckets': {'<=5': n, ..., '+inf': n}, 'p50', 'p95', 'p99', 'max'}}
+        """
+        with self._lock:
+            return {rpc: histogram.to_dict() for rpc, histogram in sorted(self._latency.items())}
+
+    def snapshot(self) -> Dict[str, Any]:
+        """All counters and latency histograms."""
+        return {
+            'by_method': self.by_method(),
+            'by_page': self.by_page(),
+            'by_session': self.by_session(),
+            'latency_ms': self.latency(),
+        }
+
+    def export_json(self) -> str:
+        """``snapshot()`` as a JSON document."""
+        return json.dumps({'generated_at': time.time(), **self.snapshot()}, indent=2, sort_keys=True)
+
+
+metrics = FirestoreMetrics()
+
+
+# ==================== Attribution ====================
+
+def track_methods(cls):
+    """
+    Class decorator: attribute Firestore operations issued inside the public
+    methods of ``cls`` to ``"<Class>.<method>"``. The outermost tracked call wins,
+    so helpers called by another tracked method do not take over its counts.
+    """
+    def _wrap(func: Callable, label: str) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_method.get() is not None:
+                return func(*args, **kwargs)
+            token = _current_method.set(label)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _current_method.reset(token)
+        return wrapper
+
+    for name, attr in list(vars(cls).items()):
+        if name.startswith('_'):
+            continue
+        label = f"{cls.__name__}.{name}"
+        if isinstance(attr, staticmethod):
+            setattr(cls, name, staticmethod(_wrap(attr.__func__, label)))
+        elif isinstance(attr, classmethod):
+            setattr(cls, name, classmethod(_wrap(attr.__func__, label)))
+        elif callable(attr):
+            setattr(cls, name, _wrap(attr, label))
+    return cls
+
+
+@contextmanager
+def track_rerun(page: str, budget: Optional[int] = None) -> Iterator[Dict[str, int]]:
+    """
+    Attribute the Firestore operations of one rerun to a page, log them as one
+    structured line and enforce the read budget.
+
+    Args:
+        page: Page being rendered
+        budget: Maximum document reads per rerun (defaults to
+            Config.FIRESTORE_READ_BUDGET; 0 disables the check)
+
+    Yields:
+        The rerun's running counters
+    """
+    if budget is None:
+        from config import Config
+        budget = Config.FIRESTORE_READ_BUDGET
+
+    counters = dict.fromkeys(OPERATIONS, 0)
+    page_token = _current_page.set(page)
+    rerun_token = _current_rerun.set(counters)
+    start = time.perf_counter()
+    try:
+        yield counters
+    finally:
+        _current_rerun.reset(rerun_token)
+        _current_page.reset(page_token)
+        wall_ms = (time.perf_counter() - start) * 1000
+        logger.info("firestore_rerun %s", json.dumps({
+            'page': page, 'session': _session_id(), 'wall_ms': round(wall_ms, 1), **counters,
+        }))
+        if budget and counters['reads'] > budget:
+            _warn_over_budget(page, counters['reads'], budget)
+
+
+def _warn_over_budget(page: str, reads: int, budget: int):
+    logger.warning("firestore_read_budget %s", json.dumps({
+        'page': page, 'session': _session_id(), 'reads': reads, 'budget': budget,
+    }))
+    try:
+        from config import active_config
+        if active_config.DEBUG:
+            import streamlit as st
+            st.toast(f"⚠️ {page}: {reads} lecturas de Firestore (presupuesto {budget})")
+    except Exception:
+        pass
+
+
+# ==================== Client proxies ====================
+
+def _unwrap(value: Any) -> Any:
+    """Underlying Firestore object of a proxy (the client checks isinstance)."""
+    return value._target if isinstance(value, _Proxy) else value
+
+
+def _unwrap_kwargs(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: _unwrap(value) for key, value in kwargs.items()}
+
+
+class _Proxy:
+    """Delegates everything it does not instrument to the wrapped object."""
+
+    __slots__ = ('_target', '_metrics')
+
+    def __init__(self, target: Any, metrics_: FirestoreMetrics):
+        self._target = target
+        self._metrics = metrics_
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._target, name)
+
+    def __eq__(self, other: Any) -> bool:
+        return self._target == _unwrap(other)
+
+    def __hash__(self) -> int:
+        return hash(self._target)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._target!r})"
+
+    def _timed(self, rpc: str, call: Callable[[], Any], writes: int = 0, deletes: int = 0) -> Any:
+        start = time.perf_counter()
+        try:
+            return call()
+        finally:
+            self._metrics.record(rpc, writes=writes, deletes=deletes,
+                                 latency_ms=(time.perf_counter() - start) * 1000)
+
+    def _counted_stream(self, rpc: str, documents: Iterable[Any]) -> Iterator[Any]:
+        """Yield query results, recording reads and latency once iteration ends."""
+        start = time.perf_counter()
+        count = 0
+        try:
+            for document in documents:
+                count += 1
+                yield document
+        finally:
+            # An empty result is billed as one read
+            self._metrics.record(rpc, reads=max(count, 1),
+                                 latency_ms=(time.perf_counter() - start) * 1000)
+
+
+class InstrumentedQuery(_Proxy):
+    """Query proxy: counts documents returned by stream() and get()."""
+
+    __slots__ = ()
+
+    def _chain(self, name: str, *args, **kwargs) -> 'InstrumentedQuery':
+        query = getattr(self._target, name)(*args, **_unwrap_kwargs(kwargs))
+        return InstrumentedQuery(query, self._metrics)
+
+    def where(self, *args, **kwargs) -> 'InstrumentedQuery':
+        return self._chain('where', *args, **kwargs)
+
+    def order_by(self, *args, **kwargs) -> 'InstrumentedQuery':
+        return self._chain('order_by', *args, **kwargs)
+
+    def limit(self, *args, **kwargs) -> 'InstrumentedQuery':
+        return self._chain('limit', *args, **kwargs)
+
+    def offset(self, *args, **kwargs) -> 'InstrumentedQuery':
+        return self._chain('offset', *args, **kwargs)
+
+    def select(self, *args, **kwargs) -> 'InstrumentedQuery':
+        return self._chain('select', *args, **kwargs)
+
+    def start_at(self, document_fields_or_snapshot) -> 'InstrumentedQuery':
+        return self._chain('start_at', _unwrap(document_fields_or_snapshot))
+
+    def start_after(self, document_fields_or_snapshot) -> 'InstrumentedQuery':
+        return self._chain('start_after', _unwrap(document_fields_or_snapshot))
+
+    def end_before(self, document_fields_or_snapshot) -> 'InstrumentedQuery':
+        return self._chain('end_before', _unwrap(document_fields_or_snapshot))
+
+    def end_at(self, document_fields_or_snapshot) -> 'InstrumentedQuery':
+        return self._chain('end_at', _unwrap(document_fields_or_snapshot))
+
+    def stream(self, transaction=None, **kwargs) -> Iterator[Any]:
+        documents = self._target.stream(transaction=_unwrap(transaction), **_unwrap_kwargs(kwargs))
+        return self._counted_stream('query.stream', documents)
+
+    def get(self, transaction=None, **kwargs) -> List[Any]:
+        return list(self.stream(transaction=transaction, **kwargs))
+
+
+class InstrumentedCollection(InstrumentedQuery):
+    """Collection proxy: hands out instrumented document references."""
+
+    __slots__ = ()
+
+    def document(self, document_id: Optional[str] = None) -> 'InstrumentedDocument':
+        return InstrumentedDocument(self._target.document(document_id), self._metrics)
+
+    def add(self, document_data: Dict[str, Any], **kwargs):
+        return self._timed('collection.add', lambda: self._target.add(document_data, **kwargs), writes=1)
+
+    def list_documents(self, **kwargs):
+        return [InstrumentedDocument(ref, self._metrics) for ref in self._target.list_documents(**kwargs)]
+
+
+class InstrumentedDocument(_Proxy):
+    """Document reference proxy: counts get/set/update/delete."""
+
+    __slots__ = ()
+
+    def collection(self, collection_id: str) -> InstrumentedCollection:
+        return InstrumentedCollection(self._target.collection(collection_id), self._metrics)
+
+    def get(self, *args, transaction=None, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._target.get(*args, transaction=_unwrap(transaction), **kwargs)
+        finally:
+            self._metrics.record('document.get', reads=1,
+                                 latency_ms=(time.perf_counter() - start) * 1000)
+
+    def set(self, *args, **kwargs):
+        return self._timed('document.set', lambda: self._target.set(*args, **kwargs), writes=1)
+
+    def create(self, *args, **kwargs):
+        return self._timed('document.create', lambda: self._target.create(*args, **kwargs), writes=1)
+
+    def update(self, *args, **kwargs):
+        return self._timed('document.update', lambda: self._target.update(*args, **kwargs), writes=1)
+
+    def delete(self, *args, **kwargs):
+        return self._timed('document.delete', lambda: self._target.delete(*args, **kwargs), deletes=1)
+
+
+class InstrumentedWriteBatch(_Proxy):
+    """Batch proxy: counts staged writes and times the commit."""
+
+    __slots__ = ()
+
+    _KIND = 'batch'
+
+    def set(self, reference, *args, **kwargs):
+        self._metrics.record(f'{self._KIND}.set', writes=1)
+        return self._target.set(_unwrap(reference), *args, **kwargs)
+
+    def create(self, reference, *args, **kwargs):
+        self._metrics.record(f'{self._KIND}.create', writes=1)
+        return self._target.create(_unwrap(reference), *args, **kwargs)
+
+    def update(self, reference, *args, **kwargs):
+        self._metrics.record(f'{self._KIND}.update', writes=1)
+        return self._target.update(_unwrap(reference), *args, **kwargs)
+
+    def delete(self, reference, *args, **kwargs):
+        self._metrics.record(f'{self._KIND}.delete', deletes=1)
+        return self._target.delete(_unwrap(reference), *args, **kwargs)
+
+    def commit(self, *args, **kwargs):
+        return self._timed(f'{self._KIND}.commit', lambda: self._target.commit(*args, **kwargs))
+
+
+class InstrumentedTransaction(InstrumentedWriteBatch):
+    """
+    Transaction proxy. ``firestore.transactional`` drives it through the
+    delegated private API; reads are counted here and the commit is timed.
+    """
+
+    __slots__ = ()
+
+    _KIND = 'transaction'
+
+    def get(self, ref_or_query, **kwargs) -> Iterator[Any]:
+        documents = self._target.get(_unwrap(ref_or_query), **kwargs)
+        rpc = 'transaction.query' if isinstance(ref_or_query, InstrumentedQuery) else 'transaction.get'
+        return self._counted_stream(rpc, documents)
+
+    def _commit(self):
+        return self._timed('transaction.commit', self._target._commit)
+
+
+class InstrumentedClient(_Proxy):
+    """Firestore client proxy returned by FirebaseService.get_db."""
+
+    __slots__ = ()
+
+    def collection(self, *path: str) -> InstrumentedCollection:
+        return InstrumentedCollection(self._target.collection(*path), self._metrics)
+
+    def collection_group(self, collection_id: str) -> InstrumentedQuery:
+        return InstrumentedQuery(self._target.collection_group(collection_id), self._metrics)
+
+    def document(self, *path: str) -> InstrumentedDocument:
+        return InstrumentedDocument(self._target.document(*path), self._metrics)
+
+    def get_all(self, references, field_paths=None, transaction=None, **kwargs) -> Iterator[Any]:
+        references = [_unwrap(ref) for ref in references]
+        documents = self._target.get_all(references, field_paths=field_paths,
+                                         transaction=_unwrap(transaction), **kwargs)
+        return self._counted_stream('client.get_all', documents)
+
+    def batch(self) -> InstrumentedWriteBatch:
+        return InstrumentedWriteBatch(self._target.batch(), self._metrics)
+
+    def transaction(self, **kwargs) -> InstrumentedTransaction:
+        return InstrumentedTransaction(self._target.transaction(**kwargs), self._metrics)
+
+
+def instrument(client: Any, target: Optional[FirestoreMetrics] = None) -> Optional[InstrumentedClient]:
+    """
+    Wrap a Firestore client (None passes through).
+
+    Args:
+        client: firestore.Client
+        target: Metrics to record into (defaults to the process-wide one)
+    """
+    if client is None:
+        return None
+    return InstrumentedClient(client, target or metrics)
@@ -0,0 +1,83 @@
+"""
+Pooled HTTP sessions for REST calls to Google APIs.
+
+``build_session`` returns a ``requests.Session`` that keeps connections alive
+in a sized pool and retries transient failures:
+
+- connection errors and responses with a status in ``RETRY_STATUSES`` are
+  retried up to ``retries`` times;
+- backoff is exponential with full jitter (uniform in [0, backoff]), so a
+  burst of failing clients does not retry in lockstep, and a ``Retry-After``
+  header takes precedence;
+- read timeouts are not retried, since the request may already have been
+  processed and a retry would double the wait;
+- URLs under a ``non_idempotent_prefixes`` entry (e.g. account creation) are
+  only retried when the server cannot have acted on them: connection
+  errors and 429.
+
+When retries run out, the last response is returned as is, so callers keep
+handling error statuses the way they already do.
+"""
+import random
+from typing import Iterable
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+# Statuses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class JitteredRetry(Retry):
+    """urllib3 Retry with full-jitter backoff."""
+
+    def get_backoff_time(self) -> float:
+        backoff = super().get_backoff_time()
+        return random.uniform(0, backoff) if backoff > 0 else 0.0
+
+
+def _retry(retries: int, backoff_factor: float, statuses: Iterable[int]) -> JitteredRetry:
+    return JitteredRetry(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=retries,
+        status_forcelist=tuple(statuses),
+        allowed_methods=None,  # Retry any method; callers opt out per prefix
+        backoff_factor=backoff_factor,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+
+def build_session(pool_size: int = 10, retries: int = 3, backoff_factor: float = 0.3,
+                  non_idempotent_prefixes: Iterable[str] = ()) -> requests.Session:
+    """
+    Create a keep-alive session with a sized connection pool and retries.
+
+    ``requests.Session`` can be shared between threads for plain requests like
+    these; each thread checks a connection out of the pool.
+
+    Args:
+        pool_size: Connections kept per host (and the number of hosts pooled)
+        retries: Maximum retries per request
+        backoff_factor: Base of the exponential backoff in seconds
+        non_idempotent_prefixes: URL prefixes only retried on connection
+            errors and 429
+
+    Returns:
+        Configured requests.Session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                          max_retries=_retry(retries, backoff_factor, RETRY_STATUSES))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    # requests picks the adapter with the longest matching prefix
+    for prefix in non_idempotent_prefixes:
+        session.mount(prefix, HTTPAdapter(pool_connections=1, pool_maxsize=pool_size,
+                                          max_retries=_retry(retries, backoff_factor, (429,))))
+    return session
@@ -0,0 +1,61 @@
+"""
+Opaque page tokens for cursor-based pagination.
+A token carries the ordering values of the last document on a page plus its
+document ID, which is everything Firestore's ``start_after`` needs.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+
+def _encode_value(value: Any) -> Any:
+    """Convert a Firestore ordering value into a JSON-safe value."""
+    if isinstance(value, datetime):
+        return {'$dt': value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    """Inverse of _encode_value."""
+    if isinstance(value, dict) and '$dt' in value:
+        return datetime.fromisoformat(value['$dt'])
+    return value
+
+
+def encode_page_token(data: Dict[str, Any]) -> str:
+    """
+    Encode cursor data as a URL-safe opaque token.
+
+    Args:
+        data: Cursor data (JSON-serializable values and datetimes)
+
+    Returns:
+        URL-safe base64 token
+    """
+    payload = {key: _encode_value(value) for key, value in data.items()}
+    raw = json.dumps(payload, separators=(',', ':'), sort_keys=True).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_page_token(token: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    Decode a token produced by encode_page_token.
+
+    Args:
+        token: Page token (None or empty for the first page)
+
+    Returns:
+        Cursor data, or None if the token is missing or malformed
+    """
+    if not token:
+        return None
+
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(payload, dict):
+            return None
+        return {key: _decode_value(value) for key, value in payload.items()}
+    except (ValueError, TypeError):
+        return None
@@ -0,0 +1,288 @@
+"""
+Process-wide product cache shared by all sessions.
+
+Product documents are stored once, keyed by product ID. Listings (a category
+listing, one catalog page) are cached as lists of product IDs only, tagged
+with the category they were filtered by, so a product appearing in many
+listings is held in memory once and an update to it is visible everywhere
+without re-querying Firestore.
+
+Eviction is LRU over products and bounded by an estimate of the memory held
+by products and listings; evicting a product drops the listings that need it.
+
+Products expire like listings (``product_ttl``, at most ``listing_ttl``), so
+writes made outside this process (the console, another instance) are picked
+up even for products that are only ever read by ID. An expired product is a
+miss, and so is any listing that references one.
+
+Invalidation is driven by product writes (``apply_change``):
+- Field updates that cannot move a product within or between listings only
+  replace the entity.
+- Changes to listing fields (category, active flag, sort keys) drop the
+  listings that contain the product or are filtered by its old or new category.
+- New products drop the listings of their category and the unfiltered ones.
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from utils.profiler import record_cache
+
+
+# Fields that decide which listings a product belongs to and where it sorts
+LISTING_FIELDS = ('active', 'category', 'created_at', 'price', 'rating')
+
+# Rough per-ID cost of a cached listing entry
+_ID_OVERHEAD = 64
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate memory footprint of a product document in bytes."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += sys.getsizeof(key) + estimate_size(item)
+    elif isinstance(value, (list, tuple, set)):
+        for item in value:
+            size += estimate_size(item)
+    return size
+
+
+def _listing_view(product: Optional[Dict[str, Any]]) -> Optional[Tuple[Any, ...]]:
+    if not product:
+        return None
+    return tuple(product.get(field) for field in LISTING_FIELDS)
+
+
+class _Listing:
+    __slots__ = ('ids', 'category', 'meta', 'expires_at', 'size')
+
+    def __init__(self, ids: List[str], category: Optional[str], meta: Dict[str, Any],
+                 expires_at: float):
+        self.ids = ids
+        self.category = category
+        self.meta = meta
+        self.expires_at = expires_at
+        self.size = _ID_OVERHEAD * (len(ids) + 1) + estimate_size(meta)
+
+
+class ProductCache:
+    """LRU cache of product entities plus ID-only listings, bounded by memory."""
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, listing_ttl: float = 600,
+                 product_ttl: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            max_bytes: Memory bound for entities and listings together
+            listing_ttl: Seconds a listing is trusted before it is re-queried
+            product_ttl: Seconds a product is trusted (defaults to, and is
+                capped at, listing_ttl)
+            clock: Monotonic clock (injectable for tests)
+        """
+        self.max_bytes = max_bytes
+        self.listing_ttl = listing_ttl
+        self.product_ttl = listing_ttl if product_ttl is None else min(product_ttl, listing_ttl)
+        self._clock = clock
+        self._lock = threading.RLock()
+
+        self._entities: "OrderedDict[str, Tuple[Dict[str, Any], int, float]]" = OrderedDict()
+        self._listings: "OrderedDict[Hashable, _Listing]" = OrderedDict()
+        self._size = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # ==================== Entities ====================
+
+    def get(self, product_id: str) -> Optional[Dict[str, Any]]:
+        """Get a copy of a cached product, or None on a miss (or if it expired)."""
+        with self._lock:
+            entry = self._live_entity(product_id)
+            if entry is None:
+                self._miss()
+                return None
+            self._entities.move_to_end(product_id)
+            self._hit()
+            return dict(entry[0])
+
+    def put(self, product: Dict[str, Any]):
+        """Store a product document (must include its 'id')."""
+        with self._lock:
+            self._store_entity(product)
+            self._evict()
+
+    def discard(self, product_id: str):
+        """Drop a product and every listing that contains it."""
+        with self._lock:
+            self._drop_entity(product_id)
+            self._drop_listings(lambda listing: product_id in listing.ids)
+
+    # ==================== Listings ====================
+
+    def get_listing(self, key: Hashable) -> Optional[Tuple[List[Dict[str, Any]], Dict[str, Any]]]:
+        """
+        Get a cached listing.
+
+        Returns:
+            (products, meta) or None if the listing is missing, expired or
+            references a product that has been evicted or has expired
+        """
+        with self._lock:
+            listing = self._listings.get(key)
+            if listing is None or listing.expires_at <= self._clock():
+                if listing is not None:
+                    self._drop_listing(key)
+                self._miss()
+                return None
+
+            products = []
+            for product_id in listing.ids:
+                entry = self._live_entity(product_id)
+                if entry is None:
+                    self._drop_listing(key)
+                    self._miss()
+                    return None
+                products.append(entry[0])
+
+            for product_id in listing.ids:
+                self._entities.move_to_end(product_id)
+            self._listings.move_to_end(key)
+            self._hit()
+            return [dict(product) for product in products], dict(listing.meta)
+
+    def put_listing(self, key: Hashable, products: List[Dict[str, Any]],
+                    category: Optional[str] = None, meta: Optional[Dict[str, Any]] = None):
+        """
+        Store a listing and the products it contains.
+
+        Args:
+            key: Listing key (e.g. the query parameters)
+            products: Products in listing order
+            category: Category the listing is filtered by (None for all categories)
+            meta: Extra values returned with the listing (e.g. the next page token)
+        """
+        with self._lock:
+            for product in products:
+                self._store_entity(product)
+            self._drop_listing(key)
+            listing = _Listing([product['id'] for product in products], category,
+                               dict(meta or {}), self._clock() + self.listing_ttl)
+            self._listings[key] = listing
+            self._size += listing.size
+            self._evict()
+
+    # ==================== Invalidation ====================
+
+    def apply_change(self, product_id: str, before: Optional[Dict[str, Any]],
+                     after: Optional[Dict[str, Any]]):
+        """
+        Apply a committed product write.
+
+        Args:
+            product_id: Product ID
+            before: Product document before the write (None when created)
+            after: Product document after the write (None when deleted)
+        """
+        with self._lock:
+            if after is None:
+                self.discard(product_id)
+                return
+
+            self._store_entity({**after, 'id': product_id})
+            if before is not None and _listing_view(before) == _listing_view(after):
+                self._evict()
+                return
+
+            categories = {product.get('category') for product in (before, after) if product}
+            self._drop_listings(
+                lambda listing: listing.category is None
+                or listing.category in categories
+                or product_id in listing.ids
+            )
+            self._evict()
+
+    def clear(self):
+        """Drop everything."""
+        with self._lock:
+            self._entities.clear()
+            self._listings.clear()
+            self._size = 0
+
+    # ==================== Introspection ====================
+
+    @property
+    def size(self) -> int:
+        """Estimated bytes held."""
+        return self._size
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+    def __contains__(self, product_id: str) -> bool:
+        entry = self._entities.get(product_id)
+        return entry is not None and entry[2] > self._clock()
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for monitoring."""
+        with self._lock:
+            return {
+                'entities': len(self._entities),
+                'listings': len(self._listings),
+                'bytes': self._size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    # ==================== Internal helpers ====================
+
+    def _hit(self):
+        self.hits += 1
+        record_cache(True)
+
+    def _miss(self):
+        self.misses += 1
+        record_cache(False)
+
+    def _live_entity(self, product_id: str) -> Optional[Tuple[Dict[str, Any], int, float]]:
+        entry = self._entities.get(product_id)
+        if entry is not None and entry[2] <= self._clock():
+            self._drop_entity(product_id)
+            return None
+        return entry
+
+    def _store_entity(self, product: Dict[str, Any]):
+        product_id = product['id']
+        self._drop_entity(product_id)
+        product = dict(product)
+        size = estimate_size(product)
+        self._entities[product_id] = (product, size, self._clock() + self.product_ttl)
+        self._size += size
+
+    def _drop_entity(self, product_id: str):
+        entry = self._entities.pop(product_id, None)
+        if entry is not None:
+            self._size -= entry[1]
+
+    def _drop_listing(self, key: Hashable):
+        listing = self._listings.pop(key, None)
+        if listing is not None:
+            self._size -= listing.size
+
+    def _drop_listings(self, predicate: Callable[[_Listing], bool]):
+        for key in [key for key, listing in self._listings.items() if predicate(listing)]:
+            self._drop_listing(key)
+
+    def _evict(self):
+        while self._size > self.max_bytes and (self._entities or self._listings):
+            if self._entities:
+                # Least recently used product, and every listing that needs it
+                product_id = next(iter(self._entities))
+                self._drop_entity(product_id)
+                self._drop_listings(lambda listing: product_id in listing.ids)
+            else:
+                self._drop_listing(next(iter(self._listings)))
+            self.evictions += 1
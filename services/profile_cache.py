@@ -0,0 +1,154 @@
+"""
+Process-wide cache of user profiles.
+
+Signing in, loading the cart and listing orders all need the same
+``users/{uid}`` document. ``ProfileCache`` keeps the parts they use (display
+name, addresses, cart, order IDs) per user for a short TTL, so a signed-in
+user's first page reads the document once instead of once per consumer.
+
+Invalidation is version-stamped: every write to a user document in this
+process calls ``invalidate(uid)``, which drops the entry and records the
+user's invalidation under the next value of a process-wide sequence. A load
+carries the sequence value from when it started and is not stored if the
+user was invalidated after that, so a slow read can never put pre-write data
+back into the cache. Invalidation records are bounded like the entries; when
+the oldest is dropped, loads started before it are no longer stored for any
+user. Writes from other processes become visible after the
+TTL; callers that need the persisted state (checkout) bypass the cache.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from services.cart_model import CART_FIELD, CART_VERSION_FIELD, cart_items_to_list
+from utils.profiler import record_cache
+
+
+# Fields of users/{uid} kept in a profile as they are
+PROFILE_FIELDS = ('display_name', 'email', 'addresses')
+
+# (cache generation, invalidation sequence when the load started)
+Version = Tuple[int, int]
+
+
+def profile_from_document(user_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Profile of a ``users/{uid}`` document (legacy array carts must be migrated first).
+
+    Returns:
+        Dictionary with 'display_name', 'email', 'addresses', 'cart_items'
+        (list), 'cart_version' and 'order_ids'
+    """
+    profile = {field: user_data.get(field) for field in PROFILE_FIELDS}
+    profile['addresses'] = profile['addresses'] or []
+    profile['cart_items'] = cart_items_to_list(user_data.get(CART_FIELD))
+    profile['cart_version'] = user_data.get(CART_VERSION_FIELD, 0)
+    profile['order_ids'] = list(user_data.get('orders', []))
+    return profile
+
+
+class _Entry:
+    __slots__ = ('profile', 'expires_at')
+
+    def __init__(self, profile: Dict[str, Any], expires_at: float):
+        self.profile = profile
+        self.expires_at = expires_at
+
+
+class ProfileCache:
+    """Per-user profile cache with TTL, LRU bound and version-stamped invalidation."""
+
+    def __init__(self, ttl: float = 30, max_entries: int = 10000,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            ttl: Seconds a profile is served before it is read again
+            max_entries: Profiles kept (least recently used first out)
+            clock: Monotonic clock (injectable for tests)
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, _Entry]' = OrderedDict()
+        # uid -> sequence of its last invalidation, bounded by max_entries
+        self._invalidated: 'OrderedDict[str, int]' = OrderedDict()
+        self._sequence = 0
+        # Sequence of the newest dropped invalidation record
+        self._floor = 0
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def version(self, uid: str) -> Version:
+        """Version stamp for a load of a user's profile started now."""
+        with self._lock:
+            return self._generation, self._sequence
+
+    def get(self, uid: str) -> Optional[Dict[str, Any]]:
+        """A copy of the cached profile, or None if missing, expired or invalidated."""
+        with self._lock:
+            entry = self._entries.get(uid)
+            if entry is not None and entry.expires_at <= self._clock():
+                del self._entries[uid]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                record_cache(False)
+                return None
+            self._entries.move_to_end(uid)
+            self.hits += 1
+            record_cache(True)
+            return copy.deepcopy(entry.profile)
+
+    def put(self, uid: str, profile: Dict[str, Any], version: Version) -> bool:
+        """
+        Store a profile loaded at ``version``.
+
+        Returns:
+            False if the user was invalidated since the load started (not stored)
+        """
+        with self._lock:
+            generation, sequence = version
+            if generation != self._generation or self._invalidated.get(uid, self._floor) > sequence:
+                return False
+            self._entries[uid] = _Entry(copy.deepcopy(profile), self._clock() + self.ttl)
+            self._entries.move_to_end(uid)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return True
+
+    def load(self, uid: str, loader: Callable[[], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        """
+        Cached profile, or ``loader()`` stored under the version seen before it ran.
+        Missing users (loader returns None) are not cached.
+        """
+        profile = self.get(uid)
+        if profile is not None:
+            return profile
+        version = self.version(uid)
+        profile = loader()
+        if profile is not None:
+            self.put(uid, profile, version)
+        return profile
+
+    def invalidate(self, uid: str):
+        """Drop a user's profile after a write to their document."""
+        with self._lock:
+            self._entries.pop(uid, None)
+            self._sequence += 1
+            self._invalidated[uid] = self._sequence
+            self._invalidated.move_to_end(uid)
+            while len(self._invalidated) > self.max_entries:
+                _, self._floor = self._invalidated.popitem(last=False)
+
+    def clear(self):
+        """Drop every profile (loads in flight are not stored either)."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
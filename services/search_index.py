@@ -0,0 +1,206 @@
+"""
+In-process inverted index for product search.
+Tokenizes product text with accent folding so Spanish and English queries
+match regardless of case or diacritics (e.g. "camara" finds "Cámara").
+"""
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from services.catalog_snapshot import CatalogSnapshot
+
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Relative weight of a token depending on the field it was found in
+FIELD_WEIGHTS = {
+    'name': 3.0,
+    'category': 2.0,
+    'description': 1.0,
+}
+
+# Score multiplier when a query term only matches as a prefix of a token
+PREFIX_MATCH_FACTOR = 0.5
+
+
+def fold_text(text: Any) -> str:
+    """Lowercase text and strip diacritics ("Cámara Ñandú" -> "camara nandu")."""
+    if not text:
+        return ""
+    normalized = unicodedata.normalize('NFKD', str(text))
+    stripped = ''.join(ch for ch in normalized if not unicodedata.combining(ch))
+    return stripped.casefold()
+
+
+def tokenize(text: Any) -> List[str]:
+    """Split text into accent-folded alphanumeric tokens."""
+    return _TOKEN_PATTERN.findall(fold_text(text))
+
+
+class SearchIndex:
+    """
+    Inverted index over product documents.
+
+    Each token maps to a posting list of ``{product_id: weight}``. Queries are
+    answered by intersecting the posting lists of every query term (prefix
+    matches included) and ranking the surviving products by accumulated weight.
+    """
+
+    def __init__(self, products: Optional[Iterable[Dict[str, Any]]] = None):
+        self._postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self._doc_tokens: Dict[str, Set[str]] = {}
+        self._products: Dict[str, Dict[str, Any]] = {}
+        self._vocabulary: Optional[List[str]] = None
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = threading.RLock()
+
+        if products:
+            self.build(products)
+
+    def __len__(self) -> int:
+        return len(self._products)
+
+    def __contains__(self, product_id: str) -> bool:
+        return product_id in self._products
+
+    def build(self, products: Iterable[Dict[str, Any]]):
+        """Rebuild the index from scratch."""
+        with self._lock:
+            self._postings.clear()
+            self._doc_tokens.clear()
+            self._products.clear()
+            self._vocabulary = None
+            self._snapshot = None
+            for product in products:
+                self._add_unlocked(product)
+
+    def add(self, product: Dict[str, Any]):
+        """Insert or replace a single product (must contain an ``id``)."""
+        with self._lock:
+            self._add_unlocked(product)
+
+    def remove(self, product_id: str):
+        """Remove a product from the index if present."""
+        with self._lock:
+            self._remove_unlocked(product_id)
+
+    def get(self, product_id: str) -> Optional[Dict[str, Any]]:
+        """Get the indexed product document by ID."""
+        return self._products.get(product_id)
+
+    def snapshot(self) -> CatalogSnapshot:
+        """Columnar snapshot of the indexed products, rebuilt on first use after a change."""
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = CatalogSnapshot(self._products.values())
+            return self._snapshot
+
+    def search(self, query: str, category: Optional[str] = None,
+               limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Search indexed products.
+
+        Args:
+            query: Free text query
+            category: Optional exact category filter
+            limit: Maximum number of results (None for all matches)
+
+        Returns:
+            Products ordered by relevance, then rating, then name
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        with self._lock:
+            # Resolve every term to its scored posting list, rarest first so
+            # the running intersection shrinks as quickly as possible
+            term_postings = [self._term_postings(term) for term in terms]
+            term_postings.sort(key=len)
+
+            if not term_postings or not term_postings[0]:
+                return []
+
+            scores = dict(term_postings[0])
+            for postings in term_postings[1:]:
+                scores = {
+                    product_id: score + postings[product_id]
+                    for product_id, score in scores.items()
+                    if product_id in postings
+                }
+                if not scores:
+                    return []
+
+            results = [self._products[product_id] for product_id in scores]
+
+        if category:
+            results = [p for p in results if p.get('category') == category]
+
+        results.sort(key=lambda p: (
+            -scores[p['id']],
+            -(p.get('rating') or 0),
+            fold_text(p.get('name', ''))
+        ))
+
+        if limit is not None:
+            results = results[:limit]
+        return results
+
+    # ==================== Internal helpers ====================
+
+    def _add_unlocked(self, product: Dict[str, Any]):
+        product_id = product.get('id')
+        if not product_id:
+            return
+
+        self._remove_unlocked(product_id)
+
+        weights: Dict[str, float] = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(product.get(field)):
+                weights[token] = weights.get(token, 0.0) + weight
+
+        for token, weight in weights.items():
+            if token not in self._postings:
+                self._vocabulary = None
+            self._postings[token][product_id] = weight
+
+        self._doc_tokens[product_id] = set(weights)
+        self._products[product_id] = product
+        self._snapshot = None
+
+    def _remove_unlocked(self, product_id: str):
+        tokens = self._doc_tokens.pop(product_id, None)
+        if self._products.pop(product_id, None) is not None:
+            self._snapshot = None
+        if not tokens:
+            return
+
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(product_id, None)
+            if not postings:
+                del self._postings[token]
+                self._vocabulary = None
+
+    def _term_postings(self, term: str) -> Dict[str, float]:
+        """Scored postings for a term: exact matches plus prefix matches."""
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+
+        merged: Dict[str, float] = {}
+        start = bisect_left(self._vocabulary, term)
+        for token in self._vocabulary[start:]:
+            if not token.startswith(term):
+                break
+            factor = 1.0 if token == term else PREFIX_MATCH_FACTOR
+            for product_id, weight in self._postings[token].items():
+                score = weight * factor
+                if score > merged.get(product_id, 0.0):
+                    merged[product_id] = score
+        return merged
@@ -0,0 +1,284 @@
+"""
+Background refresh of signed-in users' Firebase ID tokens.
+
+ID tokens expire an hour after sign-in. ``TokenManager`` keeps each signed-in
+user's ``idToken`` / ``refreshToken`` pair and exchanges the refresh token
+for a new pair shortly before the ID token expires, so requests never find
+an expired token and never wait for a refresh:
+
+- One scheduler thread sleeps until the next refresh is due and hands it to
+  a small worker pool; nothing runs while no refresh is due.
+- At most one refresh per user is in flight. ``refresh_async`` returns the
+  running refresh instead of starting another one.
+- ``token()`` only reads the current token. It never calls the network; an
+  expired token (e.g. after failed refreshes) returns None and queues a
+  refresh in the background.
+- Transient failures are retried every ``retry_delay`` seconds. A rejected
+  refresh token (revoked, disabled user) signs the user out of the manager.
+
+Tokens are kept per user ID; signing out (``discard``) stops refreshing them.
+Sessions registered with ``lazy=True`` (sign-in) are only scheduled for
+refresh once their token is first read, so users whose token nothing reads
+cost no securetoken calls.
+A session whose token has not been read through ``token()`` for
+``idle_timeout`` seconds is dropped instead of refreshed (a closed browser tab
+never signs out), and at most ``max_sessions`` are kept, least recently used
+first out.
+"""
+import heapq
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+# refresh(refresh_token) -> {'id_token', 'refresh_token', 'expires_in'};
+# None when the refresh token is rejected, raises on transient errors
+RefreshFunction = Callable[[str], Optional[Dict[str, Any]]]
+
+
+class TokenSession:
+    """Current tokens of one signed-in user."""
+
+    __slots__ = ('uid', 'id_token', 'refresh_token', 'expires_at', 'refresh_at', 'last_used', 'scheduled')
+
+    def __init__(self, uid: str, id_token: str, refresh_token: str, expires_at: float, refresh_at: float,
+                 last_used: float):
+        self.uid = uid
+        self.id_token = id_token
+        self.refresh_token = refresh_token
+        self.expires_at = expires_at
+        self.refresh_at = refresh_at
+        self.last_used = last_used
+        self.scheduled = False
+
+    def __repr__(self) -> str:
+        return f"TokenSession({self.uid!r}, expires_at={self.expires_at:.0f})"
+
+
+class TokenManager:
+    """Keeps signed-in users' ID tokens fresh from a background thread."""
+
+    def __init__(self, refresh_fn: RefreshFunction, refresh_margin: float = 300,
+                 retry_delay: float = 30, max_workers: int = 4, idle_timeout: float = 3600,
+                 max_sessions: int = 10000):
+        """
+        Args:
+            refresh_fn: Exchanges a refresh token for new tokens
+            refresh_margin: Seconds before expiry a token is refreshed (at most
+                half of its lifetime)
+            retry_delay: Seconds between attempts after a failed refresh
+            max_workers: Refreshes running at the same time
+            idle_timeout: Seconds without a ``token()`` call after which a
+                session is dropped
+            max_sessions: Sessions kept (least recently used are dropped)
+        """
+        self._refresh_fn = refresh_fn
+        self.refresh_margin = refresh_margin
+        self.retry_delay = retry_delay
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self._max_workers = max_workers
+        self._cond = threading.Condition()
+        self._sessions: "OrderedDict[str, TokenSession]" = OrderedDict()
+        self._inflight: Dict[str, Tuple[TokenSession, Future]] = {}
+        self._schedule: List[Tuple[float, int, str]] = []
+        self._sequence = itertools.count()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+        self.refreshes = 0
+        self.failures = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, uid: str) -> bool:
+        return uid in self._sessions
+
+    # ==================== Sessions ====================
+
+    def register(self, uid: str, id_token: str, refresh_token: str, expires_in: float = 3600,
+                 lazy: bool = False):
+        """
+        Start keeping a user's tokens fresh (after sign-in or sign-up).
+
+        Args:
+            uid: User ID
+            id_token: Current ID token
+            refresh_token: Refresh token issued with it
+            expires_in: Seconds until the ID token expires
+            lazy: Only schedule refreshes once ``token()`` is first called
+        """
+        with self._cond:
+            now = time.monotonic()
+            session = self._new_session(uid, id_token, refresh_token, expires_in, now)
+            self._sessions[uid] = session
+            self._sessions.move_to_end(uid)
+            # A refresh still running for the previous session must not be reused
+            self._inflight.pop(uid, None)
+            self._trim(now)
+            if not lazy:
+                self._schedule_session(session)
+
+    def discard(self, uid: str):
+        """Stop refreshing a user's tokens (sign-out)."""
+        with self._cond:
+            self._sessions.pop(uid, None)
+
+    def token(self, uid: str) -> Optional[str]:
+        """
+        The user's current ID token, without waiting for any network call.
+
+        Returns:
+            The token, or None if the user is unknown, the session was idle
+            too long, or the token has expired (a refresh is then queued in
+            the background)
+        """
+        with self._cond:
+            session = self._sessions.get(uid)
+            if session is None:
+                return None
+            now = time.monotonic()
+            if self._is_idle(session, now):
+                del self._sessions[uid]
+                return None
+            session.last_used = now
+            self._sessions.move_to_end(uid)
+            if not session.scheduled:
+                self._schedule_session(session)
+            if now < session.expires_at:
+                return session.id_token
+        self.refresh_async(uid)
+        return None
+
+    # ==================== Refreshing ====================
+
+    def refresh_async(self, uid: str) -> Optional[Future]:
+        """
+        Refresh a user's tokens in the background now.
+
+        Returns:
+            Future resolving to the new ID token (or None on failure); the
+            already running refresh if there is one; None for unknown users
+        """
+        with self._cond:
+            session = self._sessions.get(uid)
+            if session is None or self._stopped:
+                return None
+            inflight = self._inflight.get(uid)
+            if inflight is not None and inflight[0] is session:
+                return inflight[1]
+            self._ensure_started()
+            future = self._executor.submit(self._refresh, session)
+            self._inflight[uid] = (session, future)
+            return future
+
+    def stop(self):
+        """Stop the scheduler thread; running refreshes finish on their own."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+            executor = self._executor
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    # ==================== Internal helpers ====================
+
+    def _new_session(self, uid: str, id_token: str, refresh_token: str, expires_in: float,
+                     last_used: float) -> TokenSession:
+        now = time.monotonic()
+        lifetime = max(float(expires_in), 0.0)
+        margin = min(self.refresh_margin, lifetime / 2)
+        return TokenSession(uid, id_token, refresh_token, now + lifetime, now + lifetime - margin, last_used)
+
+    def _is_idle(self, session: TokenSession, now: float) -> bool:
+        return now - session.last_used >= self.idle_timeout
+
+    def _trim(self, now: float):
+        # Called with the lock held; sessions are ordered by last use
+        while self._sessions:
+            uid, session = next(iter(self._sessions.items()))
+            if len(self._sessions) <= self.max_sessions and not self._is_idle(session, now):
+                break
+            del self._sessions[uid]
+
+    def _ensure_started(self):
+        # Called with the lock held
+        if self._thread is None and not self._stopped:
+            self._executor = ThreadPoolExecutor(self._max_workers, thread_name_prefix='token-refresh')
+            self._thread = threading.Thread(target=self._run, name='token-scheduler', daemon=True)
+            self._thread.start()
+
+    def _schedule_session(self, session: TokenSession):
+        # Called with the lock held
+        self._ensure_started()
+        session.scheduled = True
+        self._schedule_at(session.refresh_at, session.uid)
+
+    def _schedule_at(self, when: float, uid: str):
+        # Called with the lock held
+        heapq.heappush(self._schedule, (when, next(self._sequence), uid))
+        self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    if self._schedule:
+                        wait = self._schedule[0][0] - time.monotonic()
+                        if wait <= 0:
+                            break
+                    else:
+                        wait = None
+                    self._cond.wait(wait)
+                if self._stopped:
+                    return
+                when, _, uid = heapq.heappop(self._schedule)
+                session = self._sessions.get(uid)
+                # Entries of signed-out users and superseded schedules are skipped
+                if session is None or session.refresh_at != when:
+                    continue
+                if self._is_idle(session, time.monotonic()):
+                    logger.info(f"Tokens of {uid} were not used for {self.idle_timeout:.0f}s; discarded")
+                    del self._sessions[uid]
+                    continue
+            self.refresh_async(uid)
+
+    def _refresh(self, session: TokenSession) -> Optional[str]:
+        try:
+            result = self._refresh_fn(session.refresh_token)
+        except Exception as e:
+            logger.warning(f"Token refresh for {session.uid} failed: {e}")
+            result = e
+
+        with self._cond:
+            inflight = self._inflight.get(session.uid)
+            if inflight is not None and inflight[0] is session:
+                del self._inflight[session.uid]
+            if self._sessions.get(session.uid) is not session:
+                return None  # Signed out or signed in again meanwhile
+
+            if isinstance(result, Exception):
+                self.failures += 1
+                session.refresh_at = time.monotonic() + self.retry_delay
+                self._schedule_at(session.refresh_at, session.uid)
+                return None
+            if result is None:
+                logger.info(f"Refresh token of {session.uid} was rejected; tokens discarded")
+                del self._sessions[session.uid]
+                return None
+
+            self.refreshes += 1
+            refreshed = self._new_session(session.uid, result['id_token'],
+                                          result.get('refresh_token') or session.refresh_token,
+                                          result.get('expires_in', 3600), session.last_used)
+            self._sessions[session.uid] = refreshed
+            self._schedule_session(refreshed)
+            return refreshed.id_token
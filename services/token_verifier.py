@@ -0,0 +1,213 @@
+"""
+Local verification of Firebase ID tokens.
+
+ID tokens are RS256 JWTs signed with Google's ``securetoken`` keys. Instead of
+calling ``accounts:lookup`` (or refetching the certificates) for every check,
+``TokenVerifier``:
+
+- keeps the public certificates in a ``PublicKeyCache`` for as long as the
+  ``Cache-Control: max-age`` of the certificate response allows, and refetches
+  early only when a token names an unknown key (key rotation), at most once
+  per ``UNKNOWN_KEY_REFETCH_INTERVAL`` so forged ``kid`` values cannot make
+  every check fetch;
+- verifies the signature and the Firebase claims locally (``aud`` is the
+  project, ``iss`` is ``https://securetoken.google.com/<project>``, ``sub`` is
+  set, ``iat``/``exp`` bracket now);
+- caches the verified claims in a bounded LRU keyed by the SHA-256 of the
+  token, until the token's ``exp``. Repeated checks of the same token are then
+  a dictionary lookup.
+
+Revocation is not checked (neither does ``auth.verify_id_token`` by default).
+"""
+import base64
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from google.auth import jwt
+
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+GOOGLE_CERTS_URL = ("https://www.googleapis.com/robot/v1/metadata/x509/"
+                    "securetoken@system.gserviceaccount.com")
+ISSUER_PREFIX = "https://securetoken.google.com/"
+
+# Certificates are refetched after this long when the response has no max-age
+DEFAULT_CERTS_MAX_AGE = 3600
+
+# Minimum seconds between early refetches for tokens naming an unknown key
+UNKNOWN_KEY_REFETCH_INTERVAL = 60
+
+# Tolerated clock difference with Google's servers, in seconds
+CLOCK_SKEW_SECONDS = 60
+
+_MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+
+# fetch() -> (certificates by key id, max-age in seconds or None)
+CertsFetcher = Callable[[], Tuple[Dict[str, str], Optional[int]]]
+
+
+def parse_max_age(cache_control: Optional[str]) -> Optional[int]:
+    """Extract max-age (seconds) from a Cache-Control header value."""
+    match = _MAX_AGE_PATTERN.search(cache_control or '')
+    return int(match.group(1)) if match else None
+
+
+def token_key_id(token: str) -> Optional[str]:
+    """The ``kid`` from a JWT header, without verifying anything."""
+    try:
+        header = token.split('.', 1)[0]
+        header += '=' * (-len(header) % 4)
+        return json.loads(base64.urlsafe_b64decode(header)).get('kid')
+    except Exception:
+        return None
+
+
+def http_certs_fetcher(session, url: str = GOOGLE_CERTS_URL, timeout: Any = 10) -> CertsFetcher:
+    """Fetcher that downloads the certificates through a requests session."""
+    def fetch() -> Tuple[Dict[str, str], Optional[int]]:
+        response = session.get(url, timeout=timeout)
+        response.raise_for_status()
+        return response.json(), parse_max_age(response.headers.get('Cache-Control'))
+    return fetch
+
+
+class PublicKeyCache:
+    """Google's token-signing certificates, cached for their max-age."""
+
+    def __init__(self, fetch: CertsFetcher, clock: Callable[[], float] = time.time):
+        self._fetch = fetch
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._certs: Dict[str, str] = {}
+        self._expires_at = 0.0
+        self._attempted_at: Optional[float] = None
+        self.fetches = 0
+
+    def get(self, key_id: Optional[str] = None) -> Dict[str, str]:
+        """
+        Current certificates by key ID.
+
+        Args:
+            key_id: Key the caller needs; an unknown key triggers one refetch
+                even before max-age runs out (keys are rotated), unless the
+                certificates were fetched less than UNKNOWN_KEY_REFETCH_INTERVAL
+                ago. The returned certificates then lack the key, so the token
+                is rejected.
+        """
+        with self._lock:
+            now = self._clock()
+            stale = now >= self._expires_at
+            unknown = (key_id is not None and key_id not in self._certs
+                       and (self._attempted_at is None
+                            or now - self._attempted_at >= UNKNOWN_KEY_REFETCH_INTERVAL))
+            if stale or unknown:
+                self._refresh()
+            return self._certs
+
+    def _refresh(self):
+        self._attempted_at = self._clock()
+        try:
+            certs, max_age = self._fetch()
+        except Exception as e:
+            if not self._certs:
+                raise
+            # Keep verifying with the keys we have; try again shortly
+            logger.warning(f"Could not refresh token certificates: {e}")
+            self._expires_at = self._clock() + 60
+            return
+        self.fetches += 1
+        self._certs = dict(certs)
+        self._expires_at = self._clock() + (max_age if max_age is not None else DEFAULT_CERTS_MAX_AGE)
+
+
+class TokenVerifier:
+    """Verifies Firebase ID tokens locally and caches the claims until ``exp``."""
+
+    def __init__(self, project_id: str, keys: PublicKeyCache, max_entries: int = 10000,
+                 clock: Callable[[], float] = time.time):
+        """
+        Args:
+            project_id: Firebase project the tokens must be issued for
+            keys: Certificate cache
+            max_entries: Bound of the claims cache (least recently used first out)
+            clock: Wall clock in epoch seconds (injectable for tests)
+        """
+        self.project_id = project_id
+        self.keys = keys
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._claims: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._claims)
+
+    def verify(self, token: str) -> Optional[Dict[str, Any]]:
+        """
+        Verify an ID token.
+
+        Returns:
+            A copy of the token claims plus 'uid', or None if the token is
+            malformed, expired, not for this project or badly signed
+        """
+        if not token:
+            return None
+        cache_key = hashlib.sha256(token.encode('utf-8')).hexdigest()
+        now = self._clock()
+
+        with self._lock:
+            claims = self._claims.get(cache_key)
+            if claims is not None:
+                if claims['exp'] > now:
+                    self._claims.move_to_end(cache_key)
+                    self.hits += 1
+                    return dict(claims)
+                del self._claims[cache_key]
+            self.misses += 1
+
+        claims = self._decode(token, now)
+        if claims is None:
+            return None
+
+        with self._lock:
+            self._claims[cache_key] = claims
+            self._claims.move_to_end(cache_key)
+            while len(self._claims) > self.max_entries:
+                self._claims.popitem(last=False)
+        return dict(claims)
+
+    def clear(self):
+        """Forget every cached verification."""
+        with self._lock:
+            self._claims.clear()
+
+    # ==================== Internal helpers ====================
+
+    def _decode(self, token: str, now: float) -> Optional[Dict[str, Any]]:
+        try:
+            certs = self.keys.get(token_key_id(token))
+            claims = jwt.decode(token, certs=certs, audience=self.project_id,
+                                clock_skew_in_seconds=CLOCK_SKEW_SECONDS)
+        except Exception as e:
+            logger.debug(f"ID token rejected: {e}")
+            return None
+
+        if claims.get('iss') != ISSUER_PREFIX + self.project_id:
+            return None
+        subject = claims.get('sub')
+        if not isinstance(subject, str) or not subject or len(subject) > 128:
+            return None
+        if not isinstance(claims.get('exp'), (int, float)) or claims['exp'] <= now:
+            return None
+        claims['uid'] = subject
+        return claims
@@ -0,0 +1,126 @@
+"""
+Tests for the asyncio read service and its synchronous facade, run on the fake backend.
+"""
+import asyncio
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from loadtest.fake_firestore import FakeAsyncFirestore, FakeFirestore
+from loadtest.harness import FakeIdentityToolkit, fake_backend
+from services.async_firebase_service import (
+    AsyncFirebaseService, EventLoopThread, SyncFirebaseFacade, get_async_firebase,
+)
+
+
+def seeded(latency=0.0):
+    """Fake database with one user, two orders and three products."""
+    db = FakeFirestore(latency=latency)
+    db.seed('products', {f"p{i}": {'name': f"P{i}", 'price': 10.0 + i, 'active': True} for i in range(3)})
+    db.seed('orders', {
+        'o1': {'user_id': 'u1', 'created_at': datetime(2024, 1, 1), 'status': 'pending'},
+        'o2': {'user_id': 'u1', 'created_at': datetime(2024, 2, 1), 'status': 'pending'},
+    })
+    db.seed('users', {'u1': {
+        'display_name': 'Ana', 'email': 'ana@example.com', 'addresses': [],
+        'cart_items': {'p1': {'product_id': 'p1', 'quantity': 1}, 'p2': {'product_id': 'p2', 'quantity': 2}},
+        'cart_version': 3, 'orders': ['o1', 'o2'],
+    }})
+    return db
+
+
+@pytest.fixture
+def runner():
+    runner = EventLoopThread()
+    yield runner
+    runner.stop()
+
+
+class TestAsyncFirebaseService:
+    """Test the async reads against the sync service's results."""
+
+    def test_matches_sync_service(self):
+        """Test that profile, cart and orders equal what FirebaseService returns."""
+        from services.firebase_service import FirebaseService
+
+        db = seeded()
+        with fake_backend(db, FakeIdentityToolkit([])):
+            facade = get_async_firebase()
+            firebase = FirebaseService()
+            assert facade.get_user_cart_state('u1') == firebase.get_user_cart_state('u1')
+            assert facade.get_user_orders('u1') == firebase.get_user_orders('u1')
+            assert facade.get_user_orders_page('u1', page_size=1) == firebase.get_user_orders_page('u1', page_size=1)
+            assert facade.get_product_by_id('p1')['name'] == 'P1'
+            assert facade.get_product_by_id('missing') is None
+
+    def test_account_overview(self):
+        """Test that the overview bundles the profile with the first orders page."""
+        with fake_backend(seeded(), FakeIdentityToolkit([])):
+            overview = get_async_firebase().get_account_overview('u1')
+        assert overview['profile']['display_name'] == 'Ana'
+        assert [order['id'] for order in overview['orders_page']['orders']] == ['o2', 'o1']
+
+    def test_cart_details_reads_products_in_parallel_chunks(self, runner, monkeypatch):
+        """Test that cart products are fetched with one get_all per chunk."""
+        db = seeded()
+        monkeypatch.setattr(AsyncFirebaseService, 'GET_ALL_CHUNK_SIZE', 1)
+        with fake_backend(db, FakeIdentityToolkit([])):
+            facade = SyncFirebaseFacade(AsyncFirebaseService(FakeAsyncFirestore(db)), runner)
+            before = db.rpc_count
+            details = facade.get_cart_details('u1')
+        assert details['version'] == 3
+        assert sorted(details['products']) == ['p1', 'p2']
+        assert db.rpc_count - before == 3  # user document + two product chunks
+
+    def test_gathered_reads_overlap(self, runner):
+        """Test that gathered reads take about one round trip, not the sum."""
+        db = seeded(latency=0.2)
+        with fake_backend(db, FakeIdentityToolkit([])):
+            facade = SyncFirebaseFacade(AsyncFirebaseService(FakeAsyncFirestore(db)), runner)
+            start = time.perf_counter()
+            overview = facade.get_account_overview('u1')
+            elapsed = time.perf_counter() - start
+        assert overview['profile'] is not None
+        assert elapsed < 0.35
+
+    def test_facade_gather(self, runner):
+        """Test running several service coroutines in one call."""
+        db = seeded()
+        with fake_backend(db, FakeIdentityToolkit([])):
+            facade = SyncFirebaseFacade(AsyncFirebaseService(FakeAsyncFirestore(db)), runner)
+            cart, product = facade.gather(facade.service.get_user_cart('u1'),
+                                          facade.service.get_product_by_id('p0'))
+        assert [item['product_id'] for item in cart] == ['p1', 'p2']
+        assert product['price'] == 10.0
+
+
+class TestEventLoopThread:
+    """Test the shared loop used by the facade."""
+
+    def test_runs_calls_from_many_threads(self, runner):
+        """Test that concurrent callers all get their own results."""
+        async def double(value):
+            await asyncio.sleep(0.01)
+            return value * 2
+
+        results = {}
+
+        def call(value):
+            results[value] = runner.run(double(value), timeout=5)
+
+        threads = [threading.Thread(target=call, args=(value,)) for value in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == {value: value * 2 for value in range(8)}
+
+    def test_errors_propagate(self, runner):
+        """Test that exceptions raised in coroutines reach the caller."""
+        async def fail():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            runner.run(fail(), timeout=5)
@@ -0,0 +1,223 @@
+"""
+Unit tests for the write-behind cart buffer.
+"""
+import threading
+
+import pytest
+from services.cart_buffer import CartWriteBuffer
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class RecordingFlush:
+    """Flush callback that records writes and can be told to fail."""
+
+    def __init__(self):
+        self.calls = []
+        self.flush_ids = []
+        self.fail = False
+
+    def __call__(self, user_id, changes, clear, flush_id):
+        self.flush_ids.append(flush_id)
+        if self.fail:
+            raise ConnectionError("offline")
+        self.calls.append((user_id, changes, clear))
+        return True
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def flush():
+    return RecordingFlush()
+
+
+@pytest.fixture
+def buffer(flush, clock):
+    return CartWriteBuffer('user_1', flush, debounce_seconds=2.0, clock=clock, use_timer=False)
+
+
+def line(product_id, quantity):
+    return {'product_id': product_id, 'name': product_id, 'price': 10.0, 'quantity': quantity}
+
+
+class TestCartWriteBuffer:
+    """Test coalescing and flushing."""
+
+    def test_changes_are_not_written_immediately(self, buffer, flush):
+        """Test that staged changes wait for a flush."""
+        buffer.stage('prod_123', line('prod_123', 5), 3)
+        assert buffer.has_pending
+        assert flush.calls == []
+
+    def test_repeated_changes_coalesce_into_one_delta(self, buffer, flush, clock):
+        """Test that five clicks produce a single write with the summed delta."""
+        for quantity in range(3, 8):
+            buffer.stage('prod_123', line('prod_123', quantity), 1)
+        buffer.stage('prod_9', line('prod_9', 2), 2)
+
+        clock.now = 2.5
+        assert buffer.maybe_flush()
+
+        assert len(flush.calls) == 1
+        _, changes, clear = flush.calls[0]
+        assert changes['prod_123'] == {'item': line('prod_123', 7), 'quantity': 5, 'replace': False}
+        assert changes['prod_9']['quantity'] == 2
+        assert clear is False
+        assert not buffer.has_pending
+
+    def test_debounce_interval(self, buffer, flush, clock):
+        """Test that a flush waits for a quiet period after the last change."""
+        buffer.stage('prod_123', line('prod_123', 3), 1)
+        clock.now = 1.5
+        buffer.stage('prod_123', line('prod_123', 4), 1)
+        clock.now = 2.5
+        buffer.maybe_flush()
+        assert flush.calls == []
+
+        clock.now = 3.6
+        buffer.maybe_flush()
+        assert len(flush.calls) == 1
+
+    def test_remove_and_clear(self, buffer, flush):
+        """Test that removals and clears are flushed as such, and re-adds replace the line."""
+        buffer.stage('prod_123', None)
+        buffer.flush()
+        assert flush.calls[-1][1] == {'prod_123': None}
+
+        buffer.stage('prod_5', None)
+        buffer.stage('prod_5', line('prod_5', 4), 4)
+        buffer.flush()
+        assert flush.calls[-1][1]['prod_5'] == {'item': line('prod_5', 4), 'quantity': 4, 'replace': True}
+
+        buffer.stage('prod_9', line('prod_9', 1), 1)
+        buffer.clear()
+        buffer.stage('prod_7', line('prod_7', 1), 1)
+        buffer.flush()
+        _, changes, clear = flush.calls[-1]
+        assert clear is True
+        assert list(changes) == ['prod_7']
+
+    def test_failed_flush_keeps_changes(self, buffer, flush):
+        """Test that nothing is lost when a flush fails."""
+        buffer.stage('prod_123', line('prod_123', 9), 7)
+        flush.fail = True
+        assert buffer.flush() is False
+        assert buffer.has_pending
+        assert buffer.last_error == "offline"
+
+        flush.fail = False
+        assert buffer.flush() is True
+        assert flush.calls[-1][1]['prod_123']['quantity'] == 7
+        assert not buffer.has_pending
+
+    def test_retry_resends_the_same_batch(self, buffer, flush):
+        """Test that a failed batch is retried unchanged, before later changes."""
+        buffer.stage('prod_123', line('prod_123', 3), 2)
+        flush.fail = True
+        assert buffer.flush() is False
+        buffer.stage('prod_9', line('prod_9', 1), 1)
+
+        flush.fail = False
+        assert buffer.flush() is True
+        assert flush.flush_ids[0] == flush.flush_ids[1] != flush.flush_ids[2]
+        assert [list(changes) for _, changes, _ in flush.calls] == [['prod_123'], ['prod_9']]
+        assert buffer.flush_count == 2
+
+    def test_stage_is_not_blocked_by_a_running_flush(self, buffer):
+        """Test that changes can be staged while a flush waits on the network."""
+        started, release = threading.Event(), threading.Event()
+        written = []
+
+        def slow_flush(user_id, changes, clear, flush_id):
+            started.set()
+            assert release.wait(5)
+            written.append(changes)
+            return True
+
+        buffer._flush_fn = slow_flush
+        buffer.stage('prod_123', line('prod_123', 1), 1)
+        flusher = threading.Thread(target=buffer.flush)
+        flusher.start()
+        assert started.wait(5)
+
+        stager = threading.Thread(target=buffer.stage, args=('prod_9', line('prod_9', 1), 1))
+        stager.start()
+        stager.join(1)
+        blocked = stager.is_alive()
+        release.set()
+        flusher.join(5)
+        stager.join(5)
+
+        assert not blocked
+        assert list(written[0]) == ['prod_123']
+        assert buffer.has_pending
+
+    def test_cancelling_changes_do_not_write(self, buffer, flush):
+        """Test that changes summing to zero are dropped."""
+        buffer.stage('prod_123', line('prod_123', 5), 3)
+        buffer.stage('prod_123', line('prod_123', 2), -3)
+        assert buffer.flush() is True
+        assert flush.calls == []
+
+
+class TestConcurrentSessions:
+    """Test flushes of two sessions against the same user document."""
+
+    def test_quantities_add_up(self):
+        """Test that two sessions adding the same product do not overwrite each other."""
+        from loadtest.fake_firestore import FakeFirestore
+        from loadtest.harness import FakeIdentityToolkit, fake_backend
+        from services.cart_buffer import persist_cart_changes
+
+        db = FakeFirestore()
+        db.seed('users', {'u1': {'cart_items': {'p1': line('p1', 1)}, 'cart_version': 1}})
+        with fake_backend(db, FakeIdentityToolkit([])):
+            first = CartWriteBuffer('u1', persist_cart_changes, use_timer=False)
+            second = CartWriteBuffer('u1', persist_cart_changes, use_timer=False)
+            first.stage('p1', line('p1', 3), 2)   # this tab saw 1 -> 3
+            second.stage('p1', line('p1', 2), 1)  # the other tab saw 1 -> 2
+            assert first.flush() and second.flush()
+
+        user = db.dump('users')['u1']
+        assert user['cart_items']['p1']['quantity'] == 4
+        assert user['cart_version'] == 3
+
+    def test_retried_write_is_applied_once(self):
+        """Test that retrying a write that landed but raised does not add its delta twice."""
+        from loadtest.fake_firestore import FakeFirestore
+        from loadtest.harness import FakeIdentityToolkit, fake_backend
+        from services.cart_buffer import persist_cart_changes
+
+        db = FakeFirestore()
+        db.seed('users', {'u1': {'cart_items': {'p1': line('p1', 1)}, 'cart_version': 1}})
+        attempts = []
+
+        def flaky(user_id, changes, clear, flush_id):
+            persist_cart_changes(user_id, changes, clear, flush_id)
+            attempts.append(flush_id)
+            if len(attempts) == 1:
+                raise TimeoutError("deadline exceeded")
+            return True
+
+        with fake_backend(db, FakeIdentityToolkit([])):
+            buffer = CartWriteBuffer('u1', flaky, use_timer=False)
+            buffer.stage('p1', line('p1', 3), 2)
+            assert buffer.flush() is False
+            assert buffer.flush() is True
+
+        user = db.dump('users')['u1']
+        assert user['cart_items']['p1']['quantity'] == 3
+        assert user['cart_version'] == 2
+        assert user['cart_recent_flushes'] == attempts[:1]
@@ -0,0 +1,60 @@
+"""
+Unit tests for the persisted cart data model.
+"""
+from datetime import datetime
+from services.cart_model import build_cart_item, cart_items_to_list, merge_legacy_cart
+
+
+class TestBuildCartItem:
+    """Test cart item snapshots."""
+
+    def test_snapshot_from_product(self, mock_product):
+        """Test that name, price and first image are copied."""
+        item = build_cart_item('prod_123', mock_product, 2)
+        assert item == {
+            'product_id': 'prod_123',
+            'name': 'Test Product',
+            'price': 29.99,
+            'image': 'https://example.com/image1.jpg',
+            'quantity': 2,
+        }
+
+    def test_snapshot_without_product(self):
+        """Test defaults when the product is unknown."""
+        item = build_cart_item('prod_x', None, 1)
+        assert item['name'] == ''
+        assert item['price'] == 0
+        assert item['image'] == ''
+
+
+class TestCartConversion:
+    """Test map/list conversions and legacy migration."""
+
+    def test_cart_items_to_list_orders_by_added_at(self):
+        """Test that items come back in insertion order and empty items are skipped."""
+        cart_items = {
+            'b': {'name': 'B', 'quantity': 1, 'added_at': datetime(2024, 1, 2)},
+            'a': {'name': 'A', 'quantity': 3, 'added_at': datetime(2024, 1, 1)},
+            'c': {'name': 'C', 'quantity': 0, 'added_at': datetime(2024, 1, 3)},
+        }
+        items = cart_items_to_list(cart_items)
+        assert [item['product_id'] for item in items] == ['a', 'b']
+
+    def test_cart_items_to_list_empty(self):
+        """Test that a missing cart converts to an empty list."""
+        assert cart_items_to_list(None) == []
+
+    def test_merge_legacy_cart(self, mock_cart_item):
+        """Test that legacy array items are folded into the map."""
+        merged = merge_legacy_cart(
+            [mock_cart_item, {'product_id': 'prod_9', 'name': 'Other', 'quantity': 1}],
+            {'prod_123': {'product_id': 'prod_123', 'name': 'Test Product', 'quantity': 1}}
+        )
+        assert merged['prod_123']['quantity'] == 3
+        assert merged['prod_9']['name'] == 'Other'
+
+    def test_merge_legacy_cart_does_not_mutate_input(self, mock_cart_item):
+        """Test that the stored map is copied, not modified in place."""
+        cart_items = {'prod_123': {'product_id': 'prod_123', 'quantity': 1}}
+        merge_legacy_cart([mock_cart_item], cart_items)
+        assert cart_items['prod_123']['quantity'] == 1
@@ -0,0 +1,186 @@
+"""
+Unit tests for the session cart store.
+"""
+import pytest
+from services.cart_buffer import CartWriteBuffer
+from services.cart_store import CartItem, CartStore
+
+
+class RecordingFlush:
+    """Flush callback that records writes."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, user_id, changes, clear, flush_id):
+        self.calls.append((user_id, changes, clear))
+        return True
+
+
+class FakeFirebase:
+    """Exposes the persisted cart state the store revalidates against."""
+
+    def __init__(self, items, version):
+        self.state = {'items': items, 'version': version}
+
+    def get_user_cart_state(self, user_id, fresh=False):
+        return self.state
+
+
+@pytest.fixture
+def flush():
+    return RecordingFlush()
+
+
+@pytest.fixture
+def store(mock_cart_item, flush):
+    buffer = CartWriteBuffer('user_1', flush, use_timer=False)
+    return CartStore([mock_cart_item], user_id='user_1', buffer=buffer, persisted_version=4)
+
+
+class TestCartItem:
+    """Test the slotted cart line."""
+
+    def test_slots(self, mock_cart_item):
+        """Test that items carry no per-instance __dict__."""
+        item = CartItem.from_dict(mock_cart_item)
+        assert not hasattr(item, '__dict__')
+        with pytest.raises(AttributeError):
+            item.color = 'red'
+
+    def test_round_trip(self, mock_cart_item):
+        """Test conversion to and from the stored format."""
+        item = CartItem.from_dict(mock_cart_item)
+        assert item.subtotal == pytest.approx(59.98)
+        assert CartItem.from_dict(item.to_dict()).to_dict() == item.to_dict()
+
+
+class TestCartStore:
+    """Test lookups, cached totals and persistence."""
+
+    def test_lookup_by_product_id(self, store):
+        """Test membership and lookup by product ID."""
+        assert 'prod_123' in store
+        assert store.get('prod_123').quantity == 2
+        assert store.get('missing') is None
+
+    def test_add_merges_existing_item(self, store, mock_product):
+        """Test that adding a product already in the cart bumps its quantity."""
+        store.add(mock_product, 3)
+        assert len(store) == 1
+        assert store.get('prod_123').quantity == 5
+
+    def test_totals_invalidate_on_change(self, store):
+        """Test that cached totals follow the local version."""
+        assert store.total == pytest.approx(59.98)
+        version = store.version
+        store.set_quantity('prod_123', 3)
+        assert store.version == version + 1
+        assert store.total == pytest.approx(89.97)
+        assert store.count == 3
+
+    def test_mutations_are_staged_in_buffer(self, store, flush):
+        """Test that edits reach the buffer and flush as one write."""
+        store.add({'id': 'prod_9', 'name': 'Mouse', 'price': 10.0}, 2)
+        store.remove('prod_123')
+        assert store.flush()
+
+        assert len(flush.calls) == 1
+        _, changes, _ = flush.calls[0]
+        assert changes['prod_9']['quantity'] == 2
+        assert changes['prod_123'] is None
+        assert store.expected_remote_version == 5
+
+    def test_quantity_changes_are_staged_as_deltas(self, store, flush):
+        """Test that set_quantity stages the difference to the previous quantity."""
+        store.set_quantity('prod_123', 5)
+        store.set_quantity('prod_123', 4)
+        assert store.flush()
+        _, changes, _ = flush.calls[0]
+        assert changes['prod_123']['quantity'] == 2  # 2 -> 4
+        assert changes['prod_123']['item']['quantity'] == 4
+
+    def test_guest_store_keeps_items_in_memory(self, mock_product):
+        """Test that a store without a buffer works as a plain cart."""
+        store = CartStore()
+        store.add(mock_product, 1)
+        assert store.flush() is True
+        assert store.revalidate() is False
+        assert store.count == 1
+
+    def test_demo_user_cart_is_not_persisted(self, monkeypatch, mock_product):
+        """Test that the shared demo uid gets an in-memory store."""
+        from services import cart_store
+
+        def load(*args):
+            raise AssertionError('demo cart loaded from Firestore')
+
+        monkeypatch.setattr(cart_store, '_load_user_store', load)
+        monkeypatch.setattr(cart_store.st, 'session_state', {'user': {'uid': cart_store.DEMO_USER_ID}})
+        store = cart_store.get_cart_store()
+        store.add(mock_product, 1)
+        assert store.user_id == cart_store.DEMO_USER_ID
+        assert store._buffer is None
+        assert cart_store.get_cart_store() is store
+
+    def test_failed_load_is_retried(self, monkeypatch, mock_product, flush):
+        """Test that a cart that could not be loaded is not bound to the user."""
+        from services import cart_store
+
+        loads = []
+
+        def load(user_id, guest=None):
+            loads.append(guest)
+            if len(loads) == 1:
+                raise ConnectionError('unavailable')
+            store = CartStore(user_id=user_id, buffer=CartWriteBuffer(user_id, flush, use_timer=False))
+            for item in guest:
+                store.add(item.to_dict(), item.quantity)
+            return store
+
+        monkeypatch.setattr(cart_store, '_load_user_store', load)
+        monkeypatch.setattr(cart_store.st, 'session_state', {'user': {'uid': 'user_1'}})
+        monkeypatch.setattr(cart_store.st, 'error', lambda message: None)
+        fallback = cart_store.get_cart_store()
+        fallback.add(mock_product, 2)
+        assert fallback.user_id is None
+
+        store = cart_store.get_cart_store()
+        assert store.user_id == 'user_1'
+        assert loads[1] is fallback
+        assert store.count == 2
+        assert store.flush()
+        assert flush.calls[0][1][mock_product['id']]['quantity'] == 2
+
+
+class TestRevalidate:
+    """Test version-based invalidation."""
+
+    def test_unchanged_version_keeps_local_copy(self, store, mock_cart_item):
+        """Test that a matching version does not reload."""
+        store.set_quantity('prod_123', 6)
+        firebase = FakeFirebase([mock_cart_item], version=5)  # our own flush
+        assert store.revalidate(firebase) is False
+        assert store.get('prod_123').quantity == 6
+
+    def test_newer_version_reloads(self, store):
+        """Test that a write from another session replaces the local copy."""
+        firebase = FakeFirebase([{'product_id': 'prod_7', 'name': 'Pad', 'price': 5.0, 'quantity': 1}], version=9)
+        version = store.version
+        assert store.revalidate(firebase) is True
+        assert [item.product_id for item in store] == ['prod_7']
+        assert store.version > version
+        assert store.total == pytest.approx(5.0)
+
+        # A further check against the same remote version is a no-op
+        assert store.revalidate(firebase) is False
+
+    def test_failed_flush_keeps_local_copy(self, mock_cart_item):
+        """Test that pending changes are not orphaned by a reload."""
+        buffer = CartWriteBuffer('user_1', lambda *args: False, use_timer=False)
+        store = CartStore([mock_cart_item], user_id='user_1', buffer=buffer, persisted_version=4)
+        store.set_quantity('prod_123', 6)
+        firebase = FakeFirebase([{'product_id': 'prod_7', 'name': 'Pad', 'price': 5.0, 'quantity': 1}], version=9)
+        assert store.revalidate(firebase) is False
+        assert store.get('prod_123').quantity == 6
+        assert store._buffer.has_pending
@@ -0,0 +1,190 @@
+"""
+Unit tests for the live catalog listener, driven by a fake Firestore query.
+"""
+from types import SimpleNamespace
+
+import pytest
+from services.catalog_listener import CatalogListener, CatalogStore
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeDoc:
+    """Minimal DocumentSnapshot."""
+
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+class FakeWatch:
+    """Watch handle returned by on_snapshot."""
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.is_active = True
+
+    def unsubscribe(self):
+        self.is_active = False
+
+    def push(self, docs, changes=()):
+        self.callback(docs, list(changes), None)
+
+
+class FakeQuery:
+    """Query exposing on_snapshot; can be told to fail when attaching."""
+
+    def __init__(self):
+        self.watches = []
+        self.fail = False
+
+    def on_snapshot(self, callback):
+        if self.fail:
+            raise ConnectionError("unavailable")
+        watch = FakeWatch(callback)
+        self.watches.append(watch)
+        return watch
+
+
+def change(kind, doc):
+    return SimpleNamespace(type=SimpleNamespace(name=kind), document=doc)
+
+
+def product_doc(doc_id, **fields):
+    return FakeDoc(doc_id, {'name': doc_id, 'category': 'Electronics', 'active': True, **fields})
+
+
+@pytest.fixture
+def query():
+    return FakeQuery()
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def listener(query, clock):
+    listener = CatalogListener(lambda: query, CatalogStore(), initial_backoff=1.0,
+                               max_backoff=8.0, clock=clock, rand=lambda: 1.0)
+    listener.start(supervise=False)
+    return listener
+
+
+class TestCatalogStore:
+    """Test snapshots, deltas and ordered pages."""
+
+    def test_first_snapshot_replaces_catalog(self, listener, query):
+        """Test that the store becomes ready with the full result set."""
+        assert not listener.store.ready
+        query.watches[-1].push([product_doc('b', price=5), product_doc('a', price=3)])
+        assert listener.store.ready
+        assert [p['id'] for p in listener.store.products()] == ['a', 'b']
+
+    def test_deltas_are_applied(self, listener, query):
+        """Test that added, modified and removed documents update the store."""
+        watch = query.watches[-1]
+        watch.push([product_doc('a', price=3), product_doc('b', price=5)])
+        watch.push([], [
+            change('ADDED', product_doc('c', price=1, category='Books')),
+            change('MODIFIED', product_doc('a', price=4)),
+            change('REMOVED', product_doc('b')),
+        ])
+        store = listener.store
+        assert 'b' not in store
+        assert store.get('a')['price'] == 4
+        assert [p['id'] for p in store.products(category='Books')] == ['c']
+
+    def test_subscribers_receive_batched_changes(self, listener, query):
+        """Test that each snapshot reaches subscribers as one batch."""
+        batches = []
+        listener.store.subscribe(batches.append)
+        watch = query.watches[-1]
+        watch.push([product_doc('a', price=3)])
+        watch.push([], [change('MODIFIED', product_doc('a', price=4))])
+        assert len(batches) == 2
+        product_id, before, after = batches[1][0]
+        assert (product_id, before['price'], after['price']) == ('a', 3, 4)
+
+    @pytest.mark.parametrize('descending', [False, True])
+    def test_pages_follow_cursor(self, descending):
+        """Test that (value, id) cursors walk the whole catalog without gaps."""
+        store = CatalogStore()
+        store.replace([{'id': f'p{i}', 'price': i % 3} for i in range(7)])
+
+        seen, after = [], None
+        while True:
+            page, has_more = store.page('price', descending, None, 3, after)
+            seen.extend(page)
+            if not has_more:
+                break
+            after = (page[-1]['price'], page[-1]['id'])
+
+        keys = [(p['price'], p['id']) for p in seen]
+        assert keys == sorted(keys, reverse=descending)
+        assert len(seen) == 7
+
+
+class TestReconnect:
+    """Test lifecycle and backoff."""
+
+    def test_reconnects_after_stream_stops(self, listener, query):
+        """Test that a dead stream is re-attached and the next snapshot is treated as full."""
+        query.watches[-1].push([product_doc('a'), product_doc('b')])
+        query.watches[-1].is_active = False
+
+        assert listener.check()
+        assert len(query.watches) == 2
+        assert listener.reconnects == 1
+
+        # 'b' was deleted while disconnected: the full snapshot drops it
+        query.watches[-1].push([product_doc('a')])
+        assert 'b' not in listener.store
+
+    def test_stale_stream_callbacks_are_ignored(self, listener, query):
+        """Test that a replaced stream can no longer change the store."""
+        old = query.watches[-1]
+        old.push([product_doc('a')])
+        old.is_active = False
+        listener.check()
+        old.push([], [change('REMOVED', product_doc('a'))])
+        assert 'a' in listener.store
+
+    def test_exponential_backoff(self, listener, query, clock):
+        """Test that failed reconnects wait 1s, 2s, 4s... capped at max_backoff."""
+        query.watches[-1].is_active = False
+        query.fail = True
+
+        delays = []
+        for _ in range(5):
+            start = clock.now
+            assert not listener.check()
+            clock.now = listener._next_attempt
+            delays.append(clock.now - start)
+        assert delays == [1.0, 2.0, 4.0, 8.0, 8.0]
+
+        query.fail = False
+        clock.now += 1
+        assert listener.check()
+        assert listener.last_error == "unavailable"  # cleared by the first snapshot
+        query.watches[-1].push([])
+        assert listener.last_error is None
+
+    def test_stop_detaches(self, listener, query):
+        """Test that stopping unsubscribes and disables reconnects."""
+        listener.stop()
+        assert not query.watches[-1].is_active
+        assert not listener.check()
+        assert len(query.watches) == 1
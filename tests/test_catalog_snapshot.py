@@ -0,0 +1,189 @@
+"""
+Unit tests for the columnar catalog snapshot.
+"""
+import random
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from services.catalog_snapshot import CatalogSnapshot
+
+
+@pytest.fixture
+def products():
+    """Catalog with price ties, missing fields and an inactive product."""
+    return [
+        {'id': 'p3', 'price': 20.0, 'rating': 4.5, 'category': 'Audio', 'stock': 0},
+        {'id': 'p1', 'price': 10.0, 'rating': 4.9, 'category': 'Audio', 'stock': 5},
+        {'id': 'p2', 'price': 20.0, 'category': 'Books', 'stock': 2},
+        {'id': 'p5', 'price': 5.0, 'rating': 3.0, 'category': 'Books', 'stock': 1, 'active': False},
+        {'id': 'p4', 'rating': 4.0, 'category': 'Audio', 'stock': 3},
+    ]
+
+
+def _scan(products, field, descending, category=None, min_price=None, max_price=None, in_stock=False,
+          min_rating=None, below_price=None):
+    """Reference implementation: filter and sort the plain dicts."""
+    matches = [
+        p for p in products
+        if p.get('active', True)
+        and (category is None or p.get('category') == category)
+        and (min_price is None or p.get('price', float('nan')) >= min_price)
+        and (max_price is None or p.get('price', float('nan')) <= max_price)
+        and (below_price is None or p.get('price', float('nan')) < below_price)
+        and (not in_stock or p.get('stock', 0) > 0)
+        and (min_rating is None or p.get('rating', float('nan')) >= min_rating)
+        and p.get(field) is not None
+    ]
+    return sorted(matches, key=lambda p: (p[field], p['id']), reverse=descending)
+
+
+class TestColumns:
+    """Test how products are laid out."""
+
+    def test_typed_columns(self, products):
+        """Test that columns are typed, ID-ordered and read-only."""
+        snapshot = CatalogSnapshot(products)
+        assert snapshot.ids == ['p1', 'p2', 'p3', 'p4', 'p5']
+        assert snapshot.price.dtype == np.float64
+        assert np.isnan(snapshot.price[3])
+        assert snapshot.stock.tolist() == [5, 2, 0, 3, 1]
+        assert snapshot.active.tolist() == [True, True, True, True, False]
+        assert snapshot.categories == ('Audio', 'Books')
+        with pytest.raises(ValueError):
+            snapshot.price[0] = 1.0
+
+    def test_get_returns_copy(self, products):
+        """Test that lookups copy the product and miss cleanly."""
+        snapshot = CatalogSnapshot(products)
+        product = snapshot.get('p2')
+        product['price'] = 0
+        assert snapshot.get('p2')['price'] == 20.0
+        assert snapshot.get('missing') is None
+
+
+class TestFilters:
+    """Test vectorized masks."""
+
+    def test_category_price_and_stock(self, products):
+        """Test that filters combine and inactive products never match."""
+        snapshot = CatalogSnapshot(products)
+        assert snapshot.mask(category='Audio').tolist() == [True, False, True, True, False]
+        assert snapshot.mask(min_price=10, max_price=20).tolist() == [True, True, True, False, False]
+        assert snapshot.mask(min_price=10, below_price=20).tolist() == [True, False, False, False, False]
+        assert snapshot.mask(in_stock=True).tolist() == [True, True, False, True, False]
+        assert snapshot.mask(min_rating=4.5).tolist() == [True, False, True, False, False]
+
+    def test_unknown_category_matches_nothing(self, products):
+        """Test that an unknown category gives an empty mask."""
+        assert not CatalogSnapshot(products).mask(category='Toys').any()
+
+
+class TestPages:
+    """Test sorted pages and cursors."""
+
+    @pytest.mark.parametrize('descending', [False, True])
+    def test_sort_ties_break_on_id(self, products, descending):
+        """Test that price ties follow document ID order and missing prices are skipped."""
+        page, has_more = CatalogSnapshot(products).page('price', descending, 10)
+        expected = _scan(products, 'price', descending)
+        assert [p['id'] for p in page] == [p['id'] for p in expected]
+        assert not has_more
+
+    @pytest.mark.parametrize('field', ['price', 'rating'])
+    @pytest.mark.parametrize('descending', [False, True])
+    @pytest.mark.parametrize('filters', [
+        {},
+        {'category': 'A'},
+        {'category': 'A', 'min_price': 2.0, 'in_stock': True},
+        {'max_price': 6.0, 'min_rating': 4.0},
+        {'min_price': 2.0, 'below_price': 5.0},
+    ])
+    def test_cursor_walk_matches_scan(self, field, descending, filters):
+        """Test that (value, id) cursors walk filtered results without gaps or repeats."""
+        rng = random.Random(7)
+        products = [
+            {'id': f'p{i:03d}', 'price': float(rng.randint(1, 8)), 'rating': rng.choice([3.5, 4.0, 4.5]),
+             'category': rng.choice(['A', 'B']), 'stock': rng.randint(0, 2)}
+            for i in range(120)
+        ]
+        snapshot = CatalogSnapshot(products)
+
+        seen, after = [], None
+        while True:
+            page, has_more = snapshot.page(field, descending, 7, after, **filters)
+            seen.extend(page)
+            if not has_more:
+                break
+            after = (page[-1][field], page[-1]['id'])
+
+        expected = _scan(products, field, descending, **filters)
+        assert [p['id'] for p in seen] == [p['id'] for p in expected]
+
+    def test_datetime_cursor(self):
+        """Test that created_at pages accept datetime cursor values."""
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        products = [{'id': f'p{i}', 'created_at': start + timedelta(hours=i % 3)} for i in range(6)]
+        snapshot = CatalogSnapshot(products)
+
+        first, _ = snapshot.page('created_at', True, 3)
+        second, has_more = snapshot.page('created_at', True, 3,
+                                         (first[-1]['created_at'], first[-1]['id']))
+        assert [p['id'] for p in first + second] == ['p5', 'p2', 'p4', 'p1', 'p3', 'p0']
+        assert not has_more
+
+    def test_page_materializes_copies(self, products):
+        """Test that page dicts can be changed without touching the snapshot."""
+        snapshot = CatalogSnapshot(products)
+        page, _ = snapshot.page(None, False, 2)
+        page[0]['price'] = -1
+        assert snapshot.get(page[0]['id'])['price'] == 10.0
+
+    def test_category_pages_use_presorted_views(self, products):
+        """Test that category-only listings slice the precomputed order without copying."""
+        snapshot = CatalogSnapshot(products)
+        rows, _ = snapshot.order('price', True, 'Audio')
+        assert rows.base is not None
+        assert [snapshot.ids[row] for row in rows] == ['p3', 'p1']
+        assert snapshot.order('price', False, 'Toys')[0].size == 0
+
+
+class TestFacets:
+    """Test precomputed facet counts."""
+
+    def test_catalog_facets(self, products):
+        """Test category, price bucket and cumulative rating counts over active products."""
+        facets = CatalogSnapshot(products).facets()
+        assert facets['count'] == 4
+        assert facets['categories'] == {'Audio': 3, 'Books': 1}
+        price = {bucket['min']: bucket['count'] for bucket in facets['price']}
+        assert price[0] == 3
+        assert sum(price.values()) == 3
+        assert {bucket['min']: bucket['count'] for bucket in facets['rating']}[4.5] == 2
+
+    def test_price_buckets_are_half_open(self):
+        """Test that a price on a bucket edge counts in the upper bucket."""
+        facets = CatalogSnapshot([{'id': 'a', 'price': 25.0}, {'id': 'b', 'price': 24.99},
+                                  {'id': 'c', 'price': 5000.0}]).facets()
+        counts = [(bucket['min'], bucket['max'], bucket['count']) for bucket in facets['price']]
+        assert counts[0] == (0, 25, 1)
+        assert counts[1] == (25, 50, 1)
+        assert counts[-1] == (1000, None, 1)
+
+    def test_bucket_filter_matches_bucket_count(self):
+        """Test that filtering by a bucket's [min, max) returns exactly its count."""
+        snapshot = CatalogSnapshot([{'id': 'a', 'price': 25.0}, {'id': 'b', 'price': 24.995},
+                                    {'id': 'c', 'price': 24.99}])
+        bucket = snapshot.facets()['price'][0]
+        rows, _ = snapshot.order('price', min_price=bucket['min'], below_price=bucket['max'])
+        assert [snapshot.materialize([row])[0]['id'] for row in rows] == ['c', 'b']
+        assert len(rows) == bucket['count']
+
+    def test_category_facets(self, products):
+        """Test that price and rating facets narrow to the category while category counts do not."""
+        snapshot = CatalogSnapshot(products)
+        facets = snapshot.facets('Books')
+        assert facets['count'] == 1
+        assert facets['categories'] == {'Audio': 3, 'Books': 1}
+        assert sum(bucket['count'] for bucket in facets['price']) == 1
+        assert snapshot.facets('Toys')['count'] == 0
@@ -0,0 +1,116 @@
+"""
+Unit tests for the category summary helpers.
+"""
+from services.category_summary import (
+    apply_product_change,
+    build_summary,
+    category_names,
+    product_contribution,
+)
+
+
+def _product(category, price, active=True):
+    return {'category': category, 'price': price, 'active': active}
+
+
+class TestBuildSummary:
+    """Test building the summary from a full listing."""
+
+    def test_counts_and_price_range(self):
+        """Test per-category count and min/max price."""
+        summary = build_summary([
+            _product('Audio', 59.99),
+            _product('Audio', 199.99),
+            _product('Gaming', 129.99),
+            _product('Gaming', 10.0, active=False),
+            {'name': 'No category', 'active': True, 'price': 1},
+        ])
+        assert summary == {
+            'Audio': {'count': 2, 'min_price': 59.99, 'max_price': 199.99},
+            'Gaming': {'count': 1, 'min_price': 129.99, 'max_price': 129.99},
+        }
+
+    def test_category_names_sorted(self):
+        """Test that names are sorted and empty categories skipped."""
+        summary = build_summary([_product('Gaming', 1), _product('Audio', 2)])
+        summary['Empty'] = {'count': 0, 'min_price': None, 'max_price': None}
+        assert category_names(summary) == ['Audio', 'Gaming']
+
+    def test_missing_price(self):
+        """Test that products without a price are counted without bounds."""
+        assert product_contribution(_product('Audio', None)) == ('Audio', None)
+        assert build_summary([_product('Audio', None)])['Audio']['min_price'] is None
+
+
+class TestApplyProductChange:
+    """Test incremental summary maintenance."""
+
+    def test_create(self):
+        """Test that creating a product extends its category."""
+        categories = build_summary([_product('Audio', 50)])
+        assert apply_product_change(categories, None, _product('Audio', 20)) == set()
+        assert categories['Audio'] == {'count': 2, 'min_price': 20, 'max_price': 50}
+
+    def test_delete_last_product_drops_category(self):
+        """Test that a category disappears with its last product."""
+        categories = build_summary([_product('Audio', 50)])
+        assert apply_product_change(categories, _product('Audio', 50), None) == set()
+        assert categories == {}
+
+    def test_delete_boundary_marks_category_stale(self):
+        """Test that removing the min/max price requests a recompute."""
+        categories = build_summary([_product('Audio', 50), _product('Audio', 20), _product('Audio', 30)])
+        assert apply_product_change(categories, _product('Audio', 20), None) == {'Audio'}
+        assert categories['Audio']['count'] == 2
+
+    def test_delete_interior_price_needs_no_recompute(self):
+        """Test that removing a price strictly inside the range is incremental."""
+        categories = build_summary([_product('Audio', 50), _product('Audio', 20), _product('Audio', 30)])
+        assert apply_product_change(categories, _product('Audio', 30), None) == set()
+        assert categories['Audio'] == {'count': 2, 'min_price': 20, 'max_price': 50}
+
+    def test_move_between_categories(self):
+        """Test that a category change moves the product's contribution."""
+        categories = build_summary([_product('Audio', 50), _product('Gaming', 10)])
+        stale = apply_product_change(categories, _product('Audio', 50), _product('Gaming', 70))
+        assert stale == set()
+        assert 'Audio' not in categories
+        assert categories['Gaming'] == {'count': 2, 'min_price': 10, 'max_price': 70}
+
+    def test_deactivate(self):
+        """Test that deactivating a product removes it from the summary."""
+        categories = build_summary([_product('Audio', 50), _product('Audio', 60)])
+        apply_product_change(categories, _product('Audio', 50), _product('Audio', 50, active=False))
+        assert categories['Audio']['count'] == 1
+
+    def test_unchanged_contribution(self):
+        """Test that edits not touching category/price/active are no-ops."""
+        categories = build_summary([_product('Audio', 50)])
+        before = {**_product('Audio', 50), 'name': 'Old'}
+        after = {**_product('Audio', 50), 'name': 'New'}
+        assert apply_product_change(categories, before, after) == set()
+        assert categories['Audio']['count'] == 1
+
+
+class TestCachedSummary:
+    """Test the cached summary read from Firestore."""
+
+    def test_failed_read_is_not_cached(self, monkeypatch):
+        """Test that a read error yields an empty summary once, then a retry."""
+        from loadtest.fake_firestore import FakeFirestore
+        from loadtest.harness import FakeIdentityToolkit, fake_backend
+        from services.firebase_service import FirebaseService, _get_cached_category_summary
+
+        db = FakeFirestore()
+        db.seed('products', {'p1': {'category': 'Audio', 'price': 20.0, 'active': True}})
+        fetch = FirebaseService._fetch_all_active_products
+
+        def failing_fetch(self):
+            raise RuntimeError("unavailable")
+
+        with fake_backend(db, FakeIdentityToolkit([])):
+            _get_cached_category_summary.clear()
+            monkeypatch.setattr(FirebaseService, '_fetch_all_active_products', failing_fetch)
+            assert FirebaseService().get_category_summary() == {}
+            monkeypatch.setattr(FirebaseService, '_fetch_all_active_products', fetch)
+            assert FirebaseService().get_categories() == ['Audio']
@@ -0,0 +1,231 @@
+"""
+Unit tests for checkout validation and stock-checked order creation.
+"""
+import threading
+
+import pytest
+
+from loadtest.fake_firestore import FakeFirestore
+from loadtest.harness import FakeIdentityToolkit, fake_backend
+from services.checkout import new_order_id, reconcile_cart
+from utils.error_handler import InsufficientStockError, ProductNotFoundError, ValidationError
+
+
+def line(product_id, quantity, price):
+    return {'product_id': product_id, 'name': product_id.upper(), 'price': price, 'quantity': quantity}
+
+
+@pytest.fixture
+def db():
+    fake = FakeFirestore()
+    fake.seed('products', {
+        'p1': {'name': 'P1', 'price': 10.0, 'stock': 5, 'active': True},
+        'p2': {'name': 'P2', 'price': 20.0, 'stock': 1, 'active': True},
+        'p3': {'name': 'P3', 'price': 30.0, 'active': True},
+    })
+    fake.seed('users', {'u1': {'cart_items': {}, 'orders': []}, 'u2': {'cart_items': {}, 'orders': []}})
+    return fake
+
+
+class TestReconcileCart:
+    """Test the single pass over cart lines."""
+
+    def test_prices_are_refreshed_and_reported(self):
+        """Test that lines take the current price and the change is listed."""
+        result = reconcile_cart([line('p1', 2, 9.0)], {'p1': {'name': 'P1', 'price': 10.0, 'stock': 5}})
+        assert result['items'][0]['price'] == 10.0
+        assert result['price_changes'] == [{'product_id': 'p1', 'name': 'P1', 'old_price': 9.0, 'new_price': 10.0}]
+        assert result['errors'] == []
+        assert result['stock_updates'] == {'p1': 2}
+
+    def test_one_error_per_failing_line(self):
+        """Test that every short or missing line gets its own error."""
+        products = {
+            'p1': {'price': 10.0, 'stock': 1},
+            'p2': {'price': 20.0, 'stock': 0},
+            'p3': {'price': 30.0, 'active': False},
+            'p4': {'price': 40.0, 'stock': 9},
+        }
+        items = [line('p1', 2, 10.0), line('p2', 1, 20.0), line('p3', 1, 30.0), line('p4', 1, 40.0),
+                 line('p5', 1, 50.0)]
+        errors = reconcile_cart(items, products)['errors']
+
+        assert [type(error) for error in errors] == [
+            InsufficientStockError, InsufficientStockError, ProductNotFoundError, ProductNotFoundError,
+        ]
+        assert errors[0].details == {'product_id': 'p1', 'requested': 2, 'available': 1}
+        assert [error.details['product_id'] for error in errors[2:]] == ['p3', 'p5']
+
+    def test_line_without_price(self):
+        """Test that a line stored without a price takes the current one."""
+        item = {'product_id': 'p1', 'name': 'P1', 'quantity': 1}
+        result = reconcile_cart([item], {'p1': {'name': 'P1', 'price': 10.0, 'stock': 5}})
+        assert result['items'][0]['price'] == 10.0
+        change = result['price_changes'][0]
+        assert change['old_price'] is None
+
+        from components.checkout_form import price_change_message
+        assert price_change_message(change) == "The price of P1 is $10.00."
+        assert price_change_message({**change, 'old_price': 9.0}) == "The price of P1 changed from $9.00 to $10.00."
+
+    def test_untracked_stock(self):
+        """Test that products without a stock field are not limited."""
+        result = reconcile_cart([line('p3', 100, 30.0)], {'p3': {'price': 30.0}})
+        assert result['errors'] == []
+        assert result['stock_updates'] == {}
+
+
+class TestCheckout:
+    """Test validate_cart and create_order on the fake backend."""
+
+    def test_validate_cart_reads_products_in_one_batch(self, db):
+        """Test that all cart products cost one get_all."""
+        from services.firebase_service import FirebaseService
+        from services.firestore_metrics import metrics
+
+        with fake_backend(db, FakeIdentityToolkit([])):
+            metrics.reset()
+            result = FirebaseService().validate_cart([line('p1', 1, 10.0), line('p2', 2, 20.0), line('p3', 1, 30.0)])
+            row = metrics.by_method()['FirebaseService.validate_cart']
+
+        assert row['rpcs'] == 1
+        assert row['reads'] == 3
+        assert [error.details['product_id'] for error in result['errors']] == ['p2']
+
+    def test_create_order_decrements_stock(self, db):
+        """Test that the order, stock and user's order list commit together."""
+        from services.firebase_service import FirebaseService
+
+        with fake_backend(db, FakeIdentityToolkit([])):
+            firebase = FirebaseService()
+            order_id = firebase.create_order('u1', {'items': [line('p1', 2, 10.0), line('p3', 4, 30.0)]})
+            assert firebase.get_product_by_id('p1')['stock'] == 3
+
+        products = db.dump('products')
+        assert products['p1']['stock'] == 3
+        assert 'stock' not in products['p3']
+        assert db.dump('users')['u1']['orders'] == [order_id]
+        assert db.dump('orders')[order_id]['status'] == 'pending'
+
+    def test_short_stock_writes_nothing(self, db):
+        """Test that a failing line aborts the whole order."""
+        from services.firebase_service import FirebaseService
+
+        with fake_backend(db, FakeIdentityToolkit([])):
+            with pytest.raises(InsufficientStockError):
+                FirebaseService().create_order('u1', {'items': [line('p1', 1, 10.0), line('p2', 2, 20.0)]})
+
+        assert db.dump('products')['p1']['stock'] == 5
+        assert db.dump('orders') == {}
+        assert db.dump('users')['u1']['orders'] == []
+
+    def test_changed_price_is_rejected(self, db):
+        """Test that an order reviewed at an old price is not placed."""
+        from services.firebase_service import FirebaseService
+
+        with fake_backend(db, FakeIdentityToolkit([])):
+            with pytest.raises(ValidationError):
+                FirebaseService().create_order('u1', {'items': [line('p1', 1, 8.0)]})
+        assert db.dump('orders') == {}
+
+    def test_last_unit_is_sold_once(self, db):
+        """Test that concurrent orders for the last unit cannot both succeed."""
+        from services.firebase_service import FirebaseService
+
+        results = {}
+        with fake_backend(db, FakeIdentityToolkit([])):
+            firebase = FirebaseService()
+
+            def order(uid):
+                try:
+                    results[uid] = firebase.create_order(uid, {'items': [line('p2', 1, 20.0)]})
+                except InsufficientStockError as e:
+                    results[uid] = e
+
+            threads = [threading.Thread(target=order, args=(uid,)) for uid in ('u1', 'u2')]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert sorted(type(result).__name__ for result in results.values()) == ['InsufficientStockError', 'str']
+        assert db.dump('products')['p2']['stock'] == 0
+        assert len(db.dump('orders')) == 1
+
+
+class TestPlaceOrder:
+    """Test the single-commit, idempotent place_order."""
+
+    @pytest.fixture
+    def cart_db(self, db):
+        db.seed('users', {'u1': {'cart_version': 4, 'orders': ['old'], 'cart_items': {
+            'p1': {'product_id': 'p1', 'name': 'P1', 'price': 10.0, 'quantity': 2},
+            'p3': {'product_id': 'p3', 'name': 'P3', 'price': 30.0, 'quantity': 1},
+        }}})
+        return db
+
+    def test_order_stock_and_cart_in_one_commit(self, cart_db):
+        """Test that the order is written, listed on the user and its lines leave the cart."""
+        from services.firebase_service import FirebaseService
+        from services.firestore_metrics import metrics
+
+        with fake_backend(cart_db, FakeIdentityToolkit([])):
+            metrics.reset()
+            order_id = FirebaseService().place_order('u1', 'order-1', {'items': [line('p1', 2, 10.0)]})
+            latency = metrics.latency()
+
+        assert order_id == 'order-1'
+        assert latency['transaction.commit']['count'] == 1
+        assert latency['client.get_all']['count'] == 1
+        user = cart_db.dump('users')['u1']
+        assert user['orders'] == ['old', 'order-1']
+        assert list(user['cart_items']) == ['p3']  # only the ordered lines are removed
+        assert user['cart_version'] == 5
+        assert cart_db.dump('products')['p1']['stock'] == 3
+        assert cart_db.dump('orders')['order-1']['user_id'] == 'u1'
+
+    def test_retry_does_not_order_twice(self, cart_db):
+        """Test that placing the same order ID again returns it without writing."""
+        from services.firebase_service import FirebaseService
+
+        order_id = new_order_id()
+        with fake_backend(cart_db, FakeIdentityToolkit([])):
+            firebase = FirebaseService()
+            assert firebase.place_order('u1', order_id, {'items': [line('p1', 2, 10.0)]}) == order_id
+            assert firebase.place_order('u1', order_id, {'items': [line('p1', 2, 10.0)]}) == order_id
+
+        assert cart_db.dump('products')['p1']['stock'] == 3
+        assert cart_db.dump('users')['u1']['orders'] == ['old', order_id]
+        assert len(cart_db.dump('orders')) == 1
+
+    def test_order_id_of_another_user_is_rejected(self, cart_db):
+        """Test that an order ID cannot be reused across users."""
+        from services.firebase_service import FirebaseService
+
+        with fake_backend(cart_db, FakeIdentityToolkit([])):
+            firebase = FirebaseService()
+            firebase.place_order('u1', 'order-1', {'items': [line('p3', 1, 30.0)]})
+            with pytest.raises(ValidationError):
+                firebase.place_order('u2', 'order-1', {'items': [line('p3', 1, 30.0)]})
+        assert cart_db.dump('users')['u2']['orders'] == []
+
+    def test_order_id_of_a_different_order_is_rejected(self, cart_db):
+        """Test that a retry only succeeds for the same lines and totals."""
+        from services.firebase_service import FirebaseService
+
+        with fake_backend(cart_db, FakeIdentityToolkit([])):
+            firebase = FirebaseService()
+            firebase.place_order('u1', 'order-1', {'items': [line('p1', 2, 10.0)], 'totals': {'total': 20.0}})
+            with pytest.raises(ValidationError):
+                firebase.place_order('u1', 'order-1', {'items': [line('p1', 3, 10.0)], 'totals': {'total': 30.0}})
+        assert cart_db.dump('products')['p1']['stock'] == 3
+
+    def test_order_data_is_not_modified(self, cart_db):
+        """Test that the caller's order data is copied, not filled in."""
+        from services.firebase_service import FirebaseService
+
+        order_data = {'items': [line('p1', 1, 10.0)]}
+        with fake_backend(cart_db, FakeIdentityToolkit([])):
+            FirebaseService().place_order('u1', 'order-1', order_data)
+        assert order_data == {'items': [line('p1', 1, 10.0)]}
+        assert cart_db.dump('orders')['order-1']['status'] == 'pending'
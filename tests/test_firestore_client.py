@@ -0,0 +1,79 @@
+"""
+Unit tests for the process-wide Firestore client holder.
+"""
+import threading
+from unittest import mock
+
+from loadtest.fake_firestore import FakeFirestore
+from services.firestore_client import FirestoreClientHolder
+from services.firestore_metrics import InstrumentedClient
+
+
+class FailingDocument:
+    """Document whose reads always fail."""
+
+    def get(self, **kwargs):
+        raise ConnectionError("unavailable")
+
+
+class FailingClient:
+    """Client whose every read fails."""
+
+    def collection(self, name):
+        return mock.Mock(document=lambda doc_id: FailingDocument())
+
+
+class TestFirestoreClientHolder:
+    """Test client reuse, health checks and warm-up."""
+
+    def test_client_created_once_across_threads(self):
+        """Test that concurrent first accesses share one instrumented client."""
+        created = []
+        barrier = threading.Barrier(8)
+
+        def factory(app):
+            created.append(app)
+            return FakeFirestore()
+
+        holder = FirestoreClientHolder(app='app', client_factory=factory)
+        clients = []
+
+        def access():
+            barrier.wait()
+            clients.append(holder.client)
+
+        threads = [threading.Thread(target=access) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert created == ['app']
+        assert len({id(client) for client in clients}) == 1
+        assert isinstance(clients[0], InstrumentedClient)
+
+    def test_health_check_ok(self):
+        """Test that a successful check records its latency."""
+        holder = FirestoreClientHolder(client_factory=lambda app: FakeFirestore())
+        health = holder.health_check()
+        assert health['ok'] and health['error'] is None
+        assert health['latency_ms'] >= 0
+        assert holder.last_health is health
+
+    def test_failed_health_check_replaces_client(self):
+        """Test that a failed check drops the client so the next access reconnects."""
+        clients = iter([FailingClient(), FakeFirestore()])
+        holder = FirestoreClientHolder(client_factory=lambda app: next(clients))
+
+        assert not holder.health_check()['ok']
+        assert holder.health_check()['ok']
+        assert holder.clients_created == 2
+
+    def test_warm_up_async_runs_once(self):
+        """Test that background warm-up is started once and leaves a healthy client."""
+        holder = FirestoreClientHolder(client_factory=lambda app: FakeFirestore())
+        thread = holder.warm_up_async()
+        assert holder.warm_up_async() is thread
+        thread.join(timeout=5)
+        assert holder.last_health['ok']
+        assert holder.clients_created == 1
@@ -0,0 +1,211 @@
+"""
+Unit tests for Firestore RPC accounting, driven by a fake Firestore client.
+"""
+import pytest
+from services import firestore_metrics
+from services.firestore_metrics import FirestoreMetrics, instrument, track_methods, track_rerun
+
+
+class FakeDoc:
+    """Minimal DocumentSnapshot."""
+
+    def __init__(self, doc_id, exists=True):
+        self.id = doc_id
+        self.exists = exists
+
+
+class FakeDocumentRef:
+    """DocumentReference recording writes."""
+
+    def __init__(self, doc_id):
+        self.id = doc_id
+        self.writes = []
+
+    def get(self, transaction=None):
+        assert not isinstance(transaction, firestore_metrics._Proxy)
+        return FakeDoc(self.id)
+
+    def set(self, data, merge=False):
+        self.writes.append(('set', data))
+
+    def update(self, data):
+        self.writes.append(('update', data))
+
+    def delete(self):
+        self.writes.append(('delete', None))
+
+
+class FakeQuery:
+    """Query returning a fixed number of documents."""
+
+    def __init__(self, size):
+        self.size = size
+
+    def where(self, *args, **kwargs):
+        return self
+
+    def limit(self, count):
+        return FakeQuery(min(self.size, count))
+
+    def stream(self, transaction=None):
+        return iter(FakeDoc(str(i)) for i in range(self.size))
+
+
+class FakeCollection(FakeQuery):
+    """Collection handing out document references."""
+
+    def document(self, doc_id=None):
+        return FakeDocumentRef(doc_id)
+
+
+class FakeTransaction:
+    """Transaction that rejects proxies like the real isinstance checks do."""
+
+    def __init__(self):
+        self.writes = []
+        self._id = b'tx'
+
+    def get(self, ref_or_query):
+        assert not isinstance(ref_or_query, firestore_metrics._Proxy)
+        if isinstance(ref_or_query, FakeDocumentRef):
+            return iter([ref_or_query.get()])
+        return ref_or_query.stream()
+
+    def set(self, ref, data):
+        assert isinstance(ref, FakeDocumentRef)
+        self.writes.append(ref.id)
+
+    def _commit(self):
+        return []
+
+
+class FakeClient:
+    """Client with one collection of five documents."""
+
+    def collection(self, name):
+        return FakeCollection(5)
+
+    def get_all(self, refs, field_paths=None, transaction=None):
+        assert all(isinstance(ref, FakeDocumentRef) for ref in refs)
+        return iter(ref.get() for ref in refs)
+
+    def transaction(self):
+        return FakeTransaction()
+
+
+@pytest.fixture
+def target():
+    return FirestoreMetrics(max_samples=100)
+
+
+@pytest.fixture
+def db(target):
+    return instrument(FakeClient(), target)
+
+
+class TestCounting:
+    """Test read/write/delete accounting."""
+
+    def test_document_operations(self, db, target):
+        """Test single-document get/set/update/delete."""
+        ref = db.collection('users').document('u1')
+        ref.get()
+        ref.set({'a': 1})
+        ref.update({'a': 2})
+        ref.delete()
+
+        counts = target.by_method()['unattributed']
+        assert counts == {'reads': 1, 'writes': 2, 'deletes': 1, 'rpcs': 4}
+        assert set(target.latency()) == {'document.get', 'document.set', 'document.update', 'document.delete'}
+
+    def test_query_reads_per_document(self, db, target):
+        """Test that queries bill one read per document, and one when empty."""
+        assert len(list(db.collection('products').where('active', '==', True).stream())) == 5
+        assert db.collection('products').limit(0).get() == []
+
+        counts = target.by_page()['none']
+        assert counts['reads'] == 6
+        assert counts['rpcs'] == 2
+
+    def test_get_all_unwraps_references(self, db, target):
+        """Test that get_all receives raw references and counts each document."""
+        refs = [db.collection('orders').document(str(i)) for i in range(3)]
+        assert [doc.id for doc in db.get_all(refs)] == ['0', '1', '2']
+        assert target.by_method()['unattributed']['reads'] == 3
+
+    def test_transaction_unwraps_and_counts(self, db, target):
+        """Test that transactional reads and staged writes are counted."""
+        transaction = db.transaction()
+        ref = db.collection('products').document('p1')
+        query = db.collection('products').where('category', '==', 'Books')
+
+        assert [doc.id for doc in transaction.get(ref)] == ['p1']
+        assert len(list(transaction.get(query))) == 5
+        ref.get(transaction=transaction)
+        transaction.set(ref, {'name': 'x'})
+        transaction._commit()
+        assert transaction._id == b'tx'
+
+        counts = target.by_method()['unattributed']
+        assert counts == {'reads': 7, 'writes': 1, 'deletes': 0, 'rpcs': 4}
+        assert 'transaction.commit' in target.latency()
+
+
+class TestAttribution:
+    """Test method, page and rerun attribution."""
+
+    def test_outermost_method_wins(self, db, target):
+        """Test that nested tracked calls keep the outer label."""
+        @track_methods
+        class Service:
+            def outer(self):
+                db.collection('users').document('u1').get()
+                return self.inner()
+
+            def inner(self):
+                return db.collection('users').document('u2').get()
+
+            @staticmethod
+            def standalone():
+                return db.collection('users').document('u3').get()
+
+        Service().outer()
+        Service().inner()
+        Service.standalone()
+        methods = target.by_method()
+        assert methods['Service.outer']['reads'] == 2
+        assert methods['Service.inner']['reads'] == 1
+        assert methods['Service.standalone']['reads'] == 1
+
+    def test_rerun_counts_and_budget(self, db, target, monkeypatch):
+        """Test that reruns are attributed to their page and the budget warns."""
+        warnings = []
+        monkeypatch.setattr(firestore_metrics, '_warn_over_budget',
+                            lambda page, reads, budget: warnings.append((page, reads, budget)))
+
+        with track_rerun('products', budget=10) as rerun:
+            list(db.collection('products').stream())
+        assert rerun['reads'] == 5
+        assert warnings == []
+
+        with track_rerun('products', budget=4):
+            list(db.collection('products').stream())
+        assert warnings == [('products', 5, 4)]
+        assert target.by_page()['products']['reads'] == 10
+
+
+class TestLatency:
+    """Test latency histograms."""
+
+    def test_buckets_and_percentiles(self, target):
+        """Test bucket placement and percentile summary."""
+        for latency in (1, 7, 30, 3000):
+            target.record('document.get', reads=1, latency_ms=latency)
+        stats = target.latency()['document.get']
+        assert stats['count'] == 4
+        assert stats['buckets']['<=5'] == 1
+        assert stats['buckets']['<=10'] == 1
+        assert stats['buckets']['<=50'] == 1
+        assert stats['buckets']['+inf'] == 1
+        assert stats['p50'] == 7
+        assert stats['max'] == 3000
@@ -0,0 +1,165 @@
+"""
+Tests for the pooled, retrying HTTP session, run against a local stub server.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from services.auth_service import AuthService
+from services.http_client import JitteredRetry, build_session
+
+
+class QuietHTTPServer(ThreadingHTTPServer):
+    """Server that ignores clients hanging up mid-response (read timeouts)."""
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+class StubServer:
+    """Local HTTP/1.1 server answering with a scripted list of (status, body, headers)."""
+
+    def __init__(self):
+        self.script = []
+        self.requests = []
+        self.client_ports = set()
+        self.delay = 0.0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                stub.requests.append((self.path, json.loads(self.rfile.read(length) or b'{}')))
+                stub.client_ports.add(self.client_address[1])
+                if stub.delay:
+                    time.sleep(stub.delay)
+                status, body, headers = stub.script.pop(0) if stub.script else (200, {}, {})
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = QuietHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.05},
+                                       daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = StubServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def session():
+    return build_session(pool_size=2, retries=2, backoff_factor=0.01)
+
+
+class TestRetries:
+    """Test which failures are retried."""
+
+    def test_retries_server_errors(self, stub, session):
+        """Test that a 503 followed by a 200 returns the 200."""
+        stub.script = [(503, {}, {}), (200, {'ok': True}, {})]
+        response = session.post(f"{stub.url}/accounts:lookup", json={'idToken': 't'}, timeout=(1, 2))
+        assert response.status_code == 200
+        assert len(stub.requests) == 2
+
+    def test_retries_rate_limit_with_retry_after(self, stub, session):
+        """Test that a 429 honours Retry-After and is retried."""
+        stub.script = [(429, {}, {'Retry-After': '0'}), (200, {}, {})]
+        assert session.post(f"{stub.url}/x", json={}, timeout=(1, 2)).status_code == 200
+        assert len(stub.requests) == 2
+
+    def test_returns_last_response_when_retries_run_out(self, stub, session):
+        """Test that exhausted retries hand back the last error response."""
+        stub.script = [(500, {}, {})] * 3
+        response = session.post(f"{stub.url}/x", json={}, timeout=(1, 2))
+        assert response.status_code == 500
+        assert len(stub.requests) == 3
+
+    def test_client_errors_are_not_retried(self, stub, session):
+        """Test that a 400 is returned immediately."""
+        stub.script = [(400, {'error': {'message': 'INVALID_PASSWORD'}}, {})]
+        assert session.post(f"{stub.url}/x", json={}, timeout=(1, 2)).status_code == 400
+        assert len(stub.requests) == 1
+
+    def test_non_idempotent_prefix_skips_server_error_retries(self, stub):
+        """Test that account creation is not retried on a 5xx but is on a 429."""
+        session = build_session(retries=2, backoff_factor=0.01,
+                                non_idempotent_prefixes=[f"{stub.url}/accounts:signUp"])
+        stub.script = [(503, {}, {})]
+        assert session.post(f"{stub.url}/accounts:signUp", json={}, timeout=(1, 2)).status_code == 503
+        assert len(stub.requests) == 1
+
+        stub.script = [(429, {}, {'Retry-After': '0'}), (200, {}, {})]
+        assert session.post(f"{stub.url}/accounts:signUp", json={}, timeout=(1, 2)).status_code == 200
+        assert len(stub.requests) == 3
+
+    def test_read_timeout_is_not_retried(self, stub, session):
+        """Test that a slow response fails after one read timeout."""
+        stub.delay = 0.5
+        start = time.perf_counter()
+        with pytest.raises(requests.exceptions.RequestException):
+            session.post(f"{stub.url}/x", json={}, timeout=(1, 0.1))
+        assert len(stub.requests) == 1
+        assert time.perf_counter() - start < 0.5
+
+    def test_backoff_is_jittered(self):
+        """Test that backoff is drawn between zero and the exponential value."""
+        retry = JitteredRetry(total=5, backoff_factor=1.0).increment().increment().increment()
+        samples = {retry.get_backoff_time() for _ in range(20)}
+        assert all(0 <= sample <= 4.0 for sample in samples)
+        assert len(samples) > 1
+
+
+class TestConnectionReuse:
+    """Test HTTP keep-alive."""
+
+    def test_sequential_requests_share_a_connection(self, stub, session):
+        """Test that consecutive requests reuse one pooled connection."""
+        for _ in range(5):
+            session.post(f"{stub.url}/x", json={}, timeout=(1, 2))
+        assert len(stub.client_ports) == 1
+
+
+class TestAuthServiceOverStub:
+    """Test AuthService REST calls through the shared session."""
+
+    def test_verify_token(self, stub, session, monkeypatch):
+        """Test that verify_token without a project ID posts to accounts:lookup and parses the user."""
+        import services.auth_service as auth_service
+
+        def no_verifier():
+            raise ValueError("no project")
+
+        monkeypatch.setattr(auth_service, '_get_token_verifier', no_verifier)
+        monkeypatch.setattr(AuthService, 'FIREBASE_AUTH_BASE_URL', f"{stub.url}/v1/accounts")
+        monkeypatch.setattr(auth_service, 'get_firebase_api_key', lambda: 'key')
+        monkeypatch.setattr(auth_service, '_get_http_session', lambda: session)
+        stub.script = [(502, {}, {}),
+                       (200, {'users': [{'localId': 'u1', 'email': 'ana@example.com'}]}, {})]
+
+        user = AuthService.verify_token('token')
+        assert user == {'uid': 'u1', 'email': 'ana@example.com', 'display_name': 'ana'}
+        assert stub.requests[-1] == ('/v1/accounts:lookup?key=key', {'idToken': 'token'})
@@ -0,0 +1,158 @@
+"""
+Unit tests for the in-memory Firestore fake and the shopper load test.
+"""
+from datetime import datetime
+
+import pytest
+from firebase_admin import firestore
+from google.api_core import exceptions
+from google.cloud.firestore_v1.field_path import FieldPath
+
+from loadtest.fake_firestore import FakeFirestore
+from loadtest.harness import FakeIdentityToolkit, LoadTest, check_budgets, fake_backend
+
+
+@pytest.fixture
+def db():
+    fake = FakeFirestore()
+    fake.seed('products', {
+        f"p{i}": {'name': f"P{i}", 'price': float(10 - i), 'category': 'A' if i % 2 else 'B', 'active': i != 3}
+        for i in range(6)
+    })
+    return fake
+
+
+class TestQueries:
+    """Test filters, ordering and cursors."""
+
+    def test_filter_order_and_limit(self, db):
+        """Test where + order_by + limit."""
+        query = db.collection('products').where('active', '==', True).order_by('price').limit(3)
+        assert [doc.id for doc in query.stream()] == ['p5', 'p4', 'p2']
+
+    def test_start_after_with_name_tiebreak(self, db):
+        """Test cursor pagination the way get_products_page builds it."""
+        base = (db.collection('products').where('category', '==', 'A')
+                .order_by('price', direction=firestore.Query.DESCENDING)
+                .order_by('__name__', direction=firestore.Query.DESCENDING))
+        first = base.limit(2).get()
+        assert [doc.id for doc in first] == ['p1', 'p3']
+        cursor = {'price': first[-1].to_dict()['price'], '__name__': first[-1].id}
+        assert [doc.id for doc in base.start_after(cursor).get()] == ['p5']
+
+    def test_snapshots_are_copies(self, db):
+        """Test that mutating a read result does not change the store."""
+        doc = db.collection('products').document('p0').get()
+        data = doc.to_dict()
+        data['price'] = 0
+        assert db.collection('products').document('p0').get().to_dict()['price'] == 10.0
+
+
+class TestWrites:
+    """Test field transforms and update semantics."""
+
+    def test_merge_set_with_nested_increment(self, db):
+        """Test add_to_cart-style writes."""
+        ref = db.collection('users').document('u1')
+        for _ in range(2):
+            ref.set({'cart_items': {'p1': {'quantity': firestore.Increment(2)}},
+                     'cart_version': firestore.Increment(1)}, merge=True)
+        assert ref.get().to_dict() == {'cart_items': {'p1': {'quantity': 4}}, 'cart_version': 2}
+
+    def test_update_field_paths_and_delete(self, db):
+        """Test dotted/quoted field paths and DELETE_FIELD."""
+        ref = db.collection('users').document('u1')
+        ref.set({'cart_items': {'a-b': {'quantity': 1}, 'c': {'quantity': 1}}, 'orders': ['o1']})
+        ref.update({
+            FieldPath('cart_items', 'a-b', 'quantity').to_api_repr(): 5,
+            FieldPath('cart_items', 'c').to_api_repr(): firestore.DELETE_FIELD,
+            'orders': firestore.ArrayUnion(['o1', 'o2']),
+        })
+        assert ref.get().to_dict() == {'cart_items': {'a-b': {'quantity': 5}}, 'orders': ['o1', 'o2']}
+
+    def test_update_missing_document(self, db):
+        """Test that update() requires an existing document."""
+        with pytest.raises(exceptions.NotFound):
+            db.collection('users').document('missing').update({'a': 1})
+
+
+class TestTransactions:
+    """Test firestore.transactional against the fake."""
+
+    def test_conflicting_write_retries(self, db):
+        """Test that a read invalidated before commit aborts and is retried."""
+        ref = db.collection('counters').document('c')
+        ref.set({'value': 0})
+        attempts = []
+
+        @firestore.transactional
+        def bump(transaction):
+            value = ref.get(transaction=transaction).to_dict()['value']
+            attempts.append(value)
+            if len(attempts) == 1:
+                ref.set({'value': 100})  # concurrent writer
+            transaction.update(ref, {'value': value + 1})
+
+        bump(db.transaction())
+        assert attempts == [0, 100]
+        assert ref.get().to_dict()['value'] == 101
+
+
+class TestServicesOnFake:
+    """Test the real services against the fake backend."""
+
+    def test_products_page_and_cart(self, db):
+        """Test pagination, add_to_cart increments and orders."""
+        from services.firebase_service import FirebaseService
+
+        identity = FakeIdentityToolkit([])
+        with fake_backend(db, identity):
+            firebase = FirebaseService()
+            page = firebase.get_products_page(page_size=2, sort='price_asc')
+            assert [p['id'] for p in page['products']] == ['p5', 'p4']
+            following = firebase.get_products_page(cursor=page['next_cursor'], page_size=2, sort='price_asc')
+            assert [p['id'] for p in following['products']] == ['p2', 'p1']
+
+            db.seed('users', {'u1': {'cart_items': {}, 'orders': []}})
+            product = firebase.get_product_by_id('p1')
+            assert firebase.add_to_cart('u1', 'p1', 2, product=product)
+            assert firebase.add_to_cart('u1', 'p1', 1, product=product)
+            assert firebase.get_user_cart('u1')[0]['quantity'] == 3
+
+            order_id = firebase.create_order('u1', {'items': firebase.get_user_cart('u1')})
+            assert [o['id'] for o in firebase.get_user_orders_page('u1')['orders']] == [order_id]
+
+    def test_add_to_cart_keeps_added_at(self, db):
+        """Test that adding to an existing line keeps the time it was first added."""
+        from services.firebase_service import FirebaseService
+
+        added_at = datetime(2024, 1, 1)
+        db.seed('users', {'u1': {'cart_items': {'p1': {'product_id': 'p1', 'quantity': 1, 'added_at': added_at}}}})
+        with fake_backend(db, FakeIdentityToolkit([])):
+            firebase = FirebaseService()
+            assert firebase.add_to_cart('u1', 'p1', 2)
+            assert firebase.add_to_cart('u1', 'p2', 1)
+
+        cart = db.dump('users')['u1']['cart_items']
+        assert cart['p1']['quantity'] == 3
+        assert cart['p1']['added_at'] == added_at
+        assert cart['p2']['added_at'] > added_at
+
+
+class TestLoadTest:
+    """Test a small end-to-end run."""
+
+    def test_small_run_within_budgets(self):
+        """Test that every journey completes within the read budgets."""
+        report = LoadTest(shoppers=20, concurrency=5, catalog_size=200, latency=0).run()
+        assert report['steps']['orders']['count'] == 20
+        # Order and user (order list + cart) writes per shopper, plus a stock decrement per ordered product (39)
+        assert report['steps']['checkout']['writes']['total'] == 79
+        assert check_budgets(report) == []
+
+    def test_budget_violation_is_reported(self):
+        """Test that exceeding a budget is flagged."""
+        report = {'steps': {'search': {'count': 10, 'errors': 0, 'reads': {'p95': 500}}}}
+        assert check_budgets(report, {'search': 1}) == [
+            "search: p95 of 500 reads/op exceeds budget of 1"
+        ]
@@ -0,0 +1,33 @@
+"""
+Unit tests for page token encoding.
+"""
+from datetime import datetime, timezone
+from services.pagination import encode_page_token, decode_page_token
+
+
+class TestPageTokens:
+    """Test page token round trips."""
+
+    def test_round_trip(self):
+        """Test that cursor data survives encoding."""
+        data = {'sort': 'price_asc', 'category': 'Audio', 'value': 59.99, 'id': 'abc123'}
+        token = encode_page_token(data)
+        assert decode_page_token(token) == data
+
+    def test_token_is_url_safe(self):
+        """Test that tokens can be used in URLs and widget keys."""
+        token = encode_page_token({'value': 'ñ/+?', 'id': 'x' * 40})
+        assert all(ch.isalnum() or ch in '-_' for ch in token)
+
+    def test_datetime_values(self):
+        """Test that datetime ordering values are restored as datetimes."""
+        created = datetime(2024, 1, 1, 12, 30, tzinfo=timezone.utc)
+        decoded = decode_page_token(encode_page_token({'value': created, 'id': 'p1'}))
+        assert decoded['value'] == created
+
+    def test_missing_or_invalid_token(self):
+        """Test that bad tokens decode to None instead of raising."""
+        assert decode_page_token(None) is None
+        assert decode_page_token('') is None
+        assert decode_page_token('not a token!') is None
+        assert decode_page_token(encode_page_token({'a': 1})[:-3] + '@@@') is None
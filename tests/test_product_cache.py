@@ -0,0 +1,156 @@
+"""
+Unit tests for the shared product cache.
+"""
+import pytest
+from services.product_cache import ProductCache, estimate_size
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_product(product_id, category='Electronics', price=10.0, **fields):
+    return {'id': product_id, 'name': f'Product {product_id}', 'category': category,
+            'price': price, 'active': True, **fields}
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def cache(clock):
+    cache = ProductCache(listing_ttl=600, clock=clock)
+    cache.put_listing(('products', None, 10), [make_product('a'), make_product('b', 'Books')])
+    cache.put_listing(('products', 'Electronics', 10), [make_product('a')], category='Electronics')
+    cache.put_listing(('products', 'Books', 10), [make_product('b', 'Books')], category='Books')
+    return cache
+
+
+class TestEntities:
+    """Test the product-by-ID layer."""
+
+    def test_listing_products_are_shared_entities(self, cache):
+        """Test that products stored by listings are served by ID."""
+        assert len(cache) == 2
+        assert cache.get('a')['name'] == 'Product a'
+        assert cache.get('missing') is None
+
+    def test_returns_copies(self, cache):
+        """Test that callers cannot mutate the shared entity."""
+        cache.get('a')['price'] = 0
+        assert cache.get('a')['price'] == 10.0
+
+    def test_listing_holds_ids_only(self, cache):
+        """Test that an entity update is visible through every listing."""
+        cache.put(make_product('a', name='Renamed'))
+        products, _ = cache.get_listing(('products', None, 10))
+        assert products[0]['name'] == 'Renamed'
+        products, _ = cache.get_listing(('products', 'Electronics', 10))
+        assert products[0]['name'] == 'Renamed'
+
+    def test_product_expires(self, cache, clock):
+        """Test that a product read only by ID is a miss after its TTL."""
+        clock.now = 599
+        assert cache.get('a') is not None
+        clock.now = 600
+        assert cache.get('a') is None
+        assert 'a' not in cache
+        assert len(cache) == 1
+
+    def test_product_ttl_is_capped_at_listing_ttl(self, clock):
+        """Test that products never outlive listings and drop the listings that need them."""
+        assert ProductCache(listing_ttl=600, product_ttl=3600, clock=clock).product_ttl == 600
+
+        cache = ProductCache(listing_ttl=600, product_ttl=60, clock=clock)
+        cache.put_listing('key', [make_product('a')])
+        clock.now = 60
+        assert cache.get_listing('key') is None
+
+
+class TestListings:
+    """Test listing storage and expiry."""
+
+    def test_meta_round_trip(self, cache):
+        """Test that listing metadata such as the next page token is returned."""
+        cache.put_listing(('page', None), [make_product('c')], meta={'next_cursor': 'tok'})
+        products, meta = cache.get_listing(('page', None))
+        assert [p['id'] for p in products] == ['c']
+        assert meta == {'next_cursor': 'tok'}
+
+    def test_listing_expires(self, cache, clock):
+        """Test that listings are re-queried after their TTL."""
+        clock.now = 300
+        cache.put(make_product('a'))
+        clock.now = 601
+        assert cache.get_listing(('products', None, 10)) is None
+        assert cache.get('a') is not None  # refreshed at 300, expires at 900
+
+
+class TestInvalidation:
+    """Test precise invalidation on product writes."""
+
+    def test_non_listing_field_update_keeps_listings(self, cache):
+        """Test that changing e.g. the description only replaces the entity."""
+        before = make_product('a')
+        cache.apply_change('a', before, {**before, 'description': 'New'})
+        assert cache.stats()['listings'] == 3
+        assert cache.get('a')['description'] == 'New'
+
+    def test_price_change_drops_affected_listings(self, cache):
+        """Test that a sort-field change drops its category and unfiltered listings only."""
+        before = make_product('a')
+        cache.apply_change('a', before, {**before, 'price': 99.0})
+        assert cache.get_listing(('products', 'Electronics', 10)) is None
+        assert cache.get_listing(('products', None, 10)) is None
+        assert cache.get_listing(('products', 'Books', 10)) is not None
+
+    def test_create_drops_category_listings(self, cache):
+        """Test that a new product invalidates listings it could appear in."""
+        cache.apply_change('c', None, make_product('c', 'Books'))
+        assert cache.get_listing(('products', 'Books', 10)) is None
+        assert cache.get_listing(('products', 'Electronics', 10)) is not None
+        assert cache.get('c') is not None
+
+    def test_delete_drops_containing_listings(self, cache):
+        """Test that deleting a product drops it and the listings holding it."""
+        cache.apply_change('b', make_product('b', 'Books'), None)
+        assert cache.get('b') is None
+        assert cache.get_listing(('products', 'Books', 10)) is None
+        assert cache.get_listing(('products', 'Electronics', 10)) is not None
+
+
+class TestEviction:
+    """Test the memory bound."""
+
+    def test_lru_eviction_respects_bound(self, clock):
+        """Test that least recently used products are evicted first."""
+        product_size = estimate_size(make_product('p0'))
+        cache = ProductCache(max_bytes=product_size * 3 + 100, clock=clock)
+        for i in range(3):
+            cache.put(make_product(f'p{i}'))
+        cache.get('p0')  # p1 is now least recently used
+        cache.put(make_product('p3'))
+
+        assert 'p1' not in cache
+        assert 'p0' in cache and 'p3' in cache
+        assert cache.size <= cache.max_bytes
+        assert cache.stats()['evictions'] == 1
+
+    def test_evicting_product_drops_its_listings(self, clock):
+        """Test that a listing never outlives a product it references."""
+        product_size = estimate_size(make_product('p0'))
+        cache = ProductCache(max_bytes=product_size * 2 + 500, clock=clock)
+        cache.put_listing('first', [make_product('p0')])
+        cache.put(make_product('p1'))
+        cache.put(make_product('p2'))
+
+        assert 'p0' not in cache
+        assert cache.get_listing('first') is None
@@ -0,0 +1,38 @@
+"""
+Unit tests for the batched product grid markup.
+"""
+from components.product_grid import build_grid_html
+
+
+class TestBuildGridHtml:
+    """Test the static grid markup."""
+
+    def test_one_card_per_product(self, mock_product):
+        """Test that the whole grid is one string with a card per product."""
+        products = [mock_product, {**mock_product, 'id': 'prod_456'}]
+        markup = build_grid_html(products)
+        assert markup.count('class="product-card"') == 2
+        assert 'data-id="prod_456"' in markup
+        assert 'https://example.com/image1.jpg' in markup
+
+    def test_values_are_escaped(self, mock_product):
+        """Test that product fields cannot inject markup."""
+        product = {**mock_product, 'name': '<script>alert(1)</script>', 'id': 'a"b'}
+        markup = build_grid_html([product])
+        assert '<script>' not in markup
+        assert 'data-id="a&quot;b"' in markup
+
+    def test_buttons_follow_stock_and_session(self, mock_product):
+        """Test add, sold-out and sign-in buttons."""
+        assert 'data-action="add"' in build_grid_html([mock_product])
+        assert 'data-action="login"' in build_grid_html([mock_product], signed_in=False)
+
+        sold_out = build_grid_html([{**mock_product, 'stock': 0}])
+        assert 'data-action="add"' not in sold_out
+        assert 'disabled' in sold_out
+
+    def test_labels_and_details_button(self, mock_product):
+        """Test label overrides and hiding the details button."""
+        markup = build_grid_html([mock_product], labels={'add': 'Add to Cart'}, show_details=False)
+        assert 'Add to Cart' in markup
+        assert 'data-action="view"' not in markup
@@ -0,0 +1,143 @@
+"""
+Unit tests for the user profile cache and its use by sign-in, cart and orders.
+"""
+import threading
+
+from loadtest.fake_firestore import FakeFirestore
+from loadtest.harness import FakeIdentityToolkit, fake_backend
+from services.profile_cache import ProfileCache
+
+
+class Clock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestProfileCache:
+    """Test TTL, bounds and version-stamped invalidation."""
+
+    def test_load_once_within_ttl(self):
+        """Test that the loader runs once until the TTL passes."""
+        clock = Clock()
+        cache = ProfileCache(ttl=30, clock=clock)
+        loads = []
+
+        def loader():
+            loads.append(1)
+            return {'display_name': 'Ana'}
+
+        assert cache.load('u1', loader) == {'display_name': 'Ana'}
+        clock.now = 29
+        cache.load('u1', loader)
+        assert len(loads) == 1
+        clock.now = 30
+        cache.load('u1', loader)
+        assert len(loads) == 2
+
+    def test_returns_copies(self):
+        """Test that callers cannot mutate the cached profile."""
+        cache = ProfileCache()
+        cache.load('u1', lambda: {'cart_items': [{'product_id': 'p1'}]})
+        cache.get('u1')['cart_items'].clear()
+        assert cache.get('u1')['cart_items'] == [{'product_id': 'p1'}]
+
+    def test_invalidate_drops_entry(self):
+        """Test that a write invalidation forces the next load."""
+        cache = ProfileCache()
+        cache.load('u1', lambda: {'cart_version': 1})
+        cache.invalidate('u1')
+        assert cache.get('u1') is None
+        assert cache.load('u1', lambda: {'cart_version': 2}) == {'cart_version': 2}
+
+    def test_load_racing_a_write_is_not_stored(self):
+        """Test that a read started before an invalidation does not repopulate the cache."""
+        cache = ProfileCache()
+        reading, written = threading.Event(), threading.Event()
+
+        def slow_loader():
+            reading.set()
+            written.wait(5)
+            return {'cart_version': 1}  # pre-write state
+
+        thread = threading.Thread(target=cache.load, args=('u1', slow_loader))
+        thread.start()
+        reading.wait(5)
+        cache.invalidate('u1')
+        written.set()
+        thread.join(5)
+        assert cache.get('u1') is None
+
+    def test_clear_discards_loads_in_flight(self):
+        """Test that clear() also rejects loads stamped before it."""
+        cache = ProfileCache()
+        version = cache.version('u1')
+        cache.clear()
+        assert cache.put('u1', {'cart_version': 1}, version) is False
+
+    def test_missing_users_are_not_cached(self):
+        """Test that a None load is retried next time."""
+        cache = ProfileCache()
+        assert cache.load('u1', lambda: None) is None
+        assert len(cache) == 0
+
+    def test_bounded(self):
+        """Test LRU eviction beyond max_entries."""
+        cache = ProfileCache(max_entries=2)
+        for uid in ('u1', 'u2', 'u3'):
+            cache.load(uid, lambda: {'display_name': uid})
+        assert len(cache) == 2
+        assert cache.get('u1') is None
+
+    def test_invalidation_records_are_bounded(self):
+        """Test that invalidating many users keeps max_entries records and stays safe."""
+        cache = ProfileCache(max_entries=2)
+        stale = cache.version('u1')
+        for uid in ('u1', 'u2', 'u3', 'u4'):
+            cache.invalidate(uid)
+        assert len(cache._invalidated) == 2
+        # u1's record was dropped, but a load started before its write is still rejected
+        assert cache.put('u1', {'cart_version': 1}, stale) is False
+        assert cache.put('u1', {'cart_version': 2}, cache.version('u1')) is True
+        assert cache.put('u5', {'cart_version': 1}, stale) is False
+
+
+class TestSharedProfileRead:
+    """Test that sign-in, cart and orders share one user document read."""
+
+    def test_first_page_reads_user_document_once(self):
+        """Test sign_in + get_user_cart_state + get_user_orders cost one read."""
+        from services.auth_service import AuthService
+        from services.firebase_service import FirebaseService
+        from services.firestore_metrics import metrics
+
+        db = FakeFirestore()
+        db.seed('users', {'u1': {'display_name': 'Ana', 'email': 'ana@example.com', 'addresses': [],
+                                 'cart_items': {'p1': {'product_id': 'p1', 'quantity': 2}},
+                                 'cart_version': 7, 'orders': []}})
+        identity = FakeIdentityToolkit([('u1', 'ana@example.com', 'secret')])
+
+        with fake_backend(db, identity):
+            firebase = FirebaseService()
+            metrics.reset()
+            user = AuthService.sign_in('ana@example.com', 'secret')
+            state = firebase.get_user_cart_state('u1')
+            orders = firebase.get_user_orders('u1')
+            # The background warm-up health check is not attributed to a method
+            reads = sum(row['reads'] for method, row in metrics.by_method().items() if method != 'unattributed')
+
+            assert user['display_name'] == 'Ana'
+            assert state == {'items': [{'product_id': 'p1', 'quantity': 2}], 'version': 7}
+            assert orders == []
+            assert reads == 1
+
+            # A cart write invalidates the profile; fresh=True always reads
+            assert firebase.apply_cart_changes('u1', {'p1': None})
+            assert firebase.get_user_cart_state('u1') == {'items': [], 'version': 8}
+            db.collection('users').document('u1').update({'cart_version': 9})
+            assert firebase.get_user_cart_state('u1')['version'] == 8
+            assert firebase.get_user_cart_state('u1', fresh=True)['version'] == 9
@@ -0,0 +1,103 @@
+"""
+Unit tests for the rerun-cost profiler.
+"""
+import json
+
+import pytest
+from utils.profiler import Profiler, percentile, profile_block, record_cache, record_rpc
+
+
+@pytest.fixture
+def target():
+    return Profiler(max_samples=100)
+
+
+class TestPercentile:
+    """Test nearest-rank percentiles."""
+
+    def test_nearest_rank(self):
+        """Test p50/p95/p99 over 1..100."""
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 95) == 95
+        assert percentile(values, 99) == 99
+
+    def test_small_and_empty(self):
+        """Test edge cases."""
+        assert percentile([], 95) == 0
+        assert percentile([7], 99) == 7
+
+
+class TestProfileBlock:
+    """Test sample recording."""
+
+    def test_counters_reach_nested_blocks(self, target):
+        """Test that RPCs and cache lookups count for every active block."""
+        with profile_block('page:home', target):
+            record_rpc(2)
+            with profile_block('component:grid', target):
+                record_rpc()
+                record_cache(True)
+                record_cache(False)
+
+        page = target.samples('page:home')[0]
+        grid = target.samples('component:grid')[0]
+        assert page['rpcs'] == 3
+        assert grid['rpcs'] == 1
+        assert (page['cache_hits'], page['cache_misses']) == (1, 1)
+        assert page['wall_ms'] >= grid['wall_ms']
+
+    def test_counters_outside_blocks_are_ignored(self, target):
+        """Test that reporting without an active block is a no-op."""
+        record_rpc(5)
+        with profile_block('page:cart', target):
+            pass
+        assert target.samples('page:cart')[0]['rpcs'] == 0
+
+    def test_sample_recorded_when_block_raises(self, target):
+        """Test that st.rerun()-style exceptions still produce a sample."""
+        with pytest.raises(RuntimeError):
+            with profile_block('page:auth', target):
+                record_rpc()
+                raise RuntimeError("rerun")
+        assert target.samples('page:auth')[0]['rpcs'] == 1
+
+    def test_window_is_bounded(self):
+        """Test that old samples are dropped."""
+        target = Profiler(max_samples=3)
+        for _ in range(5):
+            with profile_block('page:home', target):
+                pass
+        assert len(target.samples('page:home')) == 3
+
+    def test_disabled_profiler_installs_nothing(self, target, monkeypatch):
+        """Test that a disabled profiler neither records nor patches Streamlit."""
+        from utils import profiler
+
+        def ensure_delta_counter():
+            raise AssertionError('delta counter installed')
+
+        monkeypatch.setattr(profiler, '_ensure_delta_counter', ensure_delta_counter)
+        target.enabled = False
+        with profile_block('page:home', target):
+            record_rpc()
+        assert target.names() == []
+
+
+class TestSummary:
+    """Test aggregation and export."""
+
+    def test_summary_and_json_export(self, target):
+        """Test percentiles, hit rate and the JSON document."""
+        for rpcs in range(1, 11):
+            target.record('page:products', {'wall_ms': rpcs * 10.0, 'rpcs': rpcs, 'cache_hits': 1,
+                                            'cache_misses': 0, 'elements': 4, 'delta_bytes': 100})
+        stats = target.summary()['page:products']
+        assert stats['count'] == 10
+        assert stats['wall_ms']['p50'] == 50.0
+        assert stats['rpcs']['p95'] == 10
+        assert stats['cache_hit_rate'] == 1.0
+
+        exported = json.loads(target.export_json(include_samples=True))
+        assert exported['summary']['page:products']['elements']['p99'] == 4
+        assert len(exported['samples']['page:products']) == 10
@@ -0,0 +1,143 @@
+"""
+Unit tests for the product search index.
+"""
+import pytest
+from services.search_index import SearchIndex, fold_text, tokenize
+
+
+@pytest.fixture
+def catalog():
+    """Small bilingual catalog."""
+    return [
+        {'id': 'p1', 'name': 'Cámara DSLR Professional', 'description': 'Sensor de 24MP y video 4K',
+         'category': 'Photography', 'rating': 4.6},
+        {'id': 'p2', 'name': 'Laptop Gaming Pro X1', 'description': 'Potente laptop con cámara HD',
+         'category': 'Electronics', 'rating': 4.8},
+        {'id': 'p3', 'name': 'Auriculares Wireless', 'description': 'Cancelación de ruido activa',
+         'category': 'Audio', 'rating': 4.9},
+        {'id': 'p4', 'name': 'Speaker Bluetooth', 'description': 'Wireless speaker resistente al agua',
+         'category': 'Audio', 'rating': 4.3},
+    ]
+
+
+class TestTokenizer:
+    """Test text normalization helpers."""
+
+    def test_fold_text_strips_accents(self):
+        """Test that diacritics and case are removed."""
+        assert fold_text("Cámara ÑANDÚ") == "camara nandu"
+
+    def test_fold_text_handles_empty(self):
+        """Test that empty values fold to an empty string."""
+        assert fold_text(None) == ""
+        assert fold_text("") == ""
+
+    def test_tokenize(self):
+        """Test that punctuation splits tokens."""
+        assert tokenize("Monitor 4K Ultra-HD 27\"") == ['monitor', '4k', 'ultra', 'hd', '27']
+
+
+class TestSearchIndex:
+    """Test SearchIndex queries and maintenance."""
+
+    def test_accent_insensitive_search(self, catalog):
+        """Test that unaccented queries match accented products."""
+        index = SearchIndex(catalog)
+        results = index.search("camara")
+        assert [p['id'] for p in results] == ['p1', 'p2']
+
+    def test_name_matches_rank_above_description(self, catalog):
+        """Test that name matches outrank description matches."""
+        index = SearchIndex(catalog)
+        results = index.search("wireless")
+        assert results[0]['id'] == 'p3'
+        assert {p['id'] for p in results} == {'p3', 'p4'}
+
+    def test_multi_term_intersection(self, catalog):
+        """Test that all query terms must match."""
+        index = SearchIndex(catalog)
+        assert [p['id'] for p in index.search("wireless agua")] == ['p4']
+        assert index.search("wireless laptop") == []
+
+    def test_prefix_match(self, catalog):
+        """Test that partial words match as prefixes."""
+        index = SearchIndex(catalog)
+        assert [p['id'] for p in index.search("lapt")] == ['p2']
+
+    def test_category_filter_and_limit(self, catalog):
+        """Test category filtering and result limits."""
+        index = SearchIndex(catalog)
+        assert [p['id'] for p in index.search("camara", category='Electronics')] == ['p2']
+        assert len(index.search("camara", limit=1)) == 1
+
+    def test_empty_query(self, catalog):
+        """Test that a query without tokens returns nothing."""
+        index = SearchIndex(catalog)
+        assert index.search("  ¿?  ") == []
+
+    def test_incremental_add_update_remove(self, catalog):
+        """Test that the index reflects product changes without a rebuild."""
+        index = SearchIndex(catalog)
+
+        index.add({'id': 'p5', 'name': 'Teclado Mecánico', 'category': 'Gaming'})
+        assert [p['id'] for p in index.search("mecanico")] == ['p5']
+
+        index.add({'id': 'p5', 'name': 'Mouse Gamer', 'category': 'Gaming'})
+        assert index.search("mecanico") == []
+        assert [p['id'] for p in index.search("mouse")] == ['p5']
+
+        index.remove('p5')
+        assert index.search("mouse") == []
+        assert 'p5' not in index
+        assert len(index) == len(catalog)
+
+
+class TestSharedIndex:
+    """Test the process-wide index built from Firestore."""
+
+    def test_failed_build_is_not_cached(self, monkeypatch):
+        """Test that a catalog read error yields an empty index once, then a retry."""
+        from loadtest.fake_firestore import FakeFirestore
+        from loadtest.harness import FakeIdentityToolkit, fake_backend
+        from services.firebase_service import FirebaseService, _get_search_index
+
+        db = FakeFirestore()
+        db.seed('products', {'p1': {'name': 'Speaker Bluetooth', 'active': True}})
+        fetch = FirebaseService._fetch_all_active_products
+
+        def failing_fetch(self):
+            raise RuntimeError("unavailable")
+
+        with fake_backend(db, FakeIdentityToolkit([])):
+            monkeypatch.setattr(FirebaseService, '_fetch_all_active_products', failing_fetch)
+            assert len(_get_search_index()) == 0
+            monkeypatch.setattr(FirebaseService, '_fetch_all_active_products', fetch)
+            assert len(_get_search_index()) == 1
+
+    def test_product_writes_do_not_build_the_index(self, monkeypatch):
+        """Test that a write updates a built index and never scans the catalog for a cold one."""
+        from loadtest.fake_firestore import FakeFirestore
+        from loadtest.harness import FakeIdentityToolkit, fake_backend
+        from services import firebase_service
+        from services.firebase_service import FirebaseService, _apply_catalog_changes, _build_search_index
+
+        db = FakeFirestore()
+        db.seed('products', {'p1': {'name': 'Speaker Bluetooth', 'active': True}})
+        scans = []
+        fetch = FirebaseService._fetch_all_active_products
+
+        def counting_fetch(self):
+            scans.append(1)
+            return fetch(self)
+
+        with fake_backend(db, FakeIdentityToolkit([])):
+            monkeypatch.setattr(FirebaseService, '_fetch_all_active_products', counting_fetch)
+            monkeypatch.setattr(firebase_service, '_built_search_index', None)
+            _build_search_index.clear()
+            _apply_catalog_changes([('p2', None, {'name': 'Lamp', 'active': True})])
+            assert scans == []
+
+            index = firebase_service._get_search_index()
+            _apply_catalog_changes([('p3', None, {'name': 'Desk Lamp', 'active': True})])
+            assert scans == [1]
+            assert [p['id'] for p in index.search('desk')] == ['p3']
@@ -0,0 +1,93 @@
+"""
+Unit tests for stylesheet minification and the hashed build.
+"""
+import json
+
+import pytest
+
+from utils import static_assets
+from utils.static_assets import build, minify_css
+
+
+FONT_CSS = (
+    "@font-face { font-family: 'Inter'; src: local('Inter'), "
+    "url('../fonts/inter-latin-var.woff2') format('woff2'); }\n"
+    ".a { font-family: 'Inter'; }\n"
+)
+
+
+@pytest.fixture
+def static_dir(tmp_path, monkeypatch):
+    """Temporary static/ tree with a stylesheet that uses a bundled font."""
+    (tmp_path / 'css').mkdir()
+    (tmp_path / 'fonts').mkdir()
+    (tmp_path / 'css' / 'app.css').write_text(FONT_CSS)
+    monkeypatch.setattr(static_assets, 'CSS_SOURCE', tmp_path / 'css' / 'app.css')
+    monkeypatch.setattr(static_assets, 'MANIFEST_PATH', tmp_path / 'css' / 'manifest.json')
+    monkeypatch.setattr(static_assets, 'FONTS_DIR', tmp_path / 'fonts')
+    static_assets.stylesheet_html.cache_clear()
+    yield tmp_path
+    static_assets.stylesheet_html.cache_clear()
+
+
+class TestMinifyCss:
+    """Test CSS minification."""
+
+    def test_drops_comments_and_whitespace(self):
+        """Test that comments and redundant whitespace are removed."""
+        css = "/* header */\n.a > .b ,\n.c {\n    color: red;\n    margin: 0 auto;\n}\n"
+        assert minify_css(css) == ".a>.b,.c{color:red;margin:0 auto}"
+
+    def test_keeps_strings_and_expressions(self):
+        """Test that quoted values and calc() spacing survive."""
+        css = ".a::after { content: ' ; { } '; width: calc(100% - 2rem); }"
+        assert minify_css(css) == ".a::after{content:' ; { } ';width:calc(100% - 2rem)}"
+
+
+class TestBuild:
+    """Test the content-hashed build output."""
+
+    def test_writes_hashed_file_and_manifest(self, tmp_path):
+        """Test that the build file name changes with the content."""
+        source = tmp_path / 'app.css'
+        manifest = tmp_path / 'manifest.json'
+        source.write_text('.a { color: red; }')
+
+        first = build(source, manifest)
+        assert (tmp_path / first).read_text() == '.a{color:red}'
+        assert json.loads(manifest.read_text()) == {'app.css': first}
+
+        source.write_text('.a { color: blue; }')
+        second = build(source, manifest)
+        assert second != first
+        assert not (tmp_path / first).exists()
+
+
+
+class TestStylesheetHtml:
+    """Test the markup injected on every page run."""
+
+    def test_inline_fallback_without_static_serving(self, static_dir, monkeypatch):
+        """Test that the stylesheet is inlined when it cannot be linked."""
+        (static_dir / 'fonts' / 'inter-latin-var.woff2').write_bytes(b'wOF2')
+        monkeypatch.setattr(static_assets, '_static_serving_enabled', lambda: False)
+        markup = static_assets.stylesheet_html()
+        assert markup.startswith('<style>')
+        assert 'fonts.googleapis.com' not in markup
+        assert "url('app/static/fonts/inter-latin-var.woff2')" in markup
+
+    def test_missing_font_file_uses_google_fonts(self, static_dir, monkeypatch):
+        """Test that a font missing from static/fonts/ is not linked locally."""
+        monkeypatch.setattr(static_assets, '_static_serving_enabled', lambda: False)
+        markup = static_assets.stylesheet_html()
+        assert 'fonts.googleapis.com/css2?family=Inter:wght@300..600&display=swap' in markup
+        assert '@font-face' not in markup
+        assert 'rel="preload"' not in markup
+
+    def test_missing_manifest_is_built_on_first_run(self, static_dir, monkeypatch):
+        """Test that a deploy without the build step still links a hashed file."""
+        monkeypatch.setattr(static_assets, '_static_serving_enabled', lambda: True)
+        markup = static_assets.stylesheet_html()
+        name = json.loads((static_dir / 'css' / 'manifest.json').read_text())['app.css']
+        assert markup.endswith(f'<link rel="stylesheet" href="app/static/css/{name}">')
+        assert '<style>' not in markup
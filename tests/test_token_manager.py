@@ -0,0 +1,246 @@
+"""
+Unit tests for the background ID token refresh manager.
+"""
+import threading
+import time
+
+import pytest
+
+from services.auth_service import AuthService
+from services.token_manager import TokenManager
+
+
+class RefreshEndpoint:
+    """Scripted securetoken endpoint: issues numbered tokens and counts calls."""
+
+    def __init__(self, expires_in=3600):
+        self.expires_in = expires_in
+        self.calls = []
+        self.fail = 0
+        self.reject = False
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, refresh_token):
+        self.calls.append(refresh_token)
+        self.release.wait(5)
+        if self.fail:
+            self.fail -= 1
+            raise ConnectionError("unavailable")
+        if self.reject:
+            return None
+        n = len(self.calls)
+        return {'id_token': f'id-{n}', 'refresh_token': f'refresh-{n}', 'expires_in': self.expires_in}
+
+
+def wait_for(condition, timeout=5.0):
+    """Poll until condition() is true."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def endpoint():
+    return RefreshEndpoint()
+
+
+@pytest.fixture
+def manager(endpoint):
+    manager = TokenManager(endpoint, refresh_margin=300, retry_delay=0.05)
+    yield manager
+    manager.stop()
+
+
+class TestTokenManager:
+    """Test scheduling, deduplication and failure handling."""
+
+    def test_token_is_served_without_refreshing(self, manager, endpoint):
+        """Test that a fresh token is returned from memory."""
+        manager.register('u1', 'id-0', 'refresh-0', expires_in=3600)
+        assert manager.token('u1') == 'id-0'
+        assert manager.token('nobody') is None
+        assert endpoint.calls == []
+
+    def test_refreshes_before_expiry(self, manager, endpoint):
+        """Test that the scheduler refreshes ahead of expiry and keeps going."""
+        endpoint.expires_in = 0.2
+        manager.register('u1', 'id-0', 'refresh-0', expires_in=0.2)
+        assert wait_for(lambda: len(endpoint.calls) >= 2)
+        assert endpoint.calls[:2] == ['refresh-0', 'refresh-1']
+        assert manager.token('u1').startswith('id-')
+
+    def test_concurrent_refreshes_are_deduplicated(self, manager, endpoint):
+        """Test that simultaneous refresh requests for one user share one call."""
+        endpoint.release.clear()
+        manager.register('u1', 'id-0', 'refresh-0')
+        futures = [manager.refresh_async('u1') for _ in range(10)]
+        endpoint.release.set()
+        assert len({id(future) for future in futures}) == 1
+        assert futures[0].result(timeout=5) == 'id-1'
+        assert endpoint.calls == ['refresh-0']
+        assert manager.token('u1') == 'id-1'
+
+    def test_token_does_not_wait_for_a_refresh(self, manager, endpoint):
+        """Test that reading the token while a refresh hangs returns immediately."""
+        endpoint.release.clear()
+        manager.register('u1', 'id-0', 'refresh-0')
+        manager.refresh_async('u1')
+        start = time.perf_counter()
+        assert manager.token('u1') == 'id-0'
+        assert time.perf_counter() - start < 0.1
+        endpoint.release.set()
+
+    def test_expired_token_queues_a_refresh(self, manager, endpoint):
+        """Test that an expired token returns None and is refreshed in the background."""
+        endpoint.release.clear()
+        manager.register('u1', 'id-0', 'refresh-0', expires_in=0)
+        assert manager.token('u1') is None
+        endpoint.release.set()
+        assert wait_for(lambda: manager.token('u1') == 'id-1')
+        assert endpoint.calls == ['refresh-0']
+
+    def test_transient_failures_are_retried(self, manager, endpoint):
+        """Test that a failed refresh is retried after retry_delay."""
+        endpoint.fail = 2
+        manager.register('u1', 'id-0', 'refresh-0')
+        manager.refresh_async('u1')
+        assert wait_for(lambda: manager.token('u1') == 'id-3')
+        assert manager.failures == 2
+
+    def test_rejected_refresh_token_signs_out(self, manager, endpoint):
+        """Test that a revoked refresh token drops the user's tokens."""
+        endpoint.reject = True
+        manager.register('u1', 'id-0', 'refresh-0')
+        assert manager.refresh_async('u1').result(timeout=5) is None
+        assert 'u1' not in manager
+        assert manager.token('u1') is None
+
+    def test_discard_stops_refreshing(self, manager, endpoint):
+        """Test that a signed-out user's scheduled refresh is skipped."""
+        manager.register('u1', 'id-0', 'refresh-0', expires_in=0.1)
+        manager.discard('u1')
+        time.sleep(0.2)
+        assert endpoint.calls == []
+        assert manager.refresh_async('u1') is None
+
+    def test_lazy_session_is_refreshed_once_read(self, manager, endpoint):
+        """Test that tokens nobody reads cost no refresh calls."""
+        endpoint.expires_in = 0.2
+        manager.register('u1', 'id-0', 'refresh-0', expires_in=0.2, lazy=True)
+        time.sleep(0.3)
+        assert endpoint.calls == []
+
+        manager.register('u1', 'id-0', 'refresh-0', expires_in=0.2, lazy=True)
+        assert manager.token('u1') == 'id-0'
+        assert wait_for(lambda: len(endpoint.calls) >= 2)
+        assert endpoint.calls[:2] == ['refresh-0', 'refresh-1']
+
+    def test_new_sign_in_does_not_reuse_running_refresh(self, manager, endpoint):
+        """Test that re-registering replaces the in-flight refresh of the old session."""
+        endpoint.release.clear()
+        manager.register('u1', 'id-0', 'refresh-0')
+        old = manager.refresh_async('u1')
+        manager.register('u1', 'id-new', 'refresh-new')
+        new = manager.refresh_async('u1')
+        assert new is not old
+        endpoint.release.set()
+        assert old.result(timeout=5) is None  # superseded session
+        assert new.result(timeout=5) == 'id-2'
+        assert endpoint.calls == ['refresh-0', 'refresh-new']
+        assert manager.token('u1') == 'id-2'
+
+    def test_idle_session_is_dropped_instead_of_refreshed(self, endpoint):
+        """Test that tokens nobody reads stop being refreshed."""
+        manager = TokenManager(endpoint, refresh_margin=300, idle_timeout=0.05)
+        try:
+            manager.register('u1', 'id-0', 'refresh-0', expires_in=0.2)
+            assert wait_for(lambda: 'u1' not in manager)
+            assert endpoint.calls == []
+        finally:
+            manager.stop()
+
+    def test_reading_the_token_keeps_the_session(self, endpoint):
+        """Test that token() resets the idle window and an idle read returns None."""
+        manager = TokenManager(endpoint, idle_timeout=0.2)
+        try:
+            manager.register('u1', 'id-0', 'refresh-0')
+            for _ in range(3):
+                time.sleep(0.1)
+                assert manager.token('u1') == 'id-0'
+            time.sleep(0.25)
+            assert manager.token('u1') is None
+            assert 'u1' not in manager
+        finally:
+            manager.stop()
+
+    def test_least_recently_used_session_is_dropped(self, endpoint):
+        """Test that the number of sessions is bounded."""
+        manager = TokenManager(endpoint, max_sessions=2)
+        try:
+            manager.register('u1', 'id-1', 'refresh-1')
+            manager.register('u2', 'id-2', 'refresh-2')
+            assert manager.token('u1') == 'id-1'
+            manager.register('u3', 'id-3', 'refresh-3')
+            assert len(manager) == 2
+            assert 'u2' not in manager
+            assert manager.token('u1') == 'id-1'
+        finally:
+            manager.stop()
+
+
+class FakeResponse:
+    """Minimal requests.Response stand-in."""
+
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self._body = body
+
+    def json(self):
+        return self._body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise ConnectionError(f"HTTP {self.status_code}")
+
+
+class TestRefreshIdToken:
+    """Test AuthService.refresh_id_token against a fake securetoken endpoint."""
+
+    @pytest.fixture
+    def session(self, monkeypatch):
+        import services.auth_service as auth_service
+
+        class Session:
+            def __init__(self):
+                self.posts = []
+                self.responses = []
+
+            def post(self, url, **kwargs):
+                self.posts.append((url, kwargs['data']))
+                return self.responses.pop(0)
+
+        session = Session()
+        monkeypatch.setattr(auth_service, 'get_firebase_api_key', lambda: 'key')
+        monkeypatch.setattr(auth_service, '_get_http_session', lambda: session)
+        return session
+
+    def test_exchanges_refresh_token(self, session):
+        """Test the request format and the parsed tokens."""
+        session.responses.append(FakeResponse(200, {'id_token': 'new-id', 'refresh_token': 'new-refresh',
+                                                  'expires_in': '3600', 'user_id': 'u1'}))
+        assert AuthService.refresh_id_token('old-refresh') == {
+            'id_token': 'new-id', 'refresh_token': 'new-refresh', 'expires_in': 3600, 'uid': 'u1'}
+        assert session.posts == [(f"{AuthService.SECURE_TOKEN_URL}?key=key",
+                          {'grant_type': 'refresh_token', 'refresh_token': 'old-refresh'})]
+
+    def test_rejected_and_failed_refreshes(self, session):
+        """Test that a 400 means rejected (None) and a 5xx raises for a retry."""
+        session.responses.extend([FakeResponse(400, {'error': {'message': 'TOKEN_EXPIRED'}}),
+                                FakeResponse(503, {})])
+        assert AuthService.refresh_id_token('revoked') is None
+        with pytest.raises(ConnectionError):
+            AuthService.refresh_id_token('refresh')
@@ -0,0 +1,218 @@
+"""
+Unit tests for local ID token verification and its caches.
+"""
+import datetime
+import time
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from google.auth import crypt, jwt
+
+from services.auth_service import AuthService
+from services.token_verifier import (
+    ISSUER_PREFIX, PublicKeyCache, TokenVerifier, parse_max_age, token_key_id,
+)
+
+
+PROJECT = 'demo-shop'
+
+
+def make_key_pair():
+    """RSA private key (PEM) and a self-signed certificate (PEM) for it."""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'securetoken')])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (x509.CertificateBuilder().subject_name(name).issuer_name(name)
+            .public_key(key.public_key()).serial_number(1)
+            .not_valid_before(now - datetime.timedelta(days=1))
+            .not_valid_after(now + datetime.timedelta(days=1))
+            .sign(key, hashes.SHA256()))
+    private_pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                    serialization.NoEncryption()).decode()
+    return private_pem, cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+PRIVATE_PEM, CERT_PEM = make_key_pair()
+
+
+class Clock:
+    """Manually advanced clock."""
+
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def sign(kid='key-1', lifetime=3600, **overrides):
+    """Signed ID token for PROJECT, issued now."""
+    now = int(time.time())
+    claims = {'iss': ISSUER_PREFIX + PROJECT, 'aud': PROJECT, 'sub': 'user-1',
+              'email': 'ana@example.com', 'iat': now, 'exp': now + lifetime}
+    claims.update(overrides)
+    signer = crypt.RSASigner.from_string(PRIVATE_PEM, key_id=kid)
+    return jwt.encode(signer, claims).decode()
+
+
+class CertsServer:
+    """Scripted certificate endpoint counting its calls."""
+
+    def __init__(self, certs=None, max_age=3600):
+        self.certs = certs if certs is not None else {'key-1': CERT_PEM}
+        self.max_age = max_age
+        self.calls = 0
+        self.fail = False
+
+    def __call__(self):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("unavailable")
+        return dict(self.certs), self.max_age
+
+
+@pytest.fixture
+def certs():
+    return CertsServer()
+
+
+class TestPublicKeyCache:
+    """Test certificate caching."""
+
+    def test_parse_max_age(self):
+        """Test reading max-age from a Cache-Control header."""
+        assert parse_max_age('public, max-age=19302, must-revalidate, no-transform') == 19302
+        assert parse_max_age('no-cache') is None
+        assert parse_max_age(None) is None
+
+    def test_honours_max_age(self, certs):
+        """Test that certificates are refetched only after max-age."""
+        clock = Clock(1000.0)
+        keys = PublicKeyCache(certs, clock=clock)
+        keys.get()
+        clock.now += 3599
+        keys.get()
+        assert certs.calls == 1
+        clock.now += 1
+        keys.get()
+        assert certs.calls == 2
+
+    def test_unknown_key_triggers_refetch(self, certs):
+        """Test that a rotated-in key is fetched before max-age runs out."""
+        clock = Clock(0.0)
+        keys = PublicKeyCache(certs, clock=clock)
+        keys.get('key-1')
+        certs.certs['key-2'] = CERT_PEM
+        clock.now += 60
+        assert 'key-2' in keys.get('key-2')
+        assert certs.calls == 2
+
+    def test_unknown_key_refetches_are_rate_limited(self, certs):
+        """Test that unknown keys refetch at most once per interval and are rejected meanwhile."""
+        clock = Clock(0.0)
+        keys = PublicKeyCache(certs, clock=clock)
+        verifier = TokenVerifier(PROJECT, keys)
+        keys.get('key-1')
+        clock.now += 61
+        for _ in range(5):
+            assert verifier.verify(sign(kid='forged')) is None
+            clock.now += 10
+        assert certs.calls == 2
+
+        certs.certs['key-2'] = CERT_PEM
+        assert 'key-2' not in keys.get('key-2')
+        clock.now += 20
+        assert 'key-2' in keys.get('key-2')
+        assert certs.calls == 3
+
+    def test_keeps_stale_keys_when_refresh_fails(self, certs):
+        """Test that a failed refresh keeps verifying with the old keys."""
+        clock = Clock(0.0)
+        keys = PublicKeyCache(certs, clock=clock)
+        keys.get()
+        certs.fail = True
+        clock.now += 7200
+        assert keys.get() == {'key-1': CERT_PEM}
+
+
+class TestTokenVerifier:
+    """Test verification and the claims cache."""
+
+    def test_valid_token(self, certs):
+        """Test that a valid token returns its claims with uid."""
+        claims = TokenVerifier(PROJECT, PublicKeyCache(certs)).verify(sign())
+        assert claims['uid'] == 'user-1'
+        assert claims['email'] == 'ana@example.com'
+
+    def test_repeated_checks_hit_the_cache(self, certs):
+        """Test that a token is decoded once and then served from memory."""
+        verifier = TokenVerifier(PROJECT, PublicKeyCache(certs))
+        token = sign()
+        for _ in range(5):
+            assert verifier.verify(token)['uid'] == 'user-1'
+        assert (verifier.misses, verifier.hits) == (1, 4)
+        assert certs.calls == 1
+
+    def test_cached_claims_expire_with_the_token(self, certs):
+        """Test that a cached token is rejected once its exp has passed."""
+        clock = Clock(time.time())
+        verifier = TokenVerifier(PROJECT, PublicKeyCache(certs), clock=clock)
+        token = sign(lifetime=600)
+        assert verifier.verify(token)
+        clock.now += 601
+        assert verifier.verify(token) is None
+        assert len(verifier) == 0
+
+    def test_cache_is_bounded(self, certs):
+        """Test that the least recently used tokens are evicted."""
+        verifier = TokenVerifier(PROJECT, PublicKeyCache(certs), max_entries=2)
+        tokens = [sign(sub=f'user-{i}') for i in range(3)]
+        for token in tokens:
+            verifier.verify(token)
+        assert len(verifier) == 2
+        verifier.verify(tokens[0])
+        assert verifier.misses == 4
+
+    @pytest.mark.parametrize('overrides', [
+        {'aud': 'other-project'},
+        {'iss': ISSUER_PREFIX + 'other-project'},
+        {'sub': ''},
+        {'lifetime': -3600},
+    ])
+    def test_rejects_invalid_claims(self, certs, overrides):
+        """Test that tokens for another project, without subject or expired are rejected."""
+        assert TokenVerifier(PROJECT, PublicKeyCache(certs)).verify(sign(**overrides)) is None
+
+    def test_rejects_bad_signature_and_garbage(self, certs):
+        """Test that tampered and malformed tokens are rejected and not cached."""
+        verifier = TokenVerifier(PROJECT, PublicKeyCache(certs))
+        header, payload, signature = sign().split('.')
+        tampered = '.'.join([header, payload, signature[::-1]])
+        assert verifier.verify(tampered) is None
+        assert verifier.verify('not-a-token') is None
+        assert verifier.verify('') is None
+        assert len(verifier) == 0
+
+    def test_unknown_key_id_is_rejected(self, certs):
+        """Test that a token signed with a key Google does not publish fails."""
+        token = sign(kid='key-9')
+        assert token_key_id(token) == 'key-9'
+        assert TokenVerifier(PROJECT, PublicKeyCache(certs)).verify(token) is None
+
+
+class TestAuthServiceVerifyToken:
+    """Test AuthService.verify_token with the local verifier."""
+
+    def test_verifies_without_rest_calls(self, certs, monkeypatch):
+        """Test that the user comes from the token claims, not accounts:lookup."""
+        import services.auth_service as auth_service
+        verifier = TokenVerifier(PROJECT, PublicKeyCache(certs))
+        monkeypatch.setattr(auth_service, '_get_token_verifier', lambda: verifier)
+        monkeypatch.setattr(auth_service, '_get_http_session', lambda: pytest.fail("REST call made"))
+
+        assert AuthService.verify_token(sign()) == {
+            'uid': 'user-1', 'email': 'ana@example.com', 'display_name': 'ana'}
+        assert AuthService.verify_token(sign(aud='other-project')) is None
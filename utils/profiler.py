@@ -0,0 +1,206 @@
+"""
+Rerun-cost profiler for pages and components.
+
+Wrap a unit of rendering work with the ``profiled`` decorator or the
+``profile_block`` context manager::
+
+    @profiled("component:cart_summary")
+    def render_cart_summary(...): ...
+
+    with profile_block(f"page:{page}"):
+        render_page()
+
+Each run of a block records one sample:
+- ``wall_ms``: wall-clock time
+- ``rpcs``: Firestore RPCs issued (reported through ``record_rpc``)
+- ``cache_hits`` / ``cache_misses``: reported through ``record_cache``
+- ``elements`` / ``delta_bytes``: Streamlit deltas (elements) sent to the browser
+
+Blocks nest: counters go to every block active on the current thread, so a
+page sample includes the cost of its components. Samples are kept in a
+bounded window per block name and summarized as p50/p95/p99.
+"""
+import contextvars
+import functools
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+
+# Counters recorded for every sample
+COUNTERS = ('rpcs', 'cache_hits', 'cache_misses', 'elements', 'delta_bytes')
+
+# Statistics reported for each metric
+PERCENTILES = (50, 95, 99)
+
+_active_spans: contextvars.ContextVar = contextvars.ContextVar('profiler_spans', default=())
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values (0 for an empty list)."""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    rank = max(int(-(-pct * len(ordered) // 100)), 1)
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class _Span:
+    __slots__ = ('name', 'counters')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+
+class Profiler:
+    """Process-wide collection of timing samples, bounded per block name."""
+
+    def __init__(self, max_samples: int = 1000):
+        """
+        Args:
+            max_samples: Samples kept per block name (older ones are dropped)
+        """
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[Dict[str, float]]] = {}
+        self.enabled = True
+
+    def record(self, name: str, sample: Dict[str, float]):
+        """Add one sample for a block."""
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.max_samples)
+            samples.append(sample)
+
+    def names(self) -> List[str]:
+        """Names of all profiled blocks."""
+        with self._lock:
+            return sorted(self._samples)
+
+    def samples(self, name: str) -> List[Dict[str, float]]:
+        """Recorded samples of a block, oldest first."""
+        with self._lock:
+            return list(self._samples.get(name, ()))
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Aggregate samples per block.
+
+        Returns:
+            {name: {'count', 'wall_ms': {'p50', 'p95', 'p99', 'max', 'mean'},
+                    <counter>: {...}, 'cache_hit_rate'}}
+        """
+        result = {}
+        for name in self.names():
+            samples = self.samples(name)
+            stats: Dict[str, Any] = {'count': len(samples)}
+            for metric in ('wall_ms',) + COUNTERS:
+                values = [sample.get(metric, 0) for sample in samples]
+                stats[metric] = {f'p{pct}': percentile(values, pct) for pct in PERCENTILES}
+                stats[metric]['max'] = max(values) if values else 0
+                stats[metric]['mean'] = sum(values) / len(values) if values else 0
+            lookups = sum(s['cache_hits'] + s['cache_misses'] for s in samples)
+            stats['cache_hit_rate'] = (
+                sum(s['cache_hits'] for s in samples) / lookups if lookups else None
+            )
+            result[name] = stats
+        return result
+
+    def export_json(self, include_samples: bool = False) -> str:
+        """Summary (and optionally raw samples) as a JSON document."""
+        data: Dict[str, Any] = {'generated_at': time.time(), 'summary': self.summary()}
+        if include_samples:
+            data['samples'] = {name: self.samples(name) for name in self.names()}
+        return json.dumps(data, indent=2, sort_keys=True)
+
+    def reset(self):
+        """Drop all samples."""
+        with self._lock:
+            self._samples.clear()
+
+
+profiler = Profiler()
+
+
+# ==================== Recording ====================
+
+@contextmanager
+def profile_block(name: str, target: Optional[Profiler] = None) -> Iterator[None]:
+    """
+    Profile a block of rendering work.
+    The sample is recorded even if the block exits through ``st.rerun()``.
+
+    Args:
+        name: Block name, e.g. "page:home" or "component:product_grid"
+        target: Profiler to record into (defaults to the process-wide one)
+    """
+    target = target or profiler
+    if not target.enabled:
+        yield
+        return
+
+    _ensure_delta_counter()
+    span = _Span(name)
+    token = _active_spans.set(_active_spans.get() + (span,))
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        wall_ms = (time.perf_counter() - start) * 1000
+        _active_spans.reset(token)
+        target.record(name, {'wall_ms': wall_ms, **span.counters})
+
+
+def profiled(name: Optional[str] = None) -> Callable:
+    """Decorator form of ``profile_block`` (defaults to the function's qualified name)."""
+    def decorator(func: Callable) -> Callable:
+        block_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with profile_block(block_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _add(counter: str, amount: int):
+    for span in _active_spans.get():
+        span.counters[counter] += amount
+
+
+def record_rpc(count: int = 1):
+    """Report Firestore RPCs issued inside the active blocks."""
+    _add('rpcs', count)
+
+
+def record_cache(hit: bool):
+    """Report a cache lookup inside the active blocks."""
+    _add('cache_hits' if hit else 'cache_misses', 1)
+
+
+def _ensure_delta_counter():
+    """Count Streamlit deltas sent by the current script run (installed once per run)."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx(suppress_warning=True)
+    except Exception:
+        return
+    if ctx is None or getattr(ctx._enqueue, '_profiler_counting', False):
+        return
+
+    enqueue = ctx._enqueue
+
+    def counting_enqueue(msg):
+        if msg.HasField('delta'):
+            _add('elements', 1)
+            _add('delta_bytes', msg.ByteSize())
+        return enqueue(msg)
+
+    counting_enqueue._profiler_counting = True
+    ctx._enqueue = counting_enqueue
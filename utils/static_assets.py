@@ -0,0 +1,198 @@
+"""
+Global stylesheet delivery.
+
+The stylesheet source is ``static/css/app.css``. A build step minifies it into
+a content-hashed file (``static/css/app.<hash>.min.css``) and records the name
+in ``static/css/manifest.json``::
+
+    python -m utils.static_assets
+
+With Streamlit static serving enabled (``.streamlit/config.toml``) every rerun
+only sends a short ``<link>`` tag: the browser downloads the stylesheet once
+and revalidates it by ETag, and a new build gets a new URL. If the manifest is
+missing (no build step in the deploy), the first page run builds it. Without
+static serving the minified CSS is inlined instead (computed once per process).
+
+Bundled fonts in ``static/fonts/`` are preloaded. ``@font-face`` rules whose
+file is not in ``static/fonts/`` are left out of the served CSS and the family
+is loaded from Google Fonts instead, so a missing file never costs a 404.
+"""
+import hashlib
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import streamlit as st
+
+from utils.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+STATIC_DIR = Path(__file__).resolve().parent.parent / 'static'
+CSS_SOURCE = STATIC_DIR / 'css' / 'app.css'
+MANIFEST_PATH = STATIC_DIR / 'css' / 'manifest.json'
+FONTS_DIR = STATIC_DIR / 'fonts'
+
+# URL prefix Streamlit serves the static/ directory under
+STATIC_URL = 'app/static'
+
+# Google Fonts family for each bundled font file, used while the file is missing
+GOOGLE_FONTS = {
+    'inter-latin-var.woff2': 'Inter:wght@300..600',
+    'outfit-latin-var.woff2': 'Outfit:wght@300..800',
+}
+GOOGLE_FONTS_URL = 'https://fonts.googleapis.com/css2'
+
+_FONT_FACE_RE = re.compile(r"@font-face\s*\{[^}]*url\('\.\./fonts/([^']+)'\)[^}]*\}\s*")
+
+_STRING_RE = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'')
+_COMMENT_RE = re.compile(r'/\*.*?\*/', re.DOTALL)
+
+
+def minify_css(css: str) -> str:
+    """
+    Minify a stylesheet: drop comments and redundant whitespace.
+    Quoted strings are left untouched.
+
+    Args:
+        css: Stylesheet source
+
+    Returns:
+        Minified stylesheet
+    """
+    strings: List[str] = []
+
+    def _protect(match):
+        strings.append(match.group(0))
+        return f'"\x00{len(strings) - 1}\x00"'
+
+    css = _COMMENT_RE.sub('', css)
+    css = _STRING_RE.sub(_protect, css)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    css = css.replace(';}', '}')
+    css = re.sub(r'"\x00(\d+)\x00"', lambda match: strings[int(match.group(1))], css)
+    return css.strip()
+
+
+def missing_fonts(css: str, fonts_dir: Path = FONTS_DIR) -> List[str]:
+    """File names of the fonts referenced by ``@font-face`` rules but not in fonts_dir."""
+    return [name for name in _FONT_FACE_RE.findall(css) if not (fonts_dir / name).exists()]
+
+
+def stylesheet_css(source: Path = CSS_SOURCE) -> str:
+    """
+    Minified stylesheet without the ``@font-face`` rules of missing font files.
+
+    Args:
+        source: Stylesheet source (fonts are looked up in ``../fonts/`` from it)
+
+    Returns:
+        Minified stylesheet
+    """
+    fonts_dir = source.parent.parent / 'fonts'
+    css = _FONT_FACE_RE.sub(
+        lambda match: match.group(0) if (fonts_dir / match.group(1)).exists() else '',
+        source.read_text(encoding='utf-8')
+    )
+    return minify_css(css)
+
+
+def build(source: Path = CSS_SOURCE, manifest_path: Path = MANIFEST_PATH) -> str:
+    """
+    Write the minified, content-hashed stylesheet and its manifest.
+    Older builds are removed.
+
+    Returns:
+        File name of the built stylesheet
+    """
+    minified = stylesheet_css(source)
+    digest = hashlib.sha256(minified.encode('utf-8')).hexdigest()[:12]
+    name = f'{source.stem}.{digest}.min.css'
+
+    for old in source.parent.glob(f'{source.stem}.*.min.css'):
+        if old.name != name:
+            old.unlink()
+    (source.parent / name).write_text(minified, encoding='utf-8')
+    manifest_path.write_text(json.dumps({source.name: name}, indent=2) + '\n', encoding='utf-8')
+    return name
+
+
+def _static_serving_enabled() -> bool:
+    try:
+        return bool(st.get_option('server.enableStaticServing'))
+    except Exception:
+        return False
+
+
+def _built_stylesheet() -> Optional[str]:
+    try:
+        manifest: Dict[str, str] = json.loads(MANIFEST_PATH.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    name = manifest.get(CSS_SOURCE.name)
+    if name and (CSS_SOURCE.parent / name).exists():
+        return name
+    return None
+
+
+def _build_on_startup() -> Optional[str]:
+    try:
+        name = build(CSS_SOURCE, MANIFEST_PATH)
+    except OSError as e:
+        logger.warning(f"Could not build the stylesheet, inlining it instead: {e}")
+        return None
+    logger.info(f"Built static/css/{name} (no manifest found)")
+    return name
+
+
+def _google_fonts_html(css: str) -> str:
+    families = [GOOGLE_FONTS[name] for name in missing_fonts(css, FONTS_DIR) if name in GOOGLE_FONTS]
+    if not families:
+        return ''
+    query = '&'.join(f'family={family}' for family in families)
+    return (
+        '<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>'
+        f'<link rel="stylesheet" href="{GOOGLE_FONTS_URL}?{query}&display=swap">'
+    )
+
+
+@lru_cache(maxsize=1)
+def stylesheet_html() -> str:
+    """
+    HTML that applies the global stylesheet (computed once per process).
+
+    Returns:
+        ``<link>`` tags for the built stylesheet and fonts, or an inline
+        ``<style>`` block when static serving is not available
+    """
+    serving = _static_serving_enabled()
+    fonts = _google_fonts_html(CSS_SOURCE.read_text(encoding='utf-8'))
+    if serving and FONTS_DIR.exists():
+        fonts += ''.join(
+            f'<link rel="preload" href="{STATIC_URL}/fonts/{font.name}" as="font" '
+            f'type="font/woff2" crossorigin>'
+            for font in sorted(FONTS_DIR.glob('*.woff2'))
+        )
+
+    built = (_built_stylesheet() or _build_on_startup()) if serving else None
+    if built:
+        return f'{fonts}<link rel="stylesheet" href="{STATIC_URL}/css/{built}">'
+
+    # Inline fallback: font URLs are relative to the stylesheet, make them page-relative
+    css = stylesheet_css(CSS_SOURCE).replace("url('../", f"url('{STATIC_URL}/")
+    return f'{fonts}<style>{css}</style>'
+
+
+def inject_global_styles():
+    """Apply the global stylesheet to the current page."""
+    st.markdown(stylesheet_html(), unsafe_allow_html=True)
+
+
+if __name__ == '__main__':
+    print(f"Built static/css/{build()}")